@@ -2,17 +2,25 @@ from contextlib import contextmanager
 from dataclasses import dataclass
 from dataclasses import field
 import asyncio
+import cachetools
 import os
 import logging
 import typing as T
 
-import openai
-
+from academy.llm import get_llm_client
+from academy.prompt import PROMPT_TOKENS
+from academy.prompt import PromptBuilder
+from academy.prompt import PromptLane
 from donbot.action import BotAction
+from donbot.resolver import RandomResolver
 from engine.affiliation import TOWN
+from engine.buffer import MemoryAccount
+from engine.buffer import RingBuffer
 from engine.message import Message
 from engine.message import MessageType
 from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+from engine.stepper import is_phase_intro
 import log
 
 logger = logging.getLogger(__name__)
@@ -21,16 +29,13 @@ logger.addHandler(log.ch)
 from proto import message_pb2
 
 if T.TYPE_CHECKING:
-    from openai.openai_object import OpenAIObject
+    from engine.actor import Actor
+    from engine.message_log import LogEntry
+    from engine.message_log import MessageLog
 
 API_KEY = os.environ.get("OPENAI_API_KEY")
-if API_KEY is None:
-    raise OSError("Missing OpenAI API Key")
-
 ORG_ID = os.environ.get("ORGANIZATION_ID", 'org-Y46B2k8zl6JhRoUTuEMSCRg6')
 
-openai.organization = ORG_ID
-openai.api_key = API_KEY
 
 MODEL = "gpt-3.5-turbo"
 SYSTEM = "system"
@@ -65,7 +70,8 @@ class Prompt:
         return cls(role=role, content=message.message)
 
 
-rf = RoleFactory({})
+# roles only describe themselves here, but some read their config to do it
+rf = RoleFactory(DEFAULT_CONFIG)
 
 
 class Conversation:
@@ -113,25 +119,39 @@ class Conversation:
             print(f"WARNING: dropping non-chat message: {message}")
         self._messages.append(Prompt.from_msg_proto(message))
 
-    async def digest(self, debug: bool = True) -> Prompt:
+    async def digest(self, debug: bool = True) -> T.Optional[Prompt]:
         """
         Digest the conversation into a single sentence.
         """
-        digest_prompt = "\n".join([p.content for p in self._messages])
-        digest_prompt += "\nDigest the above conversation into a single sentence."
-        if debug:
-            response_str = "(MOCK ASYNC DIGEST) ChatGPT output"
-        else:
-            response = await openai.ChatCompletion.acreate(
-                model=MODEL,
-                messages=[Prompt(role=ASST, content=digest_prompt).to_dict()]
-            )
-            logger.info(f"ChatGPT Response follows:\n{response}")
-            if not response.choices:
-                logger.warn("WARNING: no response gathered from ChatGPT")
-                return
-            response_str = response.choices[0].message.content
-        return Prompt(role=ASST, content=response_str)
+        return await digest_lines([p.content for p in self._messages], self._ctx.group, debug=debug)
+
+
+async def digest_lines(lines: T.List[str], group: str, debug: bool = True) -> T.Optional[Prompt]:
+    """
+    Digest some chat into a single sentence. Cached, so the same transcript is only
+    ever summarized once.
+    """
+    digest_prompt = "\n".join(lines)
+    digest_prompt += "\nDigest the above conversation into a single sentence."
+    if debug:
+        response_str = "(MOCK ASYNC DIGEST) ChatGPT output"
+    else:
+        response_str = await get_llm_client().complete(
+            MODEL,
+            [Prompt(role=ASST, content=digest_prompt).to_dict()],
+            group=group,
+            cache=True,
+        )
+        logger.info(f"ChatGPT Response follows:\n{response_str}")
+        if response_str is None:
+            logger.warn("WARNING: no response gathered from ChatGPT")
+            return
+    return Prompt(role=ASST, content=response_str)
+
+
+# (group, turn number, phase) -> digest of that phase's public chat, every bot in a
+# game reads the same chat so they share one summary of it
+_PHASE_DIGESTS: cachetools.LRUCache = cachetools.LRUCache(maxsize=256)
 
 
 class ChatContext:
@@ -147,10 +167,28 @@ class ChatContext:
     # for key game events, we report everything
     # but maybe we don't have to?
     DIGEST_HISTORY = 10
-
-    def __init__(self, name: str, role_name: str, debug: bool = True) -> None:
+    # caps on what we remember at all, see `engine.config.Limits`
+    EVENT_HISTORY = 200
+    FEEDBACK_HISTORY = 100
+    RESPONSE_HISTORY = 100
+    # public chat lines kept for the end of phase digest
+    PHASE_TRANSCRIPT = 300
+    # gpt-3.5-turbo's context window, and how much of it to leave for the reply
+    TOKEN_BUDGET = 4096
+    REPLY_TOKENS = 512
+
+    def __init__(
+        self,
+        name: str,
+        role_name: str,
+        debug: bool = True,
+        token_budget: int = None,
+        group: str = "default",
+    ) -> None:
         self.name = name
         self.role_name = role_name
+        # bots in the same game share LLM concurrency, see `academy.llm`
+        self.group = group
         self.role = rf.create_by_name(role_name)
         self._msg_idx = 0
         self._debug = debug
@@ -166,12 +204,32 @@ class ChatContext:
         if self.role.affiliation() != TOWN:
             self.header.append((0, Prompt(ASST, "Under no circumstances should you reveal your role.")))
         self.footer = []
-        self.action_feedback: T.List[T.Tuple[int, Prompt]] = []
-        self.key_game_events: T.List[T.Tuple[int, Prompt]] = []
-        self.gpt_responses: T.List[T.Tuple[int, Prompt]] = []
-        self.conversations: T.List[T.Tuple[int, Prompt]] = []
-
+        self.memory = MemoryAccount()
+        # every history feeds the prompt builder, which keeps them merged and in budget
+        self._builder = PromptBuilder(token_budget or self.TOKEN_BUDGET, self.REPLY_TOKENS)
+        self._builder.set_header(self.header)
+        self.action_feedback: PromptLane = self.memory.register(
+            self._builder.lane(self.FEEDBACK_HISTORY, "action_feedback", priority=3)
+        )
+        self.key_game_events: PromptLane = self.memory.register(
+            self._builder.lane(self.EVENT_HISTORY, "key_game_events", priority=1)
+        )
+        self.gpt_responses: PromptLane = self.memory.register(
+            self._builder.lane(self.RESPONSE_HISTORY, "gpt_responses", priority=0)
+        )
+        # only the last few digests ever make it into a prompt
+        self.conversations: PromptLane = self.memory.register(
+            self._builder.lane(self.DIGEST_HISTORY, "conversations", priority=2)
+        )
+        # approximate tokens in the last prompt we built
+        self.prompt_tokens = 0
+        # this phase's public chat, see `digest_phase`
+        self._phase_transcript: RingBuffer[str] = self.memory.register(
+            RingBuffer(self.PHASE_TRANSCRIPT, name="phase_transcript")
+        )
         self._conversation = Conversation(self)
+        # where we got up to in the game's message log, see `catch_up`
+        self._log_index = 0
 
     @contextmanager
     def ephemeral(self, prompt: str) -> T.Iterator[None]:
@@ -209,33 +267,19 @@ class ChatContext:
 
     def reset(self) -> None:
         self._conversation = Conversation(self)
-        self.action_feedback = []
-        self.key_game_events = []
-        self.gpt_responses = []
+        self.action_feedback.clear()
+        self.key_game_events.clear()
+        self.gpt_responses.clear()
 
     @property
     def messages(self) -> T.List[T.Dict[str, str]]:
         """
-        Construct the current output history.
-
-        TODO: probably need some way of constraining tokens dynamically
-        e.g if the max token count is 4096, we'll effectively need limits
-        on basically everything...
+        Construct the current output history, oldest low-priority entries are evicted
+        to stay within the token budget, see `academy.prompt`.
         """
-        conversation_digests = self.conversations[-1 * self.DIGEST_HISTORY:]
-        all_msg: T.List[T.Tuple[int, Prompt]] = []
-        all_msg.extend(self.action_feedback)        
-        all_msg.extend(self.key_game_events)
-        all_msg.extend(self.gpt_responses)
-        all_msg.extend(conversation_digests)
-
-        # sort
-        all_msg.sort(key=lambda x: x[0])
-        all_msg = self.header[:] + all_msg + self.footer[:]
-        try:
-            return [msg.to_dict() for _, msg in all_msg]
-        except Exception as exc:
-            logger.exception(exc)
+        built = self._builder.build(self.header, self.footer)
+        self.prompt_tokens = built.tokens
+        return built.messages
 
     async def roll_over_conversation(self) -> Prompt:
         """
@@ -246,9 +290,34 @@ class ChatContext:
         old_conversation = self._conversation
         self._conversation = Conversation(self)
         prompt = await old_conversation.digest(debug=self._debug)
+        if prompt is None:
+            return
         self._msg_idx += 1
         self.conversations.append((self._msg_idx, prompt))
 
+    async def digest_phase(self, turn_number: int, phase: str) -> T.Optional[Prompt]:
+        """
+        Summarize the public chat from a phase that just ended. Every bot in the game
+        heard the same chat, so the first one to ask does the digest and the rest
+        share it.
+        """
+        if not len(self._phase_transcript):
+            return None
+        key = (self.group, turn_number, phase)
+        task = _PHASE_DIGESTS.get(key)
+        if task is None:
+            task = _PHASE_DIGESTS[key] = asyncio.ensure_future(
+                digest_lines(list(self._phase_transcript), self.group, debug=self._debug)
+            )
+        self._phase_transcript.clear()
+        # shield, one bot giving up shouldn't cancel the digest for everyone
+        prompt = await asyncio.shield(task)
+        if prompt is None:
+            return None
+        self._msg_idx += 1
+        self.conversations.append((self._msg_idx, Prompt(ASST, f"{phase.capitalize()} {turn_number}: {prompt.content}")))
+        return prompt
+
     def record_response(self, msg: str) -> None:
         """
         Record a response ChatGPT gave us
@@ -273,13 +342,23 @@ class ChatContext:
             self._conversation.add_message(msg_proto)
         elif msg_proto.source == message_pb2.Message.PUBLIC:
             self._conversation.add_message(msg_proto)
+            self._phase_transcript.append(msg_proto.message)
         else:
             print(f"WARNING: dropping message: {msg_proto.message}")
 
-    def update(self, msg: Message) -> None:
+    def catch_up(self, message_log: "MessageLog", actor: "Actor") -> None:
+        """
+        Read everything `actor` could see from the game's message log since we last
+        looked, instead of having each message pushed at us.
+        """
+        for entry in message_log.visible_to(actor, since=self._log_index):
+            self.update(entry)
+        self._log_index = message_log.next_index
+
+    def update(self, msg: T.Union[Message, "LogEntry"]) -> None:
         self._msg_idx += 1
         if msg.message_type in (MessageType.ANNOUNCEMENT, ):
-            if 'Day' in msg.title or 'Night' in msg.title:
+            if is_phase_intro(msg):
                 # this context probably isn't important
                 return
             self.key_game_events.append((self._msg_idx, Prompt(ASST, msg.ai_repr())))
@@ -298,14 +377,16 @@ class ChatGPTBot:
     Mafia-playing ChatGPT bot interface
     """
 
-    def __init__(self, name: str, role_name: str, debug: bool = True) -> None:
+    def __init__(self, name: str, role_name: str, debug: bool = True, group: str = "default") -> None:
         self.name = name
         self.role_name = role_name.replace(' ', '')
-        self.role = RoleFactory({}).create_by_name(self.role_name)
+        self.role = rf.create_by_name(self.role_name)
         if self.role is None:
             raise ValueError(f"Unknown role {self.role_name}")
         self.debug = debug
-        self._context = ChatContext(name, self.role_name)
+        self._context = ChatContext(name, self.role_name, group=group)
+        # when the LLM doesn't answer in time we still have to do something
+        self._fallback = RandomResolver()
         self.log = logging.Logger(f"ChatGPT-{name}")
         self.log.addHandler(log.ch)
 
@@ -325,11 +406,14 @@ class ChatGPTBot:
     def _resolve_default(self, *args, **kwargs) -> T.List[T.Optional[str]]:
         return []
 
-    def get_action_handler(self, bot_action: BotAction) -> T.Callable[[T.List[str]], T.List[str]]:
+    def get_action_handler(self, bot_action: BotAction) -> T.Callable[[T.List[str]], T.Any]:
+        """
+        Handlers are coroutine functions, except the default which has nothing to ask
+        """
         return self._handlers.get(bot_action, self._resolve_default)
 
-    def _resolve_day_action(self, options: T.List[str]) -> T.List[str]:
-        decision = self.make_decision(
+    async def _resolve_day_action(self, options: T.List[str]) -> T.List[str]:
+        decision = await self.make_decision(
             context=f"You are a {self.role_name}. Your ability is to {self.role.day_action_description()}.",
             choices=options,
             summary=f"You used {self.role_name}'s ability to target {{choice}}"
@@ -338,8 +422,8 @@ class ChatGPTBot:
             return [decision]
         return []
 
-    def _resolve_night_action(self, options: T.List[str]) -> T.List[str]:
-        decision = self.make_decision(
+    async def _resolve_night_action(self, options: T.List[str]) -> T.List[str]:
+        decision = await self.make_decision(
             context=f"You are a {self.role_name}. Your ability is to {self.role.night_action_description()}.",
             choices=options,
             summary=f"You used {self.role_name}'s ability to target {{choice}}"
@@ -348,8 +432,8 @@ class ChatGPTBot:
             return [decision]
         return []
 
-    def _resolve_trial_vote(self, options: T.List[str]) -> T.List[str]:
-        decision = self.make_decision(
+    async def _resolve_trial_vote(self, options: T.List[str]) -> T.List[str]:
+        decision = await self.make_decision(
             context=f"You are choosing whether to put someone on Trial. You may choose to not put anyone on trial.",
             choices=options,
             summary=f"You voted to put {{choice}} on trial."
@@ -358,8 +442,8 @@ class ChatGPTBot:
             return [decision]
         return []
 
-    def _resolve_lynch_vote(self, options: T.List[str]) -> T.List[str]:
-        decision = self.make_decision(
+    async def _resolve_lynch_vote(self, options: T.List[str]) -> T.List[str]:
+        decision = await self.make_decision(
             # i am so curious what if we don't provide context at all
             context=f"You are choosing whether or not to lynch",
             choices=options,
@@ -369,7 +453,7 @@ class ChatGPTBot:
             return [decision]
         return []
 
-    def make_decision(self, context: str, choices: T.List[str], summary: str) -> T.Optional[str]:
+    async def make_decision(self, context: str, choices: T.List[str], summary: str) -> T.Optional[str]:
         """
         Have ChatGPT make a decision for you
 
@@ -381,8 +465,15 @@ class ChatGPTBot:
         Honestly we probably need it, so it shouldn't be ephemeral
         """
         prompt = self.prompt_for_decision(context, choices)
+        # build the prompt up front, other coroutines use the context while we wait
         with self._context.ephemeral(prompt):
-            raw_choice = self.interact()
+            messages = self._request_messages()
+        # decisions are cached, the same question with the same context gets the same answer
+        raw_choice = await self.ainteract(messages, cache=True)
+        if raw_choice is None:
+            choice = self._fallback.resolve(choices)[0]
+            self.log.info(f"No decision from ChatGPT in time, picked {choice} at random")
+            return choice
         for choice in choices:
             if choice in raw_choice:
                 break
@@ -404,12 +495,14 @@ class ChatGPTBot:
         print('in iter convo')
         with self._context.conversation():
             print('in iter convo inner')
-            return await self.ainteract()
+            messages = self._request_messages()
+        return await self.ainteract(messages)
 
-    def make_speech(self, context: str = "") -> str:
+    async def make_speech(self, context: str = "") -> T.Optional[str]:
         prompt = self.prompt_for_speech(context)
         with self._context.ephemeral(prompt):
-            self.interact()
+            messages = self._request_messages()
+        return await self.ainteract(messages)
 
     def prompt_for_speech(self, context: str) -> str:
         return f"{context}. You may choose to share any information or insights you have, but you do not have to. " \
@@ -430,33 +523,25 @@ class ChatGPTBot:
         # we probably need to make this asynchronous?
         #await self.ainteract()
 
-    async def ainteract(self) -> str:
+    def _request_messages(self) -> T.List[T.Dict[str, str]]:
+        messages = self._context.messages
+        PROMPT_TOKENS.observe(self._context.prompt_tokens)
+        self.log.info(f"Prompt is ~{self._context.prompt_tokens} tokens ({len(messages)} messages)")
+        return messages
+
+    async def ainteract(self, messages: T.List[T.Dict[str, str]] = None, cache: bool = False) -> T.Optional[str]:
+        """
+        Returns None if ChatGPT didn't get back to us in time
+        """
         if self.debug:
             return "(MOCK ASYNC) ChatGPT output"
 
-        response = await openai.ChatCompletion.acreate(model=MODEL, messages=self._context.messages)
-        if not response.choices:
+        if messages is None:
+            messages = self._request_messages()
+        response_str = await get_llm_client().complete(MODEL, messages, group=self._context.group, cache=cache)
+        if response_str is None:
             self.log.info("WARNING: no response gathered from ChatGPT")
-            return
-
-        response_str = response.choices[0].message.content
-
-        self._context.record_response(response_str)
-
-        return response_str
-
-    def interact(self) -> str:
-        if self.debug:
-            return "(MOCK) ChatGPT output"
-
-        self.log.info(f"Making request with the following context:\n{self._context.messages}")
-        response = openai.ChatCompletion.create(model=MODEL, messages=self._context.messages)
-        self.log.info(f"ChatGPT Response follows:\n{response}")
-        if not response.choices:
-            self.log.warn("WARNING: no response gathered from ChatGPT")
-            return
-
-        response_str = response.choices[0].message.content
+            return None
 
         self._context.record_response(response_str)
 
@@ -468,12 +553,21 @@ class ChatGPTBot:
         digest = await self._context.roll_over_conversation()
         #self._context.
 
+    async def digest_phase(self, turn_number: int, phase: str) -> None:
+        await self._context.digest_phase(turn_number, phase)
+
     def ingest(self, message: "Message") -> None:
         """
         Depending on what kind of message we get, handle it appropriately.
         """
         self._context.update(message)
 
+    def ingest_log(self, message_log: "MessageLog", actor: "Actor") -> None:
+        """
+        In-process bots can read straight from the game's message log
+        """
+        self._context.catch_up(message_log, actor)
+
     def ingest_proto(self, message: message_pb2.Message) -> None:
         self._context.update_with_proto(message)
 
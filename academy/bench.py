@@ -0,0 +1,190 @@
+"""
+AI Game Benchmark
+
+Plays whole headless games where every actor is a ChatGPTBot making its night targets
+and trial votes through the shared LLM client, against the local stand-in by default:
+
+    python -m academy.bench --games 8 --latency lognormal:-1.5,0.5 --error-rate 0.02
+
+Games run concurrently on one event loop like lobbies on a server would, so this
+measures how many decisions per second the client's concurrency limits let through.
+Point `--api-base` at a real (or separately run) server to skip the in-process one.
+"""
+import argparse
+import asyncio
+import logging
+import time
+import typing as T
+
+from academy import ChatGPTBot
+from academy import standin
+from academy.llm import LLM_FALLBACKS
+from academy.llm import LLMClient
+from academy.llm import set_llm_client
+from donbot.action import BotAction
+from engine.action.base import TargetGroup
+from engine.config import GameConfig
+from engine.game import Game
+from engine.message import Messenger
+from engine.metrics import quantile
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.setup import DEFAULT_CONFIG
+from engine.setup import do_setup
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+from engine.tribunal import Tribunal
+
+SEED = 20230401
+MAX_TURNS = 20
+
+
+class GameResult(T.NamedTuple):
+    turns: int
+    concluded: bool
+    # seconds each decision took, LLM round trip included
+    decisions: T.List[float]
+
+
+async def _step_to(game: Game, stepper: Stepper, phase: TurnPhase) -> None:
+    # games share the loop, so step rather than advance
+    await stepper.step()
+    while game.turn_phase != phase:
+        await stepper.step()
+
+
+async def _decide(bot: ChatGPTBot, action: BotAction, options: T.List[str], timings: T.List[float]) -> T.Optional[str]:
+    t_i = time.perf_counter()
+    decision = await bot.get_action_handler(action)(options)
+    timings.append(time.perf_counter() - t_i)
+    return decision[0] if decision else None
+
+
+async def play_ai_game(seed: int = SEED, config: GameConfig = DEFAULT_CONFIG) -> GameResult:
+    """
+    Like `engine.bench.suites.play_headless_game`, but the bots pick night targets and
+    who goes on trial, and the most votes gets lynched
+    """
+    game = Game(config, seed=seed)
+    game.messenger = Messenger(game)
+    game.add_players(*[Player(f"Player-{idx}") for idx in range(len(config.role_list))])
+    do_setup(game, config=config)
+    game.tribunal = Tribunal(game, sleeper=sleep_override)
+    stepper = Stepper(game, sleep_override)
+    rng = game.rng.substream("bench")
+    group = f"game-{seed}"
+    bots = {
+        actor: ChatGPTBot(actor.name, actor.role.name, debug=False, group=group)
+        for actor in game.get_actors()
+    }
+    timings: T.List[float] = []
+
+    def catch_up() -> None:
+        for actor, bot in bots.items():
+            bot.ingest_log(game.message_log, actor)
+
+    while not game.concluded and game.turn_number < MAX_TURNS:
+        await _step_to(game, stepper, TurnPhase.DAYLIGHT)
+        if game.turn_number > 1:
+            catch_up()
+            live = game.get_live_actors()
+            votes = await asyncio.gather(*[
+                _decide(bots[actor], BotAction.TRIAL_VOTE, [other.name for other in live if other is not actor], timings)
+                for actor in live
+            ])
+            tally: T.Dict[str, int] = dict()
+            for vote in votes:
+                if vote is not None:
+                    tally[vote] = tally.get(vote, 0) + 1
+            if tally:
+                most = max(tally.values())
+                leaders = sorted(name for name, count in tally.items() if count == most)
+                game.get_actor_by_name(rng.choice(leaders)).lynch()
+                game.death_reporter.report_all_deaths()
+
+        await _step_to(game, stepper, TurnPhase.NIGHT)
+        catch_up()
+        actors = []
+        for actor in game.get_live_actors():
+            if not actor.has_night_action:
+                continue
+            if actor.role.target_group == TargetGroup.JAIL and game._jail_map.get(actor) is None:
+                continue
+            if actor.get_target_options(as_str=False):
+                actors.append(actor)
+        targets = await asyncio.gather(*[
+            _decide(bots[actor], BotAction.NIGHT_ACTION, actor.get_target_options(as_str=True), timings)
+            for actor in actors
+        ])
+        for actor, target in zip(actors, targets):
+            target = game.get_actor_by_name(target) if target is not None else None
+            if target is not None:
+                actor.choose_targets(target)
+    return GameResult(game.turn_number, game.concluded, timings)
+
+
+async def run(
+    games: int,
+    api_base: T.Optional[str],
+    standin_server: T.Optional[standin.StandIn],
+    **client_kwargs: T.Any,
+) -> T.Dict[str, T.Any]:
+    if standin_server is not None:
+        api_base = await standin_server.start()
+    client = LLMClient(api_base=api_base, **client_kwargs)
+    set_llm_client(client)
+    t_i = time.perf_counter()
+    try:
+        results = await asyncio.gather(*[play_ai_game(seed=SEED + idx) for idx in range(games)])
+    finally:
+        elapsed = time.perf_counter() - t_i
+        set_llm_client(None)
+        await client.close()
+        if standin_server is not None:
+            await standin_server.stop()
+
+    decisions = [timing for result in results for timing in result.decisions]
+    report = dict(
+        games=games,
+        concluded=sum(result.concluded for result in results),
+        turns=sum(result.turns for result in results),
+        seconds=elapsed,
+        games_per_second=games / elapsed,
+        decisions=len(decisions),
+        decisions_per_second=len(decisions) / elapsed,
+        decision_p50=quantile(decisions, 0.5),
+        decision_p99=quantile(decisions, 0.99),
+        fallbacks=sum(LLM_FALLBACKS.value(group=f"game-{SEED + idx}") for idx in range(games)),
+    )
+    if standin_server is not None:
+        report["standin"] = dict(standin_server.stats)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark AI-driven games against an LLM stand-in")
+    parser.add_argument("--games", type=int, default=4, help="games to play concurrently")
+    parser.add_argument("--api-base", default=None, help="use this server instead of an in-process stand-in")
+    parser.add_argument("--concurrency", type=int, default=None, help="override MAFIA_LLM_CONCURRENCY")
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep bot logging on")
+    standin.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    client_kwargs = dict()
+    if args.concurrency is not None:
+        client_kwargs["max_concurrency"] = args.concurrency
+    standin_server = standin.from_arguments(args) if args.api_base is None else None
+    report = asyncio.run(run(args.games, args.api_base, standin_server, **client_kwargs))
+
+    standin_stats = report.pop("standin", None)
+    for key, value in report.items():
+        print(f"{key:>22}: {value:.3f}" if isinstance(value, float) else f"{key:>22}: {value}")
+    if standin_stats:
+        print("stand-in: " + ", ".join(f"{key}={value}" for key, value in standin_stats.items()))
+
+
+if __name__ == "__main__":
+    main()
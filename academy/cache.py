@@ -0,0 +1,105 @@
+"""
+LLM Response Cache
+
+Content-addressed: the key is a hash of the model parameters and the message list
+after normalizing whitespace, so prompts that only differ in formatting share an entry.
+
+There's an in-memory LRU, and an optional on-disk tier (set MAFIA_LLM_CACHE_DIR) that
+survives restarts. The disk tier is what makes re-running a seeded simulation or a test
+lobby nearly free.
+
+Only requests that ask for it are cached (decisions and digests). Chat is supposed to
+vary, so it never is.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import typing as T
+
+import cachetools
+
+from engine.metrics import registry
+
+# off unless set
+LLM_CACHE_DIR = os.environ.get("MAFIA_LLM_CACHE_DIR")
+LLM_CACHE_SIZE = int(os.environ.get("MAFIA_LLM_CACHE_SIZE", 2048))
+
+LLM_CACHE = registry.counter(
+    "mafia_llm_cache_total",
+    "LLM response cache lookups, by which tier answered (or miss)",
+)
+
+
+def normalize(messages: T.List[T.Dict[str, str]]) -> T.List[T.Tuple[str, str]]:
+    """
+    Collapse whitespace and drop empty messages, neither changes what the model sees
+    in any way that matters to us
+    """
+    out = []
+    for message in messages:
+        content = " ".join(message.get("content", "").split())
+        if content:
+            out.append((message.get("role", ""), content))
+    return out
+
+
+def cache_key(model: str, messages: T.List[T.Dict[str, str]], **params: T.Any) -> str:
+    body = json.dumps([model, sorted(params.items()), normalize(messages)], separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class ResponseCache:
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, directory: T.Optional[str] = LLM_CACHE_DIR) -> None:
+        self._memory: cachetools.LRUCache = cachetools.LRUCache(maxsize=maxsize)
+        self._directory = directory
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def path(self, key: str) -> str:
+        # fan out a little so the directory stays browsable
+        return os.path.join(self._directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> T.Optional[str]:
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, key: str, response: str) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(response=response), f)
+        # readers never see half a file
+        os.replace(tmp_path, path)
+
+    async def get(self, key: str) -> T.Optional[str]:
+        response = self._memory.get(key)
+        if response is not None:
+            LLM_CACHE.inc(tier="memory")
+            return response
+        if self._directory is not None:
+            response = await asyncio.get_running_loop().run_in_executor(None, self._read, key)
+            if response is not None:
+                LLM_CACHE.inc(tier="disk")
+                self._memory[key] = response
+                return response
+        LLM_CACHE.inc(tier="miss")
+        return None
+
+    async def put(self, key: str, response: str) -> None:
+        if self._memory.get(key) == response:
+            # everyone sharing a deduplicated request puts the same thing
+            return
+        self._memory[key] = response
+        if self._directory is not None:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, key, response)
+            except OSError:
+                # losing the disk copy just costs a request next time
+                LLM_CACHE.inc(tier="write_error")
@@ -0,0 +1,283 @@
+"""
+LLM Client
+
+One async client shared by every bot in the process. At phase changes a whole lobby of
+bots wants a decision at once, so requests go through:
+
+    * a global semaphore, so we never have more than `MAX_CONCURRENCY` requests out
+    * a per-group semaphore (one group per game), so one lobby can't starve another
+    * deduplication, identical requests already in flight share one response
+    * optionally a response cache, see `academy.cache`
+    * a timeout per attempt and an overall deadline
+    * retries with exponential backoff and full jitter on timeouts, 429s and 5xxs
+
+Nothing here blocks the event loop. When a request can't be answered in time
+`complete` returns None and the caller falls back to something dumb (a random choice).
+
+This speaks the OpenAI chat completions HTTP API directly, so `OPENAI_API_BASE` can
+point it at any compatible server, e.g. a local stand-in for tests.
+"""
+import asyncio
+import functools
+import logging
+import os
+import random
+import time
+import typing as T
+
+from academy.cache import ResponseCache
+from academy.cache import cache_key
+from engine.loop_bound import LoopBound
+from engine.metrics import registry
+import log
+
+if T.TYPE_CHECKING:
+    from aiohttp import ClientSession
+
+logger = logging.getLogger(__name__)
+logger.addHandler(log.ch)
+logger.setLevel(logging.INFO)
+
+API_BASE = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
+MAX_CONCURRENCY = int(os.environ.get("MAFIA_LLM_CONCURRENCY", 8))
+GROUP_CONCURRENCY = int(os.environ.get("MAFIA_LLM_GROUP_CONCURRENCY", 4))
+# per attempt, and for the whole request including retries and queueing
+ATTEMPT_TIMEOUT = float(os.environ.get("MAFIA_LLM_TIMEOUT", 20.0))
+DEADLINE = float(os.environ.get("MAFIA_LLM_DEADLINE", 45.0))
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+# anything else (bad request, bad key...) isn't going to get better by asking again
+RETRY_STATUSES = frozenset((408, 409, 429, 500, 502, 503, 504))
+
+LLM_REQUEST = registry.histogram(
+    "mafia_llm_request_seconds",
+    "Wall time of an LLM request including queueing and retries",
+)
+LLM_ERRORS = registry.counter(
+    "mafia_llm_errors_total",
+    "LLM request attempts that failed, by reason",
+)
+LLM_FALLBACKS = registry.counter(
+    "mafia_llm_fallbacks_total",
+    "LLM requests that gave up and left the caller to fall back",
+)
+LLM_DEDUPED = registry.counter(
+    "mafia_llm_deduplicated_total",
+    "LLM requests answered by an identical request already in flight",
+)
+
+
+class RetryableError(Exception):
+    pass
+
+
+def backoff(attempt: int) -> float:
+    """
+    Full jitter, see https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+    """
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class _LoopState:
+    """
+    Everything the client holds that belongs to one event loop, see `engine.loop_bound`
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.session: T.Optional["ClientSession"] = None
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.groups: T.Dict[str, asyncio.Semaphore] = dict()
+        self.in_flight: T.Dict[str, asyncio.Task] = dict()
+        # how many callers are waiting on each in flight request
+        self.waiters: T.Dict[str, int] = dict()
+
+
+class LLMClient:
+
+    def __init__(
+        self,
+        api_base: str = API_BASE,
+        api_key: T.Optional[str] = None,
+        organization: T.Optional[str] = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        group_concurrency: int = GROUP_CONCURRENCY,
+        attempt_timeout: float = ATTEMPT_TIMEOUT,
+        deadline: float = DEADLINE,
+        max_retries: int = MAX_RETRIES,
+        cache: T.Optional[ResponseCache] = None,
+    ) -> None:
+        self._api_base = api_base.rstrip("/")
+        self._api_key = api_key
+        self._organization = organization
+        self._max_concurrency = max_concurrency
+        self._group_concurrency = group_concurrency
+        self._attempt_timeout = attempt_timeout
+        self._deadline = deadline
+        self._max_retries = max_retries
+        self._cache = cache if cache is not None else ResponseCache()
+
+        self._state: LoopBound[_LoopState] = LoopBound(lambda: _LoopState(self._max_concurrency))
+
+    @property
+    def cache(self) -> ResponseCache:
+        return self._cache
+
+    @property
+    def in_flight(self) -> int:
+        state = self._state.current
+        return len(state.in_flight) if state is not None else 0
+
+    def _group(self, state: "_LoopState", group: str) -> asyncio.Semaphore:
+        semaphore = state.groups.get(group)
+        if semaphore is None:
+            semaphore = state.groups[group] = asyncio.Semaphore(self._group_concurrency)
+        return semaphore
+
+    def _get_session(self) -> "ClientSession":
+        state = self._state.get()
+        if state.session is None or state.session.closed:
+            import aiohttp
+
+            headers = {"Content-Type": "application/json"}
+            if self._api_key:
+                headers["Authorization"] = f"Bearer {self._api_key}"
+            if self._organization:
+                headers["OpenAI-Organization"] = self._organization
+            state.session = aiohttp.ClientSession(headers=headers)
+        return state.session
+
+    async def close(self) -> None:
+        state = self._state.current
+        if state is None:
+            return
+        if state.session is not None and not state.session.closed:
+            await state.session.close()
+        state.session = None
+
+    @staticmethod
+    def _done(in_flight: T.Dict[str, asyncio.Task], key: str, task: asyncio.Task) -> None:
+        if in_flight.get(key) is task:
+            in_flight.pop(key)
+        # everyone waiting may have given up already, don't let asyncio complain about it
+        if not task.cancelled():
+            task.exception()
+
+    async def complete(
+        self,
+        model: str,
+        messages: T.List[T.Dict[str, str]],
+        group: str = "default",
+        max_tokens: T.Optional[int] = None,
+        deadline: T.Optional[float] = None,
+        cache: bool = False,
+    ) -> T.Optional[str]:
+        """
+        Ask for a chat completion. Returns the response text, or None if we couldn't
+        get one before the deadline.
+
+        With `cache`, an identical earlier request answers this one and a fresh
+        response is remembered for next time.
+        """
+        state = self._state.get()
+        key = cache_key(model, messages, max_tokens=max_tokens)
+        if cache:
+            response = await self._cache.get(key)
+            if response is not None:
+                return response
+        task = state.in_flight.get(key)
+        if task is not None:
+            LLM_DEDUPED.inc(group=group)
+        else:
+            task = state.in_flight[key] = asyncio.ensure_future(self._request(model, messages, group, max_tokens))
+            task.add_done_callback(functools.partial(self._done, state.in_flight, key))
+
+        t_i = time.perf_counter()
+        state.waiters[key] = state.waiters.get(key, 0) + 1
+        try:
+            # shield so one caller timing out doesn't cancel it for the others sharing it
+            response = await asyncio.wait_for(asyncio.shield(task), deadline or self._deadline)
+            if cache:
+                await self._cache.put(key, response)
+            return response
+        except asyncio.TimeoutError:
+            LLM_ERRORS.inc(group=group, reason="deadline")
+        except Exception as exc:
+            logger.warning(f"LLM request failed: {exc!r}")
+        finally:
+            LLM_REQUEST.observe(time.perf_counter() - t_i, group=group)
+            state.waiters[key] -= 1
+            if not state.waiters[key]:
+                state.waiters.pop(key)
+                # nobody wants the answer anymore, give the slot back
+                task.cancel()
+        LLM_FALLBACKS.inc(group=group)
+        return None
+
+    async def _request(
+        self,
+        model: str,
+        messages: T.List[T.Dict[str, str]],
+        group: str,
+        max_tokens: T.Optional[int],
+    ) -> str:
+        body = dict(model=model, messages=messages)
+        if max_tokens is not None:
+            body["max_tokens"] = max_tokens
+
+        state = self._state.get()
+        async with state.limit, self._group(state, group):
+            for attempt in range(self._max_retries + 1):
+                try:
+                    return await asyncio.wait_for(self._post(body), self._attempt_timeout)
+                except (RetryableError, asyncio.TimeoutError, OSError) as exc:
+                    reason = "timeout" if isinstance(exc, asyncio.TimeoutError) else type(exc).__name__
+                    LLM_ERRORS.inc(group=group, reason=reason)
+                    if attempt == self._max_retries:
+                        raise
+                    delay = backoff(attempt)
+                    logger.info(f"LLM request failed ({exc!r}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+
+    async def _post(self, body: T.Dict[str, T.Any]) -> str:
+        import aiohttp
+
+        try:
+            async with self._get_session().post(f"{self._api_base}/chat/completions", json=body) as response:
+                if response.status in RETRY_STATUSES:
+                    raise RetryableError(f"HTTP {response.status}")
+                response.raise_for_status()
+                payload = await response.json()
+        except aiohttp.ClientConnectionError as exc:
+            raise RetryableError(str(exc)) from exc
+        choices = payload.get("choices") or []
+        if not choices:
+            raise ValueError("No choices in LLM response")
+        return choices[0]["message"]["content"]
+
+
+_client: T.Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """
+    The client every bot in this process shares
+    """
+    global _client
+    if _client is None:
+        # same settings the OpenAI SDK used
+        from academy import API_KEY
+        from academy import ORG_ID
+
+        _client = LLMClient(api_key=API_KEY, organization=ORG_ID)
+    return _client
+
+
+def set_llm_client(client: T.Optional[LLMClient]) -> None:
+    """
+    Point every bot in this process at another client, e.g. one talking to the
+    stand-in (see `academy.standin`). None goes back to the default.
+    """
+    global _client
+    _client = client
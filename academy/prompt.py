@@ -0,0 +1,213 @@
+"""
+Prompt Builder
+
+ChatContext used to rebuild the whole prompt for every request: concatenate every
+history, sort it, convert to dicts, and hope it fit in the model's context window.
+
+Instead each history is a `PromptLane`. Anything appended to a lane is tokenized once
+and merged into the builder's ordered list of segments as it arrives, with a running
+token count. When the count goes over the budget the oldest segment from the
+lowest-priority lane is evicted, so building a request is just a walk over what's left.
+
+Token counts come from `count_tokens`, a local approximation of the GPT BPE (no
+tokenizer download, no network). It errs a little high on English chat, which is the
+safe side to be on for a budget.
+"""
+import bisect
+import functools
+import re
+import typing as T
+
+from engine.buffer import RingBuffer
+from engine.metrics import registry
+
+if T.TYPE_CHECKING:
+    from academy import Prompt
+
+# what the chat API adds on top of the content, per message and once per reply
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+
+# same split the GPT tokenizers do before BPE: contractions, words, numbers, punctuation
+_PRETOKENIZE = re.compile(r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+""")
+# a common English word is one token, longer ones split every ~6 characters
+_CHARS_PER_TOKEN = 6
+
+PROMPT_TOKENS = registry.histogram(
+    "mafia_llm_prompt_tokens",
+    "Approximate prompt tokens sent with each LLM request",
+    buckets=(128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192, 16384),
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Approximate number of tokens in `text`
+    """
+    tokens = 0
+    for piece in _PRETOKENIZE.findall(text):
+        tokens += max(1, (len(piece.strip()) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN)
+    return tokens
+
+
+def prompt_tokens(prompt: "Prompt") -> int:
+    return count_tokens(prompt.content) + MESSAGE_OVERHEAD
+
+
+class Segment(T.NamedTuple):
+    # the chat context's message index, this is what prompts are ordered by
+    idx: int
+    prompt: "Prompt"
+    # the dict we send, built once
+    message: T.Dict[str, str]
+    tokens: int
+    # arrival order, breaks ties between segments with the same idx
+    seq: int
+    lane: "PromptLane"
+
+
+class PromptLane(RingBuffer):
+    """
+    One of the chat context's histories. Takes `(idx, Prompt)` pairs like before and
+    keeps the builder in sync as entries come and go.
+
+    Lanes with a lower `priority` lose their oldest entries first when we're over budget.
+    """
+
+    def __init__(self, builder: "PromptBuilder", maxlen: int, name: str, priority: int) -> None:
+        super().__init__(maxlen, name=name)
+        self._builder = builder
+        self.priority = priority
+        builder._lanes.append(self)
+
+    def append(self, item: T.Tuple[int, "Prompt"]) -> None:
+        if len(self._items) == self._items.maxlen:
+            self._builder._discard(self._items[0])
+        idx, prompt = item[0], item[1]
+        segment = self._builder._insert(self, idx, prompt)
+        super().append(segment)
+        self._builder._enforce_budget()
+
+    def popleft(self) -> Segment:
+        segment = self._items.popleft()
+        self._builder._discard(segment)
+        return segment
+
+    def clear(self) -> None:
+        for segment in self._items:
+            self._builder._discard(segment)
+        super().clear()
+
+
+class BuiltPrompt(T.NamedTuple):
+    messages: T.List[T.Dict[str, str]]
+    tokens: int
+    # segments left out of this request only, because the header and footer took the room
+    skipped: int
+
+
+class PromptBuilder:
+
+    def __init__(self, budget: int, reply_tokens: int) -> None:
+        """
+        `budget` is the model's context window, `reply_tokens` of it are kept free for
+        the response.
+        """
+        self._budget = budget
+        self._reply_tokens = reply_tokens
+        self._lanes: T.List[PromptLane] = []
+        self._keys: T.List[T.Tuple[int, int]] = []
+        self._segments: T.List[Segment] = []
+        self._seq = 0
+        self._tokens = 0
+        self._evicted = 0
+        # the header is always sent, so it comes out of the room we have for lanes
+        self._header_tokens = 0
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @property
+    def tokens(self) -> int:
+        """
+        Tokens in the lanes right now, not counting the header or footer
+        """
+        return self._tokens
+
+    @property
+    def evicted(self) -> int:
+        return self._evicted
+
+    def lane(self, maxlen: int, name: str, priority: int) -> PromptLane:
+        return PromptLane(self, maxlen, name, priority)
+
+    def set_header(self, header: T.Sequence[T.Tuple[int, "Prompt"]]) -> None:
+        self._header_tokens = sum(prompt_tokens(prompt) for _, prompt in header)
+        self._enforce_budget()
+
+    def _room(self) -> int:
+        return self._budget - self._reply_tokens - REPLY_OVERHEAD - self._header_tokens
+
+    def _insert(self, lane: PromptLane, idx: int, prompt: "Prompt") -> Segment:
+        self._seq += 1
+        segment = Segment(idx, prompt, prompt.to_dict(), prompt_tokens(prompt), self._seq, lane)
+        key = (idx, self._seq)
+        # almost everything arrives in order, so this is nearly always an append
+        if not self._keys or key > self._keys[-1]:
+            self._keys.append(key)
+            self._segments.append(segment)
+        else:
+            pos = bisect.bisect_right(self._keys, key)
+            self._keys.insert(pos, key)
+            self._segments.insert(pos, segment)
+        self._tokens += segment.tokens
+        return segment
+
+    def _discard(self, segment: Segment) -> None:
+        pos = bisect.bisect_left(self._keys, (segment.idx, segment.seq))
+        if pos < len(self._keys) and self._segments[pos] is segment:
+            del self._keys[pos]
+            del self._segments[pos]
+            self._tokens -= segment.tokens
+
+    def _enforce_budget(self) -> None:
+        room = self._room()
+        while self._tokens > room:
+            lanes = [lane for lane in self._lanes if len(lane)]
+            if not lanes:
+                return
+            victim = min(lanes, key=lambda lane: (lane.priority, lane[0].idx))
+            victim.popleft()
+            self._evicted += 1
+
+    def build(
+        self,
+        header: T.Sequence[T.Tuple[int, "Prompt"]],
+        footer: T.Sequence[T.Tuple[int, "Prompt"]] = (),
+    ) -> BuiltPrompt:
+        """
+        Header, then every segment in order, then the footer. If the footer is too big
+        to fit, the oldest low-priority segments sit this request out.
+        """
+        header_tokens = sum(prompt_tokens(prompt) for _, prompt in header)
+        footer_tokens = sum(prompt_tokens(prompt) for _, prompt in footer)
+        over = self._tokens + header_tokens + footer_tokens + REPLY_OVERHEAD + self._reply_tokens - self._budget
+        skip: T.Set[int] = set()
+        if over > 0:
+            for segment in sorted(self._segments, key=lambda seg: (seg.lane.priority, seg.idx, seg.seq)):
+                if over <= 0:
+                    break
+                skip.add(segment.seq)
+                over -= segment.tokens
+
+        messages = [prompt.to_dict() for _, prompt in header]
+        tokens = header_tokens + footer_tokens + REPLY_OVERHEAD
+        for segment in self._segments:
+            if segment.seq in skip:
+                continue
+            messages.append(segment.message)
+            tokens += segment.tokens
+        messages.extend(prompt.to_dict() for _, prompt in footer)
+        return BuiltPrompt(messages, tokens, len(skip))
@@ -54,7 +54,7 @@ async def do_day(actor: "Actor", bot: "ChatGPTBot") -> None:
 
     if target is not None:
         actor.game.tribunal.submit_trial_vote(actor, target)
-        bot.make_speech(f"You have voted to put {target.name} on trial")
+        await bot.make_speech(f"You have voted to put {target.name} on trial")
         # TODO: lynch logic
 
 
@@ -86,24 +86,15 @@ async def main() -> None:
     #bot = ChatGPTBot(name="Zhuge Liang", role_name="Investigator")
     bots = [ChatGPTBot(name=actor.name, role_name=actor.role.name, debug=True)
             for actor in game.get_actors()]
-    bot_drivers = [BotMessageDriver(actor) for actor in game.get_actors()]
-    messenger = Messenger(game, *bot_drivers)
+    # bots read what they can see straight out of the game's message log
+    messenger = Messenger(game)
     game.messenger = messenger
     messenger.start()
 
-    async def printout(bot: ChatGPTBot, driver: BotMessageDriver) -> None:
-        while True:
-            msg = await driver.grpc_queue.get()
-            print(f"Message: {msg}")
-            # give this to the bot
-            bot.ingest(msg)
-
-    tasks = []
-    for bot, driver in zip(bots, bot_drivers):
-        tasks.append(asyncio.create_task(printout(bot, driver)))
-
     while True:
         print(f"{game._turn_phase.name} {game.turn_number}")
+        for actor, bot in zip(game.get_actors(), bots):
+            bot.ingest_log(game.message_log, actor)
         if game.turn_phase == TurnPhase.DAYLIGHT:
 
 
@@ -184,7 +175,7 @@ def old():
 
             if target is not None:
                 game.tribunal.submit_trial_vote(actor, target)
-                bot.make_speech(f"You have voted to put {target.name} on trial")
+                await bot.make_speech(f"You have voted to put {target.name} on trial")
                 # TODO: lynch logic
 
         elif game.turn_phase == TurnPhase.NIGHT:
@@ -0,0 +1,290 @@
+"""
+LLM Stand-in
+
+A small OpenAI-compatible chat completions server for running AI games without the
+network (or a bill). It answers in the shapes the bots ask for:
+
+    * decisions ("You must choose between: A, B, C...") get "I choose: B"
+    * digests get a one sentence summary of the transcript
+    * speech gets 'NA' most of the time, and a canned line otherwise
+
+and can be made as slow and as flaky as the real thing:
+
+    python -m academy.standin --port 8800 --latency lognormal:-0.7,0.5 --error-rate 0.02
+    OPENAI_API_BASE=http://127.0.0.1:8800/v1 python -m academy.bench
+
+Latency specs are one of `fixed:S`, `uniform:LOW,HIGH`, `lognormal:MU,SIGMA` or
+`exp:MEAN`, all in seconds. A script is a JSON list of `{"match": regex, "responses":
+[...]}` checked against the last message before the heuristics, responses are used in
+turn.
+
+In-process, for benchmarks and tests:
+
+    async with StandIn(latency="uniform:0.05,0.2") as standin:
+        client = LLMClient(api_base=standin.url)
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import re
+import socket
+import time
+import typing as T
+
+from academy.prompt import count_tokens
+import log
+
+if T.TYPE_CHECKING:
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+logger.addHandler(log.ch)
+logger.setLevel(logging.INFO)
+
+# how long a "hung" request takes, longer than any sane client timeout
+HANG_SECONDS = 600.0
+
+_CHOICES = re.compile(r"You must choose between: (.*?)\. Reply in the form")
+_SPEECH_LINES = [
+    "I have nothing to share yet.",
+    "Someone has been awfully quiet today.",
+    "I'm Town, I promise.",
+    "Let's not rush a lynch.",
+    "I think we should hear from everyone before voting.",
+]
+
+
+def parse_latency(spec: str) -> T.Callable[[random.Random], float]:
+    """
+    Turn a latency spec into a sampler
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(arg) for arg in args.split(",")] if args else []
+        if kind == "fixed" and len(values) == 1:
+            return lambda rng: values[0]
+        if kind == "uniform" and len(values) == 2:
+            return lambda rng: rng.uniform(values[0], values[1])
+        if kind == "lognormal" and len(values) == 2:
+            return lambda rng: rng.lognormvariate(values[0], values[1])
+        if kind == "exp" and len(values) == 1:
+            return lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Bad latency spec {spec!r}")
+
+
+class Script:
+    """
+    Canned responses by regex, tried before the heuristics
+    """
+
+    def __init__(self, rules: T.List[T.Dict[str, T.Any]]) -> None:
+        self._rules = [
+            (re.compile(rule["match"]), itertools.cycle(rule["responses"]))
+            for rule in rules
+        ]
+
+    @classmethod
+    def load(cls, path: str) -> "Script":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def respond(self, prompt: str) -> T.Optional[str]:
+        for pattern, responses in self._rules:
+            if pattern.search(prompt):
+                return next(responses)
+        return None
+
+
+class StandIn:
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        speak_rate: float = 0.3,
+        script: T.Optional[Script] = None,
+        seed: T.Optional[int] = None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._latency = parse_latency(latency)
+        self._error_rate = error_rate
+        self._hang_rate = hang_rate
+        self._speak_rate = speak_rate
+        self._script = script
+        self._rng = random.Random(seed)
+        self._runner: T.Optional["web.AppRunner"] = None
+
+        self.stats: T.Dict[str, T.Any] = dict(
+            requests=0,
+            errors=0,
+            hangs=0,
+            prompt_tokens=0,
+            completion_tokens=0,
+            in_flight=0,
+            peak_in_flight=0,
+        )
+
+    @property
+    def url(self) -> str:
+        """
+        What to use as the client's api base
+        """
+        return f"http://{self._host}:{self._port}/v1"
+
+    def respond(self, messages: T.List[T.Dict[str, str]]) -> str:
+        """
+        Make up a plausible reply to the last message
+        """
+        prompt = messages[-1].get("content", "") if messages else ""
+        if self._script is not None:
+            response = self._script.respond(prompt)
+            if response is not None:
+                return response
+
+        match = _CHOICES.search(prompt)
+        if match:
+            choices = [choice.strip() for choice in match.group(1).split(",") if choice.strip()]
+            if choices:
+                return f"I choose: {self._rng.choice(choices)}"
+        if "Digest the above conversation" in prompt:
+            words = " ".join(message.get("content", "") for message in messages[:-1]).split()
+            return "The town talked about " + (" ".join(words[:12]) or "nothing much") + "."
+        if "respond with 'NA'" in prompt:
+            if self._rng.random() < self._speak_rate:
+                return self._rng.choice(_SPEECH_LINES)
+            return "NA"
+        return "OK."
+
+    async def _chat_completions(self, request: "web.Request") -> "web.Response":
+        from aiohttp import web
+
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        try:
+            body = await request.json()
+            messages = body.get("messages") or []
+            await asyncio.sleep(max(0.0, self._latency(self._rng)))
+
+            roll = self._rng.random()
+            if roll < self._hang_rate:
+                self.stats["hangs"] += 1
+                await asyncio.sleep(HANG_SECONDS)
+            elif roll < self._hang_rate + self._error_rate:
+                self.stats["errors"] += 1
+                status = self._rng.choice((429, 500, 503))
+                return web.json_response(dict(error=dict(message="stand-in error", code=status)), status=status)
+
+            content = self.respond(messages)
+            prompt_tokens = sum(count_tokens(message.get("content", "")) for message in messages)
+            completion_tokens = count_tokens(content)
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            return web.json_response(dict(
+                id=f"chatcmpl-standin-{self.stats['requests']}",
+                object="chat.completion",
+                created=int(time.time()),
+                model=body.get("model", "standin"),
+                choices=[dict(
+                    index=0,
+                    message=dict(role="assistant", content=content),
+                    finish_reason="stop",
+                )],
+                usage=dict(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                ),
+            ))
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def _stats(self, request: "web.Request") -> "web.Response":
+        from aiohttp import web
+
+        return web.json_response(self.stats)
+
+    def make_app(self) -> "web.Application":
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        app.router.add_get("/stats", self._stats)
+        return app
+
+    async def start(self) -> str:
+        """
+        Start serving on this loop, returns the api base
+        """
+        from aiohttp import web
+
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        # bind ourselves so port 0 tells us which port we got
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self._host, self._port))
+        self._port = sock.getsockname()[1]
+        await web.SockSite(self._runner, sock).start()
+        logger.info(f"LLM stand-in listening on {self.url}")
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "StandIn":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: T.Any) -> None:
+        await self.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", default="fixed:0", help="e.g. fixed:0.5, uniform:0.2,1, lognormal:-0.7,0.5, exp:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 429/5xx")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never come back")
+    parser.add_argument("--speak-rate", type=float, default=0.3, help="how often bots have something to say")
+    parser.add_argument("--script", default=None, help="JSON file of scripted responses")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def from_arguments(args: argparse.Namespace, **kwargs: T.Any) -> StandIn:
+    return StandIn(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        speak_rate=args.speak_rate,
+        script=Script.load(args.script) if args.script else None,
+        seed=args.seed,
+        **kwargs,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for the bots")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    from aiohttp import web
+
+    standin = from_arguments(args, host=args.host, port=args.port)
+    print(f"OPENAI_API_BASE={standin.url}")
+    web.run_app(standin.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ This effectively replaces the Discord interface for them.
 import asyncio
 import typing as T
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from engine.metrics import registry
 
 if T.TYPE_CHECKING:
     from engine.game import Game
@@ -16,3 +19,25 @@ app = FastAPI()
 @app.get("/")
 async def debug_test():
     return {"message": "Hello World"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return registry.to_prometheus()
+
+
+@app.get("/metrics.json")
+async def metrics_json():
+    return registry.to_json()
+
+
+@app.get("/memory.json")
+async def memory_json():
+    """
+    What each running game's message buffers and queues are holding on to
+    """
+    from chatapi.discord.game import GAMES
+    return {game.log.name: game.memory_usage() for game in GAMES.values()}
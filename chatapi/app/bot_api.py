@@ -151,4 +151,4 @@ class BotApi:
     def submit_last_will(self, bot_id: str, last_will: str) -> None:
         bot = self.get_bot_by_id(bot_id)
         actor = self._game.get_actor_by_name(bot.name, raise_if_missing=True)
-        actor._last_will = last_will
+        actor.submit_last_will(last_will)
@@ -7,6 +7,9 @@ from chatapi.discord.driver import BotMessageDriver
 from engine.actor import Actor
 from engine.message import Message
 from engine.message import MessageType
+from engine.metrics import GRPC_ERRORS
+from engine.metrics import GRPC_HANDLER
+from engine.metrics import instrumented
 from engine.resolver import SequenceEvent
 import log
 from proto import command_pb2
@@ -139,6 +142,7 @@ class GrpcBotApi(service_pb2_grpc.GrpcBotApiServicer):
 
         return bot
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def Connect(self, request: connect_pb2.ConnectRequest, context):
         """
         Handle a bot service requesting a game bot.
@@ -161,6 +165,7 @@ class GrpcBotApi(service_pb2_grpc.GrpcBotApiServicer):
         response.bot_id = bot.id
         return response
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def Disconnect(self, request: connect_pb2.DisconnectRequest, context):
         """
         Handle a bot service disconnecting from a game bot.
@@ -175,6 +180,7 @@ class GrpcBotApi(service_pb2_grpc.GrpcBotApiServicer):
         response.success = True
         return response
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def GetGame(self, request: state_pb2.GetGameRequest, ctx):
         bot = self.get_bot(request.bot_id)
 
@@ -183,6 +189,7 @@ class GrpcBotApi(service_pb2_grpc.GrpcBotApiServicer):
             timestamp=time.time()
         )
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def GetActor(self, request: state_pb2.GetActorRequest, ctx):
         if self._bot_api is None:
             raise ValueError("Bot API has not been set. This endpoint is not yet configured.")
@@ -223,6 +230,7 @@ class GrpcBotApi(service_pb2_grpc.GrpcBotApiServicer):
             finally:
                 await asyncio.sleep(1.0)
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def SendMessage(self, request: message_pb2.SendMessageRequest, context) -> message_pb2.SendMessageResponse:
         # this is where the fun begins?
         bot = self.get_bot(request.bot_id)
@@ -238,7 +246,7 @@ class GrpcBotApi(service_pb2_grpc.GrpcBotApiServicer):
             try:
                 for action in bot_actor.role.day_actions() + bot_actor.role.night_actions():
                     if action.instant():
-                        SequenceEvent(action(), voted_actor).execute()
+                        SequenceEvent(action(), voted_actor).execute_instant()
                         bot_actor.reset_target()
             except Exception as exc:
                 logger.exception(exc)
@@ -247,27 +255,33 @@ class GrpcBotApi(service_pb2_grpc.GrpcBotApiServicer):
 
         return command_pb2.TargetResponse(timestamp=time.time())
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def TrialVote(self, request: command_pb2.TargetRequest, context) -> command_pb2.TargetResponse:
         return self.submit_target(request, self._bot_api.game.tribunal.submit_trial_vote)
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def LynchVote(self, request: command_pb2.BoolVoteRequest, context) -> command_pb2.BoolVoteResponse:
         bot = self.get_bot(request.bot_id)
         bot_actor = self._bot_api.game.get_actor_by_name(bot.name)
         self._bot_api.game.tribunal.submit_lynch_vote(bot_actor, request.vote)
         return command_pb2.TargetResponse(timestamp=time.time())
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def SkipVote(self, request: command_pb2.BoolVoteRequest, context) -> command_pb2.BoolVoteResponse:
         bot = self.get_bot(request.bot_id)
         bot_actor = self._bot_api.game.get_actor_by_name(bot.name)
         self._bot_api.game.tribunal.submit_skip_vote(bot_actor, request.vote)
         return command_pb2.TargetResponse(timestamp=time.time())
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def DayTarget(self, request: command_pb2.TargetRequest, context) -> command_pb2.BoolVoteResponse:
-        return self.submit_target(request, Actor.choose_targets)
+        return self.submit_target(request, Actor.submit_targets)
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def NightTarget(self, request: command_pb2.TargetRequest, context) -> command_pb2.BoolVoteResponse:
-        return self.submit_target(request, Actor.choose_targets)
+        return self.submit_target(request, Actor.submit_targets)
 
+    @instrumented(GRPC_HANDLER, GRPC_ERRORS)
     def LastWill(self, request: message_pb2.LastWillRequest, context) -> message_pb2.LastWillResponse:
         self._bot_api.submit_last_will(request.bot_id, request.last_will)
         return message_pb2.LastWillResponse(timestamp=time.time(), success=True)
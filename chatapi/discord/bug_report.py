@@ -8,6 +8,7 @@ import typing as T
 
 import disnake
 
+from chatapi.discord.game import GAMES
 from chatapi.discord.router import router
 
 
@@ -21,8 +22,20 @@ async def submit_report_callback(interaction: "disnake.ModalInteraction") -> Non
             elif entry.get('custom_id') == 'bug-report-text':
                 report_text = entry['value']
     
+    report = dict(report_role=report_role, report_text=report_text)
+
+    # point at the game journal so the bug can be replayed offline
+    channel = interaction.channel
+    game = GAMES.get(getattr(channel, "parent", None) or channel)
+    if game is not None:
+        report["turn_number"] = game.turn_number
+        report["turn_phase"] = game.turn_phase.name
+        if game.journal is not None:
+            game.journal.flush()
+            report["journal"] = game.journal.path
+
     with open(f"bugs\\bug_report_{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}.log", "w+") as bugfile:
-        json.dump(dict(report_role=report_role, report_text=report_text), bugfile)
+        json.dump(report, bugfile)
 
     await interaction.send('Issued Report Successfully', ephemeral=True)
 
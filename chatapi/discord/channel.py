@@ -18,9 +18,15 @@ class ChannelManager:
     async def create_channel(self, guild: "disnake.Guild", name: str, **kwargs) -> disnake.TextChannel:
         """
         If the channel by this name already exists, just return it.
+
+        That includes one a previous run left behind (see `mark_to_preserve`).
         """
         if name not in self._channels:
-            self._channels[name] = await guild.create_text_channel(name=name, **kwargs)
+            existing = disnake.utils.get(guild.text_channels, name=name)
+            if existing is not None:
+                self._channels[name] = existing
+            else:
+                self._channels[name] = await guild.create_text_channel(name=name, **kwargs)
         return self._channels[name]
 
     def get_channel(self, name: str) -> T.Optional["disnake.TextChannel"]:
@@ -42,7 +42,7 @@ class Court:
         """
         Should be called inside event loop.
         """
-        await self._chat_driver.setup_webhook("CourtChat")
+        await self._chat_driver.setup_webhook()
         self._chat_driver.start()
 
         # if we cannot find the automod rule here, complain loudly
@@ -1,4 +1,5 @@
 import asyncio
+import os
 import time
 import typing as T
 from collections import defaultdict
@@ -6,8 +7,13 @@ from collections import deque
 import disnake
 
 from chatapi.discord.icache import icache
+from chatapi.discord.icache import send_private
 from chatapi.discord.town_hall import TownHall
+from chatapi.discord.webhook import webhook_pool
+from engine.buffer import BoundedQueue
+from engine.buffer import DropPolicy
 from engine.game import Game
+from engine.loop_bound import LoopBound
 from engine.message import Message
 from engine.message import InboundMessageDriver
 from engine.message import MessageDriver
@@ -22,6 +28,11 @@ if T.TYPE_CHECKING:
     from engine.message import Message
     from engine.player import Player
 
+# private sends in flight at once across every player, so daybreak doesn't trip rate limits
+MAX_PRIVATE_SENDS = int(os.environ.get("MAFIA_PRIVATE_SENDS", 8))
+# Discord caps the fields on an embed
+MAX_EMBED_FIELDS = 25
+
 
 class BotMessageDriver(OutboundMessageDriver):
     """
@@ -30,7 +41,10 @@ class BotMessageDriver(OutboundMessageDriver):
 
     def __init__(self, actor: "Actor") -> None:
         self._actor = actor
-        self._grpc_queue: asyncio.Queue[Message] = asyncio.Queue()
+        # a bot that never subscribes shouldn't make us hold on to the whole game
+        self._grpc_queue: asyncio.Queue[Message] = actor.game.memory.register(BoundedQueue(
+            actor.game.limits.grpc_queue, DropPolicy.DROP_OLDEST, name=f"grpc:{actor.name}",
+        ))
         super().__init__()
 
     def wants(self, message: "Message") -> bool:
@@ -56,7 +70,27 @@ class BotMessageDriver(OutboundMessageDriver):
         self._grpc_queue.put_nowait(message)
 
 
-class ChatDriver(OutboundMessageDriver):
+class WebhookMixin:
+    """
+    Sends through the channel's pooled webhook, see `chatapi.discord.webhook`.
+
+    Every message sets its own username, so one webhook per channel does fine.
+    """
+
+    _channel: "disnake.TextChannel"
+    _webhook: "disnake.Webhook"
+
+    @classmethod
+    async def create(cls, game: "Game", channel: "disnake.TextChannel") -> "WebhookMixin":
+        driver = cls(game, channel)
+        await driver.setup_webhook()
+        return driver
+
+    async def setup_webhook(self) -> None:
+        self._webhook = await webhook_pool.get(self._channel)
+
+
+class ChatDriver(WebhookMixin, OutboundMessageDriver):
     """
     Drives messages to Chat
 
@@ -70,6 +104,8 @@ class ChatDriver(OutboundMessageDriver):
         self._channel = channel
         self._webhook: "disnake.Webhook" = None
         self._terminated = False
+        # we don't go through a Messenger, so attach ourselves
+        self.bind(game)
         self._discussion_thread: "disnake.Thread" = None
 
     def wants(self, message: "Message") -> bool:
@@ -81,15 +117,6 @@ class ChatDriver(OutboundMessageDriver):
             MessageType.INDICATOR,
         )
 
-    @classmethod
-    async def create_with_name(cls, game: "Game", channel: "disnake.TextChannel", name: str) -> "WebhookDriver":
-        driver = cls(game, channel)
-        await driver.setup_webhook(name)
-        return driver
-
-    async def setup_webhook(self, name: str):
-        self._webhook = await self._channel.create_webhook(name=name)
-
     def set_discussion_thread(self, thread: "disnake.Thread") -> None:
         self._discussion_thread = thread
 
@@ -230,7 +257,7 @@ class OldBotMessageDriver(OutboundMessageDriver):
             self._private_message_queues[player.bot].put_nowait(msg)
 
 
-class WebhookDriver(InboundMessageDriver):
+class WebhookDriver(WebhookMixin, InboundMessageDriver):
     """
     Drives messages to Discord from bots using Webhooks
     """
@@ -252,15 +279,6 @@ class WebhookDriver(InboundMessageDriver):
             MessageType.INDICATOR,
         )
 
-    @classmethod
-    async def create_with_name(cls, game: "Game", channel: "disnake.TextChannel", name: str) -> "WebhookDriver":
-        driver = cls(game, channel)
-        await driver.setup_webhook(name)
-        return driver
-
-    async def setup_webhook(self, name: str):
-        self._webhook = await self._channel.create_webhook(name=name)
-
     def set_discussion_thread(self, thread: "disnake.Thread") -> None:
         self._discussion_thread = thread
 
@@ -280,13 +298,15 @@ class WebhookDriver(InboundMessageDriver):
             if self._webhook is None:
                 return
             fmt = self.format_message(message)
-            t_init = time.time()
-            while time.time() - t_init < 60.0:  # this would be a real problem
+            clock = self._game.clock
+            thread = None
+            t_init = clock.time()
+            while clock.elapsed(t_init) < 60.0:  # this would be a real problem
                 if self._game.town_hall.discussion_thread is not None:
                     thread = self._game.town_hall.discussion_thread
                     break
                 # try again in a bit
-                await asyncio.sleep(1.0)
+                await clock.sleep(1.0)
 
             if thread is not None:
                 fmt["thread"] = thread
@@ -324,7 +344,7 @@ class DiscordPublicDriver(OutboundMessageDriver):
             try:
                 msg = await self._queue.get()
                 t_init = time.time()
-                await self.publish(msg)
+                await self.publish_and_record(msg)
                 delta = time.time() - t_init
                 if delta > 5.0:
                     print("WARNING: publish took longer than 5s")
@@ -345,9 +365,13 @@ class DiscordPrivateDriver(OutboundMessageDriver):
     """
     Drives Discord messages to a private interaction chat as Mafia Bot.
 
-    Each human player should have one of these.
+    Each human player should have one of these. Feedback that piles up in the same
+    phase (results, attacks, visits) goes out together as a single embed.
     """
 
+    # shared by every player's driver
+    _sends: LoopBound[asyncio.Semaphore] = LoopBound(lambda: asyncio.Semaphore(MAX_PRIVATE_SENDS))
+
     def __init__(self, channel: "disnake.TextChannel", actor: "Actor") -> None:
         super().__init__()
         self._channel = channel
@@ -364,17 +388,48 @@ class DiscordPrivateDriver(OutboundMessageDriver):
             return dict(embed=embed)
         return dict(content=f"(From **{message.addressed_from.name}**): {message.message}")
 
+    def format_feedback(self, messages: T.List["Message"]) -> T.Dict[str, T.Any]:
+        embed = disnake.Embed(title="Your Results")
+        for message in messages:
+            embed.add_field(name=message.title, value=message.message or "\u200b", inline=False)
+        return dict(embed=embed)
+
+    def _take_feedback(self, message: "Message") -> T.List["Message"]:
+        """
+        `message`, plus any feedback from the same phase that's queued right behind it
+        """
+        batch = [message]
+        if message.message_type != MessageType.PRIVATE_FEEDBACK:
+            return batch
+        waiting = self._queue._queue
+        while (
+            waiting
+            and len(batch) < MAX_EMBED_FIELDS
+            and waiting[0].message_type == MessageType.PRIVATE_FEEDBACK
+            and waiting[0].game_time == message.game_time
+        ):
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def run(self) -> None:
+        while True:
+            try:
+                message = await self._queue.get()
+                await self.publish_and_record(*self._take_feedback(message))
+            except asyncio.CancelledError:
+                break
+
+    async def _send(self, **kwargs: T.Any) -> None:
+        async with self._sends.get():
+            sent = await send_private(self._actor.player.user, **kwargs)
+        if not sent:
+            print(f"WARNING: could not reach {self._actor.name}. Dropping private message")
+
     async def publish(self, message: "Message") -> None:
-        ia = icache.get(self._actor.player.user)
-        if ia is None:
-            print(f"WARNING: no interaction for {self._actor.name}. Dropping private message")
+        await self._send(**self.format_message(message))
 
-        try:
-            print(f"Sending private message to {self._actor.name}")
-            await ia.send(**self.format_message(message), ephemeral=True)
-        except Exception as exc:
-            print(f"Throwing exception?: {repr(exc)}")
-            await ia.followup.send(**self.format_message(message), ephemeral=True)
+    async def publish_batch(self, messages: T.List["Message"]) -> None:
+        await self._send(**self.format_feedback(messages))
 
 
 class DiscordDriver(OutboundMessageDriver):
@@ -429,40 +484,26 @@ class DiscordDriver(OutboundMessageDriver):
             self._public_queue.append(message)
 
     async def private_publish(self, player: "Player", message: "Message", flush: bool = True) -> None:
-        # TODO: is there a better way to do it than manually checking?
-        # we can't cache it locally since the original dictionary is prone to changing
-        # we could maybe store it differently in both cases
-        # ... or actually Player should just contain a reference to User
         if message is None or not message.message:
             print(f"Empty message?")
             return
-
-        for user, interaction in icache.items():
-            if user.name == player.name:
-                break
-        else:
-            print(f"No interaction found for {player.name}. Dropping message: {message.message}")
-            return None
+        if not player.is_human:
+            return
 
         if not flush:
             self._private_queues[player].append(message)
             return
 
-        # TODO: i think this is a bug with disnake but I might just be sleepy
-        try:
-            print(f'Sending message to {player.name}')
-            await interaction.send(content=message.message, ephemeral=True)
-        except:
-            await interaction.followup.send(content=message.message, ephemeral=True)
+        if not await send_private(player.user, content=message.message):
+            print(f"Could not reach {player.name}. Dropping message: {message.message}")
 
     async def edit_last_private(self, player: "Player", **kwargs: T.Any) -> None:
         """
         Edit the previously issued private message sent to a player
         """
-        for user, interaction in icache.items():
-            if user.name == player.name:
-                break
-        else:
+        interaction = icache.for_player(player)
+        if interaction is None:
+            # a stale token can't edit anything, the next publish will go out fresh
             return None
         try:
             await interaction.edit_original_response(**kwargs)
@@ -53,10 +53,10 @@ class ForwardChatMessages:
 
         These should all be listed as public queue messages.
         """
-        router.register_message_callback(self.channel.name, self.do_forward)
+        router.register_message_callback(self.channel, self.do_forward)
 
     def disable_forwarding(self) -> None:
-        router.unregister_message_callback(self.channel.name, self.do_forward)
+        router.unregister_message_callback(self.channel, self.do_forward)
 
     async def do_forward(self, message: "disnake.Message") -> None:
         """
@@ -4,6 +4,8 @@ import typing as T
 if T.TYPE_CHECKING:
     import disnake
     from engine.game import Game
+    from engine.session import Session
 
 
 GAMES: T.Dict["disnake.TextChannel", "Game"] = {}
+SESSIONS: T.Dict["disnake.TextChannel", "Session"] = {}
@@ -15,8 +15,14 @@ import time
 import typing as T
 import disnake
 
+from chatapi.discord.resources import resource_pool
 from chatapi.discord.router import router
+from chatapi.discord.webhook import webhook_pool
+from engine.buffer import BoundedQueue
+from engine.buffer import DropPolicy
 from engine.action.jail import Jail as JailAction
+from engine.metrics import PUBLISH
+from engine.metrics import PUBLISH_LAG
 from engine.phase import TurnPhase
 from engine.role.town.jailor import Jailor
 # TODO: kidnapper, interrogator
@@ -54,12 +60,8 @@ class Hideout:
         return False
 
     async def initialize(self) -> None:
-        # create the hideout private thread
-        self._thread = await self._channel.create_thread(
-            name=self.NAME,
-            type=disnake.ChannelType.private_thread,
-            invitable=False,
-        )
+        # the hideout private thread, recycled from an earlier game if we can
+        self._thread = await resource_pool.acquire_thread(self._channel, self.NAME)
 
     @classmethod
     async def create_and_init(cls, game: "Game", channel: "disnake.TextChannel") -> "Hideout":
@@ -95,6 +97,15 @@ class Hideout:
     def stop(self) -> None:
         self._stop.set()
 
+    async def release(self) -> None:
+        """
+        Stop, and give our threads back to the pool for the next game
+        """
+        self.stop()
+        if self._thread is not None:
+            await resource_pool.release_thread(self._thread)
+            self._thread = None
+
     def signal_message(self, message: str) -> None:
         """
         TODO: there should be a default implementation for this
@@ -166,6 +177,82 @@ RouteAlias = T.Callable[[disnake.Message], str]
 # some specification for an outbound rule
 RouteEgress = T.Tuple[T.Union[disnake.Thread, disnake.TextChannel], RouteAlias]
 
+# Discord won't take a longer message
+MAX_CONTENT = 2000
+# how long a closing route waits for its sink to catch up
+DRAIN_TIMEOUT = 5.0
+
+
+class TunnelMessage(T.NamedTuple):
+    username: str
+    content: str
+    routed_at: float
+
+
+class SinkQueue:
+    """
+    Everything headed for one sink, sent in order by its own worker.
+
+    A slow sink only holds up itself. While a send is out, whatever queues up behind
+    it under the same name goes out as one message.
+    """
+
+    def __init__(self, sink: T.Union[disnake.Thread, disnake.TextChannel], maxsize: int, tags: T.Dict[str, str]) -> None:
+        self._sink = sink
+        self._queue: BoundedQueue = BoundedQueue(maxsize, policy=DropPolicy.DROP_OLDEST, name="tunnel")
+        self._queue.tags = tags
+        self._labels = dict(tags, driver="MessageTunnel")
+        self._task: T.Optional[asyncio.Task] = None
+
+    def put(self, message: TunnelMessage) -> None:
+        self._queue.put_nowait(message)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def _batch(self, first: TunnelMessage) -> TunnelMessage:
+        content = first.content
+        while not self._queue.empty():
+            # peek, only consecutive messages under the same name go together
+            upcoming: TunnelMessage = next(iter(self._queue))
+            if upcoming.username != first.username or len(content) + len(upcoming.content) + 1 > MAX_CONTENT:
+                break
+            self._queue.get_nowait()
+            self._queue.task_done()
+            content = f"{content}\n{upcoming.content}"
+        return first._replace(content=content)
+
+    async def run(self) -> None:
+        while not self._queue.empty():
+            message = self._batch(self._queue.get_nowait())
+            try:
+                PUBLISH_LAG.observe(time.perf_counter() - message.routed_at, **self._labels)
+                webhook = await webhook_pool.get(self._sink)
+                kwargs = dict(content=message.content, username=message.username)
+                if isinstance(self._sink, disnake.Thread):
+                    kwargs["thread"] = self._sink
+                with PUBLISH.time(**self._labels):
+                    await webhook.send(**kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # best effort, one lost message beats a stuck tunnel
+                print(f"Failed to tunnel message: {repr(exc)}")
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        """
+        Wait for everything queued to be sent, give up on it after `timeout`
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            self.stop()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
 
 class MessageTunnel:
     """
@@ -175,29 +262,32 @@ class MessageTunnel:
     outbound message rules. The rules will specify where to send the message, as
     well as the alias to use.
 
-    A Webhook is used for this...
+    Messages are relayed through the shared webhook pool, and each sink has its own
+    ordered queue (see `SinkQueue`), so the router callback never waits on Discord.
     TODO: does it make sense to use the game messenger?
     the routing rules seem like they'd get kinda wacked
     """
 
-    def __init__(self) -> None:
+    def __init__(self, maxsize: int = 200, tags: T.Dict[str, str] = None) -> None:
         """
         Forward from one thread to other threads
         """
         self._routing_rules: T.Dict[disnake.TextChannel, T.List[RouteEgress]] = defaultdict(list)
-        self._stop = asyncio.Event()
-        self._queue = asyncio.Queue()
-        self._webhooks: T.Dict[disnake.TextChannel, disnake.Webhook] = dict()
+        self._sinks: T.Dict[T.Union[disnake.Thread, disnake.TextChannel], SinkQueue] = dict()
+        self._maxsize = maxsize
+        self._tags = tags if tags is not None else dict()
 
     def clear(self) -> None:
         self._routing_rules = defaultdict(list)
-        # do we also clear webhooks...? nah lol
+        for sink_queue in self._sinks.values():
+            sink_queue.stop()
+        self._sinks = dict()
 
-    @staticmethod
-    def _webhook_key(channel: T.Union[disnake.Thread, disnake.TextChannel]):
-        if isinstance(channel, disnake.Thread):
-            return channel.parent
-        return channel
+    def _sink_queue(self, sink: T.Union[disnake.Thread, disnake.TextChannel]) -> SinkQueue:
+        sink_queue = self._sinks.get(sink)
+        if sink_queue is None:
+            sink_queue = self._sinks[sink] = SinkQueue(sink, self._maxsize, self._tags)
+        return sink_queue
 
     async def add_route(
         self,
@@ -214,12 +304,10 @@ class MessageTunnel:
                 raise ValueError("Route already exists with a different function")
         self._routing_rules[source].append((sink, alias))
 
-        key = self._webhook_key(sink)
-        if key not in self._webhooks:
-            # TODO: does key need to be unique?
-            self._webhooks[key] = await sink.parent.create_webhook(name=f"MessageTunnel-{key.name}")
+        # get the webhook sorted before any messages show up
+        await webhook_pool.get(sink)
 
-        router.register_message_callback(source.name, self.filter_message)
+        router.register_message_callback(source, self.filter_message)
 
     async def remove_route(
         self,
@@ -232,8 +320,20 @@ class MessageTunnel:
         for egress in self._routing_rules[source]:
             if egress[0] == sink:
                 self._routing_rules[source].remove(egress)
-                router.unregister_message_callback(source.name, self.filter_message)
-        print("WARNING: remove_route tried to remove a route that did not exist")
+                break
+        else:
+            print("WARNING: remove_route tried to remove a route that did not exist")
+            return
+
+        if not self._routing_rules[source]:
+            self._routing_rules.pop(source)
+            router.unregister_message_callback(source, self.filter_message)
+
+        # let anything already on its way arrive
+        if not any(egress[0] == sink for rules in self._routing_rules.values() for egress in rules):
+            sink_queue = self._sinks.pop(sink, None)
+            if sink_queue is not None:
+                await sink_queue.drain()
 
     async def filter_message(self, message: "disnake.Message") -> None:
         """
@@ -244,22 +344,13 @@ class MessageTunnel:
         """
         if message.channel not in self._routing_rules:
             return
+        if webhook_pool.is_pooled(message.webhook_id):
+            # we sent this one, don't bounce it back
+            return
 
+        routed_at = time.perf_counter()
         for sink, alias in self._routing_rules[message.channel]:
-            # fire and forget on best effort
-            # i think this *does* mean that messages could be delivered out of order, which
-            # we might not want...? let's see how likely it is
-            webhook = self._webhooks[self._webhook_key(sink)]
-            if message.webhook_id == webhook.id:
-                print("Skipping a double broadcast")
-                continue
-
-            #asyncio.create_task(webhook.send(content=message.content, username=alias(message)))
-            kwargs = dict(content=message.content, username=alias(message))
-            if isinstance(sink, disnake.Thread):
-                kwargs["thread"] = sink
-            # run it synchronously i guess?
-            await webhook.send(**kwargs)
+            self._sink_queue(sink).put(TunnelMessage(alias(message), message.content, routed_at))
 
 
 class Jail(Hideout):
@@ -279,12 +370,7 @@ class Jail(Hideout):
     NAME = "Jail"  # it's *all* called Jail bro
 
     async def create_thread(self) -> None:
-        # thread names must be unique - come up with a random number
-        self._threads.append(await self._channel.create_thread(
-            name=f"{self.NAME}",
-            type=disnake.ChannelType.private_thread,
-            invitable=False,
-        ))
+        self._threads.append(await resource_pool.acquire_thread(self._channel, self.NAME))
 
     async def initialize(self) -> None:
         """
@@ -295,7 +381,7 @@ class Jail(Hideout):
         Threads should be sanitized after usage.
         """
         self._threads: T.List[disnake.Thread] = list()
-        self._message_tunnel = MessageTunnel()
+        self._message_tunnel = MessageTunnel(maxsize=self._game.limits.driver_queue, tags=self._game.tags)
 
     def is_open(self) -> bool:
         """
@@ -403,12 +489,6 @@ class Jail(Hideout):
 
         await asyncio.gather(*futures)
 
-    async def clean_thread_history(self, thread: disnake.Thread) -> None:
-        t_init = time.time()
-        await thread.delete()
-        t_final = time.time()
-        self.log.info(f"Took {t_final - t_init}s to clean thread {thread.name}")
-
     async def cleanup_tunnel(self) -> None:
         futures = []
         # setup proxies with the original mappings
@@ -451,11 +531,17 @@ class Jail(Hideout):
             futures.append(asyncio.ensure_future(jc_thread.remove_user(prisoner.player.user)))
             self._threads.append(jc_thread)
 
-        # wait for removal, start a f+f task to clean in the background
+        # wait for removal, the pool cleans them up in the background
         await asyncio.gather(*futures)
 
-        for thread in self._threads:
-            asyncio.create_task(self.clean_thread_history(thread))
+        await asyncio.gather(*[resource_pool.release_thread(thread, emptied=True) for thread in self._threads])
+        self._threads = list()
+
+    async def release(self) -> None:
+        self.stop()
+        if self._active:
+            await self.empty_cells()
+            self._active = False
 
     async def signal_message(self, jailor: "Actor", message: str) -> None:
         # ok so we need to find everything that's connected
@@ -506,3 +592,11 @@ class DeathChat(Hideout):
                 await asyncio.sleep(1.0)
         except Exception as exc:
             self.log.exception(exc)
+
+
+# private threads a game will want, see `ResourcePool.provision`
+PROVISIONED_THREADS: T.Dict[str, int] = {
+    MafiaHideout.NAME: 1,
+    Jail.NAME: 2,
+    DeathChat.NAME: 1,
+}
@@ -1,36 +1,149 @@
 """
 Interaction Cache
+
+Private messages go out as ephemeral replies to the player's latest interaction, so
+we keep the latest one per user around. Discord only honours an interaction's token
+for 15 minutes; after that sends and edits on it fail, so entries expire a little
+before then instead of silently eating messages.
+
+Entries are keyed by user id, so a `Player` finds theirs in one lookup.
 """
+import os
+import time
 import typing as T
 
+import disnake
+
+from engine.metrics import ICACHE
+from engine.metrics import PRIVATE_FALLBACKS
+
 if T.TYPE_CHECKING:
-    import disnake
+    from engine.player import Player
+
+# how long Discord keeps an interaction token alive
+TOKEN_LIFETIME = 15 * 60.0
+# stop using a token this long before it dies, a send can take a while
+EXPIRY_MARGIN = float(os.environ.get("MAFIA_ICACHE_MARGIN", 60.0))
+MAX_ENTRIES = int(os.environ.get("MAFIA_ICACHE_SIZE", 4096))
+
+
+class _Entry(T.NamedTuple):
+    interaction: "disnake.Interaction"
+    expires_at: float
 
 
 class InteractionCache:
 
-    def __init__(self):
-        self._cache: T.Dict["disnake.User", "disnake.Interaction"] = dict()
+    def __init__(
+        self,
+        ttl: float = TOKEN_LIFETIME - EXPIRY_MARGIN,
+        maxsize: int = MAX_ENTRIES,
+        timer: T.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._timer = timer
+        # by user id, oldest first
+        self._cache: T.Dict[int, _Entry] = dict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
 
-    def get(self, user: "disnake.User") -> T.Optional["disnake.Interaction"]:
-        return self._cache.get(user)
+    @staticmethod
+    def _key(user: T.Union["disnake.abc.User", int]) -> int:
+        return user if isinstance(user, int) else user.id
 
-    @property
-    def keys(self) -> T.Iterator:
-        return self._cache.keys
+    def get(self, user: T.Union["disnake.abc.User", int]) -> T.Optional["disnake.Interaction"]:
+        """
+        The user's latest interaction, if its token is still good
+        """
+        key = self._key(user)
+        entry = self._cache.get(key)
+        if entry is None:
+            ICACHE.inc(result="miss")
+            return None
+        if entry.expires_at <= self._timer():
+            self._cache.pop(key, None)
+            ICACHE.inc(result="expired")
+            return None
+        ICACHE.inc(result="hit")
+        return entry.interaction
 
-    @property
-    def values(self) -> T.Iterator:
-        return self._cache.values
+    def for_player(self, player: "Player") -> T.Optional["disnake.Interaction"]:
+        if not player.is_human:
+            return None
+        return self.get(player.user)
 
-    @property
-    def items(self) -> T.Iterator:
-        return self._cache.items
+    def expires_in(self, user: T.Union["disnake.abc.User", int]) -> float:
+        """
+        Seconds until the user's interaction goes stale, 0 if there isn't a usable one
+        """
+        entry = self._cache.get(self._key(user))
+        if entry is None:
+            return 0.0
+        return max(0.0, entry.expires_at - self._timer())
 
-    async def update_with_interaction(self, interaction) -> None:
-        interaction: "disnake.Interaction" = interaction
-        self._cache[interaction.user] = interaction
+    def discard(self, user: T.Union["disnake.abc.User", int]) -> None:
+        """
+        Forget the user's interaction, e.g. because Discord rejected its token
+        """
+        self._cache.pop(self._key(user), None)
+
+    def purge(self) -> int:
+        """
+        Drop every expired entry, returns how many went
+        """
+        now = self._timer()
+        expired = [key for key, entry in self._cache.items() if entry.expires_at <= now]
+        for key in expired:
+            self._cache.pop(key)
+        if expired:
+            ICACHE.inc(len(expired), result="expired")
+        return len(expired)
+
+    def put(self, interaction: "disnake.Interaction") -> None:
+        key = interaction.user.id
+        # re-insert so the dict stays in expiry order
+        self._cache.pop(key, None)
+        self._cache[key] = _Entry(interaction, self._timer() + self._ttl)
+        if len(self._cache) > self._maxsize and not self.purge():
+            self._cache.pop(next(iter(self._cache)))
+
+    async def update_with_interaction(self, interaction: "disnake.Interaction") -> None:
+        self.put(interaction)
 
 
 # singleton object
 icache = InteractionCache()
+
+
+async def send_private(user: "disnake.abc.User", **kwargs: T.Any) -> bool:
+    """
+    Send something only `user` should see.
+
+    Goes out as an ephemeral reply to their latest interaction when there's a live one,
+    and as a DM otherwise. Returns False if neither worked, e.g. their DMs are closed,
+    in which case the caller should ask them to click something in the game channel.
+    """
+    interaction = icache.get(user)
+    if interaction is not None:
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send(**kwargs, ephemeral=True)
+            else:
+                await interaction.response.send_message(**kwargs, ephemeral=True)
+            return True
+        except (disnake.NotFound, disnake.Forbidden):
+            # the token died early (or was never acknowledged in time)
+            icache.discard(user)
+        except disnake.HTTPException as exc:
+            print(f"Failed to send private message to {user.name}: {repr(exc)}")
+
+    try:
+        await user.send(**kwargs)
+    except disnake.HTTPException as exc:
+        print(f"Could not DM {user.name}: {repr(exc)}")
+        PRIVATE_FALLBACKS.inc(path="dropped")
+        return False
+    PRIVATE_FALLBACKS.inc(path="dm")
+    return True
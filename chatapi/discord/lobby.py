@@ -12,6 +12,7 @@ from chatapi.discord.driver import BotMessageDriver
 from chatapi.discord.driver import DiscordDriver
 from chatapi.discord.driver import WebhookDriver
 from chatapi.discord.forward import ForwardChatMessages
+from chatapi.discord.members import member_cache
 from chatapi.discord.panel import LobbyPanel
 from chatapi.discord.router import router
 from engine.config import GameConfig
@@ -131,12 +132,12 @@ class NewLobby:
 
     def _register_callbacks(self) -> None:
         #self._router.register_button_custom_callback("advance_game", self.debug_advance_game)
-        router.register_button_custom_callback("join", self.add_player)
-        router.register_button_custom_callback("leave", self.remove_player)
-        router.register_button_custom_callback("start", self.start_game)
-        router.register_button_custom_callback("close", self.close_lobby)
-        router.register_button_custom_callback("add_bot", self.add_bot)
-        router.register_button_custom_callback("remove_bot", self.remove_bot)
+        router.register_button_custom_callback(self.panel.route_id("join"), self.add_player)
+        router.register_button_custom_callback(self.panel.route_id("leave"), self.remove_player)
+        router.register_button_custom_callback(self.panel.route_id("start"), self.start_game)
+        router.register_button_custom_callback(self.panel.route_id("close"), self.close_lobby)
+        router.register_button_custom_callback(self.panel.route_id("add_bot"), self.add_bot)
+        router.register_button_custom_callback(self.panel.route_id("remove_bot"), self.remove_bot)
 
     def validate(self, interaction: "disnake.Interaction") -> bool:
         """
@@ -164,6 +165,8 @@ class NewLobby:
             self.users.append(user)
             if user not in self.players:
                 self.players[user] = Player.create_from_user(user)
+            # so game start doesn't have to fetch everybody
+            member_cache.warm(interaction.guild, user)
             await interaction.response.defer()
             await interaction.send(
                 "You have successfully joined the lobby.",
@@ -234,6 +237,7 @@ class NewLobby:
             await interaction.send("Command only available to lobby host", ephemeral=True, delete_after=5.0)
             return
         self.state = LobbyState.CLOSED
+        router.unregister_namespace(self.panel.namespace)
         await interaction.send("Closing lobby")
         await self.panel.delete()
 
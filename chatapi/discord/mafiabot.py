@@ -20,18 +20,23 @@ from chatapi.discord.bug_report import bug_report_modal
 from chatapi.discord.channel import channel_manager
 from chatapi.discord.chat import CHAT_DRIVERS
 from chatapi.discord.game import GAMES
-from chatapi.discord.icache import icache
+from chatapi.discord.game import SESSIONS
+from chatapi.discord.hideout import PROVISIONED_THREADS
+from chatapi.discord.members import member_cache
 from chatapi.discord.name import NameChanger
 from chatapi.discord.router import router
 from chatapi.discord.lobby import LobbyState
 from chatapi.discord.lobby import NewLobby
 from chatapi.discord.permissions import ALL_ROLES
+from chatapi.discord.permissions import GAME_ROLES
+from chatapi.discord.resources import resource_pool
 from engine.actor import Actor
 from engine.game import Game
 from engine.game_format import GameFormat
 from engine.message import Message
 from engine.role.mafia.godfather import Godfather
 from engine.player import Player
+from engine.session import Session
 from engine.phase import GamePhase
 
 from proto import service_pb2_grpc
@@ -66,6 +71,7 @@ class MafiaBot(commands.Bot):
         intents.message_content = True
         intents.members = True
         super().__init__(command_prefix=commands.when_mentioned_or('-'), intents=intents)
+        self._resume_tasks: T.List[asyncio.Task] = None
 
     async def start(self, *args, **kwargs) -> None:
         """
@@ -84,6 +90,9 @@ class MafiaBot(commands.Bot):
     async def on_ready(self):
         print(f'Logged in as {self.user} (ID: {self.user.id})')
         print('------')
+        # on_ready fires again on every reconnect, only resume once per process
+        if self._resume_tasks is None:
+            self._resume_tasks = Session.resume_unfinished(self.guilds)
 
     async def close_lobby(self, lobby: "NewLobby") -> None:
         try:
@@ -122,9 +131,10 @@ def main() -> None:
     bot.add_listener(router.on_string_select, name="on_dropdown")
     bot.add_listener(router.on_message)
     bot.add_listener(router.on_modal_submit)
+    bot.add_listener(member_cache.on_member_update)
+    bot.add_listener(member_cache.on_raw_member_remove)
 
-    router.register_button_general_callback(icache.update_with_interaction)
-    router.register_string_general_callback(icache.update_with_interaction)
+    # each game subscribes the interaction cache to its own buttons, see TownHall
 
     async def lobby_subparser(player: "Player", interaction, command: str, args: str) -> None:
         global bot
@@ -146,6 +156,10 @@ def main() -> None:
                 game_channel = await channel_manager.create_channel(interaction.guild, "mafia-bulletin")
                 lobby = NewLobby(interaction.guild, game_channel, format=game_format, debug=True)
                 lobby_manager[interaction.guild] = lobby
+                # roles, webhook and hideout threads get made while people join
+                resource_pool.provision(
+                    interaction.guild, game_channel, roles=GAME_ROLES, threads=PROVISIONED_THREADS,
+                )
             except BaseException:  # if creation fails, do not block another re-attempt
                 lobby_manager.pop(interaction.guild)
             await lobby.add_player(interaction)
@@ -198,6 +212,21 @@ def main() -> None:
         await rule.edit(enabled=False)
         await interaction.send("Automod rule disabled", ephemeral=True)
 
+    @bot.slash_command(description="[DEBUG] Profile the Mafia game in this channel until it ends")
+    async def profile(interaction):
+        interaction: "disnake.ApplicationCommandInteraction" = interaction
+        if interaction.user.name not in ('chilly mango', 'donbot', 'asiannub'):
+            await interaction.send("Unable to use command", ephemeral=True)
+            return
+        if interaction.channel.type == disnake.ChannelType.public_thread:
+            session = SESSIONS.get(interaction.channel.parent)
+        else:
+            session = SESSIONS.get(interaction.channel)
+        if session is None or not session.start_profiling():
+            await interaction.send("Unable to profile a game here", ephemeral=True)
+            return
+        await interaction.send("Profiling this game, the profile will be saved when it ends", ephemeral=True)
+
     @bot.slash_command(description="File a bug report")
     async def bug_report(interaction):
         interaction: "disnake.ApplicationCommandInteraction" = interaction
@@ -216,9 +245,7 @@ def main() -> None:
             game = Game({})
             gf = Godfather({})
             game.add_actors(Actor(Player(interaction.user.name), gf, game))
-            driver = await ChatDriver.create_with_name(
-                game, interaction.channel, "CourtChat"
-            )
+            driver = await ChatDriver.create(game, interaction.channel)
             CHAT_DRIVERS[interaction.channel] = driver
             driver.start()
 
@@ -247,7 +274,7 @@ def main() -> None:
             await interaction.send(embed=embed)
 
         elif command == "print-msg":
-            #router.register_message_callback(interaction.channel.name, print_msg)
+            #router.register_message_callback(interaction.channel, print_msg)
             await interaction.send("i'm printing messages")
         elif lobby is None or lobby.state in (LobbyState.OPEN, LobbyState.CLOSED):
             await lobby_subparser(interaction.user, interaction, command, args)
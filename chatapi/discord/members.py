@@ -0,0 +1,157 @@
+"""
+Member Cache
+
+Game start needs a `Member` for every human player (for their roles), and fetching them
+one REST call at a time adds up. Members are kept here across games instead, and kept
+fresh by the gateway's member events, so a regular only costs a request the first time.
+
+Missing members are requested in bulk over the gateway (the same chunking API disnake
+uses at startup, up to 100 users a request), with REST as the fallback. Lobbies warm
+the cache as players join, so by the time the game starts there's usually nothing left
+to fetch.
+"""
+import asyncio
+import os
+import typing as T
+from collections import defaultdict
+
+import disnake
+
+# Discord's cap on user ids per chunk request
+QUERY_LIMIT = 100
+# lobby joins within this many seconds go out as one request
+WARM_DELAY = float(os.environ.get("MAFIA_MEMBER_WARM_DELAY", 0.5))
+
+UserLike = T.Union["disnake.abc.User", int]
+
+
+def _user_id(user: UserLike) -> int:
+    return user if isinstance(user, int) else user.id
+
+
+class MemberCache:
+
+    def __init__(self, warm_delay: float = WARM_DELAY) -> None:
+        self._warm_delay = warm_delay
+        # guild id -> user id -> member
+        self._members: T.Dict[int, T.Dict[int, "disnake.Member"]] = defaultdict(dict)
+        # (guild id, user id) -> the request that will bring them in
+        self._pending: T.Dict[T.Tuple[int, int], asyncio.Future] = dict()
+        # guild id -> user ids waiting on the next warm up
+        self._warming: T.Dict[int, T.Set[int]] = dict()
+
+    def get(self, guild: "disnake.Guild", user: UserLike) -> T.Optional["disnake.Member"]:
+        user_id = _user_id(user)
+        member = self._members[guild.id].get(user_id)
+        if member is None:
+            # the gateway may have seen them already
+            member = guild.get_member(user_id)
+            if member is not None:
+                self.put(member)
+        return member
+
+    def put(self, member: "disnake.Member") -> None:
+        self._members[member.guild.id][member.id] = member
+
+    def forget(self, guild_id: int, user_id: int) -> None:
+        self._members[guild_id].pop(user_id, None)
+
+    async def fetch_many(self, guild: "disnake.Guild", users: T.Iterable[UserLike]) -> T.Dict[int, "disnake.Member"]:
+        """
+        Members for all of `users` by user id, requesting whoever isn't cached in one go.
+
+        Users that aren't in the guild are left out.
+        """
+        found: T.Dict[int, "disnake.Member"] = dict()
+        waiting: T.Set[asyncio.Future] = set()
+        missing: T.List[int] = []
+        for user_id in dict.fromkeys(_user_id(user) for user in users):
+            member = self.get(guild, user_id)
+            if member is not None:
+                found[user_id] = member
+                continue
+            pending = self._pending.get((guild.id, user_id))
+            if pending is not None:
+                waiting.add(pending)
+            else:
+                missing.append(user_id)
+
+        if missing:
+            # don't ask twice for anybody a lobby was about to warm up
+            self._warming.get(guild.id, set()).difference_update(missing)
+            request = asyncio.ensure_future(self._request(guild, missing))
+            for user_id in missing:
+                self._pending[(guild.id, user_id)] = request
+            waiting.add(request)
+
+        for members in await asyncio.gather(*[asyncio.shield(request) for request in waiting]):
+            found.update(members)
+        return found
+
+    async def _request(self, guild: "disnake.Guild", user_ids: T.List[int]) -> T.Dict[int, "disnake.Member"]:
+        members: T.Dict[int, "disnake.Member"] = dict()
+        try:
+            try:
+                chunks = await asyncio.gather(*[
+                    guild.query_members(user_ids=user_ids[idx:idx + QUERY_LIMIT], limit=QUERY_LIMIT)
+                    for idx in range(0, len(user_ids), QUERY_LIMIT)
+                ])
+                for chunk in chunks:
+                    for member in chunk:
+                        members[member.id] = member
+            except (asyncio.TimeoutError, disnake.ClientException, disnake.HTTPException) as exc:
+                print(f"Member chunk request failed, falling back to REST: {repr(exc)}")
+
+            stragglers = [user_id for user_id in user_ids if user_id not in members]
+            if stragglers:
+                fetched = await asyncio.gather(
+                    *[guild.fetch_member(user_id) for user_id in stragglers],
+                    return_exceptions=True,
+                )
+                for user_id, member in zip(stragglers, fetched):
+                    if isinstance(member, disnake.Member):
+                        members[user_id] = member
+                    elif not isinstance(member, disnake.NotFound):
+                        print(f"Failed to fetch member {user_id}: {repr(member)}")
+
+            for member in members.values():
+                self.put(member)
+            return members
+        finally:
+            for user_id in user_ids:
+                self._pending.pop((guild.id, user_id), None)
+
+    def warm(self, guild: "disnake.Guild", user: "disnake.abc.User") -> None:
+        """
+        Make sure we'll have `user`'s member by the time a game wants it
+        """
+        if isinstance(user, disnake.Member) and user.guild.id == guild.id:
+            # interactions in a guild already come with the member
+            self.put(user)
+            return
+        if self.get(guild, user) is not None:
+            return
+        batch = self._warming.get(guild.id)
+        if batch is None:
+            batch = self._warming[guild.id] = set()
+            asyncio.get_running_loop().call_later(
+                self._warm_delay, lambda: asyncio.ensure_future(self._warm(guild)),
+            )
+        batch.add(user.id)
+
+    async def _warm(self, guild: "disnake.Guild") -> None:
+        user_ids = self._warming.pop(guild.id, set())
+        if user_ids:
+            await self.fetch_many(guild, user_ids)
+
+    async def on_member_update(self, before: "disnake.Member", after: "disnake.Member") -> None:
+        # only the members we care about, big guilds have a lot of them
+        if after.id in self._members[after.guild.id]:
+            self.put(after)
+
+    async def on_raw_member_remove(self, payload: "disnake.RawGuildMemberRemoveEvent") -> None:
+        self.forget(payload.guild_id, payload.user.id)
+
+
+# singleton object
+member_cache = MemberCache()
@@ -6,6 +6,7 @@ import disnake
 from collections import deque
 
 from chatapi.discord.icache import icache
+from chatapi.discord.router import custom_id
 from chatapi.discord.router import router
 from engine.affiliation import MAFIA
 from engine.affiliation import TRIAD
@@ -40,14 +41,16 @@ def setup_lwdn_modal(game: "Game") -> None:
         if actor is None:
             print(f"Failed to update LWDN for {user.name}")
             return
-        actor._last_will = ""
-        actor._death_note = ""
+        last_will = ""
+        death_note = ""
         for row in interaction.data.components:
             for entry in row['components']:
                 if entry.get('custom_id') == 'lw':
-                    actor._last_will = entry['value']
+                    last_will = entry['value']
                 elif entry.get('custom_id') == 'dn':
-                    actor._death_note = entry['value']
+                    death_note = entry['value']
+        actor.submit_last_will(last_will)
+        actor.submit_death_note(death_note)
 
         await interaction.send("Successfully updated last will / death note", ephemeral=True)
 
@@ -138,6 +141,7 @@ class Panel:
         self._active_history: T.List[bool] = [False]
 
         self._prev_pub: T.Dict[str, T.Any] = dict()
+        self._prev_key: T.Optional[T.Hashable] = None
 
         self.initialize()
         self.setup_router()
@@ -197,6 +201,13 @@ class Panel:
         """
         return False
 
+    def state_key(self) -> T.Optional[T.Hashable]:
+        """
+        Something that changes whenever what the panel shows does, so `drive` can skip
+        rebuilding it. None if we can't tell, then it's rebuilt on every drive.
+        """
+        return None
+
     def data_repr(self) -> T.Dict:
         """
         Get the rehydrated output as a recursed dictionary. No Discord objects please!
@@ -228,13 +239,20 @@ class Panel:
                 self._visible = False
             return
 
+        # nothing it depends on changed, so neither did it
+        key = self.state_key()
+        if self._visible and key is not None and key == self._prev_key:
+            return
+
         self.update()
 
         # do not publish if there's no change
-        if self._visible and self.data_repr() == self._prev_pub:
+        data = self.data_repr()
+        self._prev_key = key
+        if self._visible and data == self._prev_pub:
             return
 
-        self._prev_pub = self.data_repr()
+        self._prev_pub = data
 
         try:
             await self.publish()
@@ -311,23 +329,30 @@ class LobbyPanel(Panel):
         # a row for join/leave lobby interaction
         join_leave_row = disnake.ui.ActionRow()
 
-        # TODO: additionally partition this by guild ID or something
-        join_leave_row.add_button(style=disnake.ButtonStyle.primary, label="Join Game", custom_id="join")
-        join_leave_row.add_button(style=disnake.ButtonStyle.grey, label="Leave Game", custom_id="leave")
+        join_leave_row.add_button(style=disnake.ButtonStyle.primary, label="Join Game", custom_id=self.route_id("join"))
+        join_leave_row.add_button(style=disnake.ButtonStyle.grey, label="Leave Game", custom_id=self.route_id("leave"))
 
         # a row for start lobby interaction maybe?
         start_end_row = disnake.ui.ActionRow()
-        start_end_row.add_button(style=disnake.ButtonStyle.green, label="Start Game", custom_id="start")
-        start_end_row.add_button(style=disnake.ButtonStyle.red, label="Close Lobby", custom_id="close")
+        start_end_row.add_button(style=disnake.ButtonStyle.green, label="Start Game", custom_id=self.route_id("start"))
+        start_end_row.add_button(style=disnake.ButtonStyle.red, label="Close Lobby", custom_id=self.route_id("close"))
 
         rows = [join_leave_row, start_end_row]
         if self._debug:
             debug_row = disnake.ui.ActionRow()
-            debug_row.add_button(style=disnake.ButtonStyle.danger, label="Add Bot", custom_id="add_bot")
-            debug_row.add_button(style=disnake.ButtonStyle.danger, label="Remove Bot", custom_id="remove_bot")
+            debug_row.add_button(style=disnake.ButtonStyle.danger, label="Add Bot", custom_id=self.route_id("add_bot"))
+            debug_row.add_button(style=disnake.ButtonStyle.danger, label="Remove Bot", custom_id=self.route_id("remove_bot"))
             rows.append(debug_row)
         self._components = rows[:]
 
+    @property
+    def namespace(self) -> str:
+        # lobbies don't have a game yet, their channel tells them apart
+        return f"lobby-{self._channel.id}"
+
+    def route_id(self, action: str) -> str:
+        return custom_id(self.namespace, self.__class__.__name__, action)
+
     async def close(self) -> None:
         """
         Show that the game has started and that the lobby is closed.
@@ -360,6 +385,16 @@ class GamePanel(Panel):
         self._game = game
         super().__init__(channel, debug=debug)
 
+    @property
+    def route_panel(self) -> str:
+        """
+        The middle part of this panel's custom ids, the game is the namespace
+        """
+        return self.__class__.__name__
+
+    def route_id(self, action: str) -> str:
+        return custom_id(self._game.id, self.route_panel, action)
+
 
 class PublicGamePanel(GamePanel):
     """
@@ -390,6 +425,8 @@ class PrivateGamePanel(GamePanel):
         debug: bool = False
     ) -> None:
         self._actor = actor
+        # custom ids need the game before GamePanel gets to set it
+        self._game = game
         if not self._actor.player.is_human:
             raise ValueError(f"Player {actor.name} is not a human")
 
@@ -410,22 +447,26 @@ class PrivateGamePanel(GamePanel):
         super().__init__(game, channel, debug=debug)
         self.setup_message_collector()
 
+    @property
+    def route_panel(self) -> str:
+        return f"{self.__class__.__name__}-{self._actor.name}"
+
     @property
     def open_graveyard_id(self) -> str:
         # TODO: a lot of these can probably just be general
-        return f"open-gy-{self.__class__.__name__}-{self._actor.name}"
+        return self.route_id("open-gy")
 
     @property
     def setup_button_id(self) -> str:
-        return f"setup-button-{self.__class__.__name__}-{self._actor.name}"
+        return self.route_id("setup-button")
 
     @property
     def lwdn_id(self) -> str:
-        return f"open-lwdn-{self.__class__.__name__}-{self._actor.name}"
+        return self.route_id("open-lwdn")
 
     @property
     def submit_lwdn_id(self) -> str:
-        return f"submit-lwdn-{self.__class__.__name__}-{self._actor.name}"
+        return self.route_id("submit-lwdn")
 
     def setup_router(self) -> None:
         super().setup_router()
@@ -456,9 +497,9 @@ class PrivateGamePanel(GamePanel):
         for row in interaction.data.components:
             for entry in row['components']:
                 if entry.get('custom_id') == 'lw':
-                    self._actor._last_will = entry['value']
+                    self._actor.submit_last_will(entry['value'])
                 elif entry.get('custom_id') == 'dn':
-                    self._actor._death_note = entry['value']
+                    self._actor.submit_death_note(entry['value'])
 
         await interaction.send("Successfully updated last will / death note", ephemeral=True)
 
@@ -493,7 +534,7 @@ class PrivateGamePanel(GamePanel):
         By default we listen to all sent messages from our bot account and cache them
         as message instances. That way we know which messages to delete.
         """
-        router.register_message_callback(self._channel.name, self.on_message)
+        router.register_message_callback(self._channel, self.on_message)
 
     async def on_message(self, message: "disnake.Message") -> None:
         if not message.author.bot:
@@ -550,6 +591,10 @@ class PrivateGamePanel(GamePanel):
                 print(f"Failed to edit {self.__class__.__name__} for {self._actor.name}")
         try:
             await ia.send(**self.rehydrate(), ephemeral=True)
+        except disnake.NotFound:
+            # Discord gave up on the token before we did, ask for a fresh one next time
+            icache.discard(self._actor.player.user)
+            print(f"Stale interaction for {self._actor.name}, dropping {self.__class__.__name__}")
         except Exception as exc:
             print(repr(exc))
             print(f"Failed to drive {self.__class__.__name__} for {self._actor.name}")
@@ -562,7 +607,11 @@ class PrivateGamePanel(GamePanel):
         TODO: maybe add more granularity
         """
         ia = icache.get(self._actor.player.user)
-        
+        if ia is None:
+            # the token is gone, and the messages with it
+            self._instances = []
+            return
+
         for msg in self._instances:
             try:
                 await ia.followup.delete_message(msg.id)
@@ -657,7 +706,7 @@ class DayPanel(PrivateGamePanel):
 
     @property
     def day_target_id(self) -> str:
-        return f"day_target_{self._actor.name}"
+        return self.route_id("day_target")
 
     @property
     def has_valid_day_action(self) -> bool:
@@ -680,17 +729,17 @@ class DayPanel(PrivateGamePanel):
             TurnPhase.DAYLIGHT,
             # don't allow targeting in Dusk
         ):
-            self._actor.choose_targets()
+            self._actor.submit_targets()
             await interaction.response.defer()
         else:
             # if action is instant (it often is), execute immediately
-            self._actor.choose_targets(actor)
+            self._actor.submit_targets(actor)
 
             # if there are any instant actions, do them immediately
             should_reset = False
             for action in self._actor.role.day_actions():
                 if action.instant():
-                    SequenceEvent(action(), self._actor).execute()
+                    SequenceEvent(action(), self._actor).execute_instant()
                     should_reset = True
 
             if should_reset:
@@ -699,10 +748,11 @@ class DayPanel(PrivateGamePanel):
             await interaction.response.defer()
 
     def _update_embed(self) -> None:
-        self._embed.title = self._actor.role.name
+        meta = self._actor.role.meta()
+        self._embed.title = meta.name
         self._embed.description = \
-            f"You are {'the' if self._actor.role.unique() else 'a'} **{self._actor.role.name}**.\n\n" \
-            f"**Action**:\n{self._actor.role.day_action_description()}\n\n"
+            f"You are {'the' if meta.unique else 'a'} **{meta.name}**.\n\n" \
+            f"**Action**:\n{meta.day_action_description}\n\n"
         if self._actor.has_day_action and self._actor.role._ability_uses == 0:
             self._embed.description += f"**Uses Left**:\n{self._actor.role._ability_uses}\n\n"
         if isinstance(self._actor.role, Executioner):
@@ -767,23 +817,23 @@ class TribunalPanel(PublicGamePanel):
 
     @property
     def lynch_vote_yes_id(self) -> str:
-        return f"lynch_vote_yes"
+        return self.route_id("lynch_vote_yes")
 
     @property
     def lynch_vote_no_id(self) -> str:
-        return f"lynch_vote_no"
+        return self.route_id("lynch_vote_no")
 
     @property
     def lynch_vote_abs_id(self) -> str:
-        return f"lynch_vote_abs"
+        return self.route_id("lynch_vote_abs")
 
     @property
     def trial_vote_id(self) -> str:
-        return f"trial_vote"
+        return self.route_id("trial_vote")
 
     @property
     def skip_vote_id(self) -> str:
-        return f"skip-vote"
+        return self.route_id("skip-vote")
 
     def initialize(self) -> None:
         # keep track of row height
@@ -827,6 +877,9 @@ class TribunalPanel(PublicGamePanel):
         router.register_button_custom_callback(self.lynch_vote_abs_id, self.lynch_vote_abstain)
         router.register_button_custom_callback(self.skip_vote_id, self.skip_vote)
 
+    def state_key(self) -> T.Hashable:
+        return self._game.tribunal.state_key
+
     def _update_embed(self) -> None:
         self._embed.title = f"Tribunal"
         self._embed.description = self._game.tribunal.get_state_description()
@@ -919,15 +972,15 @@ class NightPanel(PrivateGamePanel):
 
     @property
     def night_target_id(self) -> str:
-        return f"night_target_{self._actor.name}"
+        return self.route_id("night_target")
 
     @property
     def wear_vest_id(self) -> str:
-        return f"wear_vest_{self._actor.name.replace(' ', '_')}"
+        return self.route_id("wear_vest")
 
     @property
     def remove_vest_id(self) -> str:
-        return f"remove_vest_{self._actor.name.replace(' ', '_')}"
+        return self.route_id("remove_vest")
 
     def setup_router(self) -> None:
         super().setup_router()
@@ -936,10 +989,11 @@ class NightPanel(PrivateGamePanel):
         router.register_button_custom_callback(self.remove_vest_id, self.remove_vest)
 
     def _update_embed(self) -> None:
-        self._embed.title = self._actor.role.name
+        meta = self._actor.role.meta()
+        self._embed.title = meta.name
         self._embed.description = \
-            f"You are {'the' if self._actor.role.unique() else 'a'} **{self._actor.role.name}**.\n\n" \
-            f"**Action**:\n{self._actor.role.night_action_description()}\n\n"
+            f"You are {'the' if meta.unique else 'a'} **{meta.name}**.\n\n" \
+            f"**Action**:\n{meta.night_action_description}\n\n"
         if self._actor.has_night_action and self._actor.role._ability_uses > 0:
             self._embed.description += f"**Uses Left**:\n{self._actor.role._ability_uses}\n\n"
         self._embed.set_author(name=self.author)
@@ -1007,10 +1061,10 @@ class NightPanel(PrivateGamePanel):
         name = interaction.data['values'][0]
         actor = self._game.get_actor_by_name(name)
         if actor is None:
-            self._actor.choose_targets()
+            self._actor.submit_targets()
             await interaction.response.defer()
         else:
-            self._actor.choose_targets(actor)
+            self._actor.submit_targets(actor)
             await interaction.response.defer()
 
     async def wear_vest(self, interaction: "disnake.Interaction") -> None:
@@ -1049,11 +1103,11 @@ class JudgePanel(NightPanel):
 
     @property
     def submit_crier_message_id(self) -> str:
-        return f"submit-crier-message-{self._actor.name}"
+        return self.route_id("submit-crier-message")
 
     @property
     def crier_message_id(self) -> str:
-        return f"open-crier-message-{self._actor.name}"
+        return self.route_id("open-crier-message")
 
     async def open_crier_modal(self, interaction: "disnake.Interaction") -> None:
         # hydrate with current LW / DN
@@ -1109,11 +1163,12 @@ class WelcomePanel(PrivateGamePanel):
 
     def update_embed(self) -> None:
         role = self._actor.role
-        self._embed.description = f"You are a **{role.name}**.\n\n" \
+        meta = role.meta()
+        self._embed.description = f"You are a **{meta.name}**.\n\n" \
             f"**Role Description**:\n" \
-            f"{role.role_description()}\n\n" \
+            f"{meta.role_description}\n\n" \
             f"**Affiliation**:\n" \
-            f"{role.affiliation_description()}\n\n"
+            f"{meta.affiliation_description}\n\n"
         if isinstance(role, Executioner):
             exec_targ: Executioner = self._actor.role.executioner_target
             exec_name = exec_targ.name if exec_targ is not None else "Unknown"
@@ -1128,8 +1183,8 @@ class WelcomePanel(PrivateGamePanel):
         self._embed.description += \
             f"**Win Condition**:\n" \
             f"{role.win_condition().description()}\n\n" \
-            f"**Day Action**:\n{role.day_action_description()}\n\n" \
-            f"**Night Action**:\n{role.night_action_description()}\n\n"
+            f"**Day Action**:\n{meta.day_action_description}\n\n" \
+            f"**Night Action**:\n{meta.night_action_description}\n\n"
 
     def initialize(self) -> None:
         self._embed = disnake.Embed()
@@ -1199,11 +1254,11 @@ class JailPanel(NightPanel):
         if actor is None:
             # additionally send something to the hideout lol
             await self._game.town_hall.signal_jail(self._actor, "**Jailor** has changed their mind.")
-            self._actor.choose_targets()
+            self._actor.submit_targets()
             await interaction.response.defer()
         else:
             await self._game.town_hall.signal_jail(self._actor, "**Jailor** has chosen to **execute** the prisoner.")
-            self._actor.choose_targets(actor)
+            self._actor.submit_targets(actor)
             await interaction.response.defer()
 
 
@@ -1,11 +1,44 @@
 """
-Create some permission groups for the game
+Create some permission groups for the game, and keep members in the right ones.
+
+Role edits are some of the most rate limited calls Discord has, so rather than firing
+off an add_roles / remove_roles per change, the `PermissionReconciler` is told what
+roles each member should have and works out the rest:
+
+    * it remembers the managed roles Discord last confirmed each member has
+    * a member whose wanted roles differ gets queued, once, however many times they
+      change before we get to them
+    * a worker replaces the member's whole role list with one `member.edit(roles=...)`
+      and records the roles Discord sends back as confirmed
+    * failures back off and retry, nothing is assumed to have worked
 """
+import asyncio
+import logging
 import typing as T
+
 import disnake
 
+from chatapi.discord.resources import resource_pool
+from engine.buffer import BoundedQueue
+from engine.buffer import DropPolicy
+from engine.metrics import ROLE_EDIT
+from engine.metrics import ROLE_EDITS
+import log
+
+logger = logging.getLogger(__name__)
+logger.addHandler(log.ch)
+logger.setLevel(logging.INFO)
+
 LIVE_PLAYER = "Live Player"
 MAFIA_LIVE = "Mafia Live"
+GAME_ROLES = (LIVE_PLAYER, MAFIA_LIVE)
+
+# edits in flight at once, Discord rate limits these per guild anyway
+RECONCILE_WORKERS = 2
+# one entry per member at most, anything past this is picked up on a later pass
+RECONCILE_QUEUE = 256
+RETRY_BASE = 1.0
+RETRY_CAP = 30.0
 
 
 class PermissionsManager:
@@ -22,15 +55,15 @@ class PermissionsManager:
         # A Live Player is alive and attached to a game of Mafia.
         # When players in Mafia die, they are removed from this role.
 
-        self._roles[LIVE_PLAYER] = await self._guild.create_role(name=LIVE_PLAYER)
-    
         # Mafia Player
         # A Mafia Player is a live player with the Mafia affiliation.
         # This should give them access to the Mafia night-time chat.
-        self._roles[MAFIA_LIVE] = await self._guild.create_role(name=MAFIA_LIVE)
 
         # TODO: JAIL ROLES!!!
 
+        # the roles are shared by every game in the guild, see `ResourcePool`
+        self._roles = await resource_pool.roles(self._guild, GAME_ROLES)
+
         # add all roles
         ALL_ROLES.update(self._roles.values())
 
@@ -39,3 +72,142 @@ class PermissionsManager:
 
 # during cleanup we want to delete every single role we've added
 ALL_ROLES: T.Set["disnake.Role"] = set()
+
+
+class PermissionReconciler:
+    """
+    Converges each member's game roles on what we want them to be
+
+    Only `managed` roles are ever added or removed, anything else a member has is
+    left alone.
+    """
+
+    def __init__(
+        self,
+        managed: T.Iterable["disnake.Role"],
+        workers: int = RECONCILE_WORKERS,
+        queue_size: int = RECONCILE_QUEUE,
+        tags: T.Dict[str, str] = None,
+    ) -> None:
+        self._managed: T.Dict[int, "disnake.Role"] = {role.id: role for role in managed}
+        self._workers = workers
+        self._tags = tags if tags is not None else dict()
+        self._queue = BoundedQueue(queue_size, policy=DropPolicy.DROP_NEWEST, name="role_edits")
+        self._queue.tags = self._tags
+        self._tasks: T.List[asyncio.Task] = []
+
+        self._members: T.Dict[int, "disnake.Member"] = dict()
+        self._desired: T.Dict[int, T.FrozenSet[int]] = dict()
+        # managed roles Discord last told us the member has
+        self._confirmed: T.Dict[int, T.FrozenSet[int]] = dict()
+        # members in the queue or being edited right now
+        self._queued: T.Set[int] = set()
+        self._failures: T.Dict[int, int] = dict()
+        self._retrying: T.Set[int] = set()
+
+    def _managed_ids(self, roles: T.Iterable["disnake.Role"]) -> T.FrozenSet[int]:
+        return frozenset(role.id for role in roles if role.id in self._managed)
+
+    @property
+    def pending(self) -> int:
+        """
+        Members whose roles don't match what we want yet
+        """
+        return sum(1 for member_id, desired in self._desired.items() if self._confirmed.get(member_id) != desired)
+
+    def confirmed(self, member: "disnake.Member") -> T.FrozenSet["disnake.Role"]:
+        return frozenset(self._managed[role_id] for role_id in self._confirmed.get(member.id, ()))
+
+    def want(self, member: "disnake.Member", roles: T.Iterable["disnake.Role"]) -> None:
+        """
+        Say which managed roles `member` should have. Cheap, call it as often as you like.
+        """
+        if member.id not in self._confirmed:
+            # first time we've seen them, start from what Discord says they have
+            self._confirmed[member.id] = self._managed_ids(member.roles)
+        self._members[member.id] = member
+        self._desired[member.id] = self._managed_ids(roles)
+        self._maybe_enqueue(member.id)
+
+    def _maybe_enqueue(self, member_id: int) -> None:
+        if member_id in self._queued or member_id in self._retrying or member_id not in self._desired:
+            return
+        if self._confirmed.get(member_id) == self._desired[member_id]:
+            return
+        if len(self._queue) >= self._queue.maxsize:
+            # don't lose track of them, the next `want` tries again
+            return
+        self._queued.add(member_id)
+        self._queue.put_nowait(member_id)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self._workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def flush(self) -> None:
+        """
+        Wait for everything queued so far to be attempted
+        """
+        await self._queue.join()
+
+    async def _work(self) -> None:
+        while True:
+            member_id = await self._queue.get()
+            try:
+                await self._reconcile(member_id)
+            except Exception as exc:
+                logger.exception(exc)
+            finally:
+                self._queued.discard(member_id)
+                self._queue.task_done()
+            # wants may have changed while the edit was out
+            self._maybe_enqueue(member_id)
+
+    async def _reconcile(self, member_id: int) -> None:
+        member = self._members.get(member_id)
+        # whatever's wanted now, every change since this was queued collapses into it
+        desired = self._desired.get(member_id)
+        if member is None or desired is None or self._confirmed.get(member_id) == desired:
+            return
+
+        roles = [role for role in member.roles if role.id not in self._managed and not role.is_default()]
+        roles.extend(self._managed[role_id] for role_id in desired)
+        try:
+            with ROLE_EDIT.time(**self._tags):
+                updated = await member.edit(roles=roles, reason="Mafia game permissions")
+        except disnake.NotFound:
+            # left the guild, nothing to reconcile anymore
+            ROLE_EDITS.inc(result="missing", **self._tags)
+            self.forget(member_id)
+            return
+        except (disnake.HTTPException, OSError) as exc:
+            ROLE_EDITS.inc(result="error", **self._tags)
+            failures = self._failures[member_id] = self._failures.get(member_id, 0) + 1
+            delay = min(RETRY_CAP, RETRY_BASE * 2 ** (failures - 1))
+            logger.warning(f"Role edit for {member} failed ({exc!r}), retrying in {delay:.0f}s")
+            self._retrying.add(member_id)
+            asyncio.get_running_loop().call_later(delay, self._retry, member_id)
+            return
+
+        ROLE_EDITS.inc(result="ok", **self._tags)
+        self._failures.pop(member_id, None)
+        if updated is not None:
+            self._members[member_id] = updated
+            self._confirmed[member_id] = self._managed_ids(updated.roles)
+        else:
+            self._confirmed[member_id] = desired
+
+    def _retry(self, member_id: int) -> None:
+        self._retrying.discard(member_id)
+        self._maybe_enqueue(member_id)
+
+    def forget(self, member_id: int) -> None:
+        for state in (self._members, self._desired, self._confirmed, self._failures):
+            state.pop(member_id, None)
+        self._retrying.discard(member_id)
@@ -45,7 +45,7 @@ def role_pref_modal() -> disnake.ui.Modal:
         components=[preferred_role_row, blocked_role_row],
     )
 
-    router.register_custom_modal_callback("bug-report-modal", submit_role_pref_modal)
+    router.register_custom_modal_callback("role-pref-modal", submit_role_pref_modal)
 
     ROLE_PREF_MODAL = modal
     return modal
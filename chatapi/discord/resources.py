@@ -0,0 +1,199 @@
+"""
+Resource Pool
+
+Starting a game used to create its permission roles, a webhook per driver and a private
+thread per hideout (plus a couple of Jail threads every night), one Discord call after
+another, and delete them all again afterwards. They're kept per guild and handed back
+out instead:
+
+    * roles are made once per guild, or picked back up by name after a restart
+    * webhooks come from the shared `webhook_pool`
+    * released threads have their members removed right away, then get purged and
+      archived in the background. Acquiring one later is a single unarchive.
+
+`provision` warms all of this up as soon as a lobby opens, so by the time the game
+starts there's mostly permission edits left to do.
+"""
+import asyncio
+import os
+import typing as T
+from collections import defaultdict
+
+import disnake
+
+from chatapi.discord.webhook import webhook_pool
+from engine.metrics import DISCORD_RESOURCES
+
+# archived threads we keep around per (channel, name), past this they get deleted
+MAX_IDLE_THREADS = int(os.environ.get("MAFIA_IDLE_THREADS", 8))
+
+Channel = T.Union["disnake.TextChannel", "disnake.Thread"]
+
+
+class ResourcePool:
+
+    def __init__(self, max_idle_threads: int = MAX_IDLE_THREADS) -> None:
+        self._max_idle_threads = max_idle_threads
+        # guild id -> role name -> role
+        self._roles: T.Dict[int, T.Dict[str, "disnake.Role"]] = defaultdict(dict)
+        self._pending_roles: T.Dict[T.Tuple[int, str], asyncio.Future] = dict()
+        # (parent channel id, thread name) -> clean, archived threads
+        self._idle: T.Dict[T.Tuple[int, str], T.List["disnake.Thread"]] = defaultdict(list)
+        self._recycling: T.Set[asyncio.Task] = set()
+        self._provisioning: T.Dict[int, asyncio.Task] = dict()
+
+    def idle_threads(self, channel: "disnake.TextChannel", name: str) -> int:
+        return len(self._idle.get((channel.id, name), ()))
+
+    async def roles(self, guild: "disnake.Guild", names: T.Iterable[str]) -> T.Dict[str, "disnake.Role"]:
+        """
+        The guild's roles by name, made if need be
+        """
+        names = list(names)
+        roles = await asyncio.gather(*[self._role(guild, name) for name in names])
+        return dict(zip(names, roles))
+
+    async def _role(self, guild: "disnake.Guild", name: str) -> "disnake.Role":
+        role = self._roles[guild.id].get(name)
+        if role is not None and guild.get_role(role.id) is not None:
+            DISCORD_RESOURCES.inc(resource="role", result="reused")
+            return role
+        key = (guild.id, name)
+        pending = self._pending_roles.get(key)
+        if pending is None:
+            pending = self._pending_roles[key] = asyncio.ensure_future(self._find_or_create_role(guild, name))
+        try:
+            return await asyncio.shield(pending)
+        finally:
+            if pending.done() and self._pending_roles.get(key) is pending:
+                self._pending_roles.pop(key)
+
+    async def _find_or_create_role(self, guild: "disnake.Guild", name: str) -> "disnake.Role":
+        role = disnake.utils.get(guild.roles, name=name)
+        if role is None:
+            DISCORD_RESOURCES.inc(resource="role", result="created")
+            role = await guild.create_role(name=name)
+        else:
+            DISCORD_RESOURCES.inc(resource="role", result="reused")
+        self._roles[guild.id][name] = role
+        return role
+
+    async def acquire_thread(self, channel: "disnake.TextChannel", name: str) -> "disnake.Thread":
+        """
+        A private thread under `channel` with nobody in it
+        """
+        idle = self._idle.get((channel.id, name))
+        while idle:
+            thread = idle.pop()
+            try:
+                if thread.archived or thread.locked:
+                    thread = await thread.edit(archived=False, locked=False)
+            except disnake.NotFound:
+                # somebody deleted it, try the next one
+                continue
+            except disnake.HTTPException as exc:
+                print(f"Could not reuse thread {thread.name}: {repr(exc)}")
+                continue
+            DISCORD_RESOURCES.inc(resource="thread", result="reused")
+            return thread
+
+        DISCORD_RESOURCES.inc(resource="thread", result="created")
+        return await channel.create_thread(
+            name=name,
+            type=disnake.ChannelType.private_thread,
+            invitable=False,
+        )
+
+    async def release_thread(self, thread: "disnake.Thread", emptied: bool = False) -> None:
+        """
+        Take everybody out of `thread` now, and clean it up for reuse in the background.
+
+        Pass `emptied` if the caller already removed its members.
+        """
+        if not emptied:
+            try:
+                members = await thread.fetch_members()
+                await asyncio.gather(*[
+                    thread.remove_user(member) for member in members if member.id != thread.guild.me.id
+                ])
+            except disnake.HTTPException as exc:
+                # it may still have people in it, don't hand it out again
+                print(f"Failed to empty thread {thread.name}: {repr(exc)}")
+                return
+        task = asyncio.create_task(self._recycle(thread))
+        self._recycling.add(task)
+        task.add_done_callback(self._recycling.discard)
+
+    async def _recycle(self, thread: "disnake.Thread") -> None:
+        idle = self._idle[(thread.parent_id, thread.name)]
+        try:
+            if len(idle) >= self._max_idle_threads:
+                await thread.delete()
+                return
+            # whoever gets it next shouldn't see what was said in it
+            await thread.purge(limit=None)
+            await thread.edit(archived=True)
+        except disnake.HTTPException as exc:
+            print(f"Failed to recycle thread {thread.name}: {repr(exc)}")
+            return
+        idle.append(thread)
+
+    def provision(
+        self,
+        guild: "disnake.Guild",
+        channel: "disnake.TextChannel",
+        roles: T.Iterable[str] = (),
+        threads: T.Dict[str, int] = None,
+    ) -> asyncio.Task:
+        """
+        Get a game's worth of resources ready in the background, see `ready`
+        """
+        task = self._provisioning.get(guild.id)
+        if task is None or task.done():
+            task = self._provisioning[guild.id] = asyncio.create_task(
+                self._provision(guild, channel, list(roles), threads or dict())
+            )
+        return task
+
+    async def _provision(
+        self,
+        guild: "disnake.Guild",
+        channel: "disnake.TextChannel",
+        roles: T.List[str],
+        threads: T.Dict[str, int],
+    ) -> None:
+        async def make_thread(name: str) -> None:
+            thread = await channel.create_thread(
+                name=name,
+                type=disnake.ChannelType.private_thread,
+                invitable=False,
+            )
+            DISCORD_RESOURCES.inc(resource="thread", result="created")
+            self._idle[(channel.id, name)].append(thread)
+
+        results = await asyncio.gather(
+            self.roles(guild, roles),
+            webhook_pool.get(channel),
+            *[
+                make_thread(name)
+                for name, count in threads.items()
+                for _ in range(count - self.idle_threads(channel, name))
+            ],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                # whatever's missing gets made on demand instead
+                print(f"Failed to provision for {guild.name}: {repr(result)}")
+
+    async def ready(self, guild: "disnake.Guild") -> None:
+        """
+        Wait for any provisioning for this guild to finish
+        """
+        task = self._provisioning.get(guild.id)
+        if task is not None:
+            await asyncio.shield(task)
+
+
+# singleton object
+resource_pool = ResourcePool()
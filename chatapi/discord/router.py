@@ -1,5 +1,18 @@
 """
 Button Click Input Router
+
+Custom ids are namespaced so several games (and lobbies) can run in one process
+without stepping on each other's buttons:
+
+    custom_id(game.id, "NightPanel-Albert", "night_target") -> "1f3a9c2e:NightPanel-Albert:night_target"
+
+Dispatch looks the (namespace, panel, action) key up level by level, so a click costs
+a few dict lookups however many games are running. Ids without a namespace (e.g. the
+bug report modal) live in the global namespace.
+
+General callbacks only see interactions from the namespaces they subscribe to, and
+message callbacks are keyed by channel id rather than name, since every game's bulletin
+channel is called "mafia-bulletin".
 """
 import asyncio
 import typing as T
@@ -7,33 +20,101 @@ from cachetools import TTLCache
 from collections import defaultdict
 import disnake
 
+Callback = T.Callable[[T.Any], T.Coroutine]
 
-class Subrouter:
+GLOBAL = ""
+SEPARATOR = ":"
+# Discord won't take longer custom ids
+MAX_CUSTOM_ID = 100
+
+
+class RouteKey(T.NamedTuple):
+    namespace: str
+    panel: str
+    action: str
+
+
+def custom_id(namespace: str, panel: str, action: str) -> str:
     """
-    Composite object for Router
+    Build a custom id the router can dispatch on
     """
+    key = SEPARATOR.join((namespace, panel, action))
+    if len(key) > MAX_CUSTOM_ID:
+        raise ValueError(f"Custom id {key!r} is longer than {MAX_CUSTOM_ID} characters")
+    return key
 
-    def __init__(self) -> None:
-        self._general_callbacks: T.List[T.Coroutine] = list()
-        self._custom_id_callbacks: T.Dict[str, T.Coroutine] = dict()
-        self._seen_interactions = TTLCache(maxsize=1000, ttl=5)
 
-    def register_general_callback(self, callback: T.Coroutine) -> None:
-        if callback not in self._general_callbacks:
-            self._general_callbacks.append(callback)
+def parse_custom_id(key: str) -> RouteKey:
+    namespace, sep, rest = key.partition(SEPARATOR)
+    if not sep:
+        return RouteKey(GLOBAL, GLOBAL, key)
+    # player names may have anything in them, so the panel is whatever's in between
+    panel, sep, action = rest.rpartition(SEPARATOR)
+    if not sep:
+        return RouteKey(namespace, GLOBAL, action)
+    return RouteKey(namespace, panel, action)
 
-    def unregister_general_callback(self, callback: T.Coroutine) -> None:
-        if callback in self._general_callbacks:
-            self._general_callbacks.remove(callback)
 
-    def register_custom_callback(self, key: str, callback: T.Coroutine) -> None:
-        if key in self._custom_id_callbacks:
+class Subrouter:
+    """
+    Composite object for Router
+    """
+
+    def __init__(self) -> None:
+        # every namespace, keep these few and cheap
+        self._general_callbacks: T.List[Callback] = list()
+        self._subscribers: T.Dict[str, T.List[Callback]] = defaultdict(list)
+        # namespace -> panel -> action -> callback
+        self._routes: T.Dict[str, T.Dict[str, T.Dict[str, Callback]]] = dict()
+
+    def register_general_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        callbacks = self._general_callbacks if namespace is None else self._subscribers[namespace]
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def unregister_general_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        callbacks = self._general_callbacks if namespace is None else self._subscribers.get(namespace, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if namespace is not None and not callbacks:
+            self._subscribers.pop(namespace, None)
+
+    def general_callbacks(self, namespace: str) -> T.List[Callback]:
+        subscribers = self._subscribers.get(namespace)
+        if not subscribers:
+            return self._general_callbacks
+        return self._general_callbacks + subscribers
+
+    def register_custom_callback(self, key: str, callback: Callback) -> None:
+        namespace, panel, action = parse_custom_id(key)
+        actions = self._routes.setdefault(namespace, dict()).setdefault(panel, dict())
+        if action in actions:
             raise KeyError(f"Callback already registered for key {key}")
-        self._custom_id_callbacks[key] = callback
+        actions[action] = callback
 
     def unregister_custom_callback(self, key: str) -> None:
-        if key in self._custom_id_callbacks:
-            self._custom_id_callbacks.pop(key)
+        namespace, panel, action = parse_custom_id(key)
+        panels = self._routes.get(namespace)
+        if panels is None or panel not in panels:
+            return
+        panels[panel].pop(action, None)
+        if not panels[panel]:
+            panels.pop(panel)
+        if not panels:
+            self._routes.pop(namespace)
+
+    def unregister_namespace(self, namespace: str) -> None:
+        self._routes.pop(namespace, None)
+        self._subscribers.pop(namespace, None)
+
+    def find(self, key: RouteKey) -> T.Optional[Callback]:
+        panels = self._routes.get(key.namespace)
+        if panels is None:
+            return None
+        actions = panels.get(key.panel)
+        if actions is None:
+            return None
+        return actions.get(key.action)
 
 
 class Router:
@@ -43,88 +124,106 @@ class Router:
         self._string_router = Subrouter()
         self._modal_router = Subrouter()
 
-        # mapping of channel name to a subrouter for that channel
-        self._message_routers: T.Dict[str, Subrouter] = defaultdict(Subrouter)
+        # channel id -> callbacks for messages in that channel
+        self._message_callbacks: T.Dict[int, T.List[Callback]] = dict()
 
-        self._button_general_callbacks: T.List[T.Coroutine] = list()
-        self._button_custom_id_callbacks: T.Dict[str, T.Coroutine] = dict()
-        self._string_general_callbacks: T.List[T.Coroutine] = list()
-        self._string_custom_id_callbacks: T.Dict[str, T.Coroutine] = dict()
         self._seen_interactions = TTLCache(maxsize=1000, ttl=5)
 
-    def register_button_general_callback(self, callback: T.Coroutine) -> None:
-        self._button_router.register_general_callback(callback)
+    def register_button_general_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        self._button_router.register_general_callback(callback, namespace)
 
-    def unregister_button_general_callback(self, callback: T.Coroutine) -> None:
-        self._button_router.unregister_general_callback(callback)
+    def unregister_button_general_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        self._button_router.unregister_general_callback(callback, namespace)
 
-    def register_button_custom_callback(self, key: str, callback: T.Coroutine) -> None:
+    def register_button_custom_callback(self, key: str, callback: Callback) -> None:
         self._button_router.register_custom_callback(key, callback)
 
     def unregister_button_custom_callback(self, key: str) -> None:
         self._button_router.unregister_custom_callback(key)
 
-    def register_string_general_callback(self, callback: T.Coroutine) -> None:
-        self._string_router.register_general_callback(callback)
+    def register_string_general_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        self._string_router.register_general_callback(callback, namespace)
 
-    def unregister_string_general_callback(self, callback: T.Coroutine) -> None:
-        self._string_router.unregister_general_callback(callback)
+    def unregister_string_general_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        self._string_router.unregister_general_callback(callback, namespace)
 
-    def register_string_custom_callback(self, key: str, callback: T.Coroutine) -> None:
+    def register_string_custom_callback(self, key: str, callback: Callback) -> None:
         self._string_router.register_custom_callback(key, callback)
 
     def unregister_string_custom_callback(self, key: str) -> None:
         self._string_router.unregister_custom_callback(key)
 
-    def register_message_callback(self, channel: str, callback: T.Coroutine) -> None:
-        self._message_routers[channel].register_general_callback(callback)
+    def register_message_callback(self, channel: "disnake.abc.Messageable", callback: Callback) -> None:
+        callbacks = self._message_callbacks.setdefault(channel.id, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
 
-    def unregister_message_callback(self, channel: str, callback: T.Coroutine) -> None:
-        self._message_routers[channel].unregister_general_callback(callback)
+    def unregister_message_callback(self, channel: "disnake.abc.Messageable", callback: Callback) -> None:
+        callbacks = self._message_callbacks.get(channel.id)
+        if callbacks is None:
+            return
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._message_callbacks.pop(channel.id)
 
-    def register_custom_modal_callback(self, custom_id: str, callback: T.Coroutine) -> None:
+    def register_custom_modal_callback(self, custom_id: str, callback: Callback) -> None:
         self._modal_router.register_custom_callback(custom_id, callback)
 
     def unregister_custom_modal_callback(self, custom_id: str) -> None:
         self._modal_router.unregister_custom_callback(custom_id)
 
-    def register_general_modal_callback(self, callback: T.Coroutine) -> None:
-        self._modal_router.register_general_callback(callback)
+    def register_general_modal_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        self._modal_router.register_general_callback(callback, namespace)
+
+    def unregister_general_modal_callback(self, callback: Callback, namespace: T.Optional[str] = None) -> None:
+        self._modal_router.unregister_general_callback(callback, namespace)
 
-    def unregister_general_modal_callback(self, callback: T.Coroutine) -> None:
-        self._modal_router.unregister_general_callback(callback)
+    def unregister_namespace(self, namespace: str) -> None:
+        """
+        Drop every route and subscriber for a namespace, e.g. when its game ends
+        """
+        for subrouter in (self._button_router, self._string_router, self._modal_router):
+            subrouter.unregister_namespace(namespace)
 
     async def on_message(self, message: "disnake.Message") -> None:
-        router = self._message_routers.get(message.channel.name)
-        if router is None:
+        callbacks = self._message_callbacks.get(message.channel.id)
+        if not callbacks:
             return
         # TODO: i don't think it makes sense to support custom_id filters for message
         # interactions but will need to re-evaluate this in the future
-        await asyncio.gather(*[gcb(message) for gcb in router._general_callbacks])
+        await asyncio.gather(*[callback(message) for callback in callbacks])
 
     async def on_modal_submit(self, interaction: "disnake.Interaction") -> None:
         await self.on_interact(self._modal_router, interaction)
 
     async def on_interact(self, router: "Subrouter", interaction: "disnake.Interaction") -> None:
-        print(interaction.id)  # debugging, see how often we get duplicates
         if interaction.id in self._seen_interactions:
             # should already be replied
             return
-
-        try:
-            await asyncio.gather(*[gcb(interaction) for gcb in router._general_callbacks])
-        except Exception as exc:
-            print(f"Error executing callback: {repr(exc)}")
+        self._seen_interactions[interaction.id] = True
 
         try:
             key: str = interaction.data.custom_id
         except AttributeError:
             print("Warning: could not parse interaction")
-
-        callback = router._custom_id_callbacks.get(key)
+            return
+        route = parse_custom_id(key)
+
+        general = router.general_callbacks(route.namespace)
+        if general:
+            try:
+                if len(general) == 1:
+                    await general[0](interaction)
+                else:
+                    await asyncio.gather(*[callback(interaction) for callback in general])
+            except Exception as exc:
+                print(f"Error executing callback: {repr(exc)}")
+
+        callback = router.find(route)
         if callback is None:
             print(f"Warning: could not find a callback for key {key}")
-            await interaction.send(f"wtf was clicked? {interaction.data.custom_id}")
+            await interaction.send(f"wtf was clicked? {key}")
             return
         await callback(interaction)
 
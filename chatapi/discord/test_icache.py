@@ -0,0 +1,122 @@
+"""
+Latest interaction per user, expired before Discord kills the token
+"""
+import mock
+import unittest
+
+from chatapi.discord.icache import InteractionCache
+from engine.metrics import ICACHE
+
+
+class _Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def interaction(user_id: int) -> mock.MagicMock:
+    return mock.MagicMock(user=mock.MagicMock(id=user_id))
+
+
+class TestInteractionCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._clock = _Clock()
+
+    def _cache(self, **kwargs) -> InteractionCache:
+        return InteractionCache(ttl=100.0, timer=self._clock, **kwargs)
+
+    def _counts(self):
+        return {result: ICACHE.value(result=result) for result in ("hit", "miss", "expired")}
+
+    def test_expires_at_ttl(self) -> None:
+        cache = self._cache()
+        first = interaction(1)
+        cache.put(first)
+        self._clock.now = 99.9
+        self.assertIs(cache.get(1), first)
+        self.assertAlmostEqual(cache.expires_in(1), 0.1)
+
+        self._clock.now = 100.0
+        self.assertEqual(cache.expires_in(1), 0.0)
+        self.assertIsNone(cache.get(1))
+        # and it's gone, not just hidden
+        self.assertEqual(len(cache), 0)
+
+    def test_counts(self) -> None:
+        cache = self._cache()
+        before = self._counts()
+        cache.put(interaction(1))
+        cache.put(interaction(2))
+        cache.get(1)
+        cache.get(mock.MagicMock(id=2))
+        cache.get(3)
+        self._clock.now = 150.0
+        cache.get(1)
+        cache.get(1)
+        # purge counts whatever it drops
+        self.assertEqual(cache.purge(), 1)
+
+        after = self._counts()
+        self.assertEqual(
+            {result: after[result] - before[result] for result in after},
+            dict(hit=2, miss=2, expired=2),
+        )
+
+    def test_put_refreshes_and_moves_to_end(self) -> None:
+        cache = self._cache()
+        cache.put(interaction(1))
+        self._clock.now = 10.0
+        cache.put(interaction(2))
+        self._clock.now = 20.0
+        latest = interaction(1)
+        cache.put(latest)
+        self.assertEqual(list(cache._cache), [2, 1])
+
+        # the newer put is the one that counts
+        self._clock.now = 110.0
+        self.assertIsNone(cache.get(2))
+        self.assertIs(cache.get(1), latest)
+        self.assertAlmostEqual(cache.expires_in(1), 10.0)
+
+    def test_maxsize_drops_expired_first(self) -> None:
+        cache = self._cache(maxsize=2)
+        cache.put(interaction(1))
+        self._clock.now = 50.0
+        cache.put(interaction(2))
+        self._clock.now = 100.0
+        # user 1 has expired, so they make room rather than the oldest live entry
+        cache.put(interaction(3))
+        self.assertEqual(list(cache._cache), [2, 3])
+
+    def test_maxsize_falls_back_to_oldest(self) -> None:
+        cache = self._cache(maxsize=2)
+        cache.put(interaction(1))
+        cache.put(interaction(2))
+        cache.put(interaction(1))
+        # nothing has expired, so the least recently put goes
+        cache.put(interaction(3))
+        self.assertEqual(list(cache._cache), [1, 3])
+        self.assertIsNone(cache.get(2))
+
+    def test_discard(self) -> None:
+        cache = self._cache()
+        cache.put(interaction(1))
+        cache.discard(1)
+        cache.discard(2)
+        self.assertIsNone(cache.get(1))
+
+    def test_bots_have_no_interactions(self) -> None:
+        cache = self._cache()
+        cache.put(interaction(1))
+        bot = mock.MagicMock(is_human=False)
+        self.assertIsNone(cache.for_player(bot))
+        human = mock.MagicMock(is_human=True, user=mock.MagicMock(id=1))
+        self.assertIsNotNone(cache.for_player(human))
+
+
+if __name__ == '__main__':
+    unittest.main()
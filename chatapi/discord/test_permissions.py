@@ -0,0 +1,183 @@
+"""
+Role edits get coalesced, confirmed and retried
+"""
+import asyncio
+import mock
+import typing as T
+import unittest
+
+import disnake
+
+from chatapi.discord.permissions import PermissionReconciler
+from engine.tests import run
+
+
+class _Role:
+
+    def __init__(self, role_id: int, name: str, default: bool = False) -> None:
+        self.id = role_id
+        self.name = name
+        self._default = default
+
+    def is_default(self) -> bool:
+        return self._default
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+EVERYONE = _Role(0, "@everyone", default=True)
+MODERATOR = _Role(1, "Moderator")
+LIVE = _Role(10, "Live Player")
+MAFIA = _Role(11, "Mafia Live")
+
+
+class _Member:
+    """
+    Stands in for a disnake.Member, `edit` answers with whatever `respond` says
+    """
+
+    def __init__(self, member_id: int, roles: T.List[_Role], respond=None) -> None:
+        self.id = member_id
+        self.roles = roles
+        self.edits: T.List[T.List[_Role]] = []
+        # list of exceptions to raise or role lists to answer with, in order
+        self.respond = list(respond or [])
+
+    async def edit(self, roles, reason=None) -> "_Member":
+        self.edits.append(list(roles))
+        await asyncio.sleep(0)
+        response = self.respond.pop(0) if self.respond else roles
+        if isinstance(response, Exception):
+            raise response
+        # Discord hands back the member as it is now
+        self.roles = list(response)
+        return self
+
+    def __repr__(self) -> str:
+        return f"Member {self.id}"
+
+
+def http_error(status: int, cls=disnake.HTTPException) -> disnake.HTTPException:
+    return cls(mock.MagicMock(status=status, reason="error"), "error")
+
+
+class TestPermissionReconciler(unittest.TestCase):
+
+    def _reconciler(self) -> PermissionReconciler:
+        return PermissionReconciler([LIVE, MAFIA], workers=1)
+
+    def test_wants_coalesce_into_one_edit(self) -> None:
+        member = _Member(1, [EVERYONE, MODERATOR])
+
+        async def go():
+            reconciler = self._reconciler()
+            reconciler.start()
+            try:
+                reconciler.want(member, [LIVE])
+                reconciler.want(member, [LIVE, MAFIA])
+                reconciler.want(member, [MAFIA])
+                reconciler.want(member, [LIVE, MAFIA])
+                self.assertEqual(reconciler.pending, 1)
+                await reconciler.flush()
+            finally:
+                await reconciler.stop()
+            return reconciler
+
+        reconciler = run(go())
+        self.assertEqual(len(member.edits), 1)
+        # roles we don't manage are kept, @everyone is never sent
+        self.assertEqual(member.edits[0], [MODERATOR, LIVE, MAFIA])
+        self.assertEqual(reconciler.confirmed(member), {LIVE, MAFIA})
+        self.assertEqual(reconciler.pending, 0)
+
+        # nothing to do when it's already right
+        async def again():
+            reconciler.start()
+            try:
+                reconciler.want(member, [MAFIA, LIVE])
+                await reconciler.flush()
+            finally:
+                await reconciler.stop()
+
+        run(again())
+        self.assertEqual(len(member.edits), 1)
+
+    def test_confirms_what_discord_returns(self) -> None:
+        # the first edit only partly sticks
+        member = _Member(1, [EVERYONE, LIVE], respond=[[EVERYONE, MODERATOR]])
+
+        async def go():
+            reconciler = self._reconciler()
+            reconciler.want(member, [MAFIA])
+            self.assertEqual(reconciler.confirmed(member), {LIVE})
+            reconciler.start()
+            try:
+                await reconciler.flush()
+                confirmed = reconciler.confirmed(member)
+                # it goes round again until Discord agrees
+                await reconciler.flush()
+            finally:
+                await reconciler.stop()
+            return reconciler, confirmed
+
+        reconciler, confirmed = run(go())
+        self.assertEqual(confirmed, frozenset())
+        self.assertEqual(len(member.edits), 2)
+        # the member Discord sent back is what the next edit starts from
+        self.assertEqual(member.edits[1], [MODERATOR, MAFIA])
+        self.assertEqual(reconciler.confirmed(member), {MAFIA})
+
+    @mock.patch("chatapi.discord.permissions.RETRY_BASE", 0.01)
+    def test_http_errors_back_off_and_retry(self) -> None:
+        member = _Member(1, [EVERYONE], respond=[http_error(503), http_error(429)])
+
+        async def go():
+            reconciler = self._reconciler()
+            reconciler.start()
+            try:
+                reconciler.want(member, [LIVE])
+                await reconciler.flush()
+                self.assertEqual(len(member.edits), 1)
+                self.assertEqual(reconciler.pending, 1)
+                # wants while backing off don't jump the queue
+                reconciler.want(member, [LIVE])
+                self.assertEqual(len(reconciler._queue), 0)
+                for _ in range(50):
+                    if not reconciler.pending:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await reconciler.stop()
+            return reconciler
+
+        reconciler = run(go())
+        self.assertEqual(len(member.edits), 3)
+        self.assertEqual(reconciler.confirmed(member), {LIVE})
+        self.assertEqual(reconciler._failures, {})
+
+    def test_missing_member_is_forgotten(self) -> None:
+        gone = _Member(1, [EVERYONE], respond=[http_error(404, disnake.NotFound)])
+        here = _Member(2, [EVERYONE])
+
+        async def go():
+            reconciler = self._reconciler()
+            reconciler.start()
+            try:
+                reconciler.want(gone, [LIVE])
+                reconciler.want(here, [LIVE])
+                await reconciler.flush()
+            finally:
+                await reconciler.stop()
+            return reconciler
+
+        reconciler = run(go())
+        self.assertEqual(len(gone.edits), 1)
+        self.assertEqual(reconciler.confirmed(gone), frozenset())
+        self.assertNotIn(gone.id, reconciler._desired)
+        self.assertEqual(reconciler.confirmed(here), {LIVE})
+        self.assertEqual(reconciler.pending, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Namespaced custom ids and how the router dispatches them
+"""
+import itertools
+import mock
+import unittest
+
+from chatapi.discord.router import GLOBAL
+from chatapi.discord.router import MAX_CUSTOM_ID
+from chatapi.discord.router import RouteKey
+from chatapi.discord.router import Router
+from chatapi.discord.router import Subrouter
+from chatapi.discord.router import custom_id
+from chatapi.discord.router import parse_custom_id
+from engine.tests import run
+
+
+_interaction_ids = itertools.count()
+
+
+def click(key: str) -> mock.MagicMock:
+    interaction = mock.MagicMock(id=next(_interaction_ids))
+    interaction.data.custom_id = key
+    interaction.send = mock.AsyncMock()
+    return interaction
+
+
+class TestCustomId(unittest.TestCase):
+
+    def test_round_trip(self) -> None:
+        key = custom_id("1f3a9c2e", "NightPanel-Albert", "night_target")
+        self.assertEqual(key, "1f3a9c2e:NightPanel-Albert:night_target")
+        self.assertEqual(parse_custom_id(key), RouteKey("1f3a9c2e", "NightPanel-Albert", "night_target"))
+
+    def test_player_names_with_separator(self) -> None:
+        for panel in ("NightPanel-al:bert", "NightPanel-::", "DayPanel-a:b:c"):
+            key = custom_id("1f3a9c2e", panel, "day_target")
+            self.assertEqual(parse_custom_id(key), RouteKey("1f3a9c2e", panel, "day_target"))
+
+    def test_no_namespace_is_global(self) -> None:
+        self.assertEqual(parse_custom_id("bug_report"), RouteKey(GLOBAL, GLOBAL, "bug_report"))
+        self.assertEqual(parse_custom_id("lobby:join"), RouteKey("lobby", GLOBAL, "join"))
+
+    def test_too_long(self) -> None:
+        with self.assertRaises(ValueError):
+            custom_id("1f3a9c2e", "NightPanel-" + "a" * MAX_CUSTOM_ID, "night_target")
+
+
+class TestSubrouter(unittest.TestCase):
+
+    def test_games_share_action_keys(self) -> None:
+        subrouter = Subrouter()
+        first, second = object(), object()
+        subrouter.register_custom_callback(custom_id("game1", "TribunalPanel", "vote"), first)
+        subrouter.register_custom_callback(custom_id("game2", "TribunalPanel", "vote"), second)
+        self.assertIs(subrouter.find(RouteKey("game1", "TribunalPanel", "vote")), first)
+        self.assertIs(subrouter.find(RouteKey("game2", "TribunalPanel", "vote")), second)
+        self.assertIsNone(subrouter.find(RouteKey("game3", "TribunalPanel", "vote")))
+
+        # but one game can't register the same key twice
+        with self.assertRaises(KeyError):
+            subrouter.register_custom_callback(custom_id("game1", "TribunalPanel", "vote"), second)
+
+    def test_unregister_namespace(self) -> None:
+        subrouter = Subrouter()
+        general, game1, game2 = object(), object(), object()
+        subrouter.register_general_callback(general)
+        subrouter.register_general_callback(game1, namespace="game1")
+        subrouter.register_general_callback(game2, namespace="game2")
+        subrouter.register_custom_callback(custom_id("game1", "TribunalPanel", "vote"), game1)
+        subrouter.register_custom_callback(custom_id("game2", "TribunalPanel", "vote"), game2)
+        self.assertEqual(subrouter.general_callbacks("game1"), [general, game1])
+
+        subrouter.unregister_namespace("game1")
+        self.assertIsNone(subrouter.find(RouteKey("game1", "TribunalPanel", "vote")))
+        self.assertEqual(subrouter.general_callbacks("game1"), [general])
+        self.assertIs(subrouter.find(RouteKey("game2", "TribunalPanel", "vote")), game2)
+        self.assertEqual(subrouter.general_callbacks("game2"), [general, game2])
+
+        # and the key is free again
+        subrouter.register_custom_callback(custom_id("game1", "TribunalPanel", "vote"), game1)
+
+    def test_unregister_custom_callback_cleans_up(self) -> None:
+        subrouter = Subrouter()
+        subrouter.register_custom_callback(custom_id("game1", "TribunalPanel", "vote"), object())
+        subrouter.unregister_custom_callback(custom_id("game1", "TribunalPanel", "vote"))
+        self.assertEqual(subrouter._routes, {})
+        # unknown keys are fine
+        subrouter.unregister_custom_callback(custom_id("game1", "TribunalPanel", "vote"))
+
+
+class TestRouter(unittest.TestCase):
+
+    def test_clicks_reach_their_own_game(self) -> None:
+        router = Router()
+        game1, game2, report = mock.AsyncMock(), mock.AsyncMock(), mock.AsyncMock()
+        watcher = mock.AsyncMock()
+        router.register_button_custom_callback(custom_id("game1", "NightPanel-al:bert", "night_target"), game1)
+        router.register_button_custom_callback(custom_id("game2", "NightPanel-al:bert", "night_target"), game2)
+        router.register_button_custom_callback("bug_report", report)
+        router.register_button_general_callback(watcher, namespace="game2")
+
+        async def go():
+            await router.on_button_click(click("game1:NightPanel-al:bert:night_target"))
+            await router.on_button_click(click("game2:NightPanel-al:bert:night_target"))
+            await router.on_button_click(click("bug_report"))
+            missing = click("game3:NightPanel-al:bert:night_target")
+            await router.on_button_click(missing)
+            return missing
+
+        missing = run(go())
+        self.assertEqual(game1.await_count, 1)
+        self.assertEqual(game2.await_count, 1)
+        self.assertEqual(report.await_count, 1)
+        # only sees its own game
+        self.assertEqual(watcher.await_count, 1)
+        missing.send.assert_awaited_once()
+
+    def test_same_interaction_dispatched_once(self) -> None:
+        router = Router()
+        callback = mock.AsyncMock()
+        router.register_button_custom_callback("bug_report", callback)
+        interaction = click("bug_report")
+        run(router.on_button_click(interaction))
+        run(router.on_button_click(interaction))
+        self.assertEqual(callback.await_count, 1)
+
+    def test_message_callbacks_by_channel_id(self) -> None:
+        router = Router()
+        # every game's bulletin has the same name
+        bulletin1 = mock.MagicMock(id=1)
+        bulletin1.name = "mafia-bulletin"
+        bulletin2 = mock.MagicMock(id=2)
+        bulletin2.name = "mafia-bulletin"
+        game1, game2 = mock.AsyncMock(), mock.AsyncMock()
+        router.register_message_callback(bulletin1, game1)
+        router.register_message_callback(bulletin1, game1)
+        router.register_message_callback(bulletin2, game2)
+
+        run(router.on_message(mock.MagicMock(channel=bulletin1)))
+        self.assertEqual(game1.await_count, 1)
+        self.assertEqual(game2.await_count, 0)
+
+        router.unregister_message_callback(bulletin1, game1)
+        run(router.on_message(mock.MagicMock(channel=bulletin1)))
+        run(router.on_message(mock.MagicMock(channel=bulletin2)))
+        self.assertEqual(game1.await_count, 1)
+        self.assertEqual(game2.await_count, 1)
+        self.assertNotIn(1, router._message_callbacks)
+
+
+if __name__ == '__main__':
+    unittest.main()
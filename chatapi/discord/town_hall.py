@@ -14,6 +14,8 @@ import typing as T
 
 from chatapi.discord.channel import channel_manager
 from chatapi.discord.forward import ForwardChatMessages
+from chatapi.discord.icache import icache
+from chatapi.discord.members import member_cache
 from chatapi.discord.hideout import DeathChat
 from chatapi.discord.hideout import Jail
 from chatapi.discord.hideout import MafiaHideout
@@ -31,9 +33,14 @@ from chatapi.discord.panel import VictoryPanel
 from chatapi.discord.panel import PossibleRolesPanel
 from chatapi.discord.permissions import LIVE_PLAYER
 from chatapi.discord.permissions import MAFIA_LIVE
+from chatapi.discord.permissions import PermissionReconciler
 from chatapi.discord.permissions import PermissionsManager
 from chatapi.discord.court import Court
+from chatapi.discord.resources import resource_pool
+from chatapi.discord.router import router
 from engine.actor import Actor
+from engine.metrics import observe_async
+from engine.metrics import PANEL_DRIVE
 from engine.phase import TurnPhase
 from engine.role.neutral.judge import Judge
 from engine.role.town.jailor import Jailor
@@ -46,6 +53,9 @@ if T.TYPE_CHECKING:
 
 PANEL_OVERRIDES = {Judge: JudgePanel, Jailor: JailPanel}
 
+# how long game end waits for the game roles to come back off players
+ROLE_RESET_TIMEOUT = 10.0
+
 
 class TownHall:
     """
@@ -61,17 +71,12 @@ class TownHall:
         self.ch_town_hall: "disnake.TextChannel" = None
         self._discussion_thread = None
         self._permission_manager = PermissionsManager(self._guild)
+        # set up once the roles exist, see `prepare_for_game`
+        self._permissions: T.Optional[PermissionReconciler] = None
 
         self._live_players_role: "disnake.Role" = None
         self._mafia_live_role: "disnake.Role" = None
 
-        # unique to the guild we're playing the game in
-        self._user_to_member: T.Dict["disnake.User", "disnake.Member"] = dict()
-
-        # TODO: caching like this is dumb
-        self._live_players: T.Set["disnake.Member"] = set()
-        self._mafia_live: T.Set["disnake.Member"] = set()
-
         self._live_player_count: int = len(self._game.get_live_actors())
 
         self._is_silenced: T.Dict["Actor", bool] = dict()
@@ -92,6 +97,10 @@ class TownHall:
         if self.ch_bulletin is None:
             raise ValueError("No bulletin channel created yet")
 
+        # private panels answer through the latest interaction from each player
+        router.register_button_general_callback(icache.update_with_interaction, namespace=self._game.id)
+        router.register_string_general_callback(icache.update_with_interaction, namespace=self._game.id)
+
         self._welcome = {
             actor: WelcomePanel(actor, self._game, self.ch_bulletin)
             for actor in self._game.get_actors() if actor.player.is_human
@@ -122,6 +131,9 @@ class TownHall:
         Lock the primary bulletin channel
         Assign correct users to the Live Players permissions group        
         """
+        # anything the lobby started provisioning is nearly done by now
+        await resource_pool.ready(self._guild)
+
         if self._game.get_live_actors_by_role(Judge):
             self._court = Court(self._game, self.ch_bulletin)
             await self._court.initialize()
@@ -129,6 +141,8 @@ class TownHall:
         roles = await self._permission_manager.setup_roles()
         self._live_players_role = roles[LIVE_PLAYER]
         self._mafia_live_role = roles[MAFIA_LIVE]
+        self._permissions = PermissionReconciler([self._live_players_role], tags=self._game.tags)
+        self._permissions.start()
 
         # town hall channels
         default_permission = disnake.PermissionOverwrite()
@@ -140,23 +154,25 @@ class TownHall:
         # we lock threads when days expire and always allow live users to comment
         # on current day's thread before it locks
         live_players_permission.send_messages_in_threads = True
-        await asyncio.gather(
-            self.get_player_members(),
-            self.ch_bulletin.edit(overwrites={
-                self._guild.default_role: default_permission,
-                self._live_players_role: live_players_permission,
-            }),
-        )
+        overwrites = {
+            self._guild.default_role: default_permission,
+            self._live_players_role: live_players_permission,
+        }
+        requests = [self.get_player_members()]
+        # the channel and roles carry over between games, so this is usually set already
+        if any(self.ch_bulletin.overwrites_for(target) != overwrite for target, overwrite in overwrites.items()):
+            requests.append(self.ch_bulletin.edit(overwrites=overwrites))
+        await asyncio.gather(*requests)
         await asyncio.gather(
             self.update_live_player_permissions(),
         )
 
         self.log.info("Preparing hideouts")
-        self._hideouts.extend([
-            await MafiaHideout.create_and_init(self._game, self.ch_bulletin),
-            await Jail.create_and_init(self._game, self.ch_bulletin),
-            await DeathChat.create_and_init(self._game, self.ch_bulletin),
-        ])
+        self._hideouts.extend(await asyncio.gather(
+            MafiaHideout.create_and_init(self._game, self.ch_bulletin),
+            Jail.create_and_init(self._game, self.ch_bulletin),
+            DeathChat.create_and_init(self._game, self.ch_bulletin),
+        ))
         for hideout in self._hideouts:
             hideout.start()
         self.log.info("Done preparing hideouts")
@@ -165,15 +181,8 @@ class TownHall:
         if actor.player.is_bot:
             return
 
-        member = self._user_to_member.get(actor.player.user)
-        if member is None:
-            print(f"Warning: no member for player {actor.name}")
-            return
-        self._is_silenced[actor] = True
-        if do_silence:
-            asyncio.create_task(member.remove_roles(self._live_players_role))
-        else:
-            asyncio.create_task(member.add_roles(self._live_players_role))
+        self._is_silenced[actor] = do_silence
+        self._reconcile(actor)
 
     @property
     def jail(self) -> Jail:
@@ -185,42 +194,64 @@ class TownHall:
     async def signal_jail(self, jailor: "Actor", message: str) -> None:
         await self.jail.signal_message(jailor, message)
 
-    async def get_member_for_user(self, user: "disnake.User") -> None:
-        self._user_to_member[user] = await self._guild.fetch_member(user.id)
-
-    def cleanup_hideouts(self) -> None:
-        for hideout in self._hideouts:
-            hideout.stop()
+    async def cleanup_hideouts(self) -> None:
+        """
+        Stop the hideouts and hand their threads back for the next game
+        """
+        await asyncio.gather(*[hideout.release() for hideout in self._hideouts], return_exceptions=True)
+        self._hideouts = []
 
     async def get_player_members(self) -> None:
         """
-        Load Member objects for all players and cache this result for later
+        Load Member objects for all players, most are usually cached from the lobby
         """
-        requests = []
-        for actor in self._game.get_actors():
-            if actor.player.is_bot:
-                continue
-            requests.append(self.get_member_for_user(actor.player.user))
-        await asyncio.gather(*requests)
+        await member_cache.fetch_many(self._guild, [
+            actor.player.user for actor in self._game.get_actors() if actor.player.is_human
+        ])
+
+    def desired_roles(self, actor: "Actor") -> T.List["disnake.Role"]:
+        """
+        Game roles this actor's member should have right now
+        """
+        if actor.is_alive and not self._is_silenced.get(actor, False):
+            return [self._live_players_role]
+        return []
+
+    def _reconcile(self, actor: "Actor") -> None:
+        if self._permissions is None:
+            return
+        member = member_cache.get(self._guild, actor.player.user)
+        if member is None:
+            print(f"Warning: no member for player {actor.name}")
+            return
+        self._permissions.want(member, self.desired_roles(actor))
 
     async def update_live_player_permissions(self) -> None:
         """
-        Add all players to the correct role group and then give that role group
+        Tell the reconciler which roles every player should have.
 
-        NOTE: role changes are expensive, don't issue them unless we have to
-        TODO: ok we probably shouldn't do this by polling, but for now we can cache
-        and assume our requests succeed
+        Only members whose roles actually need to change cost a Discord request, and
+        however many changes pile up for one member they go out as a single edit.
         """
         for actor in self._game.get_actors():
             if actor.player.is_bot:
                 continue
-            member = self._user_to_member[actor.player.user]
-            if actor.is_alive and member not in self._live_players:
-                self._live_players.add(member)
-                asyncio.create_task(member.add_roles(self._live_players_role))
-            elif (not actor.is_alive and member in self._live_players) or self._is_silenced.get(actor, False):
-                self._live_players.discard(member)
-                asyncio.create_task(member.remove_roles(self._live_players_role))
+            self._reconcile(actor)
+
+    async def stop_permissions(self) -> None:
+        if self._permissions is None:
+            return
+        # the roles outlive the game, so take them back off everybody
+        for actor in self._game.get_actors():
+            if actor.player.is_human:
+                member = member_cache.get(self._guild, actor.player.user)
+                if member is not None:
+                    self._permissions.want(member, [])
+        try:
+            await asyncio.wait_for(self._permissions.flush(), ROLE_RESET_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("Warning: timed out taking game roles back")
+        await self._permissions.stop()
 
     @property
     def panels(self) -> T.List["GamePanel"]:
@@ -268,8 +299,9 @@ class TownHall:
         Night:
             * night panel should be active
         """
+        tags = self._game.tags
         await asyncio.gather(
-            *[panel.drive() for panel in self.panels] +
+            *[observe_async(PANEL_DRIVE, panel.drive(), panel=type(panel).__name__, **tags) for panel in self.panels] +
             [self.update_live_player_permissions()]
         )
 
@@ -0,0 +1,87 @@
+"""
+Webhook Pool
+
+Discord caps how many webhooks a channel can have, and creating one is a slow,
+rate limited call. A webhook can post to any thread under its channel with any
+username, so there's no reason to make more than one per channel.
+
+The pool hands out that one webhook. It's shared by every hideout and game on the
+channel, and it outlives the games: if a webhook we made earlier is still there (say
+after a restart) we pick it back up rather than making another.
+"""
+import asyncio
+import typing as T
+
+import disnake
+
+POOL_WEBHOOK_NAME = "Mafia Relay"
+
+Channel = T.Union["disnake.TextChannel", "disnake.Thread"]
+
+
+class WebhookPool:
+
+    def __init__(self, name: str = POOL_WEBHOOK_NAME) -> None:
+        self._name = name
+        # by the id of the channel the webhook lives on
+        self._webhooks: T.Dict[int, "disnake.Webhook"] = dict()
+        self._pending: T.Dict[int, asyncio.Future] = dict()
+        self._ids: T.Set[int] = set()
+
+    @staticmethod
+    def _home(channel: Channel) -> "disnake.TextChannel":
+        # threads post through their parent's webhooks
+        if isinstance(channel, disnake.Thread):
+            return channel.parent
+        return channel
+
+    def is_pooled(self, webhook_id: T.Optional[int]) -> bool:
+        """
+        Whether a message was sent by one of our webhooks, e.g. to avoid relaying it back
+        """
+        return webhook_id is not None and webhook_id in self._ids
+
+    async def get(self, channel: Channel) -> "disnake.Webhook":
+        """
+        The webhook for `channel` (or its parent if it's a thread), made if need be
+        """
+        home = self._home(channel)
+        webhook = self._webhooks.get(home.id)
+        if webhook is not None:
+            return webhook
+        # everybody asking at once waits on the same lookup
+        pending = self._pending.get(home.id)
+        if pending is None:
+            pending = self._pending[home.id] = asyncio.ensure_future(self._find_or_create(home))
+        try:
+            webhook = await asyncio.shield(pending)
+        finally:
+            if pending.done() and self._pending.get(home.id) is pending:
+                self._pending.pop(home.id)
+        return webhook
+
+    async def _find_or_create(self, home: "disnake.TextChannel") -> "disnake.Webhook":
+        webhook = None
+        try:
+            for existing in await home.webhooks():
+                if existing.name == self._name and existing.token:
+                    webhook = existing
+                    break
+        except disnake.Forbidden:
+            pass
+        if webhook is None:
+            webhook = await home.create_webhook(name=self._name)
+        self._webhooks[home.id] = webhook
+        self._ids.add(webhook.id)
+        return webhook
+
+    def discard(self, channel: Channel) -> None:
+        """
+        Forget the channel's webhook, e.g. because the channel was deleted
+        """
+        webhook = self._webhooks.pop(self._home(channel).id, None)
+        if webhook is not None:
+            self._ids.discard(webhook.id)
+
+
+webhook_pool: WebhookPool = WebhookPool()
@@ -2,6 +2,7 @@
 It's the Robot Mafia
 """
 import asyncio
+import inspect
 import logging
 import random
 import time
@@ -14,6 +15,10 @@ import log
 from donbot.action import BotAction
 from donbot.auto_ctx import AutomationContext
 from donbot.resolver import RandomResolver
+from engine.buffer import BoundedQueue
+from engine.buffer import DropPolicy
+from engine.buffer import MemoryAccount
+from engine.buffer import RingBuffer
 from engine.affiliation import MAFIA
 from engine.affiliation import NEUTRAL
 from engine.affiliation import TRIAD
@@ -56,6 +61,8 @@ class LogEvent:
     Generic data object
     """
 
+    __slots__ = ("turn_number", "turn_phase", "message")
+
     def __init__(self, turn_number: int, turn_phase: TurnPhase, message: str) -> None:
         self.turn_number = turn_number
         self.turn_phase = turn_phase
@@ -69,6 +76,10 @@ class DonBot:
     You come to me on the day of my robot daughter's wedding
     """
 
+    # caps on what we hold on to, see `engine.config.Limits`
+    MESSAGE_QUEUE_LIMIT = 500
+    GAME_LOG_LIMIT = 100
+
     def __init__(self, bot_name: str = None, debug: bool = True) -> None:
         self._connected = False
         self._bot_name: str = bot_name
@@ -83,7 +94,10 @@ class DonBot:
 
         self._subscribe_task: asyncio.Task = None
         self._print_task: asyncio.Task = None
-        self._message_queue: asyncio.Queue[message_pb2.Message] = asyncio.Queue()
+        self.memory = MemoryAccount()
+        self._message_queue: asyncio.Queue[message_pb2.Message] = self.memory.register(
+            BoundedQueue(self.MESSAGE_QUEUE_LIMIT, DropPolicy.DROP_OLDEST, name="messages")
+        )
 
         self._outbound_queue: asyncio.Queue[str] = asyncio.Queue()
 
@@ -96,7 +110,10 @@ class DonBot:
 
         self._action_results: T.Dict[T.Tuple[TurnPhase, int], str] = dict()
 
-        self._game_log: T.List[LogEvent] = list()
+        # the last will is built from this, so it only covers the most recent events
+        self._game_log: RingBuffer[LogEvent] = self.memory.register(
+            RingBuffer(self.GAME_LOG_LIMIT, name="game_log")
+        )
         self._prev_last_will: str = ""
 
         self._should_exit = False
@@ -224,6 +241,16 @@ class DonBot:
         targets = autoctx.infer_targets(bot_actions)
         return targets
 
+    async def resolve(self, action: BotAction, options: T.List[T.Any]) -> T.List[T.Any]:
+        """
+        Resolvers can be plain functions (random) or coroutine functions (ChatGPT),
+        either way we never block the loop the other bots share.
+        """
+        selected = self._resolvers[action](options)
+        if inspect.isawaitable(selected):
+            selected = await selected
+        return selected
+
     def plan_action(self, action_target: T.Dict[BotAction, T.List[T.Any]]) -> T.Tuple[BotAction, T.Any]:
         # then we need to do something to figure out what the best one to take at any given point is
         # if we're randomly picking we don't need a lot of info, all we really need is
@@ -468,7 +495,7 @@ class DonBot:
                     if targets:
                         # when playing randomly, day targets will often trigger
                         # e.g MAYOR ON DAY 1 BABY
-                        selected = self._resolvers[BotAction.DAY_ACTION](targets)
+                        selected = await self.resolve(BotAction.DAY_ACTION, targets)
                         self.log.info(f"Selected {selected} for {self.role.name} day action")
                     else:
                         self.log.info("Skipping day action select")
@@ -476,7 +503,7 @@ class DonBot:
                 elif BotAction.NIGHT_ACTION in actions:
                     targets = actions[BotAction.NIGHT_ACTION]
                     if targets:
-                        selected = self._resolvers[BotAction.NIGHT_ACTION](targets)
+                        selected = await self.resolve(BotAction.NIGHT_ACTION, targets)
                         self.log.info(f"Selected {selected} for {self.role.name} night action")
                     else:
                         selected = None
@@ -503,7 +530,7 @@ class DonBot:
                     # we will pick someone to become suspicious of and vote up
                     # but also make sure that "No Vote" is an option
                     targets = actions[BotAction.TRIAL_VOTE] + ['No Target']
-                    selected = self._resolvers[BotAction.TRIAL_VOTE](targets)
+                    selected = await self.resolve(BotAction.TRIAL_VOTE, targets)
                     if not selected:
                         # this should always latch when we evaluate
                         primary_target = None
@@ -519,7 +546,7 @@ class DonBot:
             if (self._game.turn_phase, self._game.turn_number) not in self._lynch_decisions:
                 if BotAction.LYNCH_VOTE in actions:
                     targets = actions[BotAction.LYNCH_VOTE]
-                    selected = self._resolvers[BotAction.LYNCH_VOTE](targets)
+                    selected = await self.resolve(BotAction.LYNCH_VOTE, targets)
                     if not selected:
                         primary_target = None
                     else:
@@ -9,6 +9,7 @@ import typing as T
 from academy import ChatContext
 from academy import ChatGPTBot
 from academy import Prompt
+from donbot import BIND
 from donbot import DonBot
 from donbot.action import BotAction
 from engine.phase import TurnPhase
@@ -23,9 +24,12 @@ class FredoBot(DonBot):
 
     def __init__(self, bot_name: str = None, debug: bool = False) -> None:
         super().__init__(bot_name=bot_name, debug=debug)
+        # the day whose chat we still need to digest once it's over
+        self._undigested_day: T.Optional[int] = None
 
     def setup_resolvers(self) -> None:
-        self._ai_resolver = ChatGPTBot(self.name, self.role.name, debug=self._debug)
+        # every bot on this server is in the same game, so they share LLM concurrency
+        self._ai_resolver = ChatGPTBot(self.name, self.role.name, debug=self._debug, group=BIND)
         self._resolvers = {ba: self._ai_resolver.get_action_handler(ba) for ba in BotAction}
 
     async def print_message_task(self) -> None:
@@ -60,12 +64,17 @@ class FredoBot(DonBot):
             # pause if we can't say anything
             try:
                 if TurnPhase[self._game.turn_phase] not in (TurnPhase.DAYLIGHT,):
+                    if self._undigested_day is not None:
+                        # the whole game shares one digest of the day's chat
+                        await self._ai_resolver.digest_phase(self._undigested_day, TurnPhase.DAYLIGHT.name)
+                        self._undigested_day = None
                     continue
+                self._undigested_day = self._game.turn_number
                 # prompt for speech with the current conversation as context
                 to_say = await self._ai_resolver.iter_conversation()
                 # split it into response_context: answer
                 #response_context, _, answer = to_say.partition(':')
-                if 'NA' in to_say:
+                if not to_say or 'NA' in to_say:
                     continue
                 self.log.info(f"I will say: [{to_say}]")
                 self._outbound_queue.put_nowait(to_say)
@@ -11,6 +11,8 @@ class Annoy(Action):
     An insane person visited you
     """
 
+    __slots__ = ()
+
     def action_result(self, actor: "Actor", *targets: "Actor") -> None:
         """
         This should succeed always
@@ -11,6 +11,8 @@ class Armor(Action):
     Give somebody a bulletproof vest
     """
 
+    __slots__ = ()
+
     def action_result(self, actor: "Actor", target: "Actor") -> T.Optional[bool]:
         # if this got called we should still have charges left
         target.role.give_vest()
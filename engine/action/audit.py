@@ -27,6 +27,8 @@ class Audit(Action):
     Neutrals become Scumbag.
     """
 
+    __slots__ = ()
+
     # ahh yeah let the other actions
     ORDER = 1100
 
@@ -5,12 +5,14 @@ from enum import Enum
 import typing as T
 
 from engine.message import Message
+from engine.rng import pick
 
 if T.TYPE_CHECKING:
     from engine.actor import Actor
     from engine.crimes import Crime
     from engine.game import Game
     from engine.message import Messenger
+    from engine.rng import Flavor
 
 
 class Action:
@@ -18,8 +20,13 @@ class Action:
     Someday I'll have a big enough brain to sketch this out ahead of time
 
     But for now I don't :)
+
+    Actions are created for every event of every night, so they're slotted. Subclasses
+    need `__slots__ = ()` too or they get a __dict__ back.
     """
 
+    __slots__ = ("_action_result",)
+
     ORDER = 1000
 
     def __init__(self) -> None:
@@ -81,9 +88,10 @@ class Action:
                 messenger.queue_message(Message.private_feedback(targ, self.target_title(success), self.target_text_success()))
             elif success == False and self.target_text_fail():
                 messenger.queue_message(Message.private_feedback(targ, self.target_title(success), self.target_text_fail()))
-        if success and self.announce():
+        announcement = pick(actor.game.rng.cosmetic, self.announce()) if success else ""
+        if announcement:
             # if there is text here it should be announced
-            messenger.queue_message(Message.night_sequence(actor.game, self.announce()))
+            messenger.queue_message(Message.night_sequence(actor.game, announcement))
 
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable["Crime"]]:
@@ -92,12 +100,13 @@ class Action:
         """
         return {}
 
-    def announce(self) -> str:
+    def announce(self) -> "Flavor":
         """
         Text fed to the public channel. Generally should only issue if something
         was successful.
 
-        Most actions do not incur an announcement.
+        Most actions do not incur an announcement. Return a list to have one
+        picked at random.
         """
         return ""
 
@@ -6,9 +6,13 @@ class ConvertCultist(Transform):
     Do a series of pre-checks to determine success and what not
     """
 
+    __slots__ = ()
+
 
 class ConvertMason(Transform):
     """
     Check if target is a citizen. If so, convert to Mason.
     If target is Mafia / Triad, issue notification to them.
     """
+
+    __slots__ = ()
@@ -13,6 +13,8 @@ class Court(Action):
     Change vote counts for judge
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable["Crime"]]:
         return {
@@ -14,6 +14,8 @@ class Follow(Action):
     This ignores detection immunity by default.
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable["Crime"]]:
         return {
@@ -1,4 +1,3 @@
-import random
 import typing as T
 
 from engine.action.base import Action
@@ -28,6 +27,8 @@ class Frame(Action):
     The crime and alignment are random and do not necessarily match.
     """
 
+    __slots__ = ()
+
     # run this before any investigative checks
     ORDER = 250
 
@@ -63,10 +64,11 @@ class Frame(Action):
             MassMurderer
         )
 
-        chosen_evil = random.choice(evil_roles)
-        target.set_investigated_role(chosen_evil)
+        rng = target.game.rng.night
+        chosen_evil = rng.choice(evil_roles)
+        target.set_investigated_role(target.game._role_factory.create_role(chosen_evil))
 
-        chosen_crime = random.choice(list(Crime))
+        chosen_crime = rng.choice(list(Crime))
 
         self._action_result["framed_role"] = chosen_evil.__name__
         self._action_result["framed_crime"] = chosen_crime.value
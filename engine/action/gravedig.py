@@ -5,3 +5,5 @@ class Gravedig(Action):
     """
     Uncover somebody's last will
     """
+
+    __slots__ = ()
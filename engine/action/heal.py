@@ -17,6 +17,8 @@ class Heal(Action):
     Cannot target people who are already dead.
     """
 
+    __slots__ = ()
+
     # apply these before kill orders so if their HP dips to zero or below we pop them
     ORDER = 80
 
@@ -34,6 +36,8 @@ class HealReport(Action):
     TODO: how do you check to see if your target was attacked
     """
 
+    __slots__ = ()
+
     ORDER = 110
 
     def feedback_text_success(self) -> str:
@@ -15,6 +15,8 @@ class InvestigateCrimes(Action):
     Discover crime record of target
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable[Crime]]:
         return {True: [Crime.TRESPASSING], False: [Crime.TRESPASSING]}
@@ -39,6 +41,8 @@ class InvestigateSuspicion(Action):
     Discover affiliation of target (generally grouped)
     """
 
+    __slots__ = ()
+
     def feedback_text_success(self) -> str:
         suspicion = self._action_result.get("suspicion", "UNKNOWN [BUG]")
         if suspicion == "Not Suspicious":
@@ -61,6 +65,8 @@ class PreInvestigate(Action):
     Leave crimes for the investigator role.
     """
 
+    __slots__ = ()
+
     ORDER = 999
 
     @property
@@ -79,6 +85,8 @@ class InvestigateExact(Action):
     Discover exact role of target
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable[Crime]]:
         return {True: [Crime.TRESPASSING], False: [Crime.TRESPASSING]}
@@ -16,6 +16,8 @@ class Jail(Action):
     Jail is a day action.
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable["Crime"]]:
         return {
@@ -1,5 +1,4 @@
 from enum import Enum
-import random
 import typing as T
 
 from engine.crimes import Crime
@@ -8,6 +7,7 @@ from engine.message import Message
 
 if T.TYPE_CHECKING:
     from engine.actor import Actor
+    from engine.rng import Flavor
 
 
 class KillCause(Enum):
@@ -31,6 +31,8 @@ class Kill(Action):
     Transition a player state from alive to dead
     """
 
+    __slots__ = ()
+
     ORDER = 100
 
     @property
@@ -72,7 +74,10 @@ class Kill(Action):
         return "Someone tried to kill you, but you survived their attack!"
 
     @classmethod
-    def kill_report_text(cls) -> str:
+    def kill_report_text(cls) -> "Flavor":
+        """
+        Shown on the tombstone. Return a list to have one picked at random.
+        """
         return "Smited by God (probably a bug, contact devs)"
 
     def target_title(self, success: bool) -> str:
@@ -97,6 +102,8 @@ class JailorKill(Kill):
     Kill description should update
     """
 
+    __slots__ = ()
+
     ORDER = 75
 
     @property
@@ -122,12 +129,14 @@ class JailorKill(Kill):
 
 
 class InterroKill(JailorKill):
+    __slots__ = ()
     
     def target_text_success(self) -> str:
         return "You were executed by an Interrogator."
 
 
 class KidnapKill(JailorKill):
+    __slots__ = ()
 
     def target_text_success(self) -> str:
         return "You were executed by a Kidnapper."
@@ -138,12 +147,14 @@ class MafiaKill(Kill):
     Godfather / Mafioso Kill
     """
 
-    def announce(self) -> str:
-        return random.choice([
+    __slots__ = ()
+
+    def announce(self) -> "Flavor":
+        return [
             "You hear shots echoing through the streets",
             "You hear the rat-a-tat-tat of a sub-machine-gun in the distance",
             "You hear the sound of gunfire followed by the screeching of tires",
-        ])
+        ]
 
     @classmethod
     def kill_report_text(cls) -> str:
@@ -158,11 +169,14 @@ class TriadKill(Kill):
     Dragon Head / Enforcer Kill
     """
 
+    __slots__ = ()
+
     def target_text_success(self) -> str:
         return "You were hit by the Triad"
 
 
 class SerialKillerKill(Kill):
+    __slots__ = ()
 
     def announce(self):
         return "You hear the screams of bloody murder"
@@ -197,6 +211,7 @@ class SerialKillerKill(Kill):
 
 
 class ArsonistKill(Kill):
+    __slots__ = ()
 
     @property
     def ignore_immunity(self) -> bool:
@@ -221,6 +236,7 @@ class ArsonistKill(Kill):
 
 
 class VigilanteKill(Kill):
+    __slots__ = ()
 
     def announce(self):
         return "You hear a tight grouping of shots echoing throughout the town"
@@ -234,6 +250,7 @@ class VigilanteKill(Kill):
 
 
 class BodyguardKill(Kill):
+    __slots__ = ()
 
     def announce(self):
         return "You hear the harsh sounds of an old-fashioned shootout"
@@ -255,6 +272,8 @@ class MassMurder(Kill):
     MM kills don't have any feedback typically. They will appear in night sequence.
     """
 
+    __slots__ = ()
+
     def target_text_success(self) -> str:
         return ""
 
@@ -265,12 +284,12 @@ class MassMurder(Kill):
         return "You hear the sickening sound of a chainsaw ripping through flesh"
 
     @classmethod
-    def kill_report_text(cls) -> str:
-        return random.choice([
+    def kill_report_text(cls) -> "Flavor":
+        return [
             "Their entrails were spread around the house.",
             "They were torn to shreds with a chainsaw",
             "They were completely eviscerated",
-        ])
+        ]
 
     def target_text_success(self) -> str:
         return "You were killed by a Mass Murderer"
@@ -315,6 +334,8 @@ class Alert(MassMurder):
     just change the kill text
     """
 
+    __slots__ = ()
+
     # this needs to go before most actions
     ORDER = 20
 
@@ -343,12 +364,12 @@ class Alert(MassMurder):
         }
 
     @classmethod
-    def kill_report_text(cls) -> str:
-        return random.choice([
+    def kill_report_text(cls) -> "Flavor":
+        return [
             "Killed by a fragmentation grenade",
             "Killed by a military grade assault rifle",
-            "Ripped to pieces by a large caliber machine gun"
-        ])
+            "Ripped to pieces by a large caliber machine gun",
+        ]
 
 
 class ConstableKill(Kill):
@@ -356,6 +377,8 @@ class ConstableKill(Kill):
     Shoot the fucker
     """
 
+    __slots__ = ()
+
     def feedback_text_success(self) -> str:
         return ""
 
@@ -406,6 +429,8 @@ class Suicide(Kill):
     Suicides should always go first.
     """
 
+    __slots__ = ()
+
     ORDER = 0
 
     @classmethod
@@ -425,6 +450,7 @@ class Suicide(Kill):
 
 
 class JesterSuicide(Suicide):
+    __slots__ = ()
 
     @classmethod
     def kill_report_text(cls) -> str:
@@ -432,6 +458,7 @@ class JesterSuicide(Suicide):
 
 
 class WitchSuicide(Suicide):
+    __slots__ = ()
 
     @classmethod
     def kill_report_text(cls) -> str:
@@ -445,6 +472,8 @@ class BusSuicide(Suicide):
     TODO: this by default ignores night immunity but make that configurable?
     """
 
+    __slots__ = ()
+
     @classmethod
     def kill_report_text(cls) -> str:
         return "Run over by a bus."
@@ -464,6 +493,8 @@ class HeartAttack(Suicide):
     AFK / leaver kill
     """
 
+    __slots__ = ()
+
     @classmethod
     def kill_report_text(cls) -> str:
         return "Died of a heart attack."
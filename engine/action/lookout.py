@@ -12,6 +12,8 @@ class Lookout(Action):
     Discover everybody who visited your target
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable["Crime"]]:
         return {
@@ -6,6 +6,8 @@ class Lynch(Action):
     This is really just for epitaph
     """
 
+    __slots__ = ()
+
     @classmethod
     def kill_report_text(cls) -> str:
         return "Lynched."
@@ -12,6 +12,8 @@ class Marshall(Reveal):
     Group lynch
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable["Crime"]]:
         return {
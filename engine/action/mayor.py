@@ -12,6 +12,8 @@ class Mayor(Reveal):
     Reveal and change vote count
     """
 
+    __slots__ = ()
+
     @property
     def crimes(self) -> T.Dict[bool, T.Iterable["Crime"]]:
         return {
@@ -5,3 +5,5 @@ class NoU(Action):
     """
     Reverse action targets
     """
+
+    __slots__ = ()
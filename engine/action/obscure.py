@@ -12,6 +12,8 @@ class Obscure(Action):
     Prevent somebody's role and last will from being released on their death.
     """
 
+    __slots__ = ()
+
     # run this soon after kills are processed
     ORDER = 150
 
@@ -5,3 +5,5 @@ class Party(Action):
     """
     Enable global night chat
     """
+
+    __slots__ = ()
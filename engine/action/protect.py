@@ -18,6 +18,8 @@ class Protect(Action):
     same individual kill each other, which is almost certainly undesired.
     """
 
+    __slots__ = ()
+
     # apply these before kill orders so if their HP dips to zero or below we pop them
     ORDER = 90
 
@@ -17,6 +17,8 @@ class Redirect(Action):
     targets. For a Redirect action, this will be the control target.
     """
 
+    __slots__ = ()
+
     ORDER = 15
 
     def feedback_text_success(self) -> str:
@@ -39,6 +41,8 @@ class Hide(Action):
     Cause anything that targets you to hit your target instead
     """
 
+    __slots__ = ()
+
     ORDER = 30
 
     def feedback_text_success(self) -> str:
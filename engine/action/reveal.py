@@ -12,6 +12,8 @@ class Reveal(Action):
     Publicly reveal the role of a person
     """
 
+    __slots__ = ()
+
     def message_results(self, actor: "Actor", success: bool) -> None:
         """
         Issue a public message to the town that you have revealed your role as a base.
@@ -12,6 +12,8 @@ class Roleblock(Action):
     Block a player action
     """
 
+    __slots__ = ()
+
     ORDER = 10
 
     @property
@@ -82,3 +84,5 @@ class JailBlock(Roleblock):
         * no feedback text is given
         * 
     """
+
+    __slots__ = ()
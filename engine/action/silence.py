@@ -13,6 +13,8 @@ class Silence(Action):
     Cannot blackmail people who are night immune.
     """
 
+    __slots__ = ()
+
     # blackmail goes before vet (20) but after swaps (10ish)
     ORDER = 15
 
@@ -33,8 +35,9 @@ class Silence(Action):
         if not target.is_alive:
             return None
 
-        # this silences human players
-        actor.game.town_hall.silence(target)
+        # this silences human players (headless games have no town hall)
+        if actor.game.town_hall is not None:
+            actor.game.town_hall.silence(target)
 
         # this silences bot players
         # TODO: bots don't talk right now anyways
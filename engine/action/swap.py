@@ -7,4 +7,6 @@ class Swap(Action):
     one to target another.
     """
 
+    __slots__ = ()
+
     ORDER = 20
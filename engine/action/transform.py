@@ -16,6 +16,8 @@ class Transform(Action):
     Transform a player role into another role
     """
 
+    __slots__ = ()
+
     def target_text_success(self) -> str:
         return f"You became a {self._action_result.get('new_role', 'UNKNOWN')}"
 
@@ -37,6 +39,8 @@ class ConsiglierePromote(Transform):
     Transform a Consigliere into a Godfather
     """
 
+    __slots__ = ()
+
     def target_text_success(self) -> str:
         return f"With the Godfather gone, it is your turn to lead the famiglia. You are now the Godfather."
 
@@ -50,6 +54,8 @@ class MafiosoDemote(Transform):
     Transform a Mafia role into a Mafioso
     """
 
+    __slots__ = ()
+
     def target_text_success(self) -> str:
         return f"With no killing roles left on your team, you must now act as a Mafioso."
 
@@ -63,6 +69,8 @@ class ExecutionerLoss(Transform):
     Transform an Executioner into a Jester
     """
 
+    __slots__ = ()
+
     def target_text_success(self) -> str:
         return f"The death of your target has driven you insane. You are now a Jester."
 
@@ -16,17 +16,19 @@ from engine.affiliation import TRIAD
 from engine.crimes import Crime
 from engine.message import Message
 from engine.resolver import SequenceEvent
+from engine.rng import pick
 from engine.role.base import RoleGroup
 from engine.role.neutral.jester import Jester
 from engine.role.town.citizen import Citizen
 from engine.phase import TurnPhase
-from proto import state_pb2
 
 if T.TYPE_CHECKING:
     from engine.action.kill import Kill
     from engine.game import Game
+    from engine.message_log import LogEntry
     from engine.player import Player
     from engine.role.base import Role
+    from proto import state_pb2
 
 
 class Actor:
@@ -34,6 +36,28 @@ class Actor:
     Represents a game player.
     """
 
+    __slots__ = (
+        "_game",
+        "_player",
+        "_role",
+        "_visible_role",
+        "_crimes",
+        "_last_will",
+        "_death_note",
+        "_corpse_death_note",
+        "_lynch_vote",
+        "_vote_count",
+        "_targets",
+        "_target_history",
+        "_is_jailor",
+        "_is_jailed",
+        "_vest_active",
+        "_is_alive",
+        "_attacked_by",
+        "hitpoints",
+        "_attacked",
+    )
+
     def __repr__(self) -> str:
         return f"{'Dead ' if not self.is_alive else ''}Actor - {self.name} ({self._role})"
 
@@ -72,7 +96,7 @@ class Actor:
         self._targets: T.List["Actor"] = []
 
         # visit history (truth)
-        self._target_history: T.Dict[T.Tuple[int, TurnPhase]] = dict()
+        self._target_history: T.Dict[T.Tuple[int, TurnPhase], T.List["Actor"]] = dict()
 
         # handle jail
         self._is_jailor: bool = False
@@ -89,13 +113,9 @@ class Actor:
         self.hitpoints = 1
         self._attacked = False
 
-        # keep track of messages to issue to players
-        self._message_queue: T.List["Message"] = []
-
-        # keep track of messages that have been issued to players?
-        self._mesasge_history: T.List["Message"] = []
+    def to_proto(self) -> "state_pb2.Actor":
+        from proto import state_pb2
 
-    def to_proto(self) -> state_pb2.Actor:
         actor = state_pb2.Actor(
             player=self.player.to_proto(),
             role=self.role.to_proto(),
@@ -115,6 +135,13 @@ class Actor:
     def log(self) -> logging.Logger:
         return self._game.log
 
+    @property
+    def messages(self) -> T.Iterator["LogEntry"]:
+        """
+        Recent messages addressed to this actor, read from the game's message log
+        """
+        return self._game.message_log.for_actor(self)
+
     @property
     def is_jailed(self) -> bool:
         return self._is_jailed
@@ -126,7 +153,7 @@ class Actor:
         """
         if not self._attacked_by:
             return "Unable to determine cause of death (BUG)"
-        primary = self._attacked_by[0].kill_report_text()
+        primary = pick(self._game.rng.cosmetic, self._attacked_by[0].kill_report_text())
         if len(self._attacked_by) > 1:
             primary += ". After that, they were attacked again."
         return primary
@@ -148,12 +175,16 @@ class Actor:
         return self._role.vests
 
     def put_on_vest(self) -> bool:
+        if self._game.journal is not None:
+            self._game.journal.vest(self, True)
         if self._role.use_vest():
             self._vest_active = True
             return True
         return False
 
     def take_off_vest(self) -> None:
+        if self._game.journal is not None:
+            self._game.journal.vest(self, False)
         self._vest_active = False
 
     def consume_vest(self) -> None:
@@ -213,8 +244,8 @@ class Actor:
         """
         if not self._role._detect_immune and self.role.affiliation() in NEUTRAL:
             # detect exact for neutral killing if enabled
-            if RoleGroup.NEUTRAL_KILLING in self._role.groups():
-                return self._role.__name__
+            if RoleGroup.NEUTRAL_KILLING in self._role.meta().groups:
+                return self._role.name
             return "Not Suspicious"
 
         if not self._role._detect_immune and self.role.affiliation() in (MAFIA, TRIAD):
@@ -337,6 +368,34 @@ class Actor:
         """
         self._targets = list(targets)
 
+    def submit_targets(self, *targets: "Actor") -> None:
+        """
+        Player input version of `choose_targets`. Engine logic should never call this.
+        """
+        if self._game.journal is not None:
+            self._game.journal.target(self, targets)
+        self.choose_targets(*targets)
+
+    def submit_last_will(self, last_will: str) -> None:
+        if self._game.journal is not None:
+            self._game.journal.last_will(self, last_will)
+        self._last_will = last_will
+
+    def submit_death_note(self, death_note: str) -> None:
+        if self._game.journal is not None:
+            self._game.journal.death_note(self, death_note)
+        self._death_note = death_note
+
+    def record_visit(self, targets: T.List["Actor"]) -> None:
+        """
+        Keep track of who we actually targeted, keyed by when we did it.
+        """
+        self._target_history[(self._game.turn_number, self._game.turn_phase)] = list(targets)
+
+    @property
+    def target_history(self) -> T.Dict[T.Tuple[int, TurnPhase], T.List["Actor"]]:
+        return self._target_history
+
     def reset_target(self) -> None:
         """
         This should run after actions start processing during day and night phase
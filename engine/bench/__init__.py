@@ -0,0 +1,222 @@
+"""
+Engine Benchmarks
+
+A tiny asv-style harness. Benchmarks live in `engine.bench.suites` and register with
+the `benchmark` decorator. Every round calls the decorated function to build fresh
+state (untimed) and then times the callable it returns.
+
+    python -m engine.bench                        # run everything, compare to the stored baseline
+    python -m engine.bench -k night               # only benchmarks with "night" in the name
+    python -m engine.bench --save                 # overwrite the stored baseline
+
+Baselines are JSON files keyed by benchmark name. Numbers are only comparable on the
+same machine, so the baseline records where it was taken.
+"""
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import time
+import typing as T
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# a benchmark is more than this much slower / faster than baseline
+DEFAULT_THRESHOLD = 0.15
+
+Setup = T.Callable[[], T.Callable[[], T.Any]]
+
+
+class Benchmark(T.NamedTuple):
+    name: str
+    setup: Setup
+    rounds: int
+    warmup: int
+
+
+class BenchResult(T.NamedTuple):
+    name: str
+    samples: T.List[float]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def best(self) -> float:
+        return min(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    @property
+    def stdev(self) -> float:
+        if len(self.samples) < 2:
+            return 0.0
+        return statistics.stdev(self.samples)
+
+    def to_dict(self) -> T.Dict[str, float]:
+        return dict(
+            median=self.median,
+            min=self.best,
+            mean=self.mean,
+            stdev=self.stdev,
+            rounds=len(self.samples),
+        )
+
+
+class Comparison(T.NamedTuple):
+    name: str
+    baseline: T.Optional[float]
+    current: T.Optional[float]
+    status: str
+
+    @property
+    def ratio(self) -> T.Optional[float]:
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+
+BENCHMARKS: T.Dict[str, Benchmark] = dict()
+
+
+def benchmark(name: str = None, rounds: int = 10, warmup: int = 1) -> T.Callable[[Setup], Setup]:
+    """
+    Register a benchmark. The decorated function builds state and returns the thing to time.
+    """
+    def wrapper(setup: Setup) -> Setup:
+        bench_name = name or setup.__name__
+        if bench_name in BENCHMARKS:
+            raise ValueError(f"Duplicate benchmark {bench_name}")
+        BENCHMARKS[bench_name] = Benchmark(bench_name, setup, rounds, warmup)
+        return setup
+    return wrapper
+
+
+def run_benchmark(bench: Benchmark, rounds: int = None) -> BenchResult:
+    rounds = rounds or bench.rounds
+    samples: T.List[float] = []
+    # the engine prints a lot, keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for idx in range(bench.warmup + rounds):
+            fn = bench.setup()
+            gc.collect()
+            gc.disable()
+            try:
+                t_i = time.perf_counter()
+                fn()
+                delta = time.perf_counter() - t_i
+            finally:
+                gc.enable()
+            if idx >= bench.warmup:
+                samples.append(delta)
+    return BenchResult(bench.name, samples)
+
+
+def run_all(pattern: str = None, rounds: int = None) -> T.List[BenchResult]:
+    # registers everything
+    from engine.bench import suites  # noqa: F401
+
+    results = []
+    for name, bench in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        results.append(run_benchmark(bench, rounds=rounds))
+    return results
+
+
+def machine_info() -> T.Dict[str, str]:
+    return dict(
+        node=platform.node(),
+        machine=platform.machine(),
+        processor=platform.processor(),
+        python=platform.python_version(),
+        cpus=str(os.cpu_count()),
+    )
+
+
+def save_baseline(results: T.List[BenchResult], path: str = BASELINE_PATH) -> None:
+    """
+    Merge results into the baseline at `path`
+    """
+    baseline = load_baseline(path) or dict(results=dict())
+    baseline["machine"] = machine_info()
+    baseline["created"] = time.time()
+    for result in results:
+        baseline["results"][result.name] = result.to_dict()
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path: str = BASELINE_PATH) -> T.Optional[T.Dict[str, T.Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    results: T.List[BenchResult],
+    baseline: T.Dict[str, T.Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> T.List[Comparison]:
+    """
+    Compare medians against the baseline
+    """
+    stored = baseline.get("results", {})
+    out = []
+    for result in results:
+        base = stored.get(result.name)
+        if base is None:
+            out.append(Comparison(result.name, None, result.median, "new"))
+            continue
+        ratio = result.median / base["median"] if base["median"] else 1.0
+        if ratio > 1.0 + threshold:
+            status = "slower"
+        elif ratio < 1.0 - threshold:
+            status = "faster"
+        else:
+            status = "same"
+        out.append(Comparison(result.name, base["median"], result.median, status))
+    return out
+
+
+def _fmt_time(seconds: T.Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.3f}s"
+
+
+def format_report(
+    results: T.List[BenchResult],
+    comparisons: T.Optional[T.List[Comparison]] = None,
+    baseline: T.Optional[T.Dict[str, T.Any]] = None,
+) -> str:
+    by_name = {cmp.name: cmp for cmp in comparisons or []}
+    width = max([len(result.name) for result in results] + [9])
+    lines = [
+        f"{'benchmark':<{width}}  {'median':>10}  {'min':>10}  {'stdev':>10}  {'baseline':>10}  {'ratio':>6}  status",
+    ]
+    for result in results:
+        cmp = by_name.get(result.name)
+        ratio = f"{cmp.ratio:.2f}" if cmp is not None and cmp.ratio is not None else "-"
+        lines.append(
+            f"{result.name:<{width}}  {_fmt_time(result.median):>10}  {_fmt_time(result.best):>10}  "
+            f"{_fmt_time(result.stdev):>10}  {_fmt_time(cmp.baseline if cmp else None):>10}  "
+            f"{ratio:>6}  {cmp.status if cmp else ''}"
+        )
+    if baseline is not None and baseline.get("machine", {}).get("node") != platform.node():
+        lines.append("")
+        lines.append(f"NOTE: baseline was taken on {baseline.get('machine', {}).get('node')}, "
+                     f"numbers may not be comparable")
+    return "\n".join(lines)
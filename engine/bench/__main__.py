@@ -0,0 +1,48 @@
+"""
+python -m engine.bench --help
+"""
+import argparse
+import logging
+import sys
+
+from engine.bench import BASELINE_PATH
+from engine.bench import DEFAULT_THRESHOLD
+from engine.bench import compare
+from engine.bench import format_report
+from engine.bench import load_baseline
+from engine.bench import run_all
+from engine.bench import save_baseline
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the engine benchmarks")
+    parser.add_argument("-k", dest="pattern", default=None, help="only run benchmarks containing this")
+    parser.add_argument("--rounds", type=int, default=None, help="override the number of timed rounds")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument("--save", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative change in median that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit non-zero if anything got slower")
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep engine logging on")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    results = run_all(args.pattern, rounds=args.rounds)
+    baseline = load_baseline(args.baseline)
+    comparisons = compare(results, baseline, args.threshold) if baseline else None
+    print(format_report(results, comparisons, baseline))
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"\nSaved baseline to {args.baseline}")
+
+    if args.fail_on_regression and comparisons and any(cmp.status == "slower" for cmp in comparisons):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
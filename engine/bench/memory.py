@@ -0,0 +1,152 @@
+"""
+Memory report for the hot engine objects
+
+    python -m engine.bench.memory                 # one 15 player game + 1000 games
+    python -m engine.bench.memory --games 100000  # the full simulator-sized run
+
+For a single headless game this counts the Actor / Message / SequenceEvent / Tombstone /
+Action instances still alive when it ends and what they cost. For a batch of games it
+tracks the tracemalloc peak (which should stay flat, games don't hold on to each other)
+and what the hot objects would cost if every game in the batch was kept around, which is
+roughly what the simulator does when it holds results in memory. Batches smaller than
+100k are projected up to 100k.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import logging
+import sys
+import time
+import tracemalloc
+import typing as T
+
+from engine.action.base import Action
+from engine.actor import Actor
+from engine.bench.suites import SEED
+from engine.bench.suites import play_headless_game
+from engine.game import Tombstone
+from engine.message import Message
+from engine.resolver import SequenceEvent
+
+HOT_CLASSES: T.Tuple[type, ...] = (Actor, Message, SequenceEvent, Tombstone, Action)
+
+PROJECTED_GAMES = 100_000
+
+
+class ClassUsage(T.NamedTuple):
+    name: str
+    count: int
+    bytes: int
+    has_dict: bool
+
+
+def instance_size(obj: T.Any) -> int:
+    size = sys.getsizeof(obj)
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is not None:
+        size += sys.getsizeof(attrs)
+    return size
+
+
+def hot_object_usage() -> T.List[ClassUsage]:
+    """
+    Count every live instance of the hot classes
+    """
+    gc.collect()
+    counts = {klass: 0 for klass in HOT_CLASSES}
+    sizes = {klass: 0 for klass in HOT_CLASSES}
+    has_dict = {klass: False for klass in HOT_CLASSES}
+    for obj in gc.get_objects():
+        for klass in HOT_CLASSES:
+            if isinstance(obj, klass):
+                counts[klass] += 1
+                sizes[klass] += instance_size(obj)
+                has_dict[klass] = has_dict[klass] or hasattr(obj, "__dict__")
+                break
+    return [ClassUsage(klass.__name__, counts[klass], sizes[klass], has_dict[klass]) for klass in HOT_CLASSES]
+
+
+def fmt_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:.1f}{unit}" if unit != "B" else f"{int(size)}B"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+def format_usage(usage: T.List[ClassUsage], scale: float = 1.0) -> str:
+    lines = [f"{'class':<16}{'count':>14}{'bytes':>12}{'per object':>12}  __dict__"]
+    for entry in usage:
+        per_object = entry.bytes / entry.count if entry.count else 0
+        lines.append(
+            f"{entry.name:<16}{int(entry.count * scale):>14,}{fmt_bytes(entry.bytes * scale):>12}"
+            f"{fmt_bytes(per_object):>12}  {'yes' if entry.has_dict else 'no'}"
+        )
+    total = sum(entry.bytes for entry in usage)
+    lines.append(f"{'total':<16}{'':>14}{fmt_bytes(total * scale):>12}")
+    return "\n".join(lines)
+
+
+def single_game_report() -> str:
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = play_headless_game(SEED)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    usage = hot_object_usage()
+    del game
+    return "\n".join([
+        f"One 15 player game (tracemalloc peak {fmt_bytes(peak)})",
+        format_usage(usage),
+    ])
+
+
+def batch_report(n_games: int) -> str:
+    baseline = {entry.name: entry for entry in hot_object_usage()}
+    retained = {klass.__name__: [0, 0, False] for klass in HOT_CLASSES}
+
+    tracemalloc.start()
+    t_i = time.perf_counter()
+    for idx in range(n_games):
+        with contextlib.redirect_stdout(io.StringIO()):
+            game = play_headless_game(SEED + idx)
+        # only look at a sample of games, walking the whole heap every game is slow
+        if idx % max(n_games // 100, 1) == 0:
+            for entry in hot_object_usage():
+                stats = retained[entry.name]
+                stats[0] += entry.count - baseline[entry.name].count
+                stats[1] += entry.bytes - baseline[entry.name].bytes
+                stats[2] = stats[2] or entry.has_dict
+        del game
+    elapsed = time.perf_counter() - t_i
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sampled = len(range(0, n_games, max(n_games // 100, 1)))
+    per_game = [ClassUsage(name, count, size, has_dict) for name, (count, size, has_dict) in retained.items()]
+    return "\n".join([
+        f"{n_games:,} games in {elapsed:.1f}s (tracemalloc peak {fmt_bytes(peak)})",
+        f"Hot objects if all {PROJECTED_GAMES:,} games were kept around "
+        f"(from {sampled} sampled games):",
+        format_usage(per_game, scale=PROJECTED_GAMES / sampled),
+    ])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report memory used by the hot engine objects")
+    parser.add_argument("--games", type=int, default=1000, help="how many games to play for the batch report")
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep engine logging on")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    print(single_game_report())
+    print()
+    print(batch_report(args.games))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Benchmark definitions
+
+Each function builds whatever state it needs and returns the callable to time.
+"""
+import typing as T
+
+from engine.action.base import TargetGroup
+from engine.actor import Actor
+from engine.bench import benchmark
+from engine.config import GameConfig
+from engine.game import Game
+from engine.message import Message
+from engine.message import MessageType
+from engine.message import Messenger
+from engine.message import OutboundMessageDriver
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+from engine.setup import do_setup
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+from engine.tribunal import Tribunal
+
+SEED = 20230401
+
+# roles that interact with a lot of other actions during the night sequence
+HEAVY_ROLES = [
+    "Bodyguard",
+    "Lookout",
+    "Beguiler",
+    "Escort",
+    "Jailor",
+    "Doctor",
+    "Godfather",
+    "Mafioso",
+    "Consort",
+    "Sheriff",
+    "Investigator",
+    "SerialKiller",
+    "Vigilante",
+    "Survivor",
+    "Citizen",
+]
+
+LARGE_ROLE_LIST = DEFAULT_CONFIG.role_list + [
+    "Town Random",
+    "Town Random",
+    "Town Investigative",
+    "Town Protective",
+    "Town Support",
+    "Mafia Random",
+    "Neutral Random",
+]
+
+
+def _make_game(
+    n_actors: int,
+    roles: T.List[str] = HEAVY_ROLES,
+    config: GameConfig = DEFAULT_CONFIG,
+) -> T.Tuple[Game, Stepper]:
+    game = Game(config, seed=SEED)
+    game.messenger = Messenger(game)
+    game.tribunal = Tribunal(game, sleeper=sleep_override)
+    rf = RoleFactory(config)
+    players = [Player(f"Player-{idx}") for idx in range(n_actors)]
+    game.add_players(*players)
+    game.add_actors(*[
+        Actor(player, rf.create_by_name(roles[idx % len(roles)]), game)
+        for idx, player in enumerate(players)
+    ])
+    return game, Stepper(game, sleep_override)
+
+
+def _step_to(game: Game, stepper: Stepper, phase: TurnPhase) -> None:
+    stepper.advance()
+    while game.turn_phase != phase:
+        stepper.advance()
+
+
+def _choose_all_targets(game: Game, night: bool) -> None:
+    rng = game.rng.substream("bench")
+    for actor in game.get_live_actors():
+        if night and not actor.has_night_action:
+            continue
+        if not night and not actor.has_day_action:
+            continue
+        if actor.role.target_group == TargetGroup.JAIL and night and game._jail_map.get(actor) is None:
+            # nobody in jail, nothing to do
+            continue
+        options = actor.get_target_options(as_str=False)
+        if options:
+            actor.choose_targets(rng.choice(options))
+
+
+def _setup_bench(role_list: T.List[str]) -> T.Callable[[], T.Callable[[], T.Any]]:
+    config = GameConfig.default_with_role_list(role_list)
+
+    def setup() -> T.Callable[[], T.Any]:
+        game = Game(config, seed=SEED)
+        game.add_players(*[Player(f"Player-{idx}") for idx in range(len(role_list))])
+        return lambda: do_setup(game, config=config)
+    return setup
+
+
+benchmark("setup_default_15")(_setup_bench(DEFAULT_CONFIG.role_list))
+benchmark("setup_large_22")(_setup_bench(LARGE_ROLE_LIST))
+benchmark("setup_exact_15")(_setup_bench(HEAVY_ROLES))
+
+
+def _night_bench(n_actors: int) -> T.Callable[[], T.Callable[[], T.Any]]:
+    def setup() -> T.Callable[[], T.Any]:
+        game, stepper = _make_game(n_actors)
+        _step_to(game, stepper, TurnPhase.DAYLIGHT)
+        _choose_all_targets(game, night=False)
+        _step_to(game, stepper, TurnPhase.NIGHT)
+        _choose_all_targets(game, night=True)
+        _step_to(game, stepper, TurnPhase.NIGHT_SEQUENCE)
+        # resolve the night sequence
+        return stepper.advance
+    return setup
+
+
+for _n in (15, 30, 60):
+    benchmark(f"night_sequence_{_n}")(_night_bench(_n))
+
+
+@benchmark(rounds=5)
+def tribunal_vote_storm_60() -> T.Callable[[], T.Any]:
+    game, stepper = _make_game(60, roles=["Citizen"])
+    _step_to(game, stepper, TurnPhase.DAYLIGHT)
+    actors = game.get_live_actors()
+    tribunal = game.tribunal
+
+    def storm() -> None:
+        # everyone keeps changing their vote, spread out so nobody reaches quorum
+        for rnd in range(1, 11):
+            for idx, voter in enumerate(actors):
+                tribunal.submit_trial_vote(voter, actors[(idx + rnd) % len(actors)])
+                tribunal.maybe_go_to_trial()
+    return storm
+
+
+class _PublicSink(OutboundMessageDriver):
+
+    def wants(self, message: Message) -> bool:
+        return message.message_type in (
+            MessageType.ANNOUNCEMENT,
+            MessageType.DEBUG,
+            MessageType.NIGHT_SEQUENCE,
+        )
+
+
+class _ChatSink(OutboundMessageDriver):
+
+    def wants(self, message: Message) -> bool:
+        return message.message_type in (
+            MessageType.BOT_PUBLIC_MESSAGE,
+            MessageType.INDICATOR,
+            MessageType.PLAYER_PUBLIC_MESSAGE,
+        )
+
+
+class _PrivateSink(OutboundMessageDriver):
+
+    def __init__(self, actor: Actor) -> None:
+        super().__init__()
+        self._actor = actor
+
+    def wants(self, message: Message) -> bool:
+        return message.addressed_to == self._actor
+
+
+class _BotSink(_PrivateSink):
+
+    def wants(self, message: Message) -> bool:
+        return message.addressed_to == self._actor or message.message_type in (
+            MessageType.ANNOUNCEMENT,
+            MessageType.NIGHT_SEQUENCE,
+            MessageType.BOT_PUBLIC_MESSAGE,
+            MessageType.PLAYER_PUBLIC_MESSAGE,
+        )
+
+
+@benchmark()
+def messenger_fan_out_60() -> T.Callable[[], T.Any]:
+    game, _ = _make_game(60)
+    actors = game.get_actors()
+    # 45 humans and 15 bots, like a full lobby
+    drivers = [_PublicSink(), _ChatSink()]
+    drivers.extend(_PrivateSink(actor) for actor in actors[:45])
+    drivers.extend(_BotSink(actor) for actor in actors[45:])
+    messenger = Messenger(game, *drivers)
+
+    messages = []
+    for idx in range(200):
+        actor = actors[idx % len(actors)]
+        messages.extend([
+            Message.announce(game, f"Announcement {idx}"),
+            Message.indicate(game, f"Indicator {idx}"),
+            Message.player_public_message(actor, f"Message {idx}"),
+            Message.private_feedback(actor, "Feedback", f"Feedback {idx}"),
+            Message.private_feedback(actors[-1 - idx % 15], "Feedback", f"Bot feedback {idx}"),
+        ])
+
+    def fan_out() -> None:
+        for message in messages:
+            messenger.route_message(message)
+    return fan_out
+
+
+@benchmark()
+def game_to_proto_60() -> T.Callable[[], T.Any]:
+    game, stepper = _make_game(60)
+    _step_to(game, stepper, TurnPhase.DAYLIGHT)
+    _choose_all_targets(game, night=False)
+    _step_to(game, stepper, TurnPhase.NIGHT)
+    _choose_all_targets(game, night=True)
+    _step_to(game, stepper, TurnPhase.DAYLIGHT)
+
+    def to_proto() -> None:
+        for _ in range(100):
+            game.to_proto()
+    return to_proto
+
+
+def play_headless_game(seed: int = SEED, config: GameConfig = DEFAULT_CONFIG) -> Game:
+    """
+    Play out a whole game with random night targets and a random lynch every day
+    """
+    game = Game(config, seed=seed)
+    game.messenger = Messenger(game)
+    game.add_players(*[Player(f"Player-{idx}") for idx in range(len(config.role_list))])
+    do_setup(game, config=config)
+    game.tribunal = Tribunal(game, sleeper=sleep_override)
+    stepper = Stepper(game, sleep_override)
+    rng = game.rng.substream("bench")
+    while not game.concluded and game.turn_number < 20:
+        _step_to(game, stepper, TurnPhase.DAYLIGHT)
+        # no day actions, some of them (e.g. Court) need Discord
+        if game.turn_number > 1:
+            # somebody always gets lynched
+            rng.choice(game.get_live_actors()).lynch()
+            game.death_reporter.report_all_deaths()
+        _step_to(game, stepper, TurnPhase.NIGHT)
+        _choose_all_targets(game, night=True)
+    return game
+
+
+@benchmark(rounds=5)
+def headless_game_15() -> T.Callable[[], T.Any]:
+    return play_headless_game
@@ -0,0 +1,228 @@
+"""
+Bounded Buffers
+
+Everything that piles up messages over the course of a game goes through one of these
+so a long game with chatty players can't balloon the process:
+
+    * `RingBuffer` is an append-only history that forgets the oldest entries
+    * `BoundedQueue` is an asyncio.Queue with a cap and a policy for what to do when
+      it's full
+
+The game's `MessageLog` (see `engine.message_log`) is bounded the same way.
+
+Each game owns a `MemoryAccount` that its buffers register with, so we can ask a game
+how much it's holding on to (`Game.memory_usage`).
+"""
+import asyncio
+import sys
+import typing as T
+from collections import deque
+from enum import Enum
+
+from engine.metrics import registry
+
+if T.TYPE_CHECKING:
+    from engine.message_log import MessageLog
+
+Item = T.TypeVar("Item")
+
+DROPPED = registry.counter(
+    "mafia_buffer_dropped_total",
+    "Entries dropped because a bounded buffer or queue was full",
+)
+
+
+class DropPolicy(Enum):
+    # forget the oldest entry to make room
+    DROP_OLDEST = 0
+    # refuse the new entry
+    DROP_NEWEST = 1
+    # make producers wait (`put`), `put_nowait` raises QueueFull
+    BLOCK = 2
+
+
+def approx_size(items: T.Iterable[T.Any]) -> int:
+    """
+    Shallow size of the entries plus any strings hanging directly off them.
+
+    Good enough to see which buffer is the problem, not an exact figure.
+    """
+    total = 0
+    for item in items:
+        total += sys.getsizeof(item)
+        for attr in getattr(type(item), "__slots__", ()):
+            value = getattr(item, attr, None)
+            if isinstance(value, str):
+                total += sys.getsizeof(value)
+    return total
+
+
+class RingBuffer(T.Generic[Item]):
+    """
+    History that keeps at most `maxlen` entries
+    """
+
+    def __init__(self, maxlen: int, name: str = "") -> None:
+        self._items: T.Deque[Item] = deque(maxlen=maxlen)
+        self._name = name
+        self._dropped = 0
+        self.tags: T.Dict[str, str] = dict()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def maxlen(self) -> int:
+        return self._items.maxlen
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def append(self, item: Item) -> None:
+        if len(self._items) == self._items.maxlen:
+            self._dropped += 1
+            DROPPED.inc(buffer=self._name, **self.tags)
+        self._items.append(item)
+
+    def extend(self, items: T.Iterable[Item]) -> None:
+        for item in items:
+            self.append(item)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __iter__(self) -> T.Iterator[Item]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, idx: int) -> Item:
+        return self._items[idx]
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self._name!r}, {len(self)}/{self.maxlen})"
+
+
+class BoundedQueue(asyncio.Queue):
+    """
+    asyncio.Queue with a drop policy for when it's full.
+
+    DROP_OLDEST / DROP_NEWEST never block or raise, so they're safe to feed from the
+    synchronous engine. BLOCK is plain asyncio.Queue backpressure.
+    """
+
+    def __init__(self, maxsize: int, policy: DropPolicy = DropPolicy.DROP_OLDEST, name: str = "") -> None:
+        super().__init__(maxsize=maxsize)
+        self._policy = policy
+        self._name = name
+        self._dropped = 0
+        self.tags: T.Dict[str, str] = dict()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def policy(self) -> DropPolicy:
+        return self._policy
+
+    @property
+    def maxlen(self) -> int:
+        return self.maxsize
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def _drop(self) -> None:
+        self._dropped += 1
+        DROPPED.inc(buffer=self._name, **self.tags)
+
+    def put_nowait(self, item: T.Any) -> None:
+        if self._policy != DropPolicy.BLOCK and 0 < self.maxsize <= len(self._queue):
+            self._drop()
+            if self._policy == DropPolicy.DROP_OLDEST:
+                # one out, one in: nobody waits on a full queue that never blocks and
+                # the unfinished task count stays the same, so skip get_nowait/task_done
+                self._queue.popleft()
+                self._queue.append(item)
+            return
+        super().put_nowait(item)
+
+    async def put(self, item: T.Any) -> None:
+        if self._policy == DropPolicy.BLOCK:
+            return await super().put(item)
+        self.put_nowait(item)
+
+    def __iter__(self) -> T.Iterator[T.Any]:
+        # peek without consuming, for accounting
+        return iter(self._queue)
+
+    def __len__(self) -> int:
+        return self.qsize()
+
+    def __repr__(self) -> str:
+        return f"BoundedQueue({self._name!r}, {self.qsize()}/{self.maxsize}, {self._policy.name})"
+
+
+Bounded = T.Union[RingBuffer, BoundedQueue, "MessageLog"]
+
+
+class BufferUsage(T.NamedTuple):
+    name: str
+    length: int
+    maxlen: int
+    dropped: int
+    bytes: int
+
+
+class MemoryAccount:
+    """
+    Keeps track of every bounded buffer that belongs to a game
+    """
+
+    def __init__(self, tags: T.Dict[str, str] = None) -> None:
+        # metric labels, the game shares its tags
+        self._tags = tags if tags is not None else dict()
+        self._buffers: T.Dict[str, Bounded] = dict()
+
+    def register(self, buffer: Bounded) -> Bounded:
+        # e.g. one private driver per player, number repeats so they stay apart
+        name = buffer.name
+        idx = 1
+        while name in self._buffers and self._buffers[name] is not buffer:
+            idx += 1
+            name = f"{buffer.name}#{idx}"
+        buffer._name = name
+        buffer.tags = self._tags
+        self._buffers[name] = buffer
+        return buffer
+
+    def unregister(self, buffer: Bounded) -> None:
+        if self._buffers.get(buffer.name) is buffer:
+            self._buffers.pop(buffer.name)
+
+    def usage(self) -> T.List[BufferUsage]:
+        return [
+            BufferUsage(
+                name,
+                len(buffer),
+                buffer.maxlen,
+                buffer.dropped,
+                # the message log knows its own layout better than we do
+                buffer.approx_size() if hasattr(buffer, "approx_size") else approx_size(buffer),
+            )
+            for name, buffer in self._buffers.items()
+        ]
+
+    def report(self) -> T.Dict[str, T.Any]:
+        usage = self.usage()
+        return dict(
+            bytes=sum(entry.bytes for entry in usage),
+            entries=sum(entry.length for entry in usage),
+            dropped=sum(entry.dropped for entry in usage),
+            buffers={entry.name: entry._asdict() for entry in usage},
+        )
@@ -0,0 +1,148 @@
+"""
+Clocks
+
+Everything in a game that waits or reads a timestamp goes through the game's clock
+(`game.clock`) instead of calling `time.time` / `asyncio.sleep` directly.
+
+    RealClock: wall time
+    AcceleratedClock: wall time running N times faster (e.g. 2x speed games)
+    VirtualClock: discrete-event time for tests and simulations. Sleeping costs
+        nothing, time jumps straight to the next scheduled wakeup.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+import typing as T
+
+
+class Clock:
+    """
+    Interface for a source of time
+    """
+
+    def time(self) -> float:
+        raise NotImplementedError()
+
+    async def sleep(self, duration: float) -> None:
+        raise NotImplementedError()
+
+    def elapsed(self, since: float) -> float:
+        return self.time() - since
+
+
+class RealClock(Clock):
+
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, duration: float) -> None:
+        await asyncio.sleep(duration)
+
+
+class AcceleratedClock(Clock):
+    """
+    Game time runs `speed` times faster than wall time.
+
+    Timestamps start at wall time when the clock is created and drift ahead from there.
+    """
+
+    def __init__(self, speed: float) -> None:
+        if speed <= 0:
+            raise ValueError(f"Clock speed must be positive, got {speed}")
+        self._speed = speed
+        self._epoch = time.time()
+        self._t_init = time.monotonic()
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    def time(self) -> float:
+        return self._epoch + (time.monotonic() - self._t_init) * self._speed
+
+    async def sleep(self, duration: float) -> None:
+        await asyncio.sleep(max(duration, 0.0) / self._speed)
+
+
+class VirtualClock(Clock):
+    """
+    Discrete-event clock.
+
+    Each sleeper is parked until virtual time reaches its wakeup. Once the event loop
+    has run everything that is ready, time jumps to the earliest wakeup and those
+    sleepers are released. A full game runs in however long the engine takes to compute it.
+
+    Anything waiting on real I/O does not hold virtual time back.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._now = start
+        self._sleepers: T.List[T.Tuple[float, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._advance_scheduled = False
+
+    def time(self) -> float:
+        return self._now
+
+    def advance(self, duration: float) -> None:
+        """
+        Manually move time forward, e.g. from a synchronous test
+        """
+        self._now += max(duration, 0.0)
+
+    async def sleep(self, duration: float) -> None:
+        if duration <= 0:
+            await asyncio.sleep(0)
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._sleepers, (self._now + duration, next(self._counter), future))
+        self._schedule_advance(loop)
+        await future
+
+    def _schedule_advance(self, loop: asyncio.AbstractEventLoop) -> None:
+        if not self._advance_scheduled:
+            self._advance_scheduled = True
+            loop.call_soon(self._advance_when_idle, loop)
+
+    def _advance_when_idle(self, loop: asyncio.AbstractEventLoop) -> None:
+        # every task that is already runnable gets to its next sleep first, however
+        # many hops that takes. Pending I/O isn't ready yet so it doesn't count.
+        if _has_ready(loop):
+            loop.call_soon(self._advance_when_idle, loop)
+            return
+        self._advance_scheduled = False
+        self._wake_next(loop)
+
+    def _wake_next(self, loop: asyncio.AbstractEventLoop) -> None:
+        # drop anyone who was cancelled while asleep
+        while self._sleepers and self._sleepers[0][2].done():
+            heapq.heappop(self._sleepers)
+        if not self._sleepers:
+            return
+
+        wake_at = self._sleepers[0][0]
+        self._now = max(self._now, wake_at)
+        while self._sleepers and self._sleepers[0][0] <= wake_at:
+            _, _, future = heapq.heappop(self._sleepers)
+            if not future.done():
+                future.set_result(None)
+
+        if self._sleepers:
+            self._schedule_advance(loop)
+
+
+def _has_ready(loop: asyncio.AbstractEventLoop) -> bool:
+    """
+    Whether the loop has callbacks waiting to run besides the one running now
+    """
+    # asyncio doesn't expose this, but every BaseEventLoop keeps its ready queue here
+    return bool(getattr(loop, "_ready", None))
+
+
+def clock_for_speed(speed: float) -> Clock:
+    if speed == 1.0:
+        return RealClock()
+    return AcceleratedClock(speed)
@@ -2,6 +2,7 @@
 Game Configuration
 """
 import asyncio
+import functools
 import json
 import logging
 import os
@@ -9,8 +10,6 @@ import time
 import typing as T
 from collections import defaultdict
 
-from aiogoogle import Aiogoogle
-from aiogoogle.auth.creds import ServiceAccountCreds
 from pydantic import BaseModel
 from pydantic import Field
 
@@ -21,6 +20,9 @@ from engine.role import NAME_TO_ROLE
 from util.string import camel_to_english
 from util.string import fmt_to_excel_title
 
+if T.TYPE_CHECKING:
+    from aiogoogle.auth.creds import ServiceAccountCreds
+
 logger = logging.getLogger(__name__)
 logger.addHandler(log.ch)
 logger.setLevel(logging.INFO)
@@ -29,11 +31,20 @@ SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
 
 TOKENFILE_PATH = os.environ.get("GOOGLE_SHEETS_API_TOKEN")
-if TOKENFILE_PATH is None:
-    raise OSError("Need to specify Google Sheets API token")
 
-TOKEN = json.load(open(TOKENFILE_PATH))
-GOOGLE_CREDS = creds = ServiceAccountCreds(**TOKEN)
+
+@functools.lru_cache(maxsize=None)
+def get_google_creds() -> "ServiceAccountCreds":
+    """
+    Load the Sheets service account the first time we actually talk to Google,
+    so headless tools never need the token (or aiogoogle)
+    """
+    from aiogoogle.auth.creds import ServiceAccountCreds
+
+    if TOKENFILE_PATH is None:
+        raise OSError("Need to specify Google Sheets API token")
+    with open(TOKENFILE_PATH) as tokenfile:
+        return ServiceAccountCreds(**json.load(tokenfile))
 
 
 class ConfigError(ValueError):
@@ -47,10 +58,16 @@ class SheetsFetcher:
     Fetch game config from Sheets API
     """
 
-    def __init__(self, creds=GOOGLE_CREDS) -> None:
+    def __init__(self, creds: "ServiceAccountCreds" = None) -> None:
         self._creds = creds
         self._read_results: T.Dict[str, T.List[T.List[str]]] = dict()
 
+    @property
+    def creds(self) -> "ServiceAccountCreds":
+        if self._creds is None:
+            self._creds = get_google_creds()
+        return self._creds
+
     @property
     def read_results(self) -> T.Dict[str, T.List[T.List[str]]]:
         return self._read_results
@@ -60,8 +77,10 @@ class SheetsFetcher:
         return f"'{sheet_name}'!{_range}"
 
     async def fetch_config(self, sheet_id: str, sections: T.Iterable[T.Type["Section"]]) -> None:
+        from aiogoogle import Aiogoogle
+
         t_i = time.time()
-        async with Aiogoogle(service_account_creds=self._creds) as aiogoogle:
+        async with Aiogoogle(service_account_creds=self.creds) as aiogoogle:
             await asyncio.gather(*[self.read_from_sheets(
                 aiogoogle, sheet_id, section.fmt_range()
             ) for section in sections])
@@ -69,8 +88,10 @@ class SheetsFetcher:
         logger.info(f"Fetching sheet {sheet_id} took {delta}s")
 
     async def fetch_all_role_configs(self, sheet_id: str) -> None:
+        from aiogoogle import Aiogoogle
+
         t_i = time.time()
-        async with Aiogoogle(service_account_creds=self._creds) as aiogoogle:
+        async with Aiogoogle(service_account_creds=self.creds) as aiogoogle:
             await asyncio.gather(*[self.read_role_config(aiogoogle, sheet_id, role_name)
                                    for role_name in NAME_TO_ROLE.keys()])
         delta = time.time() - t_i
@@ -168,6 +189,8 @@ class Timing(Section):
     lynch_vote_duration: float = 30.0
     skip_first_day: bool = True
     first_day_duration: float = 30.0
+    # 2.0 runs every timer twice as fast
+    clock_speed: float = 1.0
 
     @staticmethod
     def sheet_range() -> T.Tuple[str, str, str]:
@@ -181,6 +204,25 @@ class Timing(Section):
         ])
 
 
+class Limits(Section):
+    """
+    Caps on how much each game holds on to, see `engine.buffer`.
+
+    Nothing a game keeps should grow with its length, so a long game costs the same
+    memory as a short one. Bots keep their own caps next to their state
+    (`academy.ChatContext`, `donbot.DonBot`) on the same principle.
+
+    Not loaded from the sheet (yet).
+    """
+
+    # messages kept in the game's message log
+    message_history: int = 5000
+    # messages waiting on an outbound driver (Discord, webhooks, ...)
+    driver_queue: int = 1000
+    # messages waiting for a bot to pick them up over gRPC
+    grpc_queue: int = 500
+
+
 class RoleConfig(Section):
     """
     A role-specific config.
@@ -211,7 +253,8 @@ class GameConfig:
 
     def __init__(self, config_dict: T.Dict[str, T.Any]) -> None:
         self._config_dict = config_dict
-        self.role_config: RoleConfigMixin = RoleConfigMixin()
+        # defaults don't need validating, see `Section.model_config`
+        self.role_config: RoleConfigMixin = RoleConfigMixin.model_construct()
 
         # these are not loaded from an Excel sheet (yet)
         self.preferred_role: T.Dict[str, str] = dict()
@@ -223,7 +266,8 @@ class GameConfig:
         self.excludes_list: T.List[T.Tuple[str, str]] = list()
 
         # TODO: this is kinda bad
-        self.timing: Timing = Timing()
+        self.timing: Timing = Timing.model_construct()
+        self.limits: Limits = Limits.model_construct()
 
         # make the config accessible
         self.__dict__.update(self._config_dict)
@@ -273,6 +317,8 @@ class GameConfig:
 
 
 if __name__ == "__main__":
+    from aiogoogle.auth.creds import ServiceAccountCreds
+
     with open('service_token.json') as service_token:
         token = json.loads(service_token.read())
 
@@ -1,6 +1,7 @@
 import typing as T
 
 from pydantic import BaseModel
+from pydantic import ConfigDict
 from util.string import camel_to_snake
 
 
@@ -11,6 +12,10 @@ class Section(BaseModel):
     This is just a duck type.
     """
 
+    # validators are only built the first time a section is parsed from the sheet,
+    # defaults go through `model_construct` so headless games never need them
+    model_config = ConfigDict(defer_build=True)
+
     @classmethod
     def name(cls) -> str:
         return camel_to_snake(cls.__name__)
@@ -3,6 +3,7 @@
     
 import typing as T
 from pydantic import BaseModel
+from pydantic import ConfigDict
 from pydantic import Field
 from engine.config import Section
 from util.string import camel_to_snake
@@ -47,40 +48,42 @@ from engine.config.mass_murderer import MassMurdererSection
 
 
 class RoleConfigMixin(BaseModel):
-    vigilante: VigilanteSection = Field(default_factory=VigilanteSection)
-    marshall: MarshallSection = Field(default_factory=MarshallSection)
-    judge: JudgeSection = Field(default_factory=JudgeSection)
-    bodyguard: BodyguardSection = Field(default_factory=BodyguardSection)
-    agent: AgentSection = Field(default_factory=AgentSection)
-    executioner: ExecutionerSection = Field(default_factory=ExecutionerSection)
-    kidnapper: KidnapperSection = Field(default_factory=KidnapperSection)
-    mayor: MayorSection = Field(default_factory=MayorSection)
-    serial_killer: SerialKillerSection = Field(default_factory=SerialKillerSection)
-    godfather: GodfatherSection = Field(default_factory=GodfatherSection)
-    jailor: JailorSection = Field(default_factory=JailorSection)
-    armorsmith: ArmorsmithSection = Field(default_factory=ArmorsmithSection)
-    veteran: VeteranSection = Field(default_factory=VeteranSection)
-    beguiler: BeguilerSection = Field(default_factory=BeguilerSection)
-    lookout: LookoutSection = Field(default_factory=LookoutSection)
-    jester: JesterSection = Field(default_factory=JesterSection)
-    janitor: JanitorSection = Field(default_factory=JanitorSection)
-    consort: ConsortSection = Field(default_factory=ConsortSection)
-    party_host: PartyHostSection = Field(default_factory=PartyHostSection)
-    framer: FramerSection = Field(default_factory=FramerSection)
-    survivor: SurvivorSection = Field(default_factory=SurvivorSection)
-    doctor: DoctorSection = Field(default_factory=DoctorSection)
-    constable: ConstableSection = Field(default_factory=ConstableSection)
-    sheriff: SheriffSection = Field(default_factory=SheriffSection)
-    mafioso: MafiosoSection = Field(default_factory=MafiosoSection)
-    consigliere: ConsigliereSection = Field(default_factory=ConsigliereSection)
-    investigator: InvestigatorSection = Field(default_factory=InvestigatorSection)
-    detective: DetectiveSection = Field(default_factory=DetectiveSection)
-    citizen: CitizenSection = Field(default_factory=CitizenSection)
-    auditor: AuditorSection = Field(default_factory=AuditorSection)
-    blackmailer: BlackmailerSection = Field(default_factory=BlackmailerSection)
-    scumbag: ScumbagSection = Field(default_factory=ScumbagSection)
-    escort: EscortSection = Field(default_factory=EscortSection)
-    mass_murderer: MassMurdererSection = Field(default_factory=MassMurdererSection)
+    model_config = ConfigDict(defer_build=True)
+
+    vigilante: VigilanteSection = Field(default_factory=VigilanteSection.model_construct)
+    marshall: MarshallSection = Field(default_factory=MarshallSection.model_construct)
+    judge: JudgeSection = Field(default_factory=JudgeSection.model_construct)
+    bodyguard: BodyguardSection = Field(default_factory=BodyguardSection.model_construct)
+    agent: AgentSection = Field(default_factory=AgentSection.model_construct)
+    executioner: ExecutionerSection = Field(default_factory=ExecutionerSection.model_construct)
+    kidnapper: KidnapperSection = Field(default_factory=KidnapperSection.model_construct)
+    mayor: MayorSection = Field(default_factory=MayorSection.model_construct)
+    serial_killer: SerialKillerSection = Field(default_factory=SerialKillerSection.model_construct)
+    godfather: GodfatherSection = Field(default_factory=GodfatherSection.model_construct)
+    jailor: JailorSection = Field(default_factory=JailorSection.model_construct)
+    armorsmith: ArmorsmithSection = Field(default_factory=ArmorsmithSection.model_construct)
+    veteran: VeteranSection = Field(default_factory=VeteranSection.model_construct)
+    beguiler: BeguilerSection = Field(default_factory=BeguilerSection.model_construct)
+    lookout: LookoutSection = Field(default_factory=LookoutSection.model_construct)
+    jester: JesterSection = Field(default_factory=JesterSection.model_construct)
+    janitor: JanitorSection = Field(default_factory=JanitorSection.model_construct)
+    consort: ConsortSection = Field(default_factory=ConsortSection.model_construct)
+    party_host: PartyHostSection = Field(default_factory=PartyHostSection.model_construct)
+    framer: FramerSection = Field(default_factory=FramerSection.model_construct)
+    survivor: SurvivorSection = Field(default_factory=SurvivorSection.model_construct)
+    doctor: DoctorSection = Field(default_factory=DoctorSection.model_construct)
+    constable: ConstableSection = Field(default_factory=ConstableSection.model_construct)
+    sheriff: SheriffSection = Field(default_factory=SheriffSection.model_construct)
+    mafioso: MafiosoSection = Field(default_factory=MafiosoSection.model_construct)
+    consigliere: ConsigliereSection = Field(default_factory=ConsigliereSection.model_construct)
+    investigator: InvestigatorSection = Field(default_factory=InvestigatorSection.model_construct)
+    detective: DetectiveSection = Field(default_factory=DetectiveSection.model_construct)
+    citizen: CitizenSection = Field(default_factory=CitizenSection.model_construct)
+    auditor: AuditorSection = Field(default_factory=AuditorSection.model_construct)
+    blackmailer: BlackmailerSection = Field(default_factory=BlackmailerSection.model_construct)
+    scumbag: ScumbagSection = Field(default_factory=ScumbagSection.model_construct)
+    escort: EscortSection = Field(default_factory=EscortSection.model_construct)
+    mass_murderer: MassMurdererSection = Field(default_factory=MassMurdererSection.model_construct)
 
     @classmethod
     def get_list_of_sections(cls) -> T.List[T.Type["Section"]]:
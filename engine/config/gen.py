@@ -90,6 +90,7 @@ class {klass_name}(Section):
     
 import typing as T
 from pydantic import BaseModel
+from pydantic import ConfigDict
 from pydantic import Field
 from engine.config import Section
 from util.string import camel_to_snake
@@ -105,9 +106,11 @@ if T.TYPE_CHECKING:
         config += f"""
 
 class RoleConfigMixin(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
 """
         for role_name, klass_name in class_name_map.items():
-            config += f"    {camel_to_snake(role_name)}: {klass_name} = Field(default_factory={klass_name})\n"
+            config += f"    {camel_to_snake(role_name)}: {klass_name} = Field(default_factory={klass_name}.model_construct)\n"
 
         config += """
     @classmethod
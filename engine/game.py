@@ -1,20 +1,26 @@
 import asyncio
 import logging
-import random
 import typing as T
+import uuid
 from collections import defaultdict
 from dataclasses import dataclass
 
 from engine.actor import Actor
+from engine.clock import Clock
+from engine.clock import RealClock
 from engine.affiliation import MAFIA
 from engine.affiliation import TOWN
 from engine.affiliation import TRIAD
+from engine.buffer import MemoryAccount
 from engine.config import GameConfig
+from engine.config import Limits
 from engine.report import DeathReporter
 from engine.message import Messenger
+from engine.message_log import MessageLog
 from engine.phase import GamePhase
 from engine.phase import TurnPhase
 from engine.resolver import SequenceEvent
+from engine.rng import GameRNG
 from engine.role.base import Role
 from engine.role.base import RoleFactory
 from engine.role.base import RoleGroup
@@ -22,22 +28,25 @@ from engine.role.neutral.massmurderer import MassMurderer
 from engine.role.neutral.serialkiller import SerialKiller
 import log
 
-from proto import state_pb2
 
 if T.TYPE_CHECKING:
     from chatapi.discord.town_hall import TownHall
+    from engine.journal import Journal
     from engine.player import Player
     from engine.tribunal import Tribunal
+    from proto import state_pb2
 
 
-@dataclass
+@dataclass(slots=True)
 class Tombstone:
     actor: Actor
     turn_phase: TurnPhase
     turn_number: int
     epitaph: str
 
-    def to_proto(self) -> state_pb2.Tombstone:
+    def to_proto(self) -> "state_pb2.Tombstone":
+        from proto import state_pb2
+
         return state_pb2.Tombstone(
             player=self.actor.player.to_proto(),
             epitaph=self.epitaph,
@@ -48,8 +57,27 @@ class Tombstone:
 
 class Game:
 
-    def __init__(self, config: GameConfig):
+    def __init__(
+        self,
+        config: GameConfig,
+        seed: T.Optional[int] = None,
+        clock: T.Optional[Clock] = None,
+        game_id: T.Optional[str] = None,
+    ):
         self._config = config
+        # unique per process, short enough to go in Discord custom ids
+        self._id = game_id or uuid.uuid4().hex[:8]
+        # every sleep and timestamp in this game goes through here, see `engine.clock`
+        self._clock = clock or RealClock()
+        # every random decision in this game goes through here, see `engine.rng`
+        self._rng = GameRNG(seed)
+        # labels attached to metrics from this game, see `engine.metrics`
+        self._tags: T.Dict[str, str] = dict()
+        # everything that holds on to messages is capped and accounted for, see `engine.buffer`
+        self._limits: Limits = getattr(config, "limits", None) or Limits.model_construct()
+        self._memory = MemoryAccount(self._tags)
+        # every routed message, see `engine.message_log`
+        self._message_log = self._memory.register(MessageLog(self._limits.message_history))
         self._actors: T.List["Actor"] = []  # MUST BE ORDERED STRICTLY
         self._players: T.List["Player"] = []  # MUST BE ORDERED STRICTLY
         self._game_phase = GamePhase.INITIALIZING
@@ -80,13 +108,18 @@ class Game:
         # this queue loads delayed action callbacks that fire during the night sequence
         self._night_queue: T.List["SequenceEvent"] = list()
 
+        # append-only record of player inputs, if we're keeping one
+        self.journal: T.Optional["Journal"] = None
+
         # when this attaches to a session, the channel ID of the game or
         # the channel name of the game should be used for this instead
         self.log = logging.Logger(f"Game-{id(self)}")
         self.log.addHandler(log.ch)
         self.log.setLevel(logging.INFO)
 
-    def to_proto(self) -> state_pb2.Game:
+    def to_proto(self) -> "state_pb2.Game":
+        from proto import state_pb2
+
         game = state_pb2.Game(
             game_phase=self.game_phase.name,
             turn_phase=self.turn_phase.name,
@@ -126,6 +159,40 @@ class Game:
         # just give the prisoner a bulletproof vest
         prisoner._vest_active = True
 
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    @property
+    def rng(self) -> GameRNG:
+        return self._rng
+
+    @property
+    def tags(self) -> T.Dict[str, str]:
+        return self._tags
+
+    @property
+    def limits(self) -> Limits:
+        return self._limits
+
+    @property
+    def memory(self) -> MemoryAccount:
+        return self._memory
+
+    @property
+    def message_log(self) -> MessageLog:
+        return self._message_log
+
+    def memory_usage(self) -> T.Dict[str, T.Any]:
+        """
+        How much this game's message buffers and queues are holding on to
+        """
+        return self._memory.report()
+
     @property
     def town_hall(self) -> "TownHall":
         return self._town_hall
@@ -334,7 +401,7 @@ class Game:
             and (
                 actor.role.affiliation() in (MAFIA, TRIAD)
                 or
-                RoleGroup.NEUTRAL_EVIL in actor.role.groups()
+                RoleGroup.NEUTRAL_EVIL in actor.role.meta().groups
             )
         ]
 
@@ -354,31 +421,31 @@ class Game:
     def get_live_actors(self, shuffle: bool = False) -> T.List["Actor"]:
         out = [actor for actor in self._actors if actor.is_alive]
         if shuffle:
-            random.shuffle(out)
+            self._rng.night.shuffle(out)
         return out
 
     def get_dead_actors(self, shuffle: bool = False) -> T.List["Actor"]:
         out = [actor for actor in self._actors if not actor.is_alive]
         if shuffle:
-            random.shuffle(out)
+            self._rng.night.shuffle(out)
         return out
 
     def get_live_mafia_actors(self, shuffle: bool = False) -> T.List["Actor"]:
         out = [actor for actor in self._actors if actor.is_alive and actor.role.affiliation() == MAFIA]
         if shuffle:
-            random.shuffle(out)
+            self._rng.night.shuffle(out)
         return out
 
     def get_live_non_mafia_actors(self, shuffle: bool = False) -> T.List["Actor"]:
         out = [actor for actor in self._actors if actor.is_alive and actor.role.affiliation() != MAFIA]
         if shuffle:
-            random.shuffle(out)
+            self._rng.night.shuffle(out)
         return out
 
     def get_live_non_triad_actors(self, shuffle: bool = False) -> T.List["Actor"]:
         out = [actor for actor in self._actors if actor.is_alive and actor.role.affiliation() != TRIAD]
         if shuffle:
-            random.shuffle(out)
+            self._rng.night.shuffle(out)
         return out
 
     def get_lynch_votes(self) -> T.Dict["Actor", int]:
@@ -0,0 +1,175 @@
+"""
+Game Journal
+
+Append-only binary log of every state-mutating input to a game. Combined with
+the setup snapshot at the top of the journal, this is enough to re-run the engine
+headlessly and land in exactly the same place (see `engine.replay`).
+
+Each record is a fixed header followed by a compact JSON payload:
+
+    <kind: u8> <turn_number: u16> <turn_phase: u8> <payload length: u32> <payload>
+
+Actors are referenced by their index in `game._actors`.
+
+Inputs are only ordered relative to the *end* of each stepper transition (the
+PHASE record), which is where they take effect in the engine anyway.
+"""
+import io
+import json
+import logging
+import os
+import struct
+import typing as T
+from enum import IntEnum
+
+from engine.phase import TurnPhase
+import log
+
+if T.TYPE_CHECKING:
+    from engine.actor import Actor
+    from engine.game import Game
+    from engine.resolver import SequenceEvent
+
+logger = logging.getLogger(__name__)
+logger.addHandler(log.ch)
+logger.setLevel(logging.INFO)
+
+JOURNAL_DIR = os.environ.get("MAFIA_JOURNAL_DIR", "journals")
+
+HEADER = struct.Struct("<BHBI")
+
+
+class EventKind(IntEnum):
+    SETUP = 1  # full engine snapshot, including RNG state
+    PHASE = 2  # a stepper transition out of the recorded phase completed
+    TARGET = 3
+    TRIAL_VOTE = 4
+    SKIP_VOTE = 5
+    LYNCH_VOTE = 6
+    LAST_WILL = 7
+    DEATH_NOTE = 8
+    INSTANT = 9
+    LYNCH = 10
+    VEST = 11
+    END = 12
+
+
+class JournalRecord(T.NamedTuple):
+    kind: EventKind
+    turn_number: int
+    turn_phase: TurnPhase
+    payload: T.Dict[str, T.Any]
+
+
+def _ref(actor: T.Optional["Actor"]) -> T.Optional[int]:
+    if actor is None:
+        return None
+    return actor.number
+
+
+class Journal:
+    """
+    Writes records for a single game into a binary stream.
+
+    The stream is buffered, and flushed on every phase transition.
+    """
+
+    def __init__(self, game: "Game", stream: T.BinaryIO) -> None:
+        self._game = game
+        self._stream = stream
+
+    @classmethod
+    def open(cls, game: "Game", path: str) -> "Journal":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return cls(game, open(path, "ab"))
+
+    @property
+    def path(self) -> T.Optional[str]:
+        return getattr(self._stream, "name", None)
+
+    def record(self, kind: EventKind, **payload: T.Any) -> None:
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        self._stream.write(HEADER.pack(
+            kind, self._game.turn_number, self._game.turn_phase.value, len(raw)
+        ))
+        self._stream.write(raw)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def setup(self, snapshot: T.Dict[str, T.Any]) -> None:
+        self.record(EventKind.SETUP, snapshot=snapshot)
+        self.flush()
+
+    def phase(self, from_phase: TurnPhase) -> None:
+        self.record(EventKind.PHASE, phase=from_phase.name)
+        self.flush()
+
+    def target(self, actor: "Actor", targets: T.Iterable["Actor"]) -> None:
+        self.record(EventKind.TARGET, actor=_ref(actor), targets=[_ref(t) for t in targets])
+
+    def trial_vote(self, voter: "Actor", voted: T.Optional["Actor"]) -> None:
+        self.record(EventKind.TRIAL_VOTE, voter=_ref(voter), voted=_ref(voted))
+
+    def skip_vote(self, voter: "Actor") -> None:
+        self.record(EventKind.SKIP_VOTE, voter=_ref(voter))
+
+    def lynch_vote(self, voter: "Actor", vote: T.Optional[bool]) -> None:
+        self.record(EventKind.LYNCH_VOTE, voter=_ref(voter), vote=vote)
+
+    def last_will(self, actor: "Actor", text: str) -> None:
+        self.record(EventKind.LAST_WILL, actor=_ref(actor), text=text)
+
+    def death_note(self, actor: "Actor", text: str) -> None:
+        self.record(EventKind.DEATH_NOTE, actor=_ref(actor), text=text)
+
+    def instant(self, event: "SequenceEvent") -> None:
+        from engine.snapshot import class_path
+        self.record(
+            EventKind.INSTANT,
+            action=class_path(type(event.action)),
+            actor=_ref(event.actor),
+            targets=[_ref(t) for t in event.targets],
+        )
+
+    def vest(self, actor: "Actor", on: bool) -> None:
+        self.record(EventKind.VEST, actor=_ref(actor), on=on)
+
+    def lynch(self, actor: "Actor") -> None:
+        self.record(EventKind.LYNCH, actor=_ref(actor))
+
+    def end(self, digest: str) -> None:
+        self.record(EventKind.END, digest=digest)
+        self.flush()
+
+
+def journal_path(name: str, directory: str = None) -> str:
+    return os.path.join(directory or JOURNAL_DIR, f"{name}.journal")
+
+
+def iter_records(stream: T.BinaryIO) -> T.Iterator[JournalRecord]:
+    while True:
+        header = stream.read(HEADER.size)
+        if not header:
+            return
+        if len(header) < HEADER.size:
+            logger.warning("Journal ends with a truncated header. Ignoring it.")
+            return
+        kind, turn_number, turn_phase, length = HEADER.unpack(header)
+        raw = stream.read(length)
+        if len(raw) < length:
+            logger.warning("Journal ends with a truncated record. Ignoring it.")
+            return
+        yield JournalRecord(EventKind(kind), turn_number, TurnPhase(turn_phase), json.loads(raw))
+
+
+def read_journal(path: str) -> T.List[JournalRecord]:
+    with open(path, "rb") as f:
+        return list(iter_records(f))
+
+
+def read_journal_bytes(raw: bytes) -> T.List[JournalRecord]:
+    return list(iter_records(io.BytesIO(raw)))
@@ -0,0 +1,36 @@
+"""
+State that belongs to one event loop
+
+Semaphores, sessions and tasks only work on the loop they were made on. A new loop
+turns up in tests or after a restart, and nothing made on the old one is usable
+there, so `LoopBound` builds a fresh value whenever the running loop changes.
+"""
+import asyncio
+import typing as T
+
+V = T.TypeVar("V")
+
+
+class LoopBound(T.Generic[V]):
+
+    def __init__(self, factory: T.Callable[[], V]) -> None:
+        self._factory = factory
+        self._loop: T.Optional[asyncio.AbstractEventLoop] = None
+        self._value: T.Optional[V] = None
+
+    @property
+    def current(self) -> T.Optional[V]:
+        """
+        Whatever was made last, without making anything
+        """
+        return self._value
+
+    def get(self) -> V:
+        """
+        The value for the running loop
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._value = self._factory()
+        return self._value
@@ -2,9 +2,15 @@ from enum import Enum
 import asyncio
 import cachetools
 import logging
+import sys
 import time
 import typing as T
 
+from engine.buffer import BoundedQueue
+from engine.buffer import DropPolicy
+from engine.metrics import FLUSH_TIMEOUTS
+from engine.metrics import PUBLISH
+from engine.metrics import PUBLISH_LAG
 from engine.phase import TurnPhase
 import log
 
@@ -21,6 +27,9 @@ logger = logging.getLogger(__name__)
 logger.addHandler(log.ch)
 logger.setLevel(logging.INFO)
 
+# longest a phase boundary waits on queued messages, see `Messenger.flush`
+FLUSH_TIMEOUT = 10.0
+
 
 class MessageType(Enum):
     """
@@ -61,15 +70,41 @@ class MessageType(Enum):
     NIGHT_SEQUENCE = 7
 
 
+GameTime = T.Tuple[int, "TurnPhase"]
+
+# every message from the same phase shares one game_time tuple
+_GAME_TIMES: T.Dict[GameTime, GameTime] = dict()
+
+
+def current_game_time(game: "Game") -> GameTime:
+    key = (game.turn_number, game.turn_phase)
+    return _GAME_TIMES.setdefault(key, key)
+
+
 class Message:
     """
     Messages consist of a real timestamp, a game timestamp, and a message string.
+
+    There's one of these for every indicator, vote and chat line and they sit in a
+    few queues at once, so keep them small.
     """
 
+    __slots__ = (
+        "title",
+        "message_type",
+        "real_time",
+        "game_time",
+        "message",
+        "addressed_to",
+        "addressed_from",
+        "routed_at",
+        "seq",
+    )
+
     def __init__(
         self,
         real_time: float,
-        game_time: T.Tuple[int, "TurnPhase"],
+        game_time: GameTime,
         message: str = "",
         *,
         title: str = "",
@@ -82,13 +117,18 @@ class Message:
         If not specified, this is a public message. This is primarily used for
         filtering 
         """
-        self.title = title
+        # titles repeat a lot ("Feedback", role names...)
+        self.title = sys.intern(title) if type(title) is str else title
         self.message_type = message_type
         self.real_time = real_time
         self.game_time = game_time
         self.message = message
         self.addressed_to = addressed_to
         self.addressed_from = addressed_from
+        # perf_counter when the Messenger handed this to drivers, for publish lag
+        self.routed_at: T.Optional[float] = None
+        # order the Messenger got it in, see `Messenger.flush`
+        self.seq: T.Optional[int] = None
 
     def __repr__(self) -> str:
         return f"[Message] **{self.title}** : {self.message}"
@@ -106,8 +146,8 @@ class Message:
     @classmethod
     def announce(cls, game: "Game", title: str, message: str = "") -> "Message":
         return Message(
-            time.time(),
-            (game.turn_number, game.turn_phase),
+            game.clock.time(),
+            current_game_time(game),
             message=message,
             title=title,
             message_type=MessageType.ANNOUNCEMENT,
@@ -116,8 +156,8 @@ class Message:
     @classmethod
     def indicate(cls, game: "Game", title: str, message: str = "") -> "Message":
         return Message(
-            time.time(),
-            (game.turn_number, game.turn_phase),
+            game.clock.time(),
+            current_game_time(game),
             message=message,
             title=title,
             message_type=MessageType.INDICATOR,
@@ -126,8 +166,8 @@ class Message:
     @classmethod
     def night_sequence(cls, game: "Game", message: str) -> "Message":
         return Message(
-            time.time(),
-            (game.turn_number, game.turn_phase),
+            game.clock.time(),
+            current_game_time(game),
             title=message,
             message_type=MessageType.NIGHT_SEQUENCE,
         )
@@ -135,8 +175,8 @@ class Message:
     @classmethod
     def bot_public_message(cls, actor: "Actor", message: str) -> "Message":
         return Message(
-            time.time(),
-            (actor.game.turn_number, actor.game.turn_phase),
+            actor.game.clock.time(),
+            current_game_time(actor.game),
             message=message,
             addressed_from=actor,
             message_type=MessageType.BOT_PUBLIC_MESSAGE,
@@ -145,8 +185,8 @@ class Message:
     @classmethod
     def player_public_message(cls, actor: "Actor", message: str) -> "Message":
         return Message(
-            time.time(),
-            (actor.game.turn_number, actor.game.turn_phase),
+            actor.game.clock.time(),
+            current_game_time(actor.game),
             message=message,
             addressed_from=actor,
             message_type=MessageType.PLAYER_PUBLIC_MESSAGE,
@@ -155,8 +195,8 @@ class Message:
     @classmethod
     def private_message(cls, from_actor: "Actor", to_actor: "Actor", message: str) -> "Message":
         return Message(
-            time.time(),
-            (from_actor.game.turn_number, from_actor.game.turn_phase),
+            from_actor.game.clock.time(),
+            current_game_time(from_actor.game),
             message=message,
             addressed_from=from_actor,
             addressed_to=to_actor,
@@ -166,8 +206,8 @@ class Message:
     @classmethod
     def private_feedback(cls, to_actor: "Actor", title: str, message: str) -> "Message":
         return Message(
-            time.time(),
-            (to_actor.game.turn_number, to_actor.game.turn_phase),
+            to_actor.game.clock.time(),
+            current_game_time(to_actor.game),
             message=message,
             # address_from is the game, so...
             addressed_to=to_actor,
@@ -196,9 +236,28 @@ class MessageDriver:
     messages in a thread or something like that
     """
 
+    # what to do when messages come in faster than we can publish them
+    QUEUE_POLICY = DropPolicy.DROP_OLDEST
+
     def __init__(self) -> None:
         self._task: asyncio.Task = None
         self._queue: asyncio.Queue["Message"] = asyncio.Queue()
+        # metric labels, the Messenger shares its game's tags
+        self.tags: T.Dict[str, str] = dict()
+        # seq of the message being published right now
+        self._publishing: T.Optional[int] = None
+        self._settle_waiters: T.List[asyncio.Future] = []
+
+    def bind(self, game: "Game") -> None:
+        """
+        Attach to a game: share its metric tags and cap our queue with its limits.
+        Must happen before the driver starts.
+        """
+        self.tags = game.tags
+        queue = BoundedQueue(game.limits.driver_queue, self.QUEUE_POLICY, name=type(self).__name__)
+        while not self._queue.empty():
+            queue.put_nowait(self._queue.get_nowait())
+        self._queue = game.memory.register(queue)
 
     def wants(self, message: "Message") -> bool:
         """
@@ -227,6 +286,30 @@ class MessageDriver:
         switches to the driver task.
         """
         self._queue.put_nowait(message)
+        # a full queue may have dropped something somebody's waiting on
+        self._notify_settled()
+
+    def settled(self, seq: int) -> bool:
+        """
+        Whether every message up to `seq` that came our way is out, failed or dropped
+        """
+        if self._publishing is not None and self._publishing <= seq:
+            return False
+        # asyncio.Queue keeps its items in `_queue`, drivers only hold a few
+        return not any(message.seq is not None and message.seq <= seq for message in self._queue._queue)
+
+    async def wait_settled(self, seq: int) -> None:
+        loop = asyncio.get_running_loop()
+        while not self.settled(seq):
+            waiter = loop.create_future()
+            self._settle_waiters.append(waiter)
+            await waiter
+
+    def _notify_settled(self) -> None:
+        waiters, self._settle_waiters = self._settle_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
 
     async def publish(self, message: "Message") -> None:
         """
@@ -234,6 +317,36 @@ class MessageDriver:
         """
         raise NotImplementedError("Message drivers must specify implementation for publish")
 
+    async def publish_batch(self, messages: T.List["Message"]) -> None:
+        """
+        Publish messages that were waiting together. Drivers that can fold them into a
+        single send should override this, by default they go out one at a time.
+        """
+        for message in messages:
+            await self.publish(message)
+
+    async def publish_and_record(self, *messages: "Message") -> None:
+        """
+        Publish and record how long it took, and how long the messages were waiting.
+
+        More than one message goes out through `publish_batch`.
+        """
+        labels = dict(self.tags, driver=type(self).__name__)
+        now = time.perf_counter()
+        for message in messages:
+            if message.routed_at is not None:
+                PUBLISH_LAG.observe(now - message.routed_at, **labels)
+        self._publishing = min((message.seq for message in messages if message.seq is not None), default=None)
+        try:
+            with PUBLISH.time(**labels):
+                if len(messages) == 1:
+                    await self.publish(messages[0])
+                else:
+                    await self.publish_batch(list(messages))
+        finally:
+            self._publishing = None
+            self._notify_settled()
+
     async def run(self) -> None:
         """
         Generally these should process asynchonrously whenever we get a message
@@ -241,7 +354,7 @@ class MessageDriver:
         while True:
             try:
                 msg = await self._queue.get()
-                await self.publish(msg)
+                await self.publish_and_record(msg)
             except asyncio.CancelledError:
                 break
 
@@ -315,10 +428,21 @@ class Messenger:
         """
         self._game = game
 
-        # primary queue we pull from
-        self._message_queue: asyncio.Queue[Message] = asyncio.Queue()
+        # primary queue we pull from, it's drained as fast as we can route so it's not
+        # capped, but it is accounted for
+        self._message_queue: asyncio.Queue[Message] = game.memory.register(
+            BoundedQueue(0, name="messenger")
+        )
         self._drivers = drivers
+        for driver in self._drivers:
+            driver.bind(game)
         self._inbound_tasks: T.Set[asyncio.Task] = set()
+        self._task: T.Optional[asyncio.Task] = None
+
+        # last seq handed out, and the last one routed to drivers
+        self._seq = 0
+        self._routed_seq = 0
+        self._route_waiters: T.List[asyncio.Future] = []
 
     @property
     def log(self) -> logging.Logger:
@@ -337,9 +461,17 @@ class Messenger:
         Each driver defines a filter. If the message passes the filter, it
         gets issued to that driver.
         """
+        message.routed_at = time.perf_counter()
+        self._game.message_log.append(message)
         for driver in self._drivers:
             if driver.wants(message):
                 driver.add_to_queue(message)
+        if message.seq is not None:
+            self._routed_seq = message.seq
+            waiters, self._route_waiters = self._route_waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
 
     def start(self) -> None:
         # start all message drivers
@@ -355,8 +487,38 @@ class Messenger:
         """
         Input a message into the queue.
         """
+        self._seq += 1
+        message.seq = self._seq
         self._message_queue.put_nowait(message)
 
+    async def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        """
+        Wait until everything queued before this call has been published by every
+        driver that wanted it (or failed, or got dropped), so whatever comes next
+        shows up after it.
+
+        Gives up after `timeout` and returns False, a stuck driver shouldn't stall the
+        game. Returns straight away if we were never started.
+        """
+        if self._task is None or self._task.done():
+            return True
+        target = self._seq
+        try:
+            await asyncio.wait_for(self._wait_flushed(target), timeout)
+        except asyncio.TimeoutError:
+            FLUSH_TIMEOUTS.inc(**self._game.tags)
+            self.log.warning(f"Gave up waiting on messages after {timeout}s")
+            return False
+        return True
+
+    async def _wait_flushed(self, seq: int) -> None:
+        loop = asyncio.get_running_loop()
+        while self._routed_seq < seq:
+            waiter = loop.create_future()
+            self._route_waiters.append(waiter)
+            await waiter
+        await asyncio.gather(*[driver.wait_settled(seq) for driver in self._drivers])
+
     def get_driver_by_class(self, klass: T.Type[MessageDriver]) -> T.Optional[MessageDriver]:
         for driver in self._drivers:
             if isinstance(driver, klass):
@@ -0,0 +1,284 @@
+"""
+Message Log
+
+Every message the Messenger routes gets appended here, once per game. Rather than
+hanging on to the Message objects it's stored column by column:
+
+    type | turn | phase | to | from | title | real time | text
+
+Actors and titles are small integer references into per-log tables (titles repeat a
+lot, "Feedback", "{name} Has Died"...), and the text lives in its own column. There are
+indexes by addressee and by turn number so questions like "all private feedback for
+this actor on night 3" don't walk the whole game:
+
+    game.message_log.query(
+        addressed_to=actor,
+        turn_number=3,
+        message_type=MessageType.PRIVATE_FEEDBACK,
+    )
+
+Queries yield `LogEntry` tuples which look enough like a Message for bots, last wills
+and reports to read them directly.
+
+The log keeps the most recent `Limits.message_history` messages. Older rows are
+trimmed in chunks so appends stay cheap.
+"""
+import bisect
+import heapq
+import sys
+import typing as T
+from array import array
+
+from engine.buffer import DROPPED
+from engine.message import Message
+from engine.message import MessageType
+from engine.phase import TurnPhase
+
+if T.TYPE_CHECKING:
+    from engine.actor import Actor
+
+# stands in for "nobody" in the to / from columns
+NO_ACTOR = -1
+
+_MESSAGE_TYPES = {message_type.value: message_type for message_type in MessageType}
+_TURN_PHASES = {phase.value: phase for phase in TurnPhase}
+
+
+class LogEntry(T.NamedTuple):
+    # position in the log, stays the same when older rows are trimmed
+    index: int
+    message_type: MessageType
+    turn_number: int
+    turn_phase: TurnPhase
+    addressed_to: T.Optional["Actor"]
+    addressed_from: T.Optional["Actor"]
+    title: str
+    message: str
+    real_time: float
+
+    def __repr__(self) -> str:
+        return f"[Message] **{self.title}** : {self.message}"
+
+    def ai_repr(self) -> str:
+        return f"{self.title} - {self.message}".replace('*', '')
+
+
+class MessageLog:
+
+    def __init__(self, maxlen: int, name: str = "message_log") -> None:
+        self._maxlen = maxlen
+        self._name = name
+        self.tags: T.Dict[str, str] = dict()
+
+        # index of the first row still held
+        self._base = 0
+        self._dropped = 0
+
+        self._types = array("B")
+        self._turns = array("H")
+        self._phases = array("B")
+        self._to = array("h")
+        self._from = array("h")
+        self._title_refs = array("I")
+        self._real_times = array("d")
+        self._texts: T.List[str] = []
+
+        self._actors: T.List["Actor"] = []
+        self._actor_refs: T.Dict["Actor", int] = dict()
+        self._titles: T.List[str] = []
+        self._title_offsets: T.Dict[str, int] = dict()
+
+        # log indexes, public messages are under NO_ACTOR
+        self._by_addressee: T.Dict[int, array] = dict()
+        self._by_turn: T.Dict[int, array] = dict()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def maxlen(self) -> int:
+        return self._maxlen
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def first_index(self) -> int:
+        return self._base
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _actor_ref(self, actor: T.Optional["Actor"]) -> int:
+        if actor is None:
+            return NO_ACTOR
+        ref = self._actor_refs.get(actor)
+        if ref is None:
+            ref = self._actor_refs[actor] = len(self._actors)
+            self._actors.append(actor)
+        return ref
+
+    def _title_ref(self, title: str) -> int:
+        ref = self._title_offsets.get(title)
+        if ref is None:
+            ref = self._title_offsets[title] = len(self._titles)
+            self._titles.append(title)
+        return ref
+
+    def append(self, message: Message) -> int:
+        """
+        Add a message to the log and return its index
+        """
+        index = self._base + len(self._texts)
+        turn_number, turn_phase = message.game_time
+        to_ref = self._actor_ref(message.addressed_to)
+
+        self._types.append(message.message_type.value)
+        self._turns.append(turn_number)
+        self._phases.append(turn_phase.value)
+        self._to.append(to_ref)
+        self._from.append(self._actor_ref(message.addressed_from))
+        self._title_refs.append(self._title_ref(message.title or ""))
+        self._real_times.append(message.real_time)
+        self._texts.append(message.message)
+
+        by_addressee = self._by_addressee.get(to_ref)
+        if by_addressee is None:
+            by_addressee = self._by_addressee[to_ref] = array("I")
+        by_addressee.append(index)
+        by_turn = self._by_turn.get(turn_number)
+        if by_turn is None:
+            by_turn = self._by_turn[turn_number] = array("I")
+        by_turn.append(index)
+
+        # let it run a quarter over so we're not trimming on every append
+        if len(self._texts) > self._maxlen + self._maxlen // 4:
+            self._trim(len(self._texts) - self._maxlen)
+        return index
+
+    def _trim(self, count: int) -> None:
+        for column in (
+            self._types, self._turns, self._phases, self._to, self._from,
+            self._title_refs, self._real_times, self._texts,
+        ):
+            del column[:count]
+        self._base += count
+        self._dropped += count
+        DROPPED.inc(count, buffer=self._name, **self.tags)
+        for index in (self._by_addressee, self._by_turn):
+            for key in list(index):
+                rows = index[key]
+                # indexes are in log order
+                keep = bisect.bisect_left(rows, self._base)
+                if keep == len(rows):
+                    index.pop(key)
+                elif keep:
+                    del rows[:keep]
+
+    def entry(self, index: int) -> LogEntry:
+        row = index - self._base
+        if row < 0 or row >= len(self._texts):
+            raise IndexError(f"Message {index} is not in the log")
+        to_ref = self._to[row]
+        from_ref = self._from[row]
+        return LogEntry(
+            index,
+            _MESSAGE_TYPES[self._types[row]],
+            self._turns[row],
+            _TURN_PHASES[self._phases[row]],
+            self._actors[to_ref] if to_ref != NO_ACTOR else None,
+            self._actors[from_ref] if from_ref != NO_ACTOR else None,
+            self._titles[self._title_refs[row]],
+            self._texts[row],
+            self._real_times[row],
+        )
+
+    def query(
+        self,
+        addressed_to: "Actor" = None,
+        turn_number: int = None,
+        turn_phase: TurnPhase = None,
+        message_type: MessageType = None,
+        public: bool = False,
+        since: int = 0,
+    ) -> T.Iterator[LogEntry]:
+        """
+        Iterate over the messages matching every filter given, oldest first.
+
+        `public` only matches messages that aren't addressed to anyone, `since` skips
+        anything before that log index.
+        """
+        if addressed_to is not None or public:
+            ref = self._actor_refs.get(addressed_to, None) if addressed_to is not None else NO_ACTOR
+            if ref is None:
+                return
+            rows = self._by_addressee.get(ref, ())
+            # the addressee index is usually the shorter one, only check turns on the way
+            check_turn = turn_number
+        elif turn_number is not None:
+            rows = self._by_turn.get(turn_number, ())
+            check_turn = None
+        else:
+            rows = range(self._base, self._base + len(self._texts))
+            check_turn = None
+
+        phase = turn_phase.value if turn_phase is not None else None
+        message_type = message_type.value if message_type is not None else None
+        since = max(since, self._base)
+        for index in rows:
+            if index < since:
+                continue
+            row = index - self._base
+            if check_turn is not None and self._turns[row] != check_turn:
+                continue
+            if phase is not None and self._phases[row] != phase:
+                continue
+            if message_type is not None and self._types[row] != message_type:
+                continue
+            yield self.entry(index)
+
+    def for_actor(self, actor: "Actor") -> T.Iterator[LogEntry]:
+        return self.query(addressed_to=actor)
+
+    def visible_to(self, actor: "Actor", since: int = 0) -> T.Iterator[LogEntry]:
+        """
+        Everything `actor` would have seen: public messages plus anything addressed to
+        them, oldest first
+        """
+        ref = self._actor_refs.get(actor)
+        rows = heapq.merge(
+            self._by_addressee.get(NO_ACTOR, ()),
+            self._by_addressee.get(ref, ()) if ref is not None else (),
+        )
+        since = max(since, self._base)
+        for index in rows:
+            if index >= since:
+                yield self.entry(index)
+
+    @property
+    def next_index(self) -> int:
+        """
+        Index the next message will get, handy as `since` for the next query
+        """
+        return self._base + len(self._texts)
+
+    def __iter__(self) -> T.Iterator[LogEntry]:
+        return self.query()
+
+    def approx_size(self) -> int:
+        size = sum(
+            column.itemsize * len(column) for column in (
+                self._types, self._turns, self._phases, self._to, self._from,
+                self._title_refs, self._real_times,
+            )
+        )
+        size += sys.getsizeof(self._texts) + sum(sys.getsizeof(text) for text in self._texts)
+        size += sum(sys.getsizeof(title) for title in self._titles)
+        size += sum(len(rows) * rows.itemsize for rows in self._by_addressee.values())
+        size += sum(len(rows) * rows.itemsize for rows in self._by_turn.values())
+        return size
+
+    def __repr__(self) -> str:
+        return f"MessageLog({self._name!r}, {len(self)}/{self._maxlen})"
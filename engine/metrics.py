@@ -0,0 +1,347 @@
+"""
+Metrics
+
+Lightweight counters and histograms for the hot paths: stepper transitions, the night
+sequence, panel drives, driver publishes and gRPC handlers. Everything registers on the
+module-level `registry`, which `chatapi.app` serves as Prometheus text (/metrics) or
+JSON (/metrics.json).
+
+Series are keyed by labels. Games add their own tags (`game.tags`, e.g. guild and
+game name) so we can tell which game is hanging.
+
+Latencies are wall time (perf_counter), not game clock time.
+"""
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+import typing as T
+from collections import deque
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# how many recent observations we keep around per series for quantiles
+RESERVOIR_SIZE = 1024
+
+LabelKey = T.Tuple[T.Tuple[str, str], ...]
+
+
+def _label_key(labels: T.Dict[str, T.Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: T.Dict[str, str] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def quantile(samples: T.Sequence[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(int(math.ceil(q * len(ordered))) - 1, len(ordered) - 1)
+    return ordered[max(idx, 0)]
+
+
+class Counter:
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._values: T.Dict[LabelKey, float] = dict()
+        self._keys: T.Dict[T.Tuple[T.Tuple[str, T.Any], ...], LabelKey] = dict()
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: T.Any) -> None:
+        # same trick as Histogram, buffers can drop on every message
+        raw = tuple(labels.items())
+        key = self._keys.get(raw)
+        if key is None:
+            key = self._keys[raw] = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: T.Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def to_prometheus(self) -> T.List[str]:
+        return [f"{self.name}{_fmt_labels(key)} {_fmt_value(value)}" for key, value in self._values.items()]
+
+    def to_json(self) -> T.List[T.Dict[str, T.Any]]:
+        return [dict(labels=dict(key), value=value) for key, value in self._values.items()]
+
+
+class _HistogramSeries:
+
+    def __init__(self, buckets: T.Sequence[float]) -> None:
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent: T.Deque[float] = deque(maxlen=RESERVOIR_SIZE)
+
+
+class Histogram:
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: T.Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: T.Dict[LabelKey, _HistogramSeries] = dict()
+        self._by_raw: T.Dict[T.Tuple[T.Tuple[str, T.Any], ...], _HistogramSeries] = dict()
+        self._lock = threading.Lock()
+
+    def _get_series(self, labels: T.Dict[str, T.Any]) -> _HistogramSeries:
+        # this sits on hot paths, so skip normalizing labels we've seen in this order before
+        raw = tuple(labels.items())
+        series = self._by_raw.get(raw)
+        if series is None:
+            key = _label_key(labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(self.buckets)
+            self._by_raw[raw] = series
+        return series
+
+    def observe(self, value: float, **labels: T.Any) -> None:
+        series = self._get_series(labels)
+        with self._lock:
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.sum += value
+            series.count += 1
+            series.recent.append(value)
+
+    def time(self, **labels: T.Any) -> "_Timer":
+        return _Timer(self, labels)
+
+    def count(self, **labels: T.Any) -> int:
+        series = self._series.get(_label_key(labels))
+        return series.count if series is not None else 0
+
+    def quantile(self, q: float, **labels: T.Any) -> float:
+        series = self._series.get(_label_key(labels))
+        if series is None:
+            return 0.0
+        return quantile(list(series.recent), q)
+
+    def to_prometheus(self) -> T.List[str]:
+        lines = []
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, dict(le=_fmt_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(series.sum)}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {series.count}")
+        return lines
+
+    def to_json(self) -> T.List[T.Dict[str, T.Any]]:
+        out = []
+        for key, series in self._series.items():
+            recent = list(series.recent)
+            out.append(dict(
+                labels=dict(key),
+                count=series.count,
+                sum=series.sum,
+                p50=quantile(recent, 0.5),
+                p90=quantile(recent, 0.9),
+                p99=quantile(recent, 0.99),
+                max=max(recent) if recent else 0.0,
+            ))
+        return out
+
+
+class _Timer:
+    """
+    Context manager for `Histogram.time`. A plain class is noticeably cheaper than
+    `contextlib.contextmanager` when it wraps every ORDER bucket of every night.
+    """
+
+    __slots__ = ("_histogram", "_labels", "_t_i")
+
+    def __init__(self, histogram: Histogram, labels: T.Dict[str, T.Any]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> None:
+        self._t_i = time.perf_counter()
+
+    def __exit__(self, *exc_info: T.Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._t_i, **self._labels)
+
+
+Metric = T.Union[Counter, Histogram]
+
+
+class Registry:
+
+    def __init__(self) -> None:
+        self._metrics: T.Dict[str, Metric] = dict()
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) != type(metric):
+                raise ValueError(f"Metric {metric.name} already registered as a {existing.TYPE}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: T.Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, buckets))
+
+    def get(self, name: str) -> T.Optional[Metric]:
+        return self._metrics.get(name)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(metric.to_prometheus())
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> T.Dict[str, T.Any]:
+        return {
+            metric.name: dict(type=metric.TYPE, help=metric.help, series=metric.to_json())
+            for metric in self._metrics.values()
+        }
+
+
+registry = Registry()
+
+PHASE_TRANSITION = registry.histogram(
+    "mafia_phase_transition_seconds",
+    "Wall time of each Stepper transition, including timed waits, by the phase it left",
+)
+PHASE_OVERRUN = registry.histogram(
+    "mafia_phase_overrun_seconds",
+    "How far past a scheduled phase deadline the stepper already was when it got there",
+)
+NIGHT_RESOLUTION = registry.histogram(
+    "mafia_night_resolution_seconds",
+    "Time to resolve every action in the night sequence",
+)
+NIGHT_ORDER = registry.histogram(
+    "mafia_night_order_seconds",
+    "Time to resolve all actions in a single ORDER bucket",
+)
+PANEL_DRIVE = registry.histogram(
+    "mafia_panel_drive_seconds",
+    "Time for a single Panel.drive",
+)
+UI_LOOP = registry.histogram(
+    "mafia_ui_loop_seconds",
+    "Time for a full TownHall.drive",
+)
+ROLE_EDIT = registry.histogram(
+    "mafia_role_edit_seconds",
+    "Time for one Discord member role edit",
+)
+ROLE_EDITS = registry.counter(
+    "mafia_role_edits_total",
+    "Discord member role edits, by result",
+)
+DISCORD_RESOURCES = registry.counter(
+    "mafia_discord_resources_total",
+    "Roles and threads handed out to games, by resource and whether they were created or reused",
+)
+ICACHE = registry.counter(
+    "mafia_interaction_cache_total",
+    "Interaction cache lookups, by result (hit, miss or expired)",
+)
+PRIVATE_FALLBACKS = registry.counter(
+    "mafia_private_fallbacks_total",
+    "Private messages that couldn't go out on a live interaction, by what we did instead",
+)
+PUBLISH = registry.histogram(
+    "mafia_driver_publish_seconds",
+    "Time for a message driver to publish one message",
+)
+PUBLISH_LAG = registry.histogram(
+    "mafia_driver_publish_lag_seconds",
+    "Time a message waited between being routed and being published",
+)
+FLUSH_TIMEOUTS = registry.counter(
+    "mafia_messenger_flush_timeouts_total",
+    "Messenger flushes that gave up before every driver caught up",
+)
+GRPC_HANDLER = registry.histogram(
+    "mafia_grpc_handler_seconds",
+    "Time spent in a gRPC handler",
+)
+GRPC_ERRORS = registry.counter(
+    "mafia_grpc_handler_errors_total",
+    "gRPC handlers that raised",
+)
+
+
+def instrumented(histogram: Histogram, errors: Counter = None, **labels: T.Any) -> T.Callable:
+    """
+    Decorator to time a function or coroutine function.
+
+    The function name is added as the `handler` label.
+    """
+    def decorator(fn: T.Callable) -> T.Callable:
+        fn_labels = dict(labels, handler=fn.__name__)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: T.Any, **kwargs: T.Any) -> T.Any:
+                t_i = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    if errors is not None:
+                        errors.inc(**fn_labels)
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - t_i, **fn_labels)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: T.Any, **kwargs: T.Any) -> T.Any:
+            t_i = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc(**fn_labels)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - t_i, **fn_labels)
+        return wrapper
+    return decorator
+
+
+async def observe_async(histogram: Histogram, awaitable: T.Awaitable, **labels: T.Any) -> T.Any:
+    """
+    Time an awaitable, e.g. one of many coroutines being gathered
+    """
+    t_i = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        histogram.observe(time.perf_counter() - t_i, **labels)
@@ -7,11 +7,11 @@ import logging
 import typing as T
 
 import log
-from proto import state_pb2
 
 if T.TYPE_CHECKING:
     from disnake import User
     from chatapi.app.bot import BotUser
+    from proto import state_pb2
 
 
 class Player:
@@ -24,7 +24,9 @@ class Player:
         self._user = None
         self._bot = None
 
-    def to_proto(self) -> state_pb2.Player:
+    def to_proto(self) -> "state_pb2.Player":
+        from proto import state_pb2
+
         player = state_pb2.Player()
         player.is_bot = self.is_bot
         player.is_human = self.is_human
@@ -0,0 +1,218 @@
+"""
+Profiler
+
+Opt-in sampling profiler for a single game. Turn it on for every game with the
+MAFIA_PROFILE env var, or for a running game with the /profile slash command.
+
+While a game is being profiled:
+    * a sampler thread grabs the event loop thread's stack every few ms and keeps
+      the samples that are inside one of this game's profiled regions
+      (Stepper.step, TownHall.drive and Messenger routing)
+    * SequenceEvent.execute is timed per Action subclass
+
+When the game ends the samples are written out as folded stacks, which both
+flamegraph.pl and speedscope read, along with a summary of the action timings.
+
+Nothing is patched until a profiler is started, so a game that isn't being profiled
+pays nothing for this.
+"""
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import typing as T
+from collections import Counter
+
+from engine.resolver import SequenceEvent
+
+if T.TYPE_CHECKING:
+    from engine.game import Game
+
+PROFILE_ALL = bool(os.environ.get("MAFIA_PROFILE"))
+PROFILE_DIR = os.environ.get("MAFIA_PROFILE_DIR", "profiles")
+DEFAULT_INTERVAL = float(os.environ.get("MAFIA_PROFILE_INTERVAL", 0.005))
+
+# games currently being profiled, SequenceEvent.execute only stays patched while this is non-empty
+_ACTIVE: T.Dict["Game", "Profiler"] = dict()
+_original_execute = SequenceEvent.execute
+
+
+def _profiled_execute(self: SequenceEvent) -> None:
+    profiler = _ACTIVE.get(self._game)
+    if profiler is None:
+        return _original_execute(self)
+    t_i = time.perf_counter()
+    try:
+        return _original_execute(self)
+    finally:
+        profiler.record_action(type(self._action).__name__, time.perf_counter() - t_i)
+
+
+def _region(profiler: "Profiler", region: str, fn: T.Callable) -> T.Callable:
+    """
+    Wrap a bound method so the sampler can tell when we're inside it. The sampler looks
+    for these wrapper frames on the stack and reads `profiler` and `region` off them.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_region(*args: T.Any, **kwargs: T.Any) -> T.Any:
+            profiler, region  # keep these visible in the frame locals
+            return await fn(*args, **kwargs)
+        return async_region
+
+    @functools.wraps(fn)
+    def sync_region(*args: T.Any, **kwargs: T.Any) -> T.Any:
+        profiler, region  # keep these visible in the frame locals
+        return fn(*args, **kwargs)
+    return sync_region
+
+
+async def _noop() -> None:
+    pass
+
+
+# every wrapper made by `_region` shares one of these two code objects
+_REGION_CODES = frozenset((
+    _region(None, "", lambda: None).__code__,
+    _region(None, "", _noop).__code__,
+))
+
+
+def _frame_name(frame: T.Any) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)})"
+
+
+class Profiler:
+
+    def __init__(self, game: "Game", interval: float = DEFAULT_INTERVAL) -> None:
+        self._game = game
+        self._interval = interval
+        self._stacks: T.Counter[str] = Counter()
+        self._actions: T.Dict[str, T.List[float]] = dict()
+        self._patched: T.List[T.Tuple[T.Any, str]] = []
+        self._thread: T.Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._target_thread: T.Optional[int] = None
+        self._samples = 0
+        self._t_start = 0.0
+        self._duration = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def stacks(self) -> T.Counter[str]:
+        return self._stacks
+
+    @property
+    def actions(self) -> T.Dict[str, T.List[float]]:
+        return self._actions
+
+    def wrap(self, obj: T.Any, method: str, region: str = None) -> None:
+        """
+        Mark `obj.method` as a profiled region. This shadows the method on the instance
+        only, so other games are left alone.
+        """
+        setattr(obj, method, _region(self, region or method, getattr(obj, method)))
+        self._patched.append((obj, method))
+
+    def start(self) -> None:
+        """
+        Start sampling. This must be called from the event loop thread.
+        """
+        if self.running:
+            return
+        if not _ACTIVE:
+            SequenceEvent.execute = _profiled_execute
+        _ACTIVE[self._game] = self
+        self._target_thread = threading.get_ident()
+        self._stop.clear()
+        self._t_start = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name=f"profiler-{self._game.log.name}", daemon=True)
+        self._thread.start()
+        self._game.log.info(f"Profiling started, sampling every {self._interval * 1000:.1f}ms")
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._duration += time.perf_counter() - self._t_start
+        for obj, method in reversed(self._patched):
+            # drop the instance attribute so the class method shows through again
+            obj.__dict__.pop(method, None)
+        self._patched.clear()
+        _ACTIVE.pop(self._game, None)
+        if not _ACTIVE:
+            SequenceEvent.execute = _original_execute
+
+    def record_action(self, name: str, duration: float) -> None:
+        self._actions.setdefault(name, []).append(duration)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is not None:
+                self._sample(frame)
+            # don't hang on to the loop's frames between samples
+            del frame
+
+    def _sample(self, leaf: T.Any) -> None:
+        names = []
+        frame = leaf
+        while frame is not None:
+            if frame.f_code in _REGION_CODES and frame.f_locals.get("profiler") is self:
+                names.append(frame.f_locals["region"])
+                break
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        else:
+            # the loop is busy with something that isn't ours
+            return
+        self._stacks[";".join(reversed(names))] += 1
+        self._samples += 1
+
+    def action_summary(self) -> T.List[T.Dict[str, T.Any]]:
+        summary = []
+        for name, durations in self._actions.items():
+            summary.append(dict(
+                action=name,
+                count=len(durations),
+                total=sum(durations),
+                mean=sum(durations) / len(durations),
+                max=max(durations),
+            ))
+        return sorted(summary, key=lambda entry: entry["total"], reverse=True)
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+    def dump(self, path: str) -> T.Tuple[str, str]:
+        """
+        Write the folded stacks to `path` and the action summary next to it.
+        Returns both paths.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.folded())
+        actions_path = os.path.splitext(path)[0] + ".actions.json"
+        with open(actions_path, "w") as f:
+            json.dump(dict(
+                game=self._game.log.name,
+                duration=self._duration,
+                interval=self._interval,
+                samples=self._samples,
+                actions=self.action_summary(),
+            ), f, indent=2)
+        self._game.log.info(f"Wrote {self._samples} profile samples to {path}")
+        return path, actions_path
+
+
+def profile_path(name: str, directory: str = None) -> str:
+    return os.path.join(directory or PROFILE_DIR, f"{name}.folded")
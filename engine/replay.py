@@ -0,0 +1,153 @@
+"""
+Headless Replay
+
+Re-run a game from its journal (see `engine.journal`) without Discord in the loop.
+
+    python -m engine.replay journals/Game-mafia-bulletin.journal
+
+The journal starts with a full snapshot of the game after setup. From there we
+apply every recorded input in order and run each stepper transition when the
+journal says one completed. If the journal has an END record, we compare digests
+of the final engine state to make sure we reproduced the game exactly.
+"""
+import typing as T
+
+from engine.journal import EventKind
+from engine.journal import JournalRecord
+from engine.journal import read_journal
+from engine.message import Messenger
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.resolver import SequenceEvent
+from engine.setup import DEFAULT_CONFIG
+from engine.snapshot import resolve_class
+from engine.snapshot import restore_game
+from engine.snapshot import restore_stepper
+from engine.snapshot import state_digest
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+
+if T.TYPE_CHECKING:
+    from engine.actor import Actor
+    from engine.config import GameConfig
+    from engine.game import Game
+
+
+class ReplayError(ValueError):
+    """
+    The journal does not line up with the engine
+    """
+
+
+class Replay:
+    """
+    Drives a game from a list of journal records.
+    """
+
+    def __init__(self, records: T.List[JournalRecord], config: "GameConfig" = DEFAULT_CONFIG) -> None:
+        if not records or records[0].kind != EventKind.SETUP:
+            raise ReplayError("Journal must start with a SETUP record")
+        self._records = records
+        data = records[0].payload["snapshot"]
+        players = [Player(player_data["name"]) for player_data in data["players"]]
+        self._game = restore_game(data, config, players, sleeper=sleep_override)
+        # nothing is listening, messages just pile up
+        self._game.messenger = Messenger(self._game)
+        self._stepper = Stepper(self._game, sleep_override)
+        restore_stepper(self._stepper, data)
+
+        # None means the journal never recorded an END
+        self.reproduced: T.Optional[bool] = None
+
+    @property
+    def game(self) -> "Game":
+        return self._game
+
+    def _actor(self, idx: T.Optional[int]) -> T.Optional["Actor"]:
+        if idx is None:
+            return None
+        return self._game._actors[idx]
+
+    def _do_phase(self, record: JournalRecord) -> None:
+        phase = TurnPhase[record.payload["phase"]]
+        if phase != self._game.turn_phase:
+            raise ReplayError(f"Journal finished {phase.name} but the engine is in {self._game.turn_phase.name}")
+
+        if phase == TurnPhase.DAYLIGHT:
+            # the stepper skips the Tribunal when it isn't sleeping, so do the
+            # bookkeeping `Tribunal.do_daylight` and `Stepper._to_dusk` would have done
+            tribunal = self._game.tribunal
+            if not (tribunal._skip_first_day and self._game.turn_number == 1):
+                self._game.death_reporter.report_all_deaths()
+            tribunal.reset()
+
+        self._stepper.advance()
+
+    def apply(self, record: JournalRecord) -> None:
+        payload = record.payload
+        if record.kind == EventKind.PHASE:
+            self._do_phase(record)
+        elif record.kind == EventKind.TARGET:
+            self._actor(payload["actor"]).choose_targets(*[self._actor(t) for t in payload["targets"]])
+        elif record.kind == EventKind.TRIAL_VOTE:
+            self._game.tribunal.submit_trial_vote(self._actor(payload["voter"]), self._actor(payload["voted"]))
+        elif record.kind == EventKind.SKIP_VOTE:
+            self._game.tribunal.submit_skip_vote(self._actor(payload["voter"]))
+        elif record.kind == EventKind.LYNCH_VOTE:
+            self._game.tribunal.submit_lynch_vote(self._actor(payload["voter"]), payload["vote"])
+        elif record.kind == EventKind.LAST_WILL:
+            self._actor(payload["actor"])._last_will = payload["text"]
+        elif record.kind == EventKind.DEATH_NOTE:
+            self._actor(payload["actor"])._death_note = payload["text"]
+        elif record.kind == EventKind.VEST:
+            if payload["on"]:
+                self._actor(payload["actor"]).put_on_vest()
+            else:
+                self._actor(payload["actor"]).take_off_vest()
+        elif record.kind == EventKind.INSTANT:
+            action = resolve_class(payload["action"])()
+            targets = [self._actor(t) for t in payload["targets"]]
+            SequenceEvent(action, self._actor(payload["actor"]), targets).execute()
+        elif record.kind == EventKind.LYNCH:
+            self._actor(payload["actor"]).lynch()
+        elif record.kind == EventKind.END:
+            self.reproduced = payload["digest"] == state_digest(self._game, self._stepper)
+        elif record.kind == EventKind.SETUP:
+            raise ReplayError("Found a second SETUP record")
+
+    def run(self) -> "Game":
+        for record in self._records[1:]:
+            self.apply(record)
+        return self._game
+
+
+def replay(path: str, config: "GameConfig" = DEFAULT_CONFIG) -> Replay:
+    rp = Replay(read_journal(path), config=config)
+    rp.run()
+    return rp
+
+
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay a game from its journal")
+    parser.add_argument("journal")
+    args = parser.parse_args()
+
+    rp = replay(args.journal)
+    game = rp.game
+    print(f"Finished on {game.turn_phase.name} {game.turn_number}")
+    for tombstone in game.graveyard:
+        print(f"\t{tombstone.turn_phase.name} {tombstone.turn_number}: "
+              f"{tombstone.actor.name} ({tombstone.actor.role.name}) - {tombstone.epitaph}")
+    if game.concluded:
+        print(f"Winners: {', '.join(actor.name for actor in game.evaluate_post_game())}")
+    if rp.reproduced is None:
+        print("Journal has no END record, cannot verify outcome")
+    elif rp.reproduced:
+        print("Outcome reproduced exactly")
+    else:
+        print("WARNING: replayed outcome does NOT match the recorded game")
+
+
+if __name__ == "__main__":
+    main()
@@ -67,7 +67,10 @@ class DeathReporter:
 
         Generates a message for each
         """
-        for actor in self._game.get_dead_actors(shuffle=True):
+        dead = self._game.get_dead_actors()
+        # reveal order is presentation only, keep it off the night stream
+        self._game.rng.cosmetic.shuffle(dead)
+        for actor in dead:
             if actor in self._dead_players:
                 continue
             self._dead_players.add(actor)
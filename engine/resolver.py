@@ -18,6 +18,8 @@ class SequenceEvent:
     This represents a player issuing an action request.
     """
 
+    __slots__ = ("_action", "_actor", "_game", "_targets")
+
     def __init__(self, action: "Action", actor: "Actor", targets: T.List["Actor"] = None):
         self._action = action
         self._actor = actor
@@ -40,6 +42,14 @@ class SequenceEvent:
     def targets(self) -> T.List["Actor"]:
         return self._targets
 
+    def execute_instant(self) -> None:
+        """
+        Execute an event that came straight from player input (e.g a Mayor reveal)
+        """
+        if self._game.journal is not None:
+            self._game.journal.instant(self)
+        self.execute()
+
     def execute(self) -> None:
         """
         Execute this event.
@@ -53,6 +63,7 @@ class SequenceEvent:
             return
         success = self._action.do_action(self._actor, *self._targets)
         if success is not None:
+            self._actor.record_visit(self._targets)
             self._actor.role._ability_uses -= 1
         self._action.update_crimes(self._actor, success)
         self._action.message_results(self._actor, success)
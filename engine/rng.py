@@ -0,0 +1,88 @@
+"""
+Per-game randomness
+
+Every game gets its own seeded RNG instead of sharing the global `random` module.
+The RNG is split into independent substreams so that, e.g, picking a different
+flavour text does not change who the jester takes down with them.
+
+    setup: role selection and assignment
+    night: anything that can change the outcome of a game once it's started
+    cosmetic: flavour text and presentation order
+
+Substream seeds are derived by hashing the game seed with the stream name, so a
+seed fully determines a game and parallel simulations never share a stream.
+"""
+import hashlib
+import random
+import secrets
+import typing as T
+
+# text that is either fixed or picked at random from a list of options
+Flavor = T.Union[str, T.Sequence[str]]
+
+STREAMS = ("setup", "night", "cosmetic")
+
+
+def derive_seed(seed: int, name: str) -> int:
+    return int.from_bytes(hashlib.sha256(f"{seed}:{name}".encode()).digest()[:8], "little")
+
+
+class GameRNG:
+    """
+    Seeded random number generator for a single game
+    """
+
+    def __init__(self, seed: T.Optional[int] = None) -> None:
+        self._seed = seed if seed is not None else secrets.randbits(64)
+        self._streams: T.Dict[str, random.Random] = {
+            name: random.Random(derive_seed(self._seed, name)) for name in STREAMS
+        }
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def setup(self) -> random.Random:
+        return self._streams["setup"]
+
+    @property
+    def night(self) -> random.Random:
+        return self._streams["night"]
+
+    @property
+    def cosmetic(self) -> random.Random:
+        return self._streams["cosmetic"]
+
+    def substream(self, name: str) -> random.Random:
+        """
+        Derive an additional independent stream. These are not tracked in `getstate`.
+        """
+        return random.Random(derive_seed(self._seed, name))
+
+    def getstate(self) -> T.Dict[str, T.Any]:
+        """
+        JSON-able state of every stream
+        """
+        state = dict(seed=self._seed)
+        for name, stream in self._streams.items():
+            version, internal, gauss_next = stream.getstate()
+            state[name] = [version, list(internal), gauss_next]
+        return state
+
+    def setstate(self, state: T.Dict[str, T.Any]) -> None:
+        self._seed = state["seed"]
+        for name, stream in self._streams.items():
+            version, internal, gauss_next = state[name]
+            stream.setstate((version, tuple(internal), gauss_next))
+
+
+def pick(rng: random.Random, text: Flavor) -> str:
+    """
+    Resolve flavour text that may have several variants
+    """
+    if isinstance(text, str):
+        return text
+    if not text:
+        return ""
+    return rng.choice(text)
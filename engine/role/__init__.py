@@ -3,6 +3,7 @@ import pkgutil
 import typing as T
 
 from engine.role.base import Role
+from engine.role.manifest import ROLE_MODULES
 
 
 def import_submodules(package, recursive=True):
@@ -32,7 +33,11 @@ def test():
     import_submodules(neutral)
 
 
-def get_all_roles() -> T.List[T.Type[Role]]:
+def discover_roles() -> T.List[T.Type[Role]]:
+    """
+    Import every role module and collect the roles. This is slow, so it's only used
+    to generate (and check) the manifest, see engine/role/gen.py
+    """
     test()
     roles: T.List[T.Type[Role]] = list()
     to_visit = [Role]
@@ -49,8 +54,41 @@ def get_all_roles() -> T.List[T.Type[Role]]:
     return roles
 
 
-ALL_ROLES = get_all_roles()
-NAME_TO_ROLE = {klass.__name__: klass for klass in ALL_ROLES}
+class RoleRegistry(T.Mapping[str, T.Type[Role]]):
+    """
+    Role name -> role class, backed by the static manifest.
+
+    Role modules are only imported once somebody asks for that role.
+    """
+
+    def __init__(self, modules: T.Dict[str, str]) -> None:
+        self._modules = modules
+        self._roles: T.Dict[str, T.Type[Role]] = dict()
+
+    def __getitem__(self, name: str) -> T.Type[Role]:
+        role = self._roles.get(name)
+        if role is None:
+            module = importlib.import_module(self._modules[name])
+            role = self._roles[name] = getattr(module, name)
+            # names and descriptions get asked for every tick, work them out now
+            role.meta()
+        return role
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._modules
+
+    def __iter__(self) -> T.Iterator[str]:
+        return iter(self._modules)
+
+    def __len__(self) -> int:
+        return len(self._modules)
+
+
+NAME_TO_ROLE = RoleRegistry(ROLE_MODULES)
+
+
+def get_all_roles() -> T.List[T.Type[Role]]:
+    return list(NAME_TO_ROLE.values())
 
 
 def has_killing_action(role_cls: T.Type[Role]) -> bool:
@@ -61,4 +99,16 @@ def has_killing_action(role_cls: T.Type[Role]) -> bool:
     return False
 
 
-KILLING_ROLES = [klass for klass in ALL_ROLES if has_killing_action(klass)]
+_LAZY: T.Dict[str, T.Callable[[], T.Any]] = dict(
+    ALL_ROLES=get_all_roles,
+    KILLING_ROLES=lambda: [klass for klass in get_all_roles() if has_killing_action(klass)],
+)
+
+
+def __getattr__(name: str) -> T.Any:
+    # ALL_ROLES and KILLING_ROLES import every role, so only build them when asked
+    factory = _LAZY.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = factory()
+    return value
@@ -17,18 +17,34 @@ from engine.affiliation import TRIAD
 from engine.wincon import AutoVictory
 from engine.wincon import WinCondition
 import log
-from proto import state_pb2
+from util.string import camel_to_english
 from util.string import camel_to_snake
 
 if T.TYPE_CHECKING:
     from engine.config import GameConfig
     from engine.game import Game
+    from proto import state_pb2
 
 logger = logging.getLogger(__name__)
 logger.addHandler(log.ch)
 logger.setLevel(logging.INFO)
 
 
+class RoleMeta(T.NamedTuple):
+    """
+    Everything about a role class that doesn't change from game to game, see `Role.meta`
+    """
+    name: str
+    snake_name: str
+    affiliation: str
+    groups: T.Tuple["RoleGroup", ...]
+    unique: bool
+    role_description: str
+    affiliation_description: str
+    day_action_description: str
+    night_action_description: str
+
+
 class Role:
     """
     Base Role Object (BRO)
@@ -107,33 +123,35 @@ class Role:
         """
         return False
 
+    @classmethod
+    def meta(cls) -> "RoleMeta":
+        """
+        The class's display strings and groupings, worked out the first time they're asked for
+        """
+        # look in our own __dict__, a subclass mustn't pick up its parent's
+        meta = cls.__dict__.get("_meta")
+        if meta is None:
+            meta = RoleMeta(
+                name=camel_to_english(cls.__name__),
+                snake_name=camel_to_snake(cls.__name__),
+                affiliation=cls.affiliation(),
+                groups=tuple(cls.groups()),
+                unique=cls.unique(),
+                role_description=cls.role_description(),
+                affiliation_description=cls.affiliation_description(),
+                day_action_description=cls.day_action_description(),
+                night_action_description=cls.night_action_description(),
+            )
+            cls._meta = meta
+        return meta
+
     @classmethod
     def name_repr(cls) -> str:
-        # TODO: replace `.name` with this
-        name = ""
-        for prev_char, next_char in zip(cls.__name__[:-1], cls.__name__[1:]):
-            name += prev_char
-            if prev_char == prev_char.lower() and next_char == next_char.upper():
-                name += " "
-        name += next_char
-        return name
+        return cls.meta().name
 
     @property
     def name(self) -> str:
-        # translate it from camel case if needed
-        if self._name is not None:
-            return self._name
-
-        name = ""
-        for prev_char, next_char in zip(self.__class__.__name__[:-1], self.__class__.__name__[1:]):
-            name += prev_char
-            if prev_char == prev_char.lower() and next_char == next_char.upper():
-                name += " "
-
-        name += next_char
-        self._name = name
-
-        return name
+        return type(self).meta().name
 
     def __repr__(self) -> str:
         return self.name
@@ -146,7 +164,6 @@ class Role:
         If we do not find one, we will use a default config.
         The default config should also be defined in this class.
         """
-        self._name = None
         self._config = config
         self._init_with_config()
 
@@ -195,16 +212,19 @@ class Role:
         Inheriting classes define this
         """
 
-    def to_proto(self) -> state_pb2.Role:
-        role = state_pb2.Role(name=self.name)
-        role.role_description = self.role_description()
+    def to_proto(self) -> "state_pb2.Role":
+        from proto import state_pb2
+
+        meta = self.meta()
+        role = state_pb2.Role(name=meta.name)
+        role.role_description = meta.role_description
         if self.day_actions():
-            role.action_description = self.day_action_description()
+            role.action_description = meta.day_action_description
         elif self.night_actions():
-            role.action_description = self.night_action_description()
+            role.action_description = meta.night_action_description
         else:
             role.action_description = "You have no possible actions."
-        role.affiliation = self.affiliation()
+        role.affiliation = meta.affiliation
         role.ability_uses = self._ability_uses
         return role
 
@@ -392,7 +412,7 @@ def get_group_map() -> T.Dict["RoleGroup", T.List["Role"]]:
     from engine.role import ALL_ROLES
     mapping = defaultdict(list)
     for role in ALL_ROLES:
-        for group in role.groups():
+        for group in role.meta().groups:
             if not role.DISABLED:
                 mapping[group].append(role)
 
@@ -0,0 +1,33 @@
+"""
+Generate the static role manifest (engine/role/manifest.py)
+
+    python -m engine.role.gen
+
+Run this whenever a role is added, removed or moved. test_role_manifest will fail
+until you do.
+"""
+import os
+import typing as T
+
+from engine.role import discover_roles
+
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "manifest.py")
+
+
+def render_manifest(roles: T.Dict[str, str]) -> str:
+    lines = [
+        "# this file is automatically generated by engine/role/gen.py",
+        "",
+        "# role class name -> module it lives in, in discovery order",
+        "ROLE_MODULES = {",
+    ]
+    lines.extend(f'    "{name}": "{module}",' for name, module in roles.items())
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    roles = {klass.__name__: klass.__module__ for klass in discover_roles()}
+    with open(MANIFEST_PATH, "w") as manifest:
+        manifest.write(render_manifest(roles))
+    print(f"Wrote {len(roles)} roles to {MANIFEST_PATH}")
@@ -0,0 +1,39 @@
+# this file is automatically generated by engine/role/gen.py
+
+# role class name -> module it lives in, in discovery order
+ROLE_MODULES = {
+    "Survivor": "engine.role.neutral.survivor",
+    "Jester": "engine.role.neutral.jester",
+    "Executioner": "engine.role.neutral.executioner",
+    "MassMurderer": "engine.role.neutral.massmurderer",
+    "SerialKiller": "engine.role.neutral.serialkiller",
+    "Judge": "engine.role.neutral.judge",
+    "Auditor": "engine.role.neutral.auditor",
+    "Scumbag": "engine.role.neutral.scumbag",
+    "Vigilante": "engine.role.town.vigilante",
+    "Veteran": "engine.role.town.veteran",
+    "Sheriff": "engine.role.town.sheriff",
+    "PartyHost": "engine.role.town.partyhost",
+    "Mayor": "engine.role.town.mayor",
+    "Marshall": "engine.role.town.marshall",
+    "Lookout": "engine.role.town.lookout",
+    "Jailor": "engine.role.town.jailor",
+    "Investigator": "engine.role.town.investigator",
+    "Escort": "engine.role.town.escort",
+    "Doctor": "engine.role.town.doctor",
+    "Detective": "engine.role.town.detective",
+    "Constable": "engine.role.town.constable",
+    "Armorsmith": "engine.role.town.armorsmith",
+    "Citizen": "engine.role.town.citizen",
+    "Bodyguard": "engine.role.town.bodyguard",
+    "Kidnapper": "engine.role.mafia.kidnapper",
+    "Godfather": "engine.role.mafia.godfather",
+    "Framer": "engine.role.mafia.framer",
+    "Mafioso": "engine.role.mafia.mafioso",
+    "Janitor": "engine.role.mafia.janitor",
+    "Consort": "engine.role.mafia.consort",
+    "Consigliere": "engine.role.mafia.consigliere",
+    "Blackmailer": "engine.role.mafia.blackmailer",
+    "Beguiler": "engine.role.mafia.beguiler",
+    "Agent": "engine.role.mafia.agent",
+}
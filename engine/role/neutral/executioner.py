@@ -1,5 +1,4 @@
 import logging
-import random
 import typing as T
 
 from engine.action.annoy import Annoy
@@ -52,7 +51,7 @@ class Executioner(NeutralRole):
         tries = 0
         while tries < 15:
             tries += 1
-            candidate = random.choice(game.get_live_town_actors())
+            candidate = game.rng.setup.choice(game.get_live_town_actors())
             if type(candidate.role) not in BLOCKLISTED_ROLES:
                 break
         else:
@@ -0,0 +1,69 @@
+"""
+Phase Scheduling
+
+Phase transitions used to pad themselves with fixed sleeps after doing their work, so
+every slow resolution or publish made the game that much longer. A `PhaseSchedule`
+instead pins each step of a transition to an offset from when the phase started:
+
+    schedule.start()
+    announce(intro)
+    await schedule.wait_until(10.0)   # whatever's left of the first 10s
+    announce(deaths)
+    await schedule.wait_until(18.0)
+
+so the phase takes the same wall time however long the work in between took. Work
+that runs past a deadline isn't made up for later, it's recorded in
+`mafia_phase_overrun_seconds` instead.
+"""
+import typing as T
+
+from engine.metrics import PHASE_OVERRUN
+
+if T.TYPE_CHECKING:
+    from engine.clock import Clock
+
+Sleeper = T.Callable[[float], T.Union[None, T.Coroutine]]
+Settle = T.Callable[[], T.Awaitable[T.Any]]
+
+
+class PhaseSchedule:
+
+    def __init__(self, clock: "Clock", sleeper: Sleeper, tags: T.Dict[str, str] = None) -> None:
+        self._clock = clock
+        self._sleep = sleeper
+        self._tags = tags if tags is not None else dict()
+        self._started_at = clock.time()
+        self._label = ""
+
+    @property
+    def started_at(self) -> float:
+        return self._started_at
+
+    def start(self, label: str = "") -> None:
+        """
+        Anchor deadlines to now, e.g. when a phase begins
+        """
+        self._started_at = self._clock.time()
+        self._label = label
+
+    def deadline(self, offset: float) -> float:
+        return self._started_at + offset
+
+    def remaining(self, offset: float) -> float:
+        return self.deadline(offset) - self._clock.time()
+
+    async def wait_until(self, offset: float, settle: T.Optional[Settle] = None) -> float:
+        """
+        Wait out whatever's left until `offset` seconds after the start.
+
+        `settle` is awaited first (e.g. until queued messages are out) and counts toward
+        the wait. Returns how far past the deadline we already were, 0 if we weren't.
+        """
+        if settle is not None:
+            await settle()
+        remaining = self.remaining(offset)
+        if remaining > 0:
+            await self._sleep(remaining)
+            return 0.0
+        PHASE_OVERRUN.observe(-remaining, phase=self._label, **self._tags)
+        return -remaining
@@ -18,17 +18,35 @@ from chatapi.discord.driver import DiscordPublicDriver
 from chatapi.discord.driver import DiscordPrivateDriver
 from chatapi.discord.driver import WebhookDriver
 from chatapi.discord.game import GAMES
+from chatapi.discord.game import SESSIONS
 from chatapi.discord.icache import icache
+from chatapi.discord.members import member_cache
 from chatapi.discord.router import router
 from chatapi.discord.town_hall import TownHall
+from engine.clock import clock_for_speed
 from engine.game import Game
 from engine.message import Message
 from engine.message import Messenger
+from engine.metrics import UI_LOOP
 from engine.phase import GamePhase
 from engine.phase import TurnPhase
 from engine.player import Player
+from engine.profiler import PROFILE_ALL
+from engine.profiler import Profiler
+from engine.profiler import profile_path
 from engine.setup import DEFAULT_CONFIG
+from engine.journal import Journal
+from engine.journal import journal_path
 from engine.setup import do_setup
+from engine.snapshot import abandon_snapshot
+from engine.snapshot import find_unfinished
+from engine.snapshot import read_snapshot
+from engine.snapshot import restore_game
+from engine.snapshot import restore_stepper
+from engine.snapshot import snapshot_game
+from engine.snapshot import snapshot_path
+from engine.snapshot import state_digest
+from engine.snapshot import write_snapshot
 from engine.stepper import sleep_override
 from engine.stepper import Stepper
 from engine.wincon import MassMurdererWin
@@ -38,10 +56,17 @@ from engine.wincon import MafiaWin
 from engine.wincon import SurvivorWin
 from engine.wincon import ExecutionerWin
 from engine.wincon import JesterWin
+import log
 
 if T.TYPE_CHECKING:
     import disnake
+    from engine.clock import Clock
     from engine.config import GameConfig
+    from chatapi.app.bot import BotUser
+
+logger = logging.getLogger(__name__)
+logger.addHandler(log.ch)
+logger.setLevel(logging.INFO)
 
 
 class Session:
@@ -49,13 +74,15 @@ class Session:
     def __init__(
         self,
         guild: "disnake.Guild",
-        config: "GameConfig "= DEFAULT_CONFIG
+        config: "GameConfig "= DEFAULT_CONFIG,
+        game: T.Optional[Game] = None,
     ) -> None:
         self._guild = guild
         self._config = config
         self._server_task: asyncio.Task = None
 
-        self._game = Game(config)
+        # a game is only passed in when we are restoring from a snapshot
+        self._game = game or Game(config, clock=clock_for_speed(config.timing.clock_speed))
         self._stepper = Stepper(self._game)
         self._skipper = Stepper(self._game, sleeper=sleep_override)
 
@@ -63,39 +90,182 @@ class Session:
         self._game.town_hall = self._town_hall
 
         self._game_task: asyncio.Task = None
+        self._snapshot_path: T.Optional[str] = None
+        self._record_name: T.Optional[str] = None
+        self._profiler: T.Optional[Profiler] = None
 
     @property
     def log(self) -> logging.Logger:
         return self._game.log
 
+    @property
+    def clock(self) -> "Clock":
+        return self._game.clock
+
     @property
     def bulletin(self) -> T.Optional["disnake.TextChannel"]:
         return self._town_hall.ch_bulletin
 
+    @property
+    def profiler(self) -> T.Optional[Profiler]:
+        return self._profiler
+
     def add_players(self, *players) -> None:
         self._game.add_players(*players)
 
+    def start_profiling(self) -> bool:
+        """
+        Profile the rest of this game. The profile gets written out when the game ends.
+
+        Returns False if we were already profiling or the game is over.
+        """
+        if self._profiler is not None or self._game.concluded:
+            return False
+        self._profiler = Profiler(self._game)
+        self._profiler.wrap(self._stepper, "step")
+        self._profiler.wrap(self._town_hall, "drive")
+        if self._game.messenger is not None:
+            # Messenger.run just pulls off the queue, routing is where the work is
+            self._profiler.wrap(self._game.messenger, "route_message")
+        self._profiler.start()
+        return True
+
+    def stop_profiling(self) -> None:
+        if self._profiler is None:
+            return
+        self._profiler.stop()
+        try:
+            self._profiler.dump(profile_path(self._record_name or self._game.log.name))
+        except Exception as exc:
+            self.log.exception(exc)
+        self._profiler = None
+
     async def ui_loop(self) -> None:
         """
         TODO: this is dumb
         """
         period = 1.0
         while not self._game.concluded:
-            t_i = time.time()
+            t_i = self.clock.time()
             await self._town_hall.drive()
-            delta = time.time() - t_i
+            delta = self.clock.elapsed(t_i)
+            UI_LOOP.observe(delta, **self._game.tags)
             if delta > period:
                 print(f"WARNING: UI loop lagging, took {delta}s but we allocated {period}s")
-            await asyncio.sleep(max(period - delta, 0.0))
+            await self.clock.sleep(max(period - delta, 0.0))
+
+    async def snapshot(self) -> None:
+        """
+        Write out the engine state so we can survive a restart
+        """
+        if self._snapshot_path is None:
+            return
+        try:
+            await write_snapshot(self._game, self._stepper, self._snapshot_path)
+        except Exception as exc:
+            # never kill a game because we failed to save it
+            self.log.exception(exc)
 
     async def game_loop(self) -> None:
         print("Started game loop")
         while not self._game.concluded:
             await self._stepper.step()
+            await self.snapshot()
 
         # step until daylight
         while not self._game.turn_phase in (TurnPhase.DAYLIGHT, TurnPhase.DUSK):
             await self._stepper.step()
+            await self.snapshot()
+
+    @classmethod
+    async def resume(
+        cls,
+        guild: "disnake.Guild",
+        path: str,
+        config: "GameConfig" = DEFAULT_CONFIG,
+        bots: T.Iterable["BotUser"] = (),
+    ) -> "Session":
+        """
+        Rehydrate a game from a snapshot file and pick the game loop back up.
+
+        Human players are looked up in the guild by user ID. Bot players must be
+        provided since they only live in the lobby.
+        """
+        from uuid import UUID
+        from chatapi.app.bot import BotUser
+
+        data = read_snapshot(path)
+        members = await member_cache.fetch_many(guild, [
+            player_data["user_id"] for player_data in data["players"] if player_data["user_id"] is not None
+        ])
+        bots_by_name = {bot.name: bot for bot in bots}
+        players: T.List[Player] = []
+        for player_data in data["players"]:
+            if player_data["user_id"] is not None:
+                member = members.get(player_data["user_id"])
+                if member is None:
+                    raise ValueError(f"{player_data['name']} is no longer in {guild.name}")
+                players.append(Player.create_from_user(member))
+            else:
+                bot = bots_by_name.get(player_data["name"]) or \
+                    BotUser(player_data["name"], uuid=UUID(hex=player_data["bot_id"]))
+                players.append(Player.create_from_bot(bot))
+
+        game = restore_game(data, config, players, clock=clock_for_speed(config.timing.clock_speed))
+        session = cls(guild, config=config, game=game)
+        restore_stepper(session._stepper, data)
+        session._snapshot_path = path
+        await session.run()
+        return session
+
+    @classmethod
+    def resume_unfinished(
+        cls,
+        guilds: T.Iterable["disnake.Guild"],
+        directory: str = None,
+    ) -> T.List[asyncio.Task]:
+        """
+        Pick back up the game a restart cut off in each guild. Each game runs in its own task.
+
+        Guilds share their bulletin channel and roles between games, so only the newest
+        game in a guild comes back and any older ones are abandoned.
+        """
+        by_id = {str(guild.id): guild for guild in guilds}
+        newest: T.Dict[str, str] = {}
+        # oldest first, so later games replace earlier ones
+        for path, data in find_unfinished(directory):
+            guild_id = data.get("tags", {}).get("guild")
+            if guild_id not in by_id:
+                logger.warning(f"Not resuming {path}, its guild is gone")
+                continue
+            if guild_id in newest:
+                cls._abandon(newest[guild_id], f"superseded by {path}")
+            newest[guild_id] = path
+
+        tasks = []
+        for guild_id, path in newest.items():
+            guild = by_id[guild_id]
+            logger.info(f"Resuming {path} in {guild.name}")
+            tasks.append(asyncio.create_task(cls._resume_logged(guild, path)))
+        return tasks
+
+    @classmethod
+    async def _resume_logged(cls, guild: "disnake.Guild", path: str) -> None:
+        try:
+            await cls.resume(guild, path)
+        except Exception as exc:
+            logger.exception(f"Failed to resume {path}: {exc}")
+            # otherwise we'd fail the same way on every restart
+            cls._abandon(path, f"resume failed: {exc}")
+
+    @staticmethod
+    def _abandon(path: str, reason: str) -> None:
+        try:
+            abandon_snapshot(path, reason)
+        except Exception as exc:
+            logger.exception(f"Failed to abandon {path}: {exc}")
+        else:
+            logger.warning(f"Abandoned {path}: {reason}")
 
     async def start(self) -> None:
         setup_attempt_count = 0
@@ -109,6 +279,15 @@ class Session:
         else:
             raise ValueError("Failed to setup game. Setup is likely unstable")
 
+        await self.run()
+
+    async def run(self) -> None:
+        """
+        Bring up the town hall and messaging for a game that has been set up
+        (or restored) and then play it out.
+        """
+        restored = self._game.game_phase == GamePhase.IN_PROGRESS
+
         # TODO: block this out somewhere else
         #self._game.debug_override_role("donbot", "Executioner")
         #self._game.debug_override_role("asiannub", "Vigilante")
@@ -124,11 +303,16 @@ class Session:
         self._town_hall.initialize()
         await self._town_hall.prepare_for_game()
         self._game.log.name = f"Game-{self._town_hall.ch_bulletin.name}"
+        self._game.tags.update(guild=str(self._guild.id), game=self._game.log.name)
+        # channel names get re-used between games so stamp these
+        record_name = self._record_name = f"{self._game.log.name}-{int(time.time())}"
+        self._snapshot_path = self._snapshot_path or snapshot_path(record_name)
+        self._game.log.info(f"Game seed {self._game.rng.seed}")
 
         # create message drivers for our game
         drivers = [
             DiscordPublicDriver(self._town_hall.ch_bulletin),
-            await WebhookDriver.create_with_name(self._game, self._town_hall.ch_bulletin, "Botspeak")
+            await WebhookDriver.create(self._game, self._town_hall.ch_bulletin)
         ]
         drivers.extend([DiscordPrivateDriver(self._town_hall.ch_bulletin, ac) for ac in self._game.human_actors])
         drivers.extend([BotMessageDriver(bot) for bot in self._game.bot_actors])
@@ -138,20 +322,48 @@ class Session:
 
         # if the game starts, lets store it
         GAMES[self._town_hall.ch_bulletin] = self._game
+        SESSIONS[self._town_hall.ch_bulletin] = self
+        if PROFILE_ALL:
+            self.start_profiling()
 
         # start game
-        self._game.game_phase = GamePhase.IN_PROGRESS
-        await self._town_hall.display_welcome()
+        if not restored:
+            self._game.game_phase = GamePhase.IN_PROGRESS
+            await self._town_hall.display_welcome()
 
-        await asyncio.sleep(5.0)
+            await self.clock.sleep(5.0)
 
-        await self._town_hall.display_role_setup()
+            await self._town_hall.display_role_setup()
 
-        await asyncio.sleep(5.0)
+            await self.clock.sleep(5.0)
+            await self.snapshot()
+
+        # everything from here on out is driven by player input, so journal from here
+        self._game.journal = Journal.open(self._game, journal_path(record_name))
+        self._game.journal.setup(snapshot_game(self._game, self._stepper))
 
         ui_task = asyncio.create_task(self.ui_loop())
-        await self.game_loop()
-        ui_task.cancel()
+        try:
+            await self.game_loop()
+        except Exception as exc:
+            # a restart would just run into the same thing
+            self._abandon(self._snapshot_path, f"game loop failed: {exc}")
+            raise
+        finally:
+            # game roles are pooled and outlive us, so even if the loop blew up or got
+            # cancelled nobody gets to keep theirs into the next game
+            ui_task.cancel()
+            try:
+                await self._town_hall.stop_permissions()
+                await self._town_hall.cleanup_hideouts()
+            finally:
+                self._game.journal.end(state_digest(self._game, self._stepper))
+                self._game.journal.close()
+                self.stop_profiling()
+
+        # so a restart doesn't try to pick this game back up
+        self._game.game_phase = GamePhase.CONCLUDED
+        await self.snapshot()
 
         # game should be over now, evaluate win conditions
         winners = self._game.evaluate_post_game()
@@ -177,9 +389,10 @@ class Session:
 
         # create win condition screen with primary win condition
         self._messenger.queue_message(Message.announce(self._game, "We have reached a conclusion..."))
-        await asyncio.sleep(8.0)
+        await self.clock.sleep(8.0)
         await self._town_hall.display_victory(winners, wc)
-        await asyncio.sleep(5.0)
+        await self.clock.sleep(5.0)
         await self._town_hall.display_original_roles()
         channel_manager.mark_to_preserve(self._town_hall.ch_bulletin)
+        router.unregister_namespace(self._game.id)
         self.log.info("FIN")
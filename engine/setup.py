@@ -8,12 +8,9 @@ from collections import defaultdict
 from collections import deque
 from contextlib import contextmanager
 import logging
-import numpy as np
 import random
 import typing as T
 
-from aiogoogle.auth.creds import ServiceAccountCreds
-
 from engine.actor import Actor
 from engine.config import GameConfig
 from engine.role import NAME_TO_ROLE
@@ -139,8 +136,10 @@ class WeightedSampler:
         self,
         role_weights: T.Dict[str, float],
         excludes_list: T.List[T.Tuple[str, str]],
+        rng: T.Optional[random.Random] = None,
     ) -> None:
         self._role_weights = role_weights
+        self._rng = rng or random.Random()
         self._excludes_list = excludes_list
         self._group_map = get_group_map()
 
@@ -175,10 +174,11 @@ class WeightedSampler:
             self._excludes_map[excluding].append(role)
 
     @classmethod
-    def create_from_config(cls, config: "GameConfig") -> "WeightedSampler":
+    def create_from_config(cls, config: "GameConfig", rng: T.Optional[random.Random] = None) -> "WeightedSampler":
         return cls(
             role_weights=config.role_weights,
             excludes_list=config.excludes_list,
+            rng=rng,
         )
 
     @contextmanager
@@ -203,20 +203,14 @@ class WeightedSampler:
                     valid_roles.remove(role)
 
             for role in chosen:
-                if role.unique() and role in valid_roles:
+                if role.meta().unique and role in valid_roles:
                     valid_roles.remove(role)
 
             if not valid_roles:
                 return None
 
-            weight_vec = np.array([float(self._role_weights.get(camel_to_english(r.__name__), 0.3)) for r in valid_roles])
-            weight_vec = weight_vec / sum(weight_vec)
-            return np.random.choice(
-                valid_roles,
-                1,
-                replace=False,
-                p=weight_vec
-            )[0]
+            weights = [float(self._role_weights.get(r.meta().name, 0.3)) for r in valid_roles]
+            return self._rng.choices(valid_roles, weights=weights)[0]
         except IndexError:
             # select first option
             return valid_roles[0]
@@ -244,7 +238,8 @@ def do_setup(
     if not override_player_count and (len(game.players) != len(role_list)):
         return False, f"Mismatched number of players. Have {len(game.players)} and need {len(role_list)}"
 
-    sampler = WeightedSampler.create_from_config(config)
+    rng = game.rng.setup
+    sampler = WeightedSampler.create_from_config(config, rng=rng)
     rf = RoleFactory(config)
 
     selected_roles: T.List[T.Type[Role]] = list()
@@ -300,7 +295,7 @@ def do_setup(
     ordered_roles.sort(key=lambda x: len(eligible_players.get(x, [])))
     ordered_players: T.List[Player] = list()
     for role in ordered_roles:
-        chosen_player = random.choice(eligible_players[role])
+        chosen_player = rng.choice(eligible_players[role])
 
         for remaining_players in eligible_players.values():
             while chosen_player in remaining_players:
@@ -309,7 +304,7 @@ def do_setup(
         ordered_players.append(chosen_player)
 
     game.add_actors(*[Actor(player, rf.create_role(role), game) for player, role in zip(ordered_players, ordered_roles)])
-    random.shuffle(game._actors)
+    rng.shuffle(game._actors)
     game.tribunal = Tribunal(game)
 
     for actor in game.actors:
@@ -319,7 +314,7 @@ def do_setup(
 
 if __name__ == "__main__":
     import json
-    import random
+    from aiogoogle.auth.creds import ServiceAccountCreds
     from engine.config import SheetsFetcher
     from engine.game import Game
     from engine.player import Player
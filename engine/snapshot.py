@@ -0,0 +1,427 @@
+"""
+Snapshot / Restore
+
+If the bot process restarts mid-game we lose everything in the Game, the Tribunal,
+every Actor and the Stepper. This module flattens all of that into a plain
+JSON-able dictionary at each phase boundary so a game can be picked back up.
+
+Actors are referenced by their index in `game._actors` (which is strictly ordered),
+and classes (roles, actions, kills) are referenced by import path.
+
+Players are NOT rehydrated here since they wrap Discord users. Whoever restores
+the game is responsible for providing Player objects that match the snapshot
+player names (see `Session.resume`).
+"""
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import os
+import time
+import typing as T
+from collections import defaultdict
+
+from engine.crimes import Crime
+from engine.phase import GamePhase
+from engine.phase import TurnPhase
+from engine.resolver import SequenceEvent
+import log
+
+if T.TYPE_CHECKING:
+    from engine.action.base import Action
+    from engine.actor import Actor
+    from engine.clock import Clock
+    from engine.config import GameConfig
+    from engine.game import Game
+    from engine.player import Player
+    from engine.role.base import Role
+    from engine.stepper import Stepper
+
+logger = logging.getLogger(__name__)
+logger.addHandler(log.ch)
+logger.setLevel(logging.INFO)
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_DIR = os.environ.get("MAFIA_SNAPSHOT_DIR", "snapshots")
+
+# role attributes that get rebuilt from config instead of being serialized
+ROLE_SKIP_ATTRS = ("_config", "_name")
+
+
+class SnapshotError(ValueError):
+    """
+    Exception class for a snapshot that cannot be restored
+    """
+
+
+def class_path(klass: T.Type) -> str:
+    return f"{klass.__module__}:{klass.__qualname__}"
+
+
+def resolve_class(path: str) -> T.Type:
+    module_name, _, qualname = path.partition(":")
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class _Encoder:
+    """
+    Maps actors to indices (and back) while walking a game.
+    """
+
+    def __init__(self, actors: T.List["Actor"]) -> None:
+        self._actors = actors
+        self._index = {actor: idx for idx, actor in enumerate(actors)}
+
+    def ref(self, actor: T.Optional["Actor"]) -> T.Optional[int]:
+        if actor is None:
+            return None
+        return self._index[actor]
+
+    def refs(self, actors: T.Iterable["Actor"]) -> T.List[int]:
+        return [self._index[actor] for actor in actors]
+
+    def deref(self, idx: T.Optional[int]) -> T.Optional["Actor"]:
+        if idx is None:
+            return None
+        return self._actors[idx]
+
+    def derefs(self, idxs: T.Iterable[int]) -> T.List["Actor"]:
+        return [self._actors[idx] for idx in idxs]
+
+    def value(self, value: T.Any) -> T.Any:
+        """
+        Encode a generic role attribute value
+        """
+        from engine.actor import Actor
+        if isinstance(value, Actor):
+            return {"actor": self.ref(value)}
+        if isinstance(value, (list, tuple)):
+            return [self.value(v) for v in value]
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        raise SnapshotError(f"Cannot snapshot value {value!r} of type {type(value)}")
+
+    def unvalue(self, value: T.Any) -> T.Any:
+        if isinstance(value, dict) and "actor" in value:
+            return self.deref(value["actor"])
+        if isinstance(value, list):
+            return [self.unvalue(v) for v in value]
+        return value
+
+    def role(self, role: "Role") -> T.Dict[str, T.Any]:
+        return dict(
+            cls=class_path(type(role)),
+            attrs={k: self.value(v) for k, v in role.__dict__.items() if k not in ROLE_SKIP_ATTRS},
+        )
+
+    def unrole(self, data: T.Dict[str, T.Any], config: "GameConfig") -> "Role":
+        role = resolve_class(data["cls"])(config)
+        for key, value in data["attrs"].items():
+            setattr(role, key, self.unvalue(value))
+        return role
+
+    def event(self, event: "SequenceEvent") -> T.Dict[str, T.Any]:
+        return dict(
+            action=class_path(type(event.action)),
+            actor=self.ref(event.actor),
+            targets=self.refs(event.targets),
+        )
+
+    def unevent(self, data: T.Dict[str, T.Any]) -> "SequenceEvent":
+        action: "Action" = resolve_class(data["action"])()
+        return SequenceEvent(action, self.deref(data["actor"]), self.derefs(data["targets"]))
+
+
+def _encode_player(player: "Player") -> T.Dict[str, T.Any]:
+    out = dict(name=player.name, bot_id=None, user_id=None)
+    if player.is_bot:
+        out["bot_id"] = player.bot.id
+    elif player.is_human:
+        out["user_id"] = player.user.id
+    return out
+
+
+def _encode_actor(enc: _Encoder, actor: "Actor") -> T.Dict[str, T.Any]:
+    return dict(
+        role=enc.role(actor._role),
+        # visible role is usually just the real role
+        visible_role=None if actor._visible_role is actor._role else enc.role(actor._visible_role),
+        crimes=sorted(crime.value for crime in actor._crimes),
+        last_will=actor._last_will,
+        death_note=actor._death_note,
+        corpse_death_note=actor._corpse_death_note,
+        lynch_vote=enc.ref(actor._lynch_vote),
+        vote_count=actor._vote_count,
+        targets=enc.refs(actor._targets),
+        target_history=[
+            [turn_number, turn_phase.name, enc.refs(targets)]
+            for (turn_number, turn_phase), targets in actor._target_history.items()
+        ],
+        is_jailor=actor._is_jailor,
+        is_jailed=actor._is_jailed,
+        vest_active=actor._vest_active,
+        is_alive=actor._is_alive,
+        attacked_by=[class_path(kill) for kill in actor._attacked_by],
+        hitpoints=actor.hitpoints,
+        attacked=actor._attacked,
+    )
+
+
+def _encode_tribunal(enc: _Encoder, game: "Game") -> T.Optional[T.Dict[str, T.Any]]:
+    tribunal = game.tribunal
+    if tribunal is None:
+        return None
+    return dict(
+        state=tribunal._state.name,
+        on_trial=enc.ref(tribunal._on_trial),
+        anonymous=tribunal._anonymous,
+        skip_vote=sorted(enc.refs(tribunal._skip_vote)),
+        trial_vote=[[enc.ref(k), enc.ref(v)] for k, v in tribunal._trial_vote.items()],
+        lynch_vote=[[enc.ref(k), v] for k, v in tribunal._lynch_vote.items()],
+        vote_count=[[enc.ref(k), v] for k, v in tribunal._vote_count.items() if k is not None],
+        trial_type=tribunal._trial_type,
+        lynches_left=tribunal._lynches_left,
+        judge=enc.ref(tribunal._judge),
+        mayor=enc.ref(tribunal._mayor),
+        reveal_role=tribunal._reveal_role,
+    )
+
+
+def snapshot_game(game: "Game", stepper: "Stepper" = None) -> T.Dict[str, T.Any]:
+    """
+    Flatten the full engine state into a JSON-able dictionary.
+    """
+    enc = _Encoder(game._actors)
+    return dict(
+        version=SNAPSHOT_VERSION,
+        # wall time, the game clock may be running fast or virtual
+        created=time.time(),
+        id=game.id,
+        # the session stamps the guild here, which is how a restart finds its way back
+        tags=dict(game.tags),
+        players=[_encode_player(actor.player) for actor in game._actors],
+        actors=[_encode_actor(enc, actor) for actor in game._actors],
+        game=dict(
+            game_phase=game._game_phase.name,
+            turn_number=game._turn_number,
+            turn_phase=game._turn_phase.name,
+            graveyard=[
+                [enc.ref(ts.actor), ts.turn_phase.name, ts.turn_number, ts.epitaph]
+                for ts in game._graveyard
+            ],
+            allow_chat=game._allow_chat,
+            allow_pm=game._allow_pm,
+            party_planned=game._party_planned,
+            jail_map=[[enc.ref(k), enc.ref(v)] for k, v in game._jail_map.items()],
+            day_queue=[enc.event(ev) for ev in game._day_queue],
+            night_queue=[enc.event(ev) for ev in game._night_queue],
+            reported_dead=sorted(enc.refs(game.death_reporter._dead_players)),
+        ),
+        tribunal=_encode_tribunal(enc, game),
+        stepper=dict(
+            live_player_count=stepper._live_player_count if stepper is not None else None,
+        ),
+        rng=game.rng.getstate(),
+    )
+
+
+def restore_game(
+    data: T.Dict[str, T.Any],
+    config: "GameConfig",
+    players: T.Iterable["Player"],
+    sleeper=None,
+    clock: T.Optional["Clock"] = None,
+) -> "Game":
+    """
+    Rehydrate a Game (and its Tribunal) from a snapshot.
+
+    `players` must contain a player for each name recorded in the snapshot.
+    """
+    # avoid circular import
+    from engine.actor import Actor
+    from engine.clock import Clock
+    from engine.game import Game
+    from engine.game import Tombstone
+    from engine.tribunal import Tribunal
+
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {data.get('version')}")
+
+    by_name = {player.name: player for player in players}
+    # keep the id so custom ids on panels sent before the restart still route
+    game = Game(config, clock=clock, game_id=data.get("id"))
+    for player_data in data["players"]:
+        player = by_name.get(player_data["name"])
+        if player is None:
+            raise SnapshotError(f"No player provided for {player_data['name']}")
+        game.add_players(player)
+
+    # two passes since actors reference each other
+    for player, actor_data in zip(game._players, data["actors"]):
+        game._actors.append(Actor(player, None, game))
+
+    enc = _Encoder(game._actors)
+    for actor, actor_data in zip(game._actors, data["actors"]):
+        actor._role = enc.unrole(actor_data["role"], config)
+        if actor_data["visible_role"] is None:
+            actor._visible_role = actor._role
+        else:
+            actor._visible_role = enc.unrole(actor_data["visible_role"], config)
+        actor._crimes = {Crime(crime) for crime in actor_data["crimes"]}
+        actor._last_will = actor_data["last_will"]
+        actor._death_note = actor_data["death_note"]
+        actor._corpse_death_note = actor_data["corpse_death_note"]
+        actor._lynch_vote = enc.deref(actor_data["lynch_vote"])
+        actor._vote_count = actor_data["vote_count"]
+        actor._targets = enc.derefs(actor_data["targets"])
+        actor._target_history = {
+            (turn_number, TurnPhase[turn_phase]): enc.derefs(targets)
+            for turn_number, turn_phase, targets in actor_data["target_history"]
+        }
+        actor._is_jailor = actor_data["is_jailor"]
+        actor._is_jailed = actor_data["is_jailed"]
+        actor._vest_active = actor_data["vest_active"]
+        actor._is_alive = actor_data["is_alive"]
+        actor._attacked_by = [resolve_class(path) for path in actor_data["attacked_by"]]
+        actor.hitpoints = actor_data["hitpoints"]
+        actor._attacked = actor_data["attacked"]
+
+    game_data = data["game"]
+    game._game_phase = GamePhase[game_data["game_phase"]]
+    game._turn_number = game_data["turn_number"]
+    game._turn_phase = TurnPhase[game_data["turn_phase"]]
+    game._graveyard = [
+        Tombstone(enc.deref(idx), TurnPhase[turn_phase], turn_number, epitaph)
+        for idx, turn_phase, turn_number, epitaph in game_data["graveyard"]
+    ]
+    game._allow_chat = game_data["allow_chat"]
+    game._allow_pm = game_data["allow_pm"]
+    game._party_planned = game_data["party_planned"]
+    game._jail_map = {enc.deref(k): enc.deref(v) for k, v in game_data["jail_map"]}
+    game._day_queue = [enc.unevent(ev) for ev in game_data["day_queue"]]
+    game._night_queue = [enc.unevent(ev) for ev in game_data["night_queue"]]
+    game.death_reporter._dead_players = set(enc.derefs(game_data["reported_dead"]))
+
+    tribunal_data = data["tribunal"]
+    if tribunal_data is not None:
+        from engine.tribunal import TribunalState
+        tribunal = Tribunal(game, sleeper=sleeper)
+        tribunal._state = TribunalState[tribunal_data["state"]]
+        tribunal._on_trial = enc.deref(tribunal_data["on_trial"])
+        tribunal._anonymous = tribunal_data["anonymous"]
+        tribunal._skip_vote = set(enc.derefs(tribunal_data["skip_vote"]))
+        tribunal._trial_vote = {enc.deref(k): enc.deref(v) for k, v in tribunal_data["trial_vote"]}
+        tribunal._lynch_vote = {enc.deref(k): v for k, v in tribunal_data["lynch_vote"]}
+        tribunal._vote_count = defaultdict(lambda: 1)
+        tribunal._vote_count.update({enc.deref(k): v for k, v in tribunal_data["vote_count"]})
+        tribunal._trial_type = tribunal_data["trial_type"]
+        tribunal._lynches_left = tribunal_data["lynches_left"]
+        tribunal._judge = enc.deref(tribunal_data["judge"])
+        tribunal._mayor = enc.deref(tribunal_data["mayor"])
+        tribunal._reveal_role = tribunal_data["reveal_role"]
+        game.tribunal = tribunal
+
+    game.rng.setstate(data["rng"])
+
+    return game
+
+
+def restore_stepper(stepper: "Stepper", data: T.Dict[str, T.Any]) -> None:
+    live_player_count = data["stepper"]["live_player_count"]
+    if live_player_count is not None:
+        stepper._live_player_count = live_player_count
+
+
+def state_digest(game: "Game", stepper: "Stepper" = None) -> str:
+    """
+    Hash of everything in the engine that can affect the outcome of a game.
+
+    Excludes players (since they wrap Discord users), the capture time, the game id and tags.
+    """
+    data = snapshot_game(game, stepper)
+    data.pop("created")
+    data.pop("id")
+    data.pop("tags")
+    data.pop("players")
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def dumps(data: T.Dict[str, T.Any]) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def loads(raw: bytes) -> T.Dict[str, T.Any]:
+    return json.loads(raw)
+
+
+def snapshot_path(name: str, directory: str = None) -> str:
+    return os.path.join(directory or SNAPSHOT_DIR, f"{name}.json")
+
+
+def _write_atomic(path: str, raw: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+    os.replace(tmp, path)
+
+
+async def write_snapshot(game: "Game", stepper: "Stepper", path: str) -> None:
+    """
+    Capture the state on the loop (so it's consistent) and push the file write
+    to a worker thread so we don't stall the loop on disk.
+    """
+    t_i = time.time()
+    raw = dumps(snapshot_game(game, stepper))
+    delta = time.time() - t_i
+    await asyncio.get_running_loop().run_in_executor(None, _write_atomic, path, raw)
+    game.log.debug(f"Snapshot of {len(raw)} bytes took {delta * 1000.0:.2f}ms to capture")
+
+
+def read_snapshot(path: str) -> T.Dict[str, T.Any]:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def abandon_snapshot(path: str, reason: str) -> None:
+    """
+    Mark a snapshot so `find_unfinished` never hands it out again. The state is kept
+    around for post-mortems.
+    """
+    data = read_snapshot(path)
+    data["abandoned"] = reason
+    _write_atomic(path, dumps(data))
+
+
+def find_unfinished(directory: str = None) -> T.List[T.Tuple[str, T.Dict[str, T.Any]]]:
+    """
+    Snapshots of games that were still being played when they were written and
+    haven't been abandoned since, oldest first.
+    """
+    directory = directory or SNAPSHOT_DIR
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    unfinished = []
+    for name in names:
+        # skip half written files from _write_atomic
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            data = read_snapshot(path)
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Skipping unreadable snapshot {path}: {exc}")
+            continue
+        if data.get("version") != SNAPSHOT_VERSION:
+            continue
+        if data["game"]["game_phase"] != GamePhase.IN_PROGRESS.name or data.get("abandoned"):
+            continue
+        unfinished.append((path, data))
+    return sorted(unfinished, key=lambda item: item[1]["created"])
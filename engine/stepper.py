@@ -5,8 +5,6 @@ The stepper should know how to take in a game, look at its current state,
 and advance game logic.
 """
 import asyncio
-import random
-import time
 import typing as T
 from collections import defaultdict
 
@@ -15,9 +13,14 @@ from engine.action.transform import ConsiglierePromote
 from engine.action.transform import ExecutionerLoss
 from engine.action.transform import MafiosoDemote
 from engine.message import Message
+from engine.message import MessageType
+from engine.metrics import NIGHT_ORDER
+from engine.metrics import NIGHT_RESOLUTION
+from engine.metrics import PHASE_TRANSITION
 from engine.phase import GamePhase
 from engine.phase import TurnPhase
 from engine.resolver import SequenceEvent
+from engine.schedule import PhaseSchedule
 from engine.role.mafia.consigliere import Consigliere
 from engine.role.mafia.godfather import Godfather
 from engine.role.mafia.mafioso import Mafioso
@@ -27,6 +30,7 @@ if T.TYPE_CHECKING:
     from engine.actor import Actor
     from engine.game import Game
     from engine.message import Messenger
+    from engine.message_log import LogEntry
 
 
 Sleeper = T.Callable[[float], T.Union[None, T.Coroutine]]
@@ -64,6 +68,72 @@ NIGHT_DEATH_COUNT_DESCRIPTION = {
 }
 
 
+# titles of the announcements that open each day and night
+DAY_TITLE = "Day {}"
+NIGHT_TITLE = "Night {}"
+
+
+def is_phase_intro(message: T.Union[Message, "LogEntry"]) -> bool:
+    """
+    Whether this is the announcement that opens a day (sent at daybreak) or a
+    night (sent at dusk)
+    """
+    if message.message_type != MessageType.ANNOUNCEMENT:
+        return False
+    if message.turn_phase == TurnPhase.DAYBREAK:
+        return message.title == DAY_TITLE.format(message.turn_number)
+    if message.turn_phase == TurnPhase.DUSK:
+        return message.title == NIGHT_TITLE.format(message.turn_number)
+    return False
+
+
+DAYBREAK_INTROS = (
+    "A new dawn breaks as the sun rises, marking the start of a brand new day "
+    "filled with endless possibilities.",
+    "The golden orb ascends into the sky, bringing forth a fresh beginning and "
+    "a clean slate for all.",
+    "As the first rays of sunlight peek over the horizon, the world awakens to "
+    "a fresh start and a chance to create new memories.",
+    "A new chapter begins as the sun rises, signaling a new opportunity to "
+    "embrace life with renewed energy and enthusiasm.",
+    "With the rising of the sun comes a fresh start and a chance to make "
+    "the most of every moment.",
+    "The sun's ascent into the sky marks the beginning of a new day, a blank "
+    "canvas waiting to be painted with new experiences and adventures.",
+    "As the sun rises, so does the potential for growth, renewal, and positivity "
+    "in all aspects of life.",
+    "The morning sun's arrival brings with it a sense of hope and optimism, "
+    "inspiring a sense of purpose and motivation to tackle the day's challenges.",
+    "With each new dawn comes the promise of a fresh start and a chance to chase "
+    "one's dreams with renewed vigor and determination.",
+    "As the sun ascends into the sky, it illuminates the path ahead, encouraging "
+    "us to step boldly into the future and seize the day.",
+)
+
+NIGHTFALL_OUTROS = (
+    "As the sun sinks beneath the horizon, the moon ascends into the sky, "
+    "casting a soft, ethereal glow across the world.",
+    "With the setting of the sun comes the rise of the moon, signaling the "
+    "end of one day and the start of another.",
+    "As the last rays of sunlight disappear, the moon takes its place in the "
+    "sky, illuminating the darkness with its gentle radiance.",
+    "The sun's descent marks the transition from day to night, with the moon "
+    "rising to take its place as the guiding light.",
+    "As the sun sets, the moon rises, casting a serene and tranquil ambiance "
+    "over the world below.",
+    "With the sunset comes a sense of calm and tranquility, as the moon rises "
+    "to provide a comforting source of light in the darkness.",
+    "As the sun disappears beyond the horizon, the moon rises to offer a sense "
+    "of serenity and peace to all who gaze upon it.",
+    "With the setting of the sun and the rise of the moon, the world transitions "
+    "from the hustle and bustle of the day to the stillness and quiet of the night.",
+    "The setting sun and the rising moon create a stunning contrast, signaling the "
+    "end of one cycle and the start of another.",
+    "As the sun bids farewell to the day, the moon rises to cast its enchanting "
+    "spell over the world, a gentle reminder of the beauty that exists in the darkness.",
+)
+
+
 async def sleep_override(duration: float) -> T.Coroutine:
     pass
 
@@ -75,11 +145,14 @@ class Stepper:
     We rely on config primarily for timings.
     """
 
-    def __init__(self, game: "Game", sleeper: Sleeper = asyncio.sleep) -> None:
-        self._sleep = sleeper
+    def __init__(self, game: "Game", sleeper: T.Optional[Sleeper] = None) -> None:
+        # defaults to the game clock
+        self._sleep = sleeper or game.clock.sleep
         self._game = game
         self._config = game._config
         self._init_with_config()
+        # transitions wait on deadlines counted from when the current phase began
+        self._schedule = PhaseSchedule(game.clock, self._sleep, tags=game.tags)
         self._live_player_count = len(self._game.get_live_actors())
         self._reported_dead: T.Set["Actor"] = set()
 
@@ -88,20 +161,33 @@ class Stepper:
         return self._game.messenger
 
     def _init_with_config(self) -> None:
+        # daybreak announcements, each gets this long before the next one
+        self._intro_pause = 10.0
+        self._death_count_pause = 10.0
+        self._death_report_pause = 8.0
         self._daybreak_to_daylight = 5.0
         self._day_duration = self._config.timing.day_duration
         self._dusk_to_night = 10.0
+        # after the day's actions resolve
+        self._dusk_resolution_pause = 3.0
         self._night_duration = self._config.timing.night_duration
         self._night_sequence_duration = 5.0
 
-    async def _flush_then_wait_for_min_time(self, delay: float, min_time: float) -> None:
+    async def _flush(self) -> None:
         """
-        Flush all messages and then wait for some minimum duration
+        Wait for everything announced so far to go out, so the next thing players see
+        (e.g. the new phase's panels) shows up after it
         """
-        t_init = time.time()
-        t_final = time.time()
-        t_remaining = min_time - (t_final - t_init)
-        await self._sleep(max(t_remaining, 0))
+        # headless steppers don't wait on anything, publishing included
+        if self._sleep != sleep_override:
+            await self.messenger.flush()
+
+    def _enter_phase(self, phase: TurnPhase) -> None:
+        """
+        Move the game into `phase` and start counting its deadlines
+        """
+        self._game.turn_phase = phase
+        self._schedule.start(label=phase.name)
 
     async def _post_initialization(self) -> None:
         """
@@ -112,7 +198,7 @@ class Stepper:
         print("Transitioning Post-Init to Daybreak")
         # phase advancing should be done last
         self._live_player_count = len(self._game.get_live_actors())
-        self._game.turn_phase = TurnPhase.DAYBREAK
+        self._enter_phase(TurnPhase.DAYBREAK)
 
     async def _to_daylight(self) -> None:
         """
@@ -120,37 +206,18 @@ class Stepper:
 
         Handle daybreak to daylight transition
         """
-        intro = random.choice([
-            "A new dawn breaks as the sun rises, marking the start of a brand new day "
-            "filled with endless possibilities.",
-            "The golden orb ascends into the sky, bringing forth a fresh beginning and "
-            "a clean slate for all.",
-            "As the first rays of sunlight peek over the horizon, the world awakens to "
-            "a fresh start and a chance to create new memories.",
-            "A new chapter begins as the sun rises, signaling a new opportunity to "
-            "embrace life with renewed energy and enthusiasm.",
-            "With the rising of the sun comes a fresh start and a chance to make "
-            "the most of every moment.",
-            "The sun's ascent into the sky marks the beginning of a new day, a blank "
-            "canvas waiting to be painted with new experiences and adventures.",
-            "As the sun rises, so does the potential for growth, renewal, and positivity "
-            "in all aspects of life.",
-            "The morning sun's arrival brings with it a sense of hope and optimism, "
-            "inspiring a sense of purpose and motivation to tackle the day's challenges.",
-            "With each new dawn comes the promise of a fresh start and a chance to chase "
-            "one's dreams with renewed vigor and determination.",
-            "As the sun ascends into the sky, it illuminates the path ahead, encouraging "
-            "us to step boldly into the future and seize the day.",
-        ])
+        intro = self._game.rng.cosmetic.choice(DAYBREAK_INTROS)
         self.messenger.queue_message(Message.announce(
             self._game,
-            title=f"Day {self._game.turn_number}",
+            title=DAY_TITLE.format(self._game.turn_number),
             message=intro
         ))
         print("Transitioning to Daylight")
 
-        # dramatic effect!
-        await self._sleep(10.0)
+        # dramatic effect! each announcement goes out on its own beat, counted from
+        # daybreak so slow publishes don't drag the whole thing out
+        offset = self._intro_pause
+        await self._schedule.wait_until(offset, settle=self._flush)
 
         curr_live = len(self._game.get_live_actors())
         live_diff = self._live_player_count - curr_live
@@ -160,17 +227,19 @@ class Stepper:
                 self._game,
                 night_death_count_desc,
             ))
-            await self._sleep(10.0)
+            offset += self._death_count_pause
+            await self._schedule.wait_until(offset, settle=self._flush)
 
         # report all deaths
         for msg in self._game.death_reporter.release_all_new_deaths():
             self.messenger.queue_message(msg)
-            await self._sleep(8.0)
+            offset += self._death_report_pause
+            await self._schedule.wait_until(offset, settle=self._flush)
 
         # phase advancing should be done last
-        self._game.turn_phase = TurnPhase.DAYLIGHT
+        self._enter_phase(TurnPhase.DAYLIGHT)
 
-        await self._sleep(5.0)
+        await self._schedule.wait_until(self._daybreak_to_daylight)
 
     async def _to_dusk(self) -> None:
         """
@@ -184,10 +253,11 @@ class Stepper:
         if not self._sleep == sleep_override:
             await self._game.tribunal.do_daylight()
             self._game.tribunal.reset()
-            await self._flush_then_wait_for_min_time(10.0, 0.0)
+            # the verdict goes out before dusk does
+            await self._flush()
 
         # phase advancing should be done last
-        self._game.turn_phase = TurnPhase.DUSK
+        self._enter_phase(TurnPhase.DUSK)
 
     async def _to_night(self) -> None:
         """
@@ -199,36 +269,15 @@ class Stepper:
         # tally player count here so we know how many died
         self._live_player_count = len(self._game.get_live_actors())
 
-        outro = random.choice([
-            "As the sun sinks beneath the horizon, the moon ascends into the sky, "
-            "casting a soft, ethereal glow across the world.",
-            "With the setting of the sun comes the rise of the moon, signaling the "
-            "end of one day and the start of another.",
-            "As the last rays of sunlight disappear, the moon takes its place in the "
-            "sky, illuminating the darkness with its gentle radiance.",
-            "The sun's descent marks the transition from day to night, with the moon "
-            "rising to take its place as the guiding light.",
-            "As the sun sets, the moon rises, casting a serene and tranquil ambiance "
-            "over the world below.",
-            "With the sunset comes a sense of calm and tranquility, as the moon rises "
-            "to provide a comforting source of light in the darkness.",
-            "As the sun disappears beyond the horizon, the moon rises to offer a sense "
-            "of serenity and peace to all who gaze upon it.",
-            "With the setting of the sun and the rise of the moon, the world transitions "
-            "from the hustle and bustle of the day to the stillness and quiet of the night.",
-            "The setting sun and the rising moon create a stunning contrast, signaling the "
-            "end of one cycle and the start of another.",
-            "As the sun bids farewell to the day, the moon rises to cast its enchanting "
-            "spell over the world, a gentle reminder of the beauty that exists in the darkness.",
-        ])
+        outro = self._game.rng.cosmetic.choice(NIGHTFALL_OUTROS)
 
         self.messenger.queue_message(Message.announce(
             self._game,
-            title=f"Night {self._game.turn_number}",
+            title=NIGHT_TITLE.format(self._game.turn_number),
             message=outro
         ))
 
-        await self._flush_then_wait_for_min_time(10.0, self._dusk_to_night)
+        await self._schedule.wait_until(self._dusk_to_night, settle=self._flush)
 
         events: T.List[SequenceEvent] = list()
         events.extend(self._game._day_queue)
@@ -280,10 +329,10 @@ class Stepper:
         else:
             # check for consigliere
             if to_promote is not None:
-                SequenceEvent(ConsiglierePromote(), to_promote, to_promote).execute()
+                SequenceEvent(ConsiglierePromote(), to_promote, [to_promote]).execute()
             # promote mafia if any left
             elif actor is not None:
-                SequenceEvent(MafiosoDemote(), actor, actor).execute()
+                SequenceEvent(MafiosoDemote(), actor, [actor]).execute()
             else:
                 print("No valid promotions?")
 
@@ -293,10 +342,10 @@ class Stepper:
             if not exec_target.is_alive and not exec_target.lynched:
                 SequenceEvent(ExecutionerLoss(), executioner, [executioner]).execute()
 
-        await self._sleep(3.0)
+        await self._schedule.wait_until(self._dusk_to_night + self._dusk_resolution_pause)
 
         # phase advancing should be done last
-        self._game.turn_phase = TurnPhase.NIGHT
+        self._enter_phase(TurnPhase.NIGHT)
 
     async def _to_night_sequence(self) -> None:
         """
@@ -305,13 +354,12 @@ class Stepper:
         Handle night to night sequence transition
         """
         print("Night to Night Sequence")    
-        # TODO: coded transition durations
         # the primary messages that may accumulate here are appropriate to collect at the end
         # of the NIGHT phase
-        await self._flush_then_wait_for_min_time(60.0, self._night_duration)
+        await self._schedule.wait_until(self._night_duration, settle=self._flush)
     
         # phase advancing should be done last
-        self._game.turn_phase = TurnPhase.NIGHT_SEQUENCE
+        self._enter_phase(TurnPhase.NIGHT_SEQUENCE)
 
     async def _to_daybreak(self) -> None:
         """
@@ -339,21 +387,25 @@ class Stepper:
         for event in events:
             grouped_events[event.action.ORDER].append(event)
     
-        for order_key in sorted(grouped_events.keys()):
-            print(f"Doing events for {order_key}")
-            # prune at each distinct order key value
-            # this is done in order to make sure that kills process before investigative actions
-            # and that downstream actions are never processed by dead people
-            # upstream actions like bus driving and roleblocking will still apply though
-            #
-            # all kill actions should process simultaneously
-            # e.g if vigilante and mafioso both target each other, they should both die, instead
-            # of leaving one of them to get resolved first, and one of them alive as a result
-            valid_events = [ev for ev in grouped_events[order_key] if ev.actor.is_alive]
-            for ev in valid_events:
-                ev.execute()
-
-        await self._flush_then_wait_for_min_time(2.0, self._night_sequence_duration)
+        tags = self._game.tags
+        with NIGHT_RESOLUTION.time(**tags):
+            for order_key in sorted(grouped_events.keys()):
+                print(f"Doing events for {order_key}")
+                # prune at each distinct order key value
+                # this is done in order to make sure that kills process before investigative actions
+                # and that downstream actions are never processed by dead people
+                # upstream actions like bus driving and roleblocking will still apply though
+                #
+                # all kill actions should process simultaneously
+                # e.g if vigilante and mafioso both target each other, they should both die, instead
+                # of leaving one of them to get resolved first, and one of them alive as a result
+                with NIGHT_ORDER.time(order=order_key, **tags):
+                    valid_events = [ev for ev in grouped_events[order_key] if ev.actor.is_alive]
+                    for ev in valid_events:
+                        ev.execute()
+
+        # resolving counts toward the night sequence, it doesn't add to it
+        await self._schedule.wait_until(self._night_sequence_duration, settle=self._flush)
     
         for actor in self._game.get_live_actors():
             # TODO: something that manages this for us would be nice?
@@ -364,9 +416,29 @@ class Stepper:
         self._game._jail_map = dict()
 
         # phase advancing should be done last
-        self._game.turn_phase = TurnPhase.DAYBREAK
+        self._enter_phase(TurnPhase.DAYBREAK)
         self._game.turn_number += 1
 
+    def _get_transition(self) -> T.Callable[[], T.Coroutine]:
+        if self._game.turn_phase == TurnPhase.INITIALIZING:
+            return self._post_initialization
+        if self._game.turn_phase == TurnPhase.DAYBREAK:
+            return self._to_daylight
+        if self._game.turn_phase == TurnPhase.DAYLIGHT:
+            return self._to_dusk
+        if self._game.turn_phase == TurnPhase.DUSK:
+            return self._to_night
+        if self._game.turn_phase == TurnPhase.NIGHT:
+            return self._to_night_sequence
+        if self._game.turn_phase == TurnPhase.NIGHT_SEQUENCE:
+            return self._to_daybreak
+
+        raise ValueError(f"Unknown turn phase {self._game.turn_phase}")
+
+    def _record_phase(self, from_phase: TurnPhase) -> None:
+        if self._game.journal is not None:
+            self._game.journal.phase(from_phase)
+
     def advance(self, sleep: Sleeper=sleep_override, loop: asyncio.AbstractEventLoop = None) -> None:
         """
         For debugging and initialization purposes, immediately step
@@ -376,43 +448,17 @@ class Stepper:
         The sleep function is by default overridden to a bypass, but can be set to anything.
         """
         loop = loop or asyncio.get_event_loop() or asyncio.new_event_loop()
-        if self._game.turn_phase == TurnPhase.INITIALIZING:
-            loop.run_until_complete(self._post_initialization())
-            return
-        if self._game.turn_phase == TurnPhase.DAYBREAK:
-            loop.run_until_complete(self._to_daylight())
-            return
-        if self._game.turn_phase == TurnPhase.DAYLIGHT:
-            loop.run_until_complete(self._to_dusk())
-            return
-        if self._game.turn_phase == TurnPhase.DUSK:
-            loop.run_until_complete(self._to_night())
-            return
-        if self._game.turn_phase == TurnPhase.NIGHT:
-            loop.run_until_complete(self._to_night_sequence())
-            return
-        if self._game.turn_phase == TurnPhase.NIGHT_SEQUENCE:
-            loop.run_until_complete(self._to_daybreak())
-            return
-        
-        raise ValueError(f"Unknown turn phase {self._game.turn_phase}")
+        from_phase = self._game.turn_phase
+        with PHASE_TRANSITION.time(phase=from_phase.name, **self._game.tags):
+            loop.run_until_complete(self._get_transition()())
+        self._record_phase(from_phase)
 
     async def step(self) -> None:
         """
         Asynchronously step the game forward.
         This typically involves some sort of timed waiting.
         """
-        if self._game.turn_phase == TurnPhase.INITIALIZING:
-            return await self._post_initialization()
-        if self._game.turn_phase == TurnPhase.DAYBREAK:
-            return await self._to_daylight()
-        if self._game.turn_phase == TurnPhase.DAYLIGHT:
-            return await self._to_dusk()
-        if self._game.turn_phase == TurnPhase.DUSK:
-            return await self._to_night()
-        if self._game.turn_phase == TurnPhase.NIGHT:
-            return await self._to_night_sequence()
-        if self._game.turn_phase == TurnPhase.NIGHT_SEQUENCE:
-            return await self._to_daybreak()
-    
-        raise ValueError(f"Unknown turn phase {self._game.turn_phase}")
+        from_phase = self._game.turn_phase
+        with PHASE_TRANSITION.time(phase=from_phase.name, **self._game.tags):
+            await self._get_transition()()
+        self._record_phase(from_phase)
@@ -0,0 +1,13 @@
+import asyncio
+
+
+def run(coro):
+    """
+    Run a coroutine to completion on its own loop
+    """
+    # don't use asyncio.run, it unsets the event loop other tests rely on
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
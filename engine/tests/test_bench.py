@@ -0,0 +1,59 @@
+"""
+Benchmark harness sanity checks. These don't measure anything meaningful,
+they only make sure every benchmark still runs.
+"""
+import os
+import tempfile
+import unittest
+
+from engine.action.base import Action
+from engine.bench import BenchResult
+from engine.bench import BENCHMARKS
+from engine.bench import compare
+from engine.bench import format_report
+from engine.bench import load_baseline
+from engine.bench import run_benchmark
+from engine.bench import save_baseline
+from engine.bench import suites  # noqa: F401
+from engine.bench.memory import hot_object_usage
+from engine.bench.suites import play_headless_game
+
+
+class TestBench(unittest.TestCase):
+
+    def test_every_benchmark_runs(self) -> None:
+        for bench in BENCHMARKS.values():
+            result = run_benchmark(bench._replace(warmup=0), rounds=1)
+            self.assertEqual(len(result.samples), 1, bench.name)
+
+    def test_compare_to_baseline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "baseline.json")
+            save_baseline([BenchResult("a", [1.0]), BenchResult("b", [1.0]), BenchResult("c", [1.0])], path)
+            baseline = load_baseline(path)
+
+        current = [BenchResult("a", [1.5]), BenchResult("b", [0.5]), BenchResult("c", [1.05]), BenchResult("d", [1.0])]
+        statuses = {cmp.name: cmp.status for cmp in compare(current, baseline, threshold=0.1)}
+        self.assertEqual(statuses, dict(a="slower", b="faster", c="same", d="new"))
+        self.assertIn("slower", format_report(current, compare(current, baseline), baseline))
+
+    def test_hot_objects_are_slotted(self) -> None:
+        game = play_headless_game()
+        usage = {entry.name: entry for entry in hot_object_usage()}
+        self.assertGreater(usage["Message"].count, 0)
+        self.assertGreater(usage["Tombstone"].count, 0)
+        for entry in usage.values():
+            self.assertFalse(entry.has_dict, entry.name)
+        self.assertTrue(game.concluded)
+
+    def test_every_action_is_slotted(self) -> None:
+        # a subclass without `__slots__ = ()` quietly gets a __dict__ back
+        to_visit = [Action]
+        while to_visit:
+            klass = to_visit.pop()
+            to_visit.extend(klass.__subclasses__())
+            self.assertIn("__slots__", klass.__dict__, klass.__name__)
+
+
+if __name__ == '__main__':
+    unittest.main()
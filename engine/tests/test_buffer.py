@@ -0,0 +1,95 @@
+"""
+Bounded buffers, drop policies and per-game memory accounting
+"""
+import asyncio
+import unittest
+
+from engine.actor import Actor
+from engine.buffer import BoundedQueue
+from engine.buffer import DropPolicy
+from engine.buffer import RingBuffer
+from engine.config import GameConfig
+from engine.config import Limits
+from engine.game import Game
+from engine.message import Message
+from engine.message import Messenger
+from engine.message import OutboundMessageDriver
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+
+
+class _Sink(OutboundMessageDriver):
+
+    def wants(self, message: Message) -> bool:
+        return True
+
+
+class TestBuffer(unittest.TestCase):
+
+    def test_ring_buffer_forgets_oldest(self) -> None:
+        ring = RingBuffer(3, name="test")
+        ring.extend(range(5))
+        self.assertEqual(list(ring), [2, 3, 4])
+        self.assertEqual(ring.dropped, 2)
+
+    def test_queue_policies(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            oldest = BoundedQueue(2, DropPolicy.DROP_OLDEST)
+            newest = BoundedQueue(2, DropPolicy.DROP_NEWEST)
+            block = BoundedQueue(2, DropPolicy.BLOCK)
+            for item in range(4):
+                oldest.put_nowait(item)
+                newest.put_nowait(item)
+            self.assertEqual(list(oldest), [2, 3])
+            self.assertEqual(list(newest), [0, 1])
+            self.assertEqual((oldest.dropped, newest.dropped), (2, 2))
+
+            block.put_nowait(0)
+            block.put_nowait(1)
+            with self.assertRaises(asyncio.QueueFull):
+                block.put_nowait(2)
+
+            async def put_when_drained() -> None:
+                waiter = asyncio.ensure_future(block.put(2))
+                await asyncio.sleep(0)
+                self.assertFalse(waiter.done())
+                block.get_nowait()
+                await waiter
+            loop.run_until_complete(put_when_drained())
+            self.assertEqual(list(block), [1, 2])
+        finally:
+            loop.close()
+
+    def test_game_memory_is_capped_and_reported(self) -> None:
+        limits = Limits(message_history=10, driver_queue=20)
+        config = GameConfig.default_with_role_list(DEFAULT_CONFIG.role_list, limits=limits)
+        game = Game(config, seed=1)
+        rf = RoleFactory(config)
+        players = [Player("Albert Yang"), Player("Anthony Chen")]
+        game.add_players(*players)
+        game.add_actors(*[Actor(p, rf.create_by_name("Citizen"), game) for p in players])
+        albert = game.get_actor_by_name("Albert Yang")
+        messenger = Messenger(game, _Sink())
+
+        for idx in range(100):
+            messenger.route_message(Message.player_public_message(albert, f"spam {idx}"))
+            messenger.route_message(Message.private_feedback(albert, "Feedback", f"feedback {idx}"))
+
+        log = game.message_log
+        self.assertLessEqual(len(log), 12)
+        self.assertEqual(log.dropped, 200 - len(log))
+        self.assertEqual(list(albert.messages)[-1].message, "feedback 99")
+
+        usage = game.memory_usage()
+        buffers = usage["buffers"]
+        self.assertEqual(buffers["message_log"]["dropped"], log.dropped)
+        self.assertEqual(buffers["_Sink"]["length"], 20)
+        self.assertEqual(buffers["_Sink"]["dropped"], 180)
+        self.assertEqual(usage["entries"], len(log) + 20)
+        self.assertGreater(usage["bytes"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
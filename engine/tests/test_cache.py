@@ -0,0 +1,148 @@
+"""
+LLM response cache and shared phase digests
+"""
+import asyncio
+import mock
+import os
+import tempfile
+import unittest
+
+from academy import ChatContext
+from academy import Prompt
+from academy.cache import LLM_CACHE
+from academy.cache import ResponseCache
+from academy.cache import cache_key
+from engine.tests import run
+
+
+class TestCacheKey(unittest.TestCase):
+
+    def test_whitespace_shares_a_key(self) -> None:
+        messages = [dict(role="system", content="You are playing a game of Mafia."), dict(role="user", content="Pick one")]
+        reformatted = [
+            dict(role="system", content="  You are playing\n a game   of Mafia. "),
+            dict(role="assistant", content=" \n"),
+            dict(role="user", content="Pick\tone"),
+        ]
+        self.assertEqual(cache_key("model", messages), cache_key("model", reformatted))
+
+    def test_params_and_roles_matter(self) -> None:
+        messages = [dict(role="user", content="Pick one")]
+        key = cache_key("model", messages, temperature=0.0)
+        self.assertNotEqual(key, cache_key("model", messages, temperature=1.0))
+        self.assertNotEqual(key, cache_key("other", messages, temperature=0.0))
+        self.assertNotEqual(key, cache_key("model", [dict(role="assistant", content="Pick one")], temperature=0.0))
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+
+    def _counts(self):
+        return {tier: LLM_CACHE.value(tier=tier) for tier in ("memory", "disk", "miss")}
+
+    def _delta(self, before):
+        return {tier: count - before[tier] for tier, count in self._counts().items()}
+
+    def test_memory_then_disk(self) -> None:
+        key = cache_key("model", [dict(role="user", content="hello")])
+
+        async def go():
+            cache = ResponseCache(maxsize=1, directory=self._directory.name)
+            self.assertIsNone(await cache.get(key))
+            await cache.put(key, "OK.")
+            self.assertEqual(await cache.get(key), "OK.")
+
+            # push it out of the LRU, the disk still has it
+            await cache.put("other", "Nope.")
+            self.assertEqual(await cache.get(key), "OK.")
+            # and now it's back in memory
+            self.assertEqual(await cache.get(key), "OK.")
+
+            # a fresh process only has the disk
+            self.assertEqual(await ResponseCache(directory=self._directory.name).get(key), "OK.")
+
+        before = self._counts()
+        run(go())
+        self.assertEqual(self._delta(before), dict(memory=2, disk=2, miss=1))
+
+    def test_writes_are_atomic(self) -> None:
+        cache = ResponseCache(directory=self._directory.name)
+        key = cache_key("model", [dict(role="user", content="hello")])
+        run(cache.put(key, "OK."))
+
+        path = cache.path(key)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+
+        # a half written file from a crash is never read, only the real one
+        with open(f"{path}.tmp", "w") as f:
+            f.write('{"resp')
+        self.assertEqual(run(ResponseCache(directory=self._directory.name).get(key)), "OK.")
+
+        # and a corrupt entry is a miss rather than an error
+        with open(path, "w") as f:
+            f.write('{"resp')
+        self.assertIsNone(run(ResponseCache(directory=self._directory.name).get(key)))
+
+    def test_put_same_response_is_a_no_op(self) -> None:
+        cache = ResponseCache(directory=self._directory.name)
+
+        async def go():
+            with mock.patch.object(cache, "_write", wraps=cache._write) as write:
+                await asyncio.gather(*[cache.put("key", "OK.") for _ in range(3)])
+                await cache.put("key", "OK.")
+                await cache.put("key", "Changed.")
+            return write.call_count
+
+        self.assertEqual(run(go()), 2)
+        self.assertEqual(run(ResponseCache(directory=self._directory.name).get("key")), "Changed.")
+
+    def test_memory_only(self) -> None:
+        cache = ResponseCache(directory=None)
+        run(cache.put("key", "OK."))
+        self.assertEqual(run(cache.get("key")), "OK.")
+        self.assertEqual(os.listdir(self._directory.name), [])
+
+
+class TestPhaseDigest(unittest.TestCase):
+
+    def test_concurrent_digests_share_one_task(self) -> None:
+        calls = []
+
+        async def digest(lines, group, debug=True):
+            calls.append((list(lines), group))
+            await asyncio.sleep(0.01)
+            return Prompt("assistant", "Everyone suspects Albert.")
+
+        group = "test_concurrent_digests_share_one_task"
+        contexts = [ChatContext(name, "Citizen", group=group) for name in ("Albert Yang", "Anthony Chen", "Jerry Feng")]
+        for context in contexts:
+            context._phase_transcript.append("Albert Yang: I am the sheriff")
+
+        async def go():
+            with mock.patch("academy.digest_lines", side_effect=digest):
+                return await asyncio.gather(*[context.digest_phase(2, "DAYLIGHT") for context in contexts])
+
+        prompts = run(go())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0], (["Albert Yang: I am the sheriff"], group))
+        self.assertEqual(len(set(id(prompt) for prompt in prompts)), 1)
+        for context in contexts:
+            self.assertEqual(len(context._phase_transcript), 0)
+            self.assertEqual(
+                [segment.prompt.content for segment in context.conversations],
+                ["Daylight 2: Everyone suspects Albert."],
+            )
+
+    def test_nothing_said_nothing_digested(self) -> None:
+        context = ChatContext("Albert Yang", "Citizen", group="test_nothing_said_nothing_digested")
+        with mock.patch("academy.digest_lines") as digest:
+            self.assertIsNone(run(context.digest_phase(1, "DAYLIGHT")))
+        digest.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Run games on a virtual clock
+"""
+import asyncio
+import mock
+import time
+import unittest
+
+from engine.actor import Actor
+from engine.clock import AcceleratedClock
+from engine.clock import VirtualClock
+from engine.game import Game
+from engine.message import Message
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+from engine.stepper import Stepper
+from engine.tests import run
+from engine.tribunal import Tribunal
+
+
+class TestClock(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._clock = VirtualClock(start=1000.0)
+        self._game = Game(DEFAULT_CONFIG, seed=5, clock=self._clock)
+        self._game.messenger = mock.MagicMock()
+        self._game.messenger.flush = mock.AsyncMock(return_value=True)
+        # real timings, only the clock is fake
+        self._game.tribunal = Tribunal(self._game)
+        self._stepper = Stepper(self._game)
+        rf = RoleFactory(DEFAULT_CONFIG)
+        players = [Player(name) for name in ("Albert Yang", "Anthony Chen", "Brandon Chen", "Jerry Feng")]
+        roles = ["Citizen", "Citizen", "Citizen", "Survivor"]
+        self._game.add_players(*players)
+        self._game.add_actors(*[Actor(p, rf.create_by_name(r), self._game) for p, r in zip(players, roles)])
+
+    def test_virtual_six_day_game(self) -> None:
+        async def play() -> None:
+            while self._game.turn_number <= 6:
+                await self._stepper.step()
+
+        t_i = time.time()
+        run(play())
+        wall = time.time() - t_i
+
+        self.assertEqual(self._game.turn_number, 7)
+        # five full days, plus the short first day and six nights
+        timing = DEFAULT_CONFIG.timing
+        self.assertGreater(self._clock.time() - 1000.0, 5 * timing.day_duration + 6 * timing.night_duration)
+        self.assertLess(wall, 5.0)
+
+    def test_concurrent_sleepers_wake_in_order(self) -> None:
+        woke = []
+
+        async def sleeper(name: str, duration: float) -> None:
+            await self._clock.sleep(duration)
+            woke.append((name, self._clock.time()))
+
+        async def main() -> None:
+            await asyncio.gather(sleeper("late", 30.0), sleeper("early", 10.0), sleeper("mid", 20.0))
+
+        run(main())
+        self.assertEqual(woke, [("early", 1010.0), ("mid", 1020.0), ("late", 1030.0)])
+
+    def test_busy_tasks_sleep_before_time_moves(self) -> None:
+        woke = []
+
+        async def sleeper(name: str, duration: float, hops: int) -> None:
+            # e.g. a message working its way through the messenger and driver queues
+            for _ in range(hops):
+                await asyncio.sleep(0)
+            await self._clock.sleep(duration)
+            woke.append((name, self._clock.time()))
+
+        async def main() -> None:
+            await asyncio.gather(sleeper("idle", 1.0, 0), sleeper("busy", 0.1, 5), sleeper("busier", 0.5, 50))
+
+        run(main())
+        self.assertEqual(woke, [("busy", 1000.1), ("busier", 1000.5), ("idle", 1001.0)])
+
+    def test_messages_use_game_clock(self) -> None:
+        self._clock.advance(42.0)
+        message = Message.announce(self._game, "hello")
+        self.assertEqual(message.real_time, 1042.0)
+
+    def test_accelerated_sleep(self) -> None:
+        clock = AcceleratedClock(100.0)
+        t_i = time.time()
+        game_t_i = clock.time()
+        run(clock.sleep(10.0))
+        self.assertLess(time.time() - t_i, 1.0)
+        self.assertGreaterEqual(clock.elapsed(game_t_i), 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Record a game into a journal and make sure we can replay it exactly
+"""
+import io
+import mock
+import unittest
+
+from engine.actor import Actor
+from engine.game import Game
+from engine.journal import EventKind
+from engine.journal import Journal
+from engine.journal import read_journal_bytes
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.replay import Replay
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+from engine.snapshot import snapshot_game
+from engine.snapshot import state_digest
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+from engine.tribunal import Tribunal
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._game = Game(DEFAULT_CONFIG, seed=1234)
+        self._game.messenger = mock.MagicMock()
+        self._game.tribunal = Tribunal(self._game, sleeper=sleep_override)
+        self._stepper = Stepper(self._game, sleep_override)
+        self._rf = RoleFactory(DEFAULT_CONFIG)
+        players = [
+            Player("Albert Yang"),
+            Player("Anthony Chen"),
+            Player("Brandon Chen"),
+            Player("Jerry Feng"),
+            Player("Mimi Jiao"),
+            Player("William Yuan"),
+            Player("Kurtis Carsch"),
+        ]
+        roles = ["Godfather", "Vigilante", "Doctor", "Survivor", "Sheriff", "Mafioso", "Jester"]
+        actors = [Actor(p, self._rf.create_by_name(r), self._game) for p, r in zip(players, roles)]
+        self._game.add_players(*players)
+        self._game.add_actors(*actors)
+
+        self._stream = io.BytesIO()
+        self._game.journal = Journal(self._game, self._stream)
+        self._game.journal.setup(snapshot_game(self._game, self._stepper))
+
+    def _actor(self, name: str) -> Actor:
+        return self._game.get_actor_by_name(name)
+
+    def _step_to(self, phase: TurnPhase) -> None:
+        self._stepper.advance()
+        while self._game.turn_phase != phase:
+            self._stepper.advance()
+
+    def _end_day(self) -> None:
+        # what the Tribunal would have done
+        self._game.death_reporter.report_all_deaths()
+        self._game.tribunal.reset()
+
+    def test_replay_reproduces_game(self) -> None:
+        self._step_to(TurnPhase.NIGHT)
+        self._actor("Brandon Chen").submit_targets(self._actor("Mimi Jiao"))
+        self._actor("William Yuan").submit_targets(self._actor("Mimi Jiao"))
+        self._actor("Mimi Jiao").submit_targets(self._actor("William Yuan"))
+        self._actor("Jerry Feng").put_on_vest()
+        self._actor("Anthony Chen").submit_last_will("N1: nothing")
+        self._step_to(TurnPhase.DAYLIGHT)
+
+        # sheriff checked the mafioso
+        self.assertIn((1, TurnPhase.NIGHT_SEQUENCE), self._actor("Mimi Jiao").target_history)
+
+        tribunal = self._game.tribunal
+        for voter in ("Albert Yang", "Anthony Chen", "Brandon Chen", "Jerry Feng"):
+            tribunal.submit_trial_vote(self._actor(voter), self._actor("Kurtis Carsch"))
+        tribunal.submit_lynch_vote(self._actor("Albert Yang"), True)
+        self._game.journal.lynch(self._actor("Kurtis Carsch"))
+        self._actor("Kurtis Carsch").lynch()
+        self._end_day()
+        self._step_to(TurnPhase.NIGHT)
+        self._actor("Albert Yang").submit_targets(self._actor("Anthony Chen"))
+        self._step_to(TurnPhase.DAYLIGHT)
+
+        self._game.journal.end(state_digest(self._game, self._stepper))
+
+        records = read_journal_bytes(self._stream.getvalue())
+        self.assertEqual(records[0].kind, EventKind.SETUP)
+        self.assertEqual(records[-1].kind, EventKind.END)
+
+        replay = Replay(records, config=DEFAULT_CONFIG)
+        game = replay.run()
+        self.assertTrue(replay.reproduced)
+        self.assertEqual(
+            [(ts.actor.name, ts.turn_number, ts.epitaph) for ts in self._game.graveyard],
+            [(ts.actor.name, ts.turn_number, ts.epitaph) for ts in game.graveyard],
+        )
+
+    def test_replay_detects_divergence(self) -> None:
+        self._step_to(TurnPhase.NIGHT)
+        self._actor("Brandon Chen").submit_targets(self._actor("Mimi Jiao"))
+        self._step_to(TurnPhase.DAYLIGHT)
+        # an engine-side mutation that never went through the journal
+        self._actor("Albert Yang").kill()
+        self._game.journal.end(state_digest(self._game, self._stepper))
+
+        replay = Replay(read_journal_bytes(self._stream.getvalue()), config=DEFAULT_CONFIG)
+        replay.run()
+        self.assertFalse(replay.reproduced)
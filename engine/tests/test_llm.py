@@ -0,0 +1,149 @@
+"""
+Shared LLM client, against the local stand-in
+"""
+import asyncio
+import mock
+import unittest
+
+from academy import ChatGPTBot
+from academy.cache import ResponseCache
+from academy.llm import LLMClient
+from academy.llm import LLM_DEDUPED
+from academy.llm import set_llm_client
+from academy.standin import StandIn
+from engine.tests import run
+
+
+def ask(text: str):
+    return [dict(role="assistant", content=text)]
+
+
+class _Flaky(StandIn):
+    """
+    Answers the first few requests with the given statuses
+    """
+
+    def __init__(self, statuses, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._statuses = list(statuses)
+
+    async def _chat_completions(self, request):
+        from aiohttp import web
+
+        if self._statuses:
+            self.stats["requests"] += 1
+            return web.json_response(dict(error=dict(message="flaky")), status=self._statuses.pop(0))
+        return await super()._chat_completions(request)
+
+
+class TestLLMClient(unittest.TestCase):
+
+    def _client(self, standin: StandIn, **kwargs) -> LLMClient:
+        return LLMClient(api_base=standin.url, cache=ResponseCache(directory=None), **kwargs)
+
+    def test_identical_requests_share_one_call(self) -> None:
+        async def go():
+            async with StandIn(latency="fixed:0.1") as standin:
+                client = self._client(standin)
+                try:
+                    responses = await asyncio.gather(*[
+                        client.complete("model", ask("hello"), group="dedup") for _ in range(3)
+                    ])
+                finally:
+                    await client.close()
+                return standin.stats["requests"], responses
+
+        deduped = LLM_DEDUPED.value(group="dedup")
+        requests, responses = run(go())
+        self.assertEqual(requests, 1)
+        self.assertEqual(len(set(responses)), 1)
+        self.assertIsNotNone(responses[0])
+        self.assertEqual(LLM_DEDUPED.value(group="dedup") - deduped, 2)
+
+    def test_global_concurrency_limit(self) -> None:
+        async def go():
+            async with StandIn(latency="fixed:0.05") as standin:
+                client = self._client(standin, max_concurrency=2, group_concurrency=10)
+                try:
+                    await asyncio.gather(*[
+                        client.complete("model", ask(f"question {idx}"), group=f"game {idx % 3}")
+                        for idx in range(6)
+                    ])
+                finally:
+                    await client.close()
+                return standin.stats
+
+        stats = run(go())
+        self.assertEqual(stats["requests"], 6)
+        self.assertEqual(stats["peak_in_flight"], 2)
+
+    def test_group_concurrency_limit(self) -> None:
+        async def go():
+            async with StandIn(latency="fixed:0.05") as standin:
+                client = self._client(standin, max_concurrency=10, group_concurrency=1)
+                try:
+                    await asyncio.gather(*[
+                        client.complete("model", ask(f"question {idx}"), group="one game")
+                        for idx in range(3)
+                    ])
+                    one_game = standin.stats["peak_in_flight"]
+                    await asyncio.gather(*[
+                        client.complete("model", ask(f"question {idx}"), group=f"game {idx}")
+                        for idx in range(3)
+                    ])
+                finally:
+                    await client.close()
+                return one_game, standin.stats["peak_in_flight"]
+
+        one_game, many_games = run(go())
+        self.assertEqual(one_game, 1)
+        self.assertEqual(many_games, 3)
+
+    @mock.patch("academy.llm.backoff", return_value=0.0)
+    def test_retries_rate_limits_and_server_errors(self, _backoff) -> None:
+        async def go():
+            async with _Flaky([429, 503], seed=1) as standin:
+                client = self._client(standin, max_retries=3)
+                try:
+                    response = await client.complete("model", ask("hello"))
+                finally:
+                    await client.close()
+                return standin.stats["requests"], response
+
+        requests, response = run(go())
+        self.assertEqual(requests, 3)
+        self.assertEqual(response, "OK.")
+
+    @mock.patch("academy.llm.backoff", return_value=0.0)
+    def test_bad_requests_are_not_retried(self, _backoff) -> None:
+        async def go():
+            async with _Flaky([400]) as standin:
+                client = self._client(standin)
+                try:
+                    response = await client.complete("model", ask("hello"))
+                finally:
+                    await client.close()
+                return standin.stats["requests"], response
+
+        self.assertEqual(run(go()), (1, None))
+
+    def test_deadline_falls_back_to_random(self) -> None:
+        choices = ["Albert Yang", "Anthony Chen", "Brandon Chen"]
+
+        async def go():
+            async with StandIn(latency="fixed:0.5") as standin:
+                client = self._client(standin, deadline=0.1)
+                set_llm_client(client)
+                try:
+                    self.assertIsNone(await client.complete("model", ask("hello")))
+                    bot = ChatGPTBot("Jerry Feng", "Citizen", debug=False)
+                    return await bot.make_decision("Pick somebody", choices, "You picked {choice}")
+                finally:
+                    set_llm_client(None)
+                    await client.close()
+
+        self.assertIn(run(go()), choices)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Columnar message log and its queries
+"""
+import unittest
+
+from engine.actor import Actor
+from engine.game import Game
+from engine.message import Message
+from engine.message import MessageType
+from engine.message import Messenger
+from engine.message_log import MessageLog
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+
+
+class TestMessageLog(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._game = Game(DEFAULT_CONFIG)
+        rf = RoleFactory(DEFAULT_CONFIG)
+        players = [Player("Albert Yang"), Player("Anthony Chen")]
+        self._game.add_players(*players)
+        self._game.add_actors(*[Actor(p, rf.create_by_name("Citizen"), self._game) for p in players])
+        self._albert, self._anthony = self._game.get_actors()
+
+    def _play_turns(self, log: MessageLog, turns: int) -> None:
+        for turn in range(1, turns + 1):
+            self._game._turn_number = turn
+            self._game._turn_phase = TurnPhase.DAYLIGHT
+            log.append(Message.announce(self._game, f"Day {turn}"))
+            log.append(Message.player_public_message(self._anthony, f"hi {turn}"))
+            self._game._turn_phase = TurnPhase.NIGHT_SEQUENCE
+            log.append(Message.private_feedback(self._albert, "Feedback", f"albert night {turn}"))
+            log.append(Message.private_feedback(self._anthony, "Feedback", f"anthony night {turn}"))
+            log.append(Message.private_message(self._anthony, self._albert, f"psst {turn}"))
+
+    def test_queries(self) -> None:
+        log = MessageLog(1000)
+        self._play_turns(log, 5)
+        self.assertEqual(len(log), 25)
+
+        feedback = list(log.query(
+            addressed_to=self._albert,
+            turn_number=3,
+            message_type=MessageType.PRIVATE_FEEDBACK,
+        ))
+        self.assertEqual([entry.message for entry in feedback], ["albert night 3"])
+        entry = feedback[0]
+        self.assertIs(entry.addressed_to, self._albert)
+        self.assertIsNone(entry.addressed_from)
+        self.assertEqual(entry.turn_phase, TurnPhase.NIGHT_SEQUENCE)
+        self.assertEqual(repr(entry), "[Message] **Feedback** : albert night 3")
+        self.assertEqual(log.entry(entry.index), entry)
+
+        self.assertEqual(len(list(log.query(addressed_to=self._albert))), 10)
+        self.assertEqual(len(list(log.query(turn_number=2))), 5)
+        self.assertEqual(
+            [entry.title for entry in log.query(public=True, message_type=MessageType.ANNOUNCEMENT)],
+            [f"Day {turn}" for turn in range(1, 6)],
+        )
+        self.assertEqual(len(list(log.query(turn_phase=TurnPhase.DAYLIGHT, since=20))), 2)
+        sent = [entry for entry in log if entry.addressed_from is self._anthony]
+        self.assertEqual(len(sent), 10)
+
+        seen = list(log.visible_to(self._anthony, since=20))
+        self.assertEqual([entry.message for entry in seen], ["", "hi 5", "anthony night 5"])
+        self.assertEqual(log.next_index, 25)
+
+    def test_trims_oldest(self) -> None:
+        log = MessageLog(10)
+        self._play_turns(log, 10)
+        self.assertLessEqual(len(log), 12)
+        self.assertEqual(log.dropped, 50 - len(log))
+        self.assertEqual(log.first_index, log.dropped)
+        self.assertEqual(list(log.query(turn_number=1)), [])
+        self.assertEqual(
+            [entry.message for entry in log.query(addressed_to=self._albert, turn_number=10)],
+            ["albert night 10", "psst 10"],
+        )
+        with self.assertRaises(IndexError):
+            log.entry(0)
+
+    def test_messenger_records_to_game_log(self) -> None:
+        Messenger(self._game).route_message(Message.private_feedback(self._albert, "Feedback", "you were healed"))
+        self.assertEqual([entry.message for entry in self._albert.messages], ["you were healed"])
+        self.assertEqual(list(self._anthony.messages), [])
+
+    def test_bot_catches_up_from_log(self) -> None:
+        from academy import ChatContext
+
+        log = self._game.message_log
+        self._game._turn_phase = TurnPhase.DAYBREAK
+        log.append(Message.announce(self._game, "Day 1", "the sun rises"))
+        self._game._turn_phase = TurnPhase.DAYLIGHT
+        log.append(Message.announce(self._game, "Day 1 Verdict", "nobody was lynched"))
+        self._game._turn_phase = TurnPhase.NIGHT_SEQUENCE
+        log.append(Message.private_feedback(self._albert, "Feedback", "you were healed"))
+        log.append(Message.private_feedback(self._anthony, "Feedback", "you were roleblocked"))
+
+        context = ChatContext(self._albert.name, "Citizen")
+        context.catch_up(log, self._albert)
+        # the day intro is dropped, anything else that happens to say "Day" is kept
+        self.assertEqual(
+            [segment.prompt.content for segment in context.key_game_events],
+            ["Day 1 Verdict - nobody was lynched"],
+        )
+        self.assertEqual(
+            [segment.prompt.content for segment in context.action_feedback],
+            ["Feedback - you were healed"],
+        )
+
+        # only what's new the next time around
+        log.append(Message.private_feedback(self._albert, "Feedback", "you were jailed"))
+        context.catch_up(log, self._albert)
+        self.assertEqual(len(context.action_feedback), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
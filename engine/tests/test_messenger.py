@@ -0,0 +1,243 @@
+"""
+Messenger flush barrier
+"""
+import asyncio
+import mock
+import unittest
+
+from chatapi.discord.driver import DiscordPrivateDriver
+from chatapi.discord.driver import MAX_EMBED_FIELDS
+from engine.actor import Actor
+from engine.game import Game
+from engine.message import Message
+from engine.message import Messenger
+from engine.message import OutboundMessageDriver
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+
+
+class _SlowSink(OutboundMessageDriver):
+
+    def __init__(self, delay: float, fail: bool = False) -> None:
+        super().__init__()
+        self._delay = delay
+        self._fail = fail
+        self.published = []
+
+    def wants(self, message: Message) -> bool:
+        return True
+
+    async def publish(self, message: Message) -> None:
+        await asyncio.sleep(self._delay)
+        if self._fail:
+            raise RuntimeError("Discord is down")
+        self.published.append(message.title)
+
+    async def run(self) -> None:
+        # keep going after failures, like the Discord drivers do
+        while True:
+            message = await self._queue.get()
+            try:
+                await self.publish_and_record(message)
+            except RuntimeError:
+                pass
+
+
+class _BatchingSink(_SlowSink):
+
+    def __init__(self, delay: float) -> None:
+        super().__init__(delay)
+        self.batches = []
+
+    async def publish_batch(self, messages) -> None:
+        await asyncio.sleep(self._delay)
+        self.batches.append([message.title for message in messages])
+
+    async def run(self) -> None:
+        while True:
+            messages = [await self._queue.get()]
+            while not self._queue.empty():
+                messages.append(self._queue.get_nowait())
+            await self.publish_and_record(*messages)
+
+
+class TestMessengerFlush(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._game = Game(DEFAULT_CONFIG, seed=1)
+        rf = RoleFactory(DEFAULT_CONFIG)
+        player = Player("Albert Yang")
+        self._game.add_players(player)
+        self._game.add_actors(Actor(player, rf.create_by_name("Citizen"), self._game))
+
+    def tearDown(self) -> None:
+        # the messenger and drivers run forever
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+    def _announce(self, messenger: Messenger, text: str) -> None:
+        messenger.queue_message(Message.announce(self._game, text))
+
+    def test_flush_waits_for_every_driver(self) -> None:
+        fast, slow = _SlowSink(0.0), _SlowSink(0.02)
+        messenger = Messenger(self._game, fast, slow)
+
+        async def go() -> bool:
+            messenger.start()
+            for idx in range(3):
+                self._announce(messenger, f"death {idx}")
+            flushed = await messenger.flush(timeout=1.0)
+            # queued after the barrier, not waited on
+            self._announce(messenger, "daylight")
+            return flushed
+
+        self.assertTrue(self._loop.run_until_complete(go()))
+        self.assertEqual(fast.published, ["death 0", "death 1", "death 2"])
+        self.assertEqual(slow.published, ["death 0", "death 1", "death 2"])
+
+    def test_flush_waits_for_batches(self) -> None:
+        sink = _BatchingSink(0.02)
+        messenger = Messenger(self._game, sink)
+
+        async def go() -> bool:
+            messenger.start()
+            for idx in range(3):
+                self._announce(messenger, f"death {idx}")
+            return await messenger.flush(timeout=1.0)
+
+        self.assertTrue(self._loop.run_until_complete(go()))
+        self.assertEqual(sink.batches, [["death 0", "death 1", "death 2"]])
+
+    def test_failed_publishes_count_as_done(self) -> None:
+        messenger = Messenger(self._game, _SlowSink(0.0, fail=True))
+
+        async def go() -> bool:
+            messenger.start()
+            self._announce(messenger, "death")
+            return await messenger.flush(timeout=1.0)
+
+        self.assertTrue(self._loop.run_until_complete(go()))
+
+    def test_flush_times_out(self) -> None:
+        messenger = Messenger(self._game, _SlowSink(10.0))
+
+        async def go() -> bool:
+            messenger.start()
+            self._announce(messenger, "death")
+            return await messenger.flush(timeout=0.05)
+
+        self.assertFalse(self._loop.run_until_complete(go()))
+
+    def test_unstarted_messenger_does_not_wait(self) -> None:
+        messenger = Messenger(self._game, _SlowSink(10.0))
+        self._announce(messenger, "death")
+        self.assertTrue(self._loop.run_until_complete(messenger.flush(timeout=5.0)))
+
+
+class TestPrivateFeedbackBatching(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._game = Game(DEFAULT_CONFIG, seed=1)
+        rf = RoleFactory(DEFAULT_CONFIG)
+        players = []
+        for name in ("Albert Yang", "Anthony Chen"):
+            user = mock.MagicMock()
+            user.name = name
+            players.append(Player.create_from_user(user))
+        self._game.add_players(*players)
+        self._game.add_actors(*[Actor(player, rf.create_by_name("Citizen"), self._game) for player in players])
+        self._albert, self._anthony = self._game.get_actors()
+        self._messages = []
+
+    def tearDown(self) -> None:
+        self._close_loop()
+
+    def _close_loop(self) -> None:
+        # drivers run forever
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+    def _at(self, turn_number: int, turn_phase: TurnPhase = TurnPhase.NIGHT_SEQUENCE) -> None:
+        self._game._turn_number = turn_number
+        self._game._turn_phase = turn_phase
+
+    def _feedback(self, text: str) -> None:
+        self._messages.append(Message.private_feedback(self._albert, "Feedback", text))
+
+    def _send_all(self):
+        """
+        Queue everything up front then let the driver go, returns what reached send_private
+        """
+        driver = DiscordPrivateDriver(mock.MagicMock(), self._albert)
+        for seq, message in enumerate(self._messages):
+            message.seq = seq
+            driver.add_to_queue(message)
+
+        async def go():
+            driver.start()
+            await driver.wait_settled(len(self._messages))
+
+        with mock.patch("chatapi.discord.driver.send_private", return_value=True) as send:
+            self._loop.run_until_complete(asyncio.wait_for(go(), 1.0))
+        return [call.kwargs for call in send.call_args_list]
+
+    def _fields(self, sent):
+        return [[field.value for field in kwargs["embed"].fields] for kwargs in sent]
+
+    def test_same_phase_is_one_embed(self) -> None:
+        self._at(1)
+        for text in ("You were attacked", "You were healed", "Your target is innocent"):
+            self._feedback(text)
+        sent = self._send_all()
+        self.assertEqual(self._fields(sent), [["You were attacked", "You were healed", "Your target is innocent"]])
+        self.assertEqual(sent[0]["embed"].title, "Your Results")
+
+    def test_batches_stop_at_phase_or_other_messages(self) -> None:
+        self._at(1)
+        self._feedback("night 1")
+        self._feedback("night 1 again")
+        self._at(2, TurnPhase.DAYLIGHT)
+        self._feedback("day 2")
+        self._messages.append(Message.private_message(self._anthony, self._albert, "psst"))
+        self._feedback("day 2 again")
+        sent = self._send_all()
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(self._fields([sent[0]]), [["night 1", "night 1 again"]])
+        # one piece of feedback on its own goes out as before
+        self.assertEqual(sent[1]["embed"].description, "day 2")
+        self.assertEqual(sent[2]["content"], "(From **Anthony Chen**): psst")
+        self.assertEqual(sent[3]["embed"].description, "day 2 again")
+
+    def test_batches_cap_at_embed_fields(self) -> None:
+        self._at(1)
+        for idx in range(MAX_EMBED_FIELDS + 5):
+            self._feedback(f"result {idx}")
+        fields = self._fields(self._send_all())
+        self.assertEqual([len(batch) for batch in fields], [MAX_EMBED_FIELDS, 5])
+        self.assertEqual(fields[1][-1], f"result {MAX_EMBED_FIELDS + 4}")
+
+    def test_send_limit_follows_the_loop(self) -> None:
+        self._at(1)
+        self._feedback("first game")
+        self.assertEqual(len(self._send_all()), 1)
+        first = DiscordPrivateDriver._sends.current
+
+        # a fresh loop gets its own semaphore rather than one bound to the last
+        self._close_loop()
+        self._loop = asyncio.new_event_loop()
+        self._messages = []
+        self._feedback("second game")
+        self.assertEqual(len(self._send_all()), 1)
+        self.assertIsNot(DiscordPrivateDriver._sends.current, first)
@@ -0,0 +1,88 @@
+"""
+Metrics registry and engine instrumentation
+"""
+import mock
+import unittest
+
+from engine.actor import Actor
+from engine.game import Game
+from engine.metrics import NIGHT_ORDER
+from engine.metrics import NIGHT_RESOLUTION
+from engine.metrics import PHASE_TRANSITION
+from engine.metrics import Registry
+from engine.metrics import instrumented
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+from engine.tribunal import Tribunal
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_exports(self) -> None:
+        registry = Registry()
+        hist = registry.histogram("test_seconds", "A test", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 2.0):
+            hist.observe(value, guild="123")
+
+        self.assertEqual(hist.count(guild="123"), 4)
+        self.assertEqual(hist.quantile(0.5, guild="123"), 0.5)
+        self.assertEqual(hist.quantile(0.99, guild="123"), 2.0)
+
+        text = registry.to_prometheus()
+        self.assertIn('# TYPE test_seconds histogram', text)
+        self.assertIn('test_seconds_bucket{guild="123",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{guild="123",le="1.0"} 3', text)
+        self.assertIn('test_seconds_bucket{guild="123",le="+Inf"} 4', text)
+        self.assertIn('test_seconds_count{guild="123"} 4', text)
+
+        series = registry.to_json()["test_seconds"]["series"][0]
+        self.assertEqual(series["labels"], dict(guild="123"))
+        self.assertEqual(series["p50"], 0.5)
+
+    def test_instrumented_counts_errors(self) -> None:
+        registry = Registry()
+        hist = registry.histogram("handler_seconds", "handlers")
+        errors = registry.counter("handler_errors_total", "errors")
+
+        @instrumented(hist, errors)
+        def handler(fail: bool) -> None:
+            if fail:
+                raise ValueError("nope")
+
+        handler(False)
+        with self.assertRaises(ValueError):
+            handler(True)
+        self.assertEqual(hist.count(handler="handler"), 2)
+        self.assertEqual(errors.value(handler="handler"), 1)
+
+    def test_night_is_instrumented_with_game_tags(self) -> None:
+        game = Game(DEFAULT_CONFIG)
+        game.tags.update(guild="test-guild", game="test-night")
+        game.messenger = mock.MagicMock()
+        game.tribunal = Tribunal(game, sleeper=sleep_override)
+        rf = RoleFactory(DEFAULT_CONFIG)
+        players = [Player("Albert Yang"), Player("Anthony Chen"), Player("Brandon Chen")]
+        game.add_players(*players)
+        game.add_actors(*[Actor(p, rf.create_by_name(r), game) for p, r in zip(players, ["Mafioso", "Doctor", "Citizen"])])
+        stepper = Stepper(game, sleep_override)
+        while game.turn_phase != TurnPhase.NIGHT_SEQUENCE:
+            stepper.advance()
+        game.get_actor_by_name("Albert Yang").choose_targets(game.get_actor_by_name("Brandon Chen"))
+        stepper.advance()
+
+        tags = dict(guild="test-guild", game="test-night")
+        self.assertEqual(NIGHT_RESOLUTION.count(**tags), 1)
+        self.assertEqual(PHASE_TRANSITION.count(phase="NIGHT_SEQUENCE", **tags), 1)
+        orders = [
+            series["labels"]["order"] for series in NIGHT_ORDER.to_json()
+            if series["labels"].get("game") == "test-night"
+        ]
+        self.assertTrue(orders)
+
+
+if __name__ == '__main__':
+    unittest.main()
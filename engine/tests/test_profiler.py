@@ -0,0 +1,85 @@
+"""
+Opt-in game profiler
+"""
+import asyncio
+import json
+import mock
+import os
+import tempfile
+import unittest
+
+from engine.actor import Actor
+from engine.game import Game
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.profiler import Profiler
+from engine.profiler import profile_path
+from engine.resolver import SequenceEvent
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+from engine.tribunal import Tribunal
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_profile_night_sequence(self) -> None:
+        game = Game(DEFAULT_CONFIG, seed=1234)
+        game.messenger = mock.MagicMock()
+        game.tribunal = Tribunal(game, sleeper=sleep_override)
+        rf = RoleFactory(DEFAULT_CONFIG)
+        players = [Player("Albert Yang"), Player("Anthony Chen"), Player("Brandon Chen")]
+        game.add_players(*players)
+        game.add_actors(*[Actor(p, rf.create_by_name(r), game) for p, r in zip(players, ["Mafioso", "Doctor", "Citizen"])])
+        stepper = Stepper(game, sleep_override)
+        while game.turn_phase != TurnPhase.NIGHT_SEQUENCE:
+            stepper.advance()
+        game.get_actor_by_name("Albert Yang").choose_targets(game.get_actor_by_name("Brandon Chen"))
+        game.get_actor_by_name("Anthony Chen").choose_targets(game.get_actor_by_name("Brandon Chen"))
+
+        # make the night slow enough to get sampled
+        slow_step = stepper.step
+
+        async def step() -> None:
+            await slow_step()
+            t_i = game.clock.time()
+            while game.clock.time() - t_i < 0.05:
+                pass
+        stepper.step = step
+
+        original_execute = SequenceEvent.execute
+        profiler = Profiler(game, interval=0.0005)
+        profiler.wrap(stepper, "step", region="night")
+
+        loop = asyncio.new_event_loop()
+        try:
+            profiler.start()
+            self.assertIsNot(SequenceEvent.execute, original_execute)
+            loop.run_until_complete(stepper.step())
+        finally:
+            profiler.stop()
+            loop.close()
+
+        # everything is put back once we stop
+        self.assertIs(SequenceEvent.execute, original_execute)
+        self.assertNotIn("step", stepper.__dict__)
+
+        self.assertLessEqual({"MafiaKill", "Heal"}, set(profiler.actions))
+        self.assertTrue(profiler.stacks)
+        for stack in profiler.stacks:
+            self.assertTrue(stack.startswith("night;"), stack)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            folded_path, actions_path = profiler.dump(profile_path("game", tmp))
+            with open(folded_path) as f:
+                line = f.readline()
+            self.assertRegex(line, r"^night;.* \d+$")
+            with open(actions_path) as f:
+                summary = json.load(f)
+        self.assertEqual(summary["samples"], sum(profiler.stacks.values()))
+        self.assertEqual({entry["action"] for entry in summary["actions"]}, set(profiler.actions))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Prompt lanes and the builder that keeps them merged and in budget
+"""
+import unittest
+
+from academy import Prompt
+from academy.prompt import MESSAGE_OVERHEAD
+from academy.prompt import PromptBuilder
+from academy.prompt import REPLY_OVERHEAD
+from academy.prompt import prompt_tokens
+
+# every test word is a single token
+SEGMENT = 1 + MESSAGE_OVERHEAD
+REPLY = 10
+
+
+def builder_for(segments: int) -> PromptBuilder:
+    """
+    A builder with room for exactly this many one-word segments
+    """
+    return PromptBuilder(segments * SEGMENT + REPLY + REPLY_OVERHEAD, REPLY)
+
+
+def say(word: str) -> Prompt:
+    return Prompt("assistant", word)
+
+
+def contents(builder: PromptBuilder, footer=()) -> list:
+    return [message["content"] for message in builder.build([], footer).messages]
+
+
+class TestPromptBuilder(unittest.TestCase):
+
+    def test_segment_size(self) -> None:
+        self.assertEqual(prompt_tokens(say("alpha")), SEGMENT)
+
+    def test_evicts_lowest_priority_oldest_first(self) -> None:
+        builder = builder_for(4)
+        low = builder.lane(10, "low", priority=0)
+        high = builder.lane(10, "high", priority=1)
+        high.append((1, say("one")))
+        low.append((2, say("two")))
+        low.append((3, say("three")))
+        high.append((4, say("four")))
+        self.assertEqual(builder.evicted, 0)
+
+        high.append((5, say("five")))
+        self.assertEqual(contents(builder), ["one", "three", "four", "five"])
+        high.append((6, say("six")))
+        self.assertEqual(contents(builder), ["one", "four", "five", "six"])
+        self.assertEqual(len(low), 0)
+
+        # once the low lane is empty the high lane gives up its oldest
+        high.append((7, say("seven")))
+        self.assertEqual(contents(builder), ["four", "five", "six", "seven"])
+        self.assertEqual(builder.evicted, 3)
+        self.assertEqual(builder.tokens, 4 * SEGMENT)
+
+    def test_out_of_order_insert(self) -> None:
+        builder = builder_for(10)
+        events = builder.lane(10, "events", priority=1)
+        feedback = builder.lane(10, "feedback", priority=2)
+        events.append((5, say("five")))
+        feedback.append((1, say("one")))
+        events.append((3, say("three")))
+        # same idx goes after whatever got there first
+        feedback.append((3, say("again")))
+        events.append((9, say("nine")))
+        self.assertEqual(contents(builder), ["one", "three", "again", "five", "nine"])
+
+        # and discarding from the middle finds the right segment
+        feedback.popleft()
+        self.assertEqual(contents(builder), ["three", "again", "five", "nine"])
+        self.assertEqual(builder.tokens, 4 * SEGMENT)
+
+    def test_lane_maxlen_discards(self) -> None:
+        builder = builder_for(10)
+        lane = builder.lane(2, "short", priority=0)
+        for idx, word in enumerate(["one", "two", "three"]):
+            lane.append((idx, say(word)))
+        self.assertEqual(contents(builder), ["two", "three"])
+        self.assertEqual(builder.tokens, 2 * SEGMENT)
+        self.assertEqual(lane.dropped, 1)
+        # falling off the end of a lane isn't a budget eviction
+        self.assertEqual(builder.evicted, 0)
+
+    def test_clear_keeps_token_total(self) -> None:
+        builder = builder_for(10)
+        keep = builder.lane(10, "keep", priority=1)
+        drop = builder.lane(10, "drop", priority=0)
+        keep.append((1, say("one")))
+        drop.append((2, say("two")))
+        drop.append((3, say("three")))
+        keep.append((4, say("four")))
+
+        drop.clear()
+        self.assertEqual(builder.tokens, 2 * SEGMENT)
+        self.assertEqual(contents(builder), ["one", "four"])
+
+        # the room freed up is really there
+        for idx in range(5, 13):
+            drop.append((idx, say("more")))
+        self.assertEqual(builder.evicted, 0)
+        self.assertEqual(builder.tokens, 10 * SEGMENT)
+
+    def test_oversized_footer_skips_segments(self) -> None:
+        builder = builder_for(4)
+        low = builder.lane(10, "low", priority=0)
+        high = builder.lane(10, "high", priority=1)
+        low.append((1, say("one")))
+        high.append((2, say("two")))
+        low.append((3, say("three")))
+        high.append((4, say("four")))
+
+        footer = [(5, say("decide")), (6, say("now"))]
+        built = builder.build([], footer)
+        self.assertEqual(built.skipped, 2)
+        self.assertEqual(
+            [message["content"] for message in built.messages],
+            ["two", "four", "decide", "now"],
+        )
+        self.assertEqual(built.tokens, 4 * SEGMENT + REPLY_OVERHEAD)
+
+        # only that request went without them
+        self.assertEqual(builder.build([], []).skipped, 0)
+        self.assertEqual(contents(builder), ["one", "two", "three", "four"])
+        self.assertEqual(builder.evicted, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Same seed, same game
+"""
+import mock
+import typing as T
+import unittest
+
+from engine.game import Game
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.rng import GameRNG
+from engine.setup import DEFAULT_CONFIG
+from engine.setup import do_setup
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+from engine.tribunal import Tribunal
+
+
+class TestGameRNG(unittest.TestCase):
+
+    def _setup_game(self, seed: int) -> Game:
+        game = Game(DEFAULT_CONFIG, seed=seed)
+        game.messenger = mock.MagicMock()
+        game.add_players(*[Player(f"Player-{idx}") for idx in range(len(DEFAULT_CONFIG.role_list))])
+        success, msg = do_setup(game, config=DEFAULT_CONFIG)
+        self.assertTrue(success, msg)
+        game.tribunal = Tribunal(game, sleeper=sleep_override)
+        return game
+
+    def _assignments(self, game: Game) -> T.List[T.Tuple[str, str]]:
+        return [(actor.name, actor.role.name) for actor in game.actors]
+
+    def test_same_seed_same_setup(self) -> None:
+        self.assertEqual(
+            self._assignments(self._setup_game(42)),
+            self._assignments(self._setup_game(42)),
+        )
+        # there are a lot of possible setups, these should not collide
+        self.assertNotEqual(
+            [self._assignments(self._setup_game(seed)) for seed in range(3)],
+            [self._assignments(self._setup_game(42)) for _ in range(3)],
+        )
+
+    def test_same_seed_same_night(self) -> None:
+        outcomes = []
+        for _ in range(2):
+            game = self._setup_game(7)
+            stepper = Stepper(game, sleep_override)
+            for _ in range(4):
+                stepper.advance()
+            self.assertEqual(game.turn_phase, TurnPhase.NIGHT)
+            # everyone with a night action goes after the next person in line
+            actors = game.get_live_actors()
+            for actor, target in zip(actors, actors[1:] + actors[:1]):
+                if actor.has_night_action:
+                    actor.choose_targets(target)
+            while game.turn_phase != TurnPhase.DAYLIGHT:
+                stepper.advance()
+            outcomes.append([(ts.actor.name, ts.epitaph) for ts in game.graveyard])
+        self.assertEqual(outcomes[0], outcomes[1])
+
+    def test_substreams_are_independent(self) -> None:
+        first = GameRNG(3)
+        second = GameRNG(3)
+        for _ in range(10):
+            second.cosmetic.random()
+        self.assertEqual(first.night.random(), second.night.random())
+        self.assertEqual(first.setup.random(), second.setup.random())
+        self.assertNotEqual(first.night.random(), first.setup.random())
+
+    def test_state_round_trip(self) -> None:
+        rng = GameRNG()
+        rng.night.random()
+        state = rng.getstate()
+        expected = [rng.night.random(), rng.cosmetic.random()]
+
+        restored = GameRNG(0)
+        restored.setstate(state)
+        self.assertEqual(restored.seed, rng.seed)
+        self.assertEqual([restored.night.random(), restored.cosmetic.random()], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -96,7 +96,7 @@ class TestRoles(unittest.TestCase):
         """
         Check an actor's messages to ensure that some string is contained in the message queue.
         """
-        for message in actor._message_queue:
+        for message in actor.messages:
             if contains in repr(message):
                 return
         self.assertTrue(False)
@@ -0,0 +1,95 @@
+"""
+Phase deadlines
+"""
+import mock
+import unittest
+
+from engine.actor import Actor
+from engine.clock import VirtualClock
+from engine.game import Game
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.schedule import PhaseSchedule
+from engine.setup import DEFAULT_CONFIG
+from engine.stepper import Stepper
+from engine.tests import run
+
+
+class TestPhaseSchedule(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._clock = VirtualClock(start=100.0)
+        self._schedule = PhaseSchedule(self._clock, self._clock.sleep)
+        self._schedule.start()
+
+    def test_work_counts_toward_deadline(self) -> None:
+        async def phase() -> None:
+            # slow resolution
+            self._clock.advance(3.0)
+            await self._schedule.wait_until(10.0)
+
+        run(phase())
+        self.assertEqual(self._clock.time(), 110.0)
+
+    def test_overrun_does_not_wait(self) -> None:
+        overrun = []
+
+        async def phase() -> None:
+            self._clock.advance(12.0)
+            overrun.append(await self._schedule.wait_until(10.0))
+
+        run(phase())
+        self.assertEqual(overrun, [2.0])
+        self.assertEqual(self._clock.time(), 112.0)
+
+    def test_settle_counts_toward_deadline(self) -> None:
+        async def settle() -> None:
+            await self._clock.sleep(4.0)
+
+        run(self._schedule.wait_until(10.0, settle=settle))
+        self.assertEqual(self._clock.time(), 110.0)
+
+
+class TestStepperDeadlines(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._clock = VirtualClock(start=1000.0)
+        self._game = Game(DEFAULT_CONFIG, seed=5, clock=self._clock)
+        self._game.messenger = mock.MagicMock()
+        self._game.messenger.flush = mock.AsyncMock(return_value=True)
+        self._stepper = Stepper(self._game)
+        rf = RoleFactory(DEFAULT_CONFIG)
+        players = [Player(name) for name in ("Albert Yang", "Anthony Chen", "Brandon Chen", "Jerry Feng")]
+        roles = ["Citizen", "Citizen", "Citizen", "Survivor"]
+        self._game.add_players(*players)
+        self._game.add_actors(*[Actor(p, rf.create_by_name(r), self._game) for p, r in zip(players, roles)])
+
+    def test_slow_publishing_does_not_stretch_daybreak(self) -> None:
+        run(self._stepper.step())
+        self.assertEqual(self._game.turn_phase, TurnPhase.DAYBREAK)
+        t_i = self._clock.time()
+
+        # every announcement takes a while to get out
+        self._game.messenger.queue_message.side_effect = lambda message: self._clock.advance(4.0)
+        run(self._stepper.step())
+
+        self.assertEqual(self._game.turn_phase, TurnPhase.DAYLIGHT)
+        self.assertEqual(self._clock.time() - t_i, 15.0)
+
+    def test_night_ends_on_time(self) -> None:
+        async def to_night() -> None:
+            while self._game.turn_phase != TurnPhase.NIGHT:
+                await self._stepper.step()
+
+        # skip the day
+        self._game.tribunal = mock.MagicMock(do_daylight=mock.AsyncMock())
+        run(to_night())
+        t_i = self._clock.time()
+
+        # the UI took its time getting back to us
+        self._clock.advance(7.0)
+        run(self._stepper.step())
+
+        self.assertEqual(self._game.turn_phase, TurnPhase.NIGHT_SEQUENCE)
+        self.assertEqual(self._clock.time() - t_i, DEFAULT_CONFIG.timing.night_duration)
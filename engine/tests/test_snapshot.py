@@ -0,0 +1,191 @@
+"""
+Make sure a game survives a round trip through a snapshot
+"""
+import mock
+import tempfile
+import time
+import typing as T
+import unittest
+
+from engine.actor import Actor
+from engine.game import Game
+from engine.phase import GamePhase
+from engine.phase import TurnPhase
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
+from engine.snapshot import dumps
+from engine.snapshot import find_unfinished
+from engine.snapshot import loads
+from engine.snapshot import read_snapshot
+from engine.snapshot import restore_game
+from engine.snapshot import restore_stepper
+from engine.snapshot import snapshot_game
+from engine.snapshot import snapshot_path
+from engine.snapshot import write_snapshot
+from engine.stepper import sleep_override
+from engine.stepper import Stepper
+from engine.tests import run
+from engine.tribunal import Tribunal
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._game = Game(DEFAULT_CONFIG)
+        self._game.messenger = mock.MagicMock()
+        self._game.tribunal = Tribunal(self._game, sleeper=sleep_override)
+        self._stepper = Stepper(self._game, sleep_override)
+        self._rf = RoleFactory(DEFAULT_CONFIG)
+        self._players = [
+            Player("Albert Yang"),
+            Player("Anthony Chen"),
+            Player("Brandon Chen"),
+            Player("Jerry Feng"),
+            Player("Mimi Jiao"),
+            Player("William Yuan"),
+        ]
+        roles = ["Godfather", "Vigilante", "Doctor", "Survivor", "Sheriff", "Mafioso"]
+        self._actors = [
+            Actor(player, self._rf.create_by_name(role), self._game)
+            for player, role in zip(self._players, roles)
+        ]
+        self._game.add_players(*self._players)
+        self._game.add_actors(*self._actors)
+
+        # step to night one
+        for _ in range(4):
+            self._stepper.advance(self._game)
+        self.assertEqual(self._game.turn_phase, TurnPhase.NIGHT)
+
+    def _restore(self) -> T.Tuple[Game, T.Dict[str, T.Any]]:
+        data = loads(dumps(snapshot_game(self._game, self._stepper)))
+        game = restore_game(data, DEFAULT_CONFIG, self._players, sleeper=sleep_override)
+        game.messenger = mock.MagicMock()
+        return game, data
+
+    def test_round_trip(self) -> None:
+        gf, vig, doc, surv, sheriff, maf = self._actors
+        surv.put_on_vest()
+        maf.choose_targets(doc)
+        sheriff.choose_targets(gf)
+        vig._last_will = "I am the vig"
+        for _ in range(2):
+            self._stepper.advance(self._game)
+        self.assertFalse(doc.is_alive)
+
+        self._game.tribunal.submit_trial_vote(vig, gf)
+        self._game.tribunal.mayor_action(sheriff)
+
+        restored, _ = self._restore()
+        # panels namespace their custom ids by game id
+        self.assertEqual(restored.id, self._game.id)
+        self.assertEqual(restored.turn_number, self._game.turn_number)
+        self.assertEqual(restored.turn_phase, self._game.turn_phase)
+        for old, new in zip(self._game.actors, restored.actors):
+            self.assertEqual(old.name, new.name)
+            self.assertEqual(type(old.role), type(new.role))
+            self.assertEqual(old.is_alive, new.is_alive)
+            self.assertEqual(old._crimes, new._crimes)
+            self.assertEqual(old._last_will, new._last_will)
+            self.assertEqual(old.role._ability_uses, new.role._ability_uses)
+            self.assertEqual(old.role._vests, new.role._vests)
+            self.assertEqual(old._attacked_by, new._attacked_by)
+        self.assertEqual(
+            [(ts.actor.name, ts.epitaph) for ts in self._game.graveyard],
+            [(ts.actor.name, ts.epitaph) for ts in restored.graveyard],
+        )
+        self.assertEqual(restored.tribunal._trial_vote[restored.actors[1]], restored.actors[0])
+        self.assertEqual(restored.tribunal._vote_count[restored.actors[4]], 4)
+        self.assertEqual(restored.tribunal._mayor, restored.actors[4])
+
+    def test_restored_game_keeps_playing(self) -> None:
+        doc = self._actors[2]
+        restored, data = self._restore()
+        stepper = Stepper(restored, sleep_override)
+        restore_stepper(stepper, data)
+
+        # the mafioso kills the doctor in the restored game
+        restored.actors[5].choose_targets(restored.actors[2])
+        for _ in range(2):
+            stepper.advance(restored)
+        self.assertFalse(restored.actors[2].is_alive)
+        self.assertTrue(doc.is_alive)
+
+    def test_resume_unfinished_from_disk(self) -> None:
+        from engine.session import Session
+
+        self._game.game_phase = GamePhase.IN_PROGRESS
+        self._game.tags.update(guild="1234")
+        with tempfile.TemporaryDirectory() as directory:
+            path = snapshot_path("unfinished", directory)
+            done = snapshot_path("done", directory)
+            finished = Game(DEFAULT_CONFIG)
+            finished.game_phase = GamePhase.CONCLUDED
+
+            async def write():
+                await write_snapshot(self._game, self._stepper, path)
+                await write_snapshot(finished, None, done)
+            run(write())
+
+            self.assertEqual([found for found, _ in find_unfinished(directory)], [path])
+
+            # a restart hands each game back to the guild it was played in
+            guild = mock.MagicMock(id=1234)
+            with mock.patch.object(Session, "_resume_logged", new_callable=mock.MagicMock) as resume, \
+                    mock.patch("asyncio.create_task") as create_task:
+                tasks = Session.resume_unfinished([guild, mock.MagicMock(id=5678)], directory)
+            resume.assert_called_once_with(guild, path)
+            self.assertEqual(tasks, [create_task.return_value])
+
+            data = read_snapshot(path)
+
+        # and the restored game plays on from where it was cut off
+        restored = restore_game(data, DEFAULT_CONFIG, self._players, sleeper=sleep_override)
+        restored.messenger = mock.MagicMock()
+        stepper = Stepper(restored, sleep_override)
+        restore_stepper(stepper, data)
+        self.assertEqual(restored.game_phase, GamePhase.IN_PROGRESS)
+        self.assertEqual(restored.turn_phase, TurnPhase.NIGHT)
+        restored.actors[5].choose_targets(restored.actors[2])
+        for _ in range(2):
+            stepper.advance(restored)
+        self.assertEqual(restored.turn_phase, TurnPhase.DAYBREAK)
+        self.assertEqual(restored.turn_number, 2)
+        self.assertFalse(restored.actors[2].is_alive)
+
+    def test_resume_newest_per_guild(self) -> None:
+        from engine.session import Session
+
+        self._game.game_phase = GamePhase.IN_PROGRESS
+        with tempfile.TemporaryDirectory() as directory:
+            def write(name: str, guild: str, created: float) -> str:
+                data = snapshot_game(self._game, self._stepper)
+                data.update(created=created, tags=dict(guild=guild))
+                path = snapshot_path(name, directory)
+                with open(path, "wb") as f:
+                    f.write(dumps(data))
+                return path
+
+            newer = write("newer", "1234", 200.0)
+            older = write("older", "1234", 100.0)
+            broken = write("broken", "5678", 150.0)
+
+            guilds = [mock.MagicMock(id=1234), mock.MagicMock(id=5678)]
+            with mock.patch.object(Session, "_resume_logged", new_callable=mock.MagicMock) as resume, \
+                    mock.patch("asyncio.create_task"):
+                Session.resume_unfinished(guilds, directory)
+            self.assertEqual(resume.call_args_list, [mock.call(guilds[0], newer), mock.call(guilds[1], broken)])
+            # the older game would fight the newer one over the bulletin
+            self.assertIn("superseded", read_snapshot(older)["abandoned"])
+
+            # a game that can't come back isn't retried on every restart
+            with mock.patch.object(Session, "resume", side_effect=ValueError("Albert Yang left")):
+                run(Session._resume_logged(guilds[1], broken))
+            self.assertEqual([found for found, _ in find_unfinished(directory)], [newer])
+
+    def test_snapshot_is_cheap(self) -> None:
+        t_i = time.time()
+        for _ in range(100):
+            dumps(snapshot_game(self._game, self._stepper))
+        self.assertLess((time.time() - t_i) / 100, 0.01)
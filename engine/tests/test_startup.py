@@ -0,0 +1,75 @@
+"""
+Startup path: static role manifest and deferred heavy imports
+"""
+import os
+import subprocess
+import sys
+import unittest
+
+from engine.role import NAME_TO_ROLE
+from engine.role import discover_roles
+from engine.role.manifest import ROLE_MODULES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# importing the headless engine, not counting interpreter startup. Most of what's left
+# is importing pydantic itself
+HEADLESS_IMPORT_BUDGET = 0.3
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_manifest_matches_roles(self) -> None:
+        # if this fails, run `python -m engine.role.gen`
+        discovered = {klass.__name__: klass.__module__ for klass in discover_roles()}
+        self.assertEqual(ROLE_MODULES, discovered)
+        for name, klass in NAME_TO_ROLE.items():
+            self.assertEqual(klass.__name__, name)
+
+    def test_registry_precomputes_meta(self) -> None:
+        klass = NAME_TO_ROLE["MassMurderer"]
+        self.assertIn("_meta", klass.__dict__)
+        self.assertEqual(klass.meta().name, "Mass Murderer")
+        self.assertEqual(klass.meta().snake_name, "mass_murderer")
+        self.assertEqual(list(klass.meta().groups), klass.groups())
+        # subclasses get their own
+        self.assertNotEqual(NAME_TO_ROLE["Citizen"].meta().name, klass.meta().name)
+
+    def test_headless_import_skips_heavy_stack(self) -> None:
+        env = dict(os.environ)
+        env.pop("GOOGLE_SHEETS_API_TOKEN", None)
+        env.pop("OPENAI_API_KEY", None)
+        script = (
+            "import sys\n"
+            "import engine.setup, engine.stepper, engine.tribunal, engine.replay\n"
+            "heavy = ('aiogoogle', 'openai', 'disnake', 'numpy', 'google.protobuf')\n"
+            "print(','.join(sorted(name for name in heavy if name in sys.modules)))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_headless_import_time(self) -> None:
+        script = (
+            "import time\n"
+            "t_i = time.perf_counter()\n"
+            "import engine.setup, engine.stepper, engine.tribunal, engine.replay\n"
+            "delta = time.perf_counter() - t_i\n"
+            "from engine.config.vigilante import VigilanteSection\n"
+            "print(delta, VigilanteSection.__pydantic_complete__)\n"
+        )
+        timings = []
+        # best of a few, a cold disk cache or a busy machine shouldn't fail this
+        for _ in range(3):
+            result = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            delta, built = result.stdout.split()
+            timings.append(float(delta))
+            # default config sections aren't validated, so their schemas aren't built
+            self.assertEqual(built, "False")
+        self.assertLess(min(timings), HEADLESS_IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
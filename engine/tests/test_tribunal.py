@@ -7,8 +7,13 @@ import asyncio
 import mock
 import unittest
 
+from engine.actor import Actor
 from engine.game import Game
+from engine.player import Player
+from engine.role.base import RoleFactory
+from engine.setup import DEFAULT_CONFIG
 from engine.tribunal import Tribunal
+from engine.tribunal import TribunalState
 
 
 class AsyncMock(mock.MagicMock):
@@ -24,3 +29,33 @@ class TestTribunal(unittest.TestCase):
     def setUp(self) -> None:
         self._game = Game()
         self._tribunal = Tribunal(self._game, {})  # test with defaults
+
+
+class TestStateDescription(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._game = Game(DEFAULT_CONFIG, seed=1)
+        self._game.messenger = mock.MagicMock()
+        rf = RoleFactory(DEFAULT_CONFIG)
+        players = [Player(name) for name in ("Albert Yang", "Anthony Chen", "Brandon Chen")]
+        self._game.add_players(*players)
+        self._actors = [Actor(p, rf.create_by_name("Citizen"), self._game) for p in players]
+        self._game.add_actors(*self._actors)
+        self._tribunal = Tribunal(self._game)
+        self._tribunal._state = TribunalState.TRIAL_VOTE
+
+    def test_description_is_cached_until_votes_change(self) -> None:
+        first = self._tribunal.get_state_description()
+        self.assertIs(self._tribunal.get_state_description(), first)
+
+        albert, anthony, _ = self._actors
+        self._tribunal.submit_trial_vote(albert, anthony)
+        second = self._tribunal.get_state_description()
+        self.assertNotEqual(second, first)
+        self.assertIn(f"**{anthony.name}**\n\t\t1", second)
+
+    def test_description_follows_deaths(self) -> None:
+        first = self._tribunal.get_state_description()
+        self._actors[2].kill()
+        self.assertNotIn(self._actors[2].name, self._tribunal.get_state_description())
+        self.assertIn(self._actors[2].name, first)
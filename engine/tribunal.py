@@ -1,9 +1,7 @@
 """
 Trial System
 """
-import asyncio
 import math
-import time
 import typing as T
 from enum import Enum
 from collections import defaultdict
@@ -11,12 +9,12 @@ from collections import defaultdict
 from engine.message import Message
 from engine.phase import GamePhase
 from engine.phase import TurnPhase
-from proto import state_pb2
 
 if T.TYPE_CHECKING:
     from engine.actor import Actor
     from engine.game import Game
     from engine.message import Messenger
+    from proto import state_pb2
 
 
 class TrialType:
@@ -41,11 +39,12 @@ class Tribunal:
     Inheriting classes can make overrides based on game rules.
     """
 
-    def __init__(self, game: "Game", sleeper = asyncio.sleep) -> None:
+    def __init__(self, game: "Game", sleeper = None) -> None:
         self._game = game
         self._config = game._config
         self._state = TribunalState.CLOSED
-        self._sleep = sleeper
+        # defaults to the game clock
+        self._sleep = sleeper or game.clock.sleep
 
         self._on_trial: "Actor" = None
 
@@ -85,7 +84,14 @@ class Tribunal:
         # this is just a timing mechanism
         self._reveal_role: bool = False
 
-    def to_proto(self) -> state_pb2.Tribunal:
+        # bumped whenever a vote (or a vote's weight) changes, see `state_key`
+        self._votes_version = 0
+        self._description_key: T.Optional[T.Tuple] = None
+        self._description = ""
+
+    def to_proto(self) -> "state_pb2.Tribunal":
+        from proto import state_pb2
+
         tribunal = state_pb2.Tribunal(
             on_trial=self._on_trial.to_proto() if self._on_trial is not None else None,
         )
@@ -115,10 +121,34 @@ class Tribunal:
     def messenger(self) -> "Messenger":
         return self._game.messenger
 
+    @property
+    def state_key(self) -> T.Tuple:
+        """
+        Changes whenever anything `get_state_description` shows does
+        """
+        return (
+            self._state,
+            self._on_trial,
+            self._trial_type,
+            self._lynches_left,
+            self._anonymous,
+            self._reveal_role,
+            self._votes_version,
+            tuple(self._game.get_live_actors()),
+        )
+
     def get_state_description(self) -> str:
         """
         TODO: de-couple this from the engine object and attach this to the view model
         """
+        # panels ask for this every tick, only re-render when something changed
+        key = self.state_key
+        if key != self._description_key:
+            self._description = self._describe_state()
+            self._description_key = key
+        return self._description
+
+    def _describe_state(self) -> str:
         if self.state == TribunalState.CLOSED:
             return "Tribunal is closed"
         if self.state == TribunalState.TRIAL_VOTE and not self._trial_type == TrialType.MULTI:
@@ -151,6 +181,7 @@ class Tribunal:
         # they lose their extra votes
         self._vote_count[mayor] = votes
         self._mayor = mayor
+        self._votes_version += 1
         return True
 
     def marshall_action(self) -> bool:
@@ -169,6 +200,7 @@ class Tribunal:
         self._trial_type = TrialType.MULTI
         self._anonymous = True
         self._vote_count[judge] = votes
+        self._votes_version += 1
         return True
 
     def reset(self) -> None:
@@ -187,6 +219,7 @@ class Tribunal:
         self._trial_vote = dict()
         self._lynch_vote = dict()
         self._vote_count.pop(self._judge, None)
+        self._votes_version += 1
 
     @property
     def trial_quorum(self) -> int:
@@ -217,13 +250,13 @@ class Tribunal:
         if self._skip_first_day and self._game.turn_number == 1:
             # pre-game discussion i guess
             # TODO: uncomment
-            await asyncio.sleep(self._first_day_duration)
+            await self._sleep(self._first_day_duration)
             return
 
         self._state = TribunalState.TRIAL_VOTE
-        t_init = time.time()
+        t_init = self._game.clock.time()
 
-        while (time.time() - t_init < self._day_duration) or self.trial_ongoing:
+        while (self._game.clock.elapsed(t_init) < self._day_duration) or self.trial_ongoing:
             if self._state == TribunalState.TRIAL_VOTE:
                 if self.maybe_go_to_trial():
                     self.messenger.queue_message(Message.indicate(
@@ -294,6 +327,8 @@ class Tribunal:
             elif self._state == TribunalState.LYNCH_VERDICT:
                 await self._sleep(5.0)
 
+                if self._game.journal is not None:
+                    self._game.journal.lynch(self._on_trial)
                 self._on_trial.lynch()
 
                 # do not announce deaths immediately
@@ -390,11 +425,13 @@ class Tribunal:
         Go in order of player
         """
         output = ""
+        counts = self.trial_vote_counts
         for actor in self._game.get_live_actors():
             # do not include dead players
-            output += f"\t**{actor.name}**\n\t\t{self.trial_vote_counts.get(actor, 0)}\n"
-        if self.skip_vote_counts:
-            output += f"\t**Skip Votes**\n\t\t{self.skip_vote_counts}"
+            output += f"\t**{actor.name}**\n\t\t{counts.get(actor, 0)}\n"
+        skips = self.skip_vote_counts
+        if skips:
+            output += f"\t**Skip Votes**\n\t\t{skips}"
         return output
 
     def lynch_tally(self) -> str:
@@ -454,8 +491,11 @@ class Tribunal:
         if voter == voted:
             return
 
+        if self._game.journal is not None:
+            self._game.journal.trial_vote(voter, voted)
         self._trial_vote[voter] = voted
         self._skip_vote.discard(voter)
+        self._votes_version += 1
         if self._anonymous:
             name = "Somebody"
         else:
@@ -473,7 +513,10 @@ class Tribunal:
             ))
 
     def submit_skip_vote(self, voter: "Actor") -> None:
+        if self._game.journal is not None:
+            self._game.journal.skip_vote(voter)
         self._trial_vote[voter] = None
+        self._votes_version += 1
         if self._anonymous:
             name = "Somebody"
         else:
@@ -488,9 +531,12 @@ class Tribunal:
     def submit_lynch_vote(self, voter: "Actor", vote: T.Optional[bool]) -> None:
         if self._on_trial == voter:
             return
+        if self._game.journal is not None:
+            self._game.journal.lynch_vote(voter, vote)
         if self._anonymous:
             name = "Somebody"
         else:
             name = voter.name
         self.messenger.queue_message(Message.indicate(self._game, f"{name} has cast a ballot"))
         self._lynch_vote[voter] = vote
+        self._votes_version += 1
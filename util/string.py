@@ -1,3 +1,4 @@
+import functools
 import re
 
 
@@ -18,6 +19,7 @@ def snake_to_english(string: str) -> str:
     return ' '.join(word.title() for word in string.split('_'))
 
 
+@functools.lru_cache(maxsize=None)
 def camel_to_english(string: str) -> str:
     name = ""
     for prev_char, next_char in zip(string[:-1], string[1:]):